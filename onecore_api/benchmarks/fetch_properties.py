@@ -0,0 +1,136 @@
+"""Benchmark ``CoreApi.fetch_properties`` against a local stub OneCore.
+
+Starts an HTTP server on localhost that answers every request after a fixed
+delay, then times a property search with per-property calls done serially
+(the wave disabled) and in one concurrent wave::
+
+    python benchmarks/fetch_properties.py --properties 15 --latency 0.05
+
+Nothing leaves the machine; the response cache is cleared before each run.
+"""
+
+import argparse
+import contextlib
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import core_api  # noqa: E402
+import response_cache  # noqa: E402
+
+
+def _stub_handler(properties, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            path = self.path.split("?", 1)[0]
+            if path == "/properties/search":
+                content = [
+                    {"code": f"P{i}", "designation": f"Fastighet {i}"}
+                    for i in range(properties)
+                ]
+            else:
+                code = path.rsplit("/", 1)[1]
+                content = [
+                    {"code": f"{code}-B{i}", "type": "Tvättstuga"} for i in range(3)
+                ]
+            body = json.dumps({"content": content}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class _Params:
+    def __init__(self, values):
+        self.values = values
+
+    def sudo(self):
+        return self
+
+    def get_param(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set_param(self, key, value):
+        self.values[key] = value
+
+
+class _Cursor:
+    dbname = "onecore-benchmark"
+
+
+class _Env(dict):
+    cr = _Cursor()
+
+
+def _time_runs(api, runs, location_type):
+    timings = []
+    for _ in range(runs):
+        response_cache.cache.invalidate()
+        started = time.perf_counter()
+        api.fetch_properties("Fastighet", location_type)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--properties", type=int, default=15)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--location-type", default="Byggnad")
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), _stub_handler(args.properties, args.latency)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    env = _Env(
+        {
+            "ir.config_parameter": _Params(
+                {
+                    "onecore_base_url": f"http://127.0.0.1:{server.server_port}",
+                    "onecore_api_token": "benchmark-token",
+                    "onecore_http_prewarm_connections": "0",
+                }
+            )
+        }
+    )
+    try:
+        api = core_api.CoreApi(env)
+        # Without the wave, every property's buildings are fetched in turn.
+        with patch.object(
+            core_api.CoreApi, "_wave", lambda self, paths: contextlib.nullcontext()
+        ):
+            serial = _time_runs(api, args.runs, args.location_type)
+        wave = _time_runs(api, args.runs, args.location_type)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(
+        f"fetch_properties: {args.properties} properties, "
+        f"{args.latency * 1000:.0f} ms per call, {args.runs} runs"
+    )
+    for name, timings in (("serial", serial), ("wave", wave)):
+        print(f"  {name:<7} median {statistics.median(timings) * 1000:8.1f} ms")
+    print(f"  speedup {statistics.median(serial) / statistics.median(wave):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Micro-benchmark of ``json_codec`` backends on OneCore-shaped payloads.
+
+Times ``loads``/``dumps`` with the standard library and, if installed,
+``orjson`` on synthetic payloads shaped like the real ones: a room's
+components response, the wizard's subtype list and a rooms list::
+
+    python benchmarks/json_codec.py --components 200 --repeat 200
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json_codec  # noqa: E402
+
+
+def _component(i):
+    return {
+        "id": f"c0a8{i:04d}-7e1d-4b8e-9a51-5c1f0e2d{i:04d}",
+        "serialNumber": f"SN-{i:08d}",
+        "warrantyMonths": 24,
+        "priceAtPurchase": 12999.0 + i,
+        "depreciationPriceAtPurchase": 9999.5,
+        "economicLifespan": 15,
+        "condition": "Gott skick",
+        "specifications": "Energiklass A++, 60 cm bred, frostfri",
+        "additionalInformation": "Monterad av fastighetsskötare",
+        "model": {
+            "id": f"m-{i % 40}",
+            "modelName": f"Kylskåp KS{i % 40:03d}",
+            "manufacturer": "Electrolux",
+            "subtype": {
+                "id": f"st-{i % 12}",
+                "subTypeName": "Kyl/frys kombination",
+                "technicalLifespan": 20,
+                "replacementIntervalMonths": 180,
+                "componentType": {
+                    "id": f"t-{i % 5}",
+                    "typeName": "Vitvara",
+                    "category": {"id": "cat-1", "categoryName": "Kök"},
+                },
+            },
+        },
+        "componentInstallations": [
+            {
+                "id": f"inst-{i}",
+                "installationDate": "2021-05-17T00:00:00.000Z",
+                "deinstallationDate": None,
+            }
+        ],
+    }
+
+
+def _payloads(components):
+    return {
+        "components": {"content": [_component(i) for i in range(components)]},
+        "subtypes": [
+            {
+                "id": f"st-{i}",
+                "subTypeName": f"Undertyp {i}",
+                "depreciationPrice": 1500 + i,
+                "economicLifespan": 10,
+                "technicalLifespan": 15,
+                "replacementIntervalMonths": 120,
+            }
+            for i in range(50)
+        ],
+        "rooms": [{"id": f"room-{i}", "name": f"Rum {i}"} for i in range(8)],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--components", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    backends = ["json"] + (["orjson"] if json_codec.orjson is not None else [])
+    payloads = _payloads(args.components)
+    print(f"json_codec: {args.repeat} iterations, microseconds per call")
+    print(f"  {'payload':<12}{'op':<7}" + "".join(f"{b:>10}" for b in backends))
+    try:
+        for name, value in payloads.items():
+            encoded = json_codec.dumps(value)
+            for op in ("loads", "dumps"):
+                row = []
+                for backend in backends:
+                    json_codec.use(backend)
+                    fn = (
+                        (lambda: json_codec.loads(encoded))
+                        if op == "loads"
+                        else (lambda: json_codec.dumps(value))
+                    )
+                    best = min(timeit.repeat(fn, number=args.repeat, repeat=3))
+                    row.append(best / args.repeat * 1e6)
+                print(
+                    f"  {name:<12}{op:<7}" + "".join(f"{t:>10.1f}" for t in row)
+                )
+    finally:
+        json_codec.use()
+    if len(backends) == 1:
+        print("orjson is not installed; only the stdlib backend was measured.")
+
+
+if __name__ == "__main__":
+    main()
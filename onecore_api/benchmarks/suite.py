@@ -0,0 +1,266 @@
+"""Benchmark suite for the OneCore client against the local stub OneCore.
+
+Times the client's hot paths end to end over real HTTP on localhost
+(``stub_server.StubOneCore``, so nothing leaves the machine) and writes
+p50/p95/p99 latency and throughput per scenario to a JSON file::
+
+    python benchmarks/suite.py --latency 0.02 --output results.json
+    python benchmarks/suite.py --only parallel --compare results.json
+
+Scenarios:
+
+* ``get_json``: one ``CoreApi._get_json`` of a residence.
+* ``parallel_get_json[width=N]``: one wave of N room component reads.
+* ``fetch_form_data[leases=N]``: a tenant with one and with several leases,
+  with the second (maintenance unit) wave.
+* ``fetch_properties[properties=N]``: a wide search, buildings per property.
+* ``load_components[rooms=N]``: the requests of the maintenance module's
+  ``load_components_for_residence`` (rooms, then categories and every
+  room's components in one wave, decoded), for 3 to 15 rooms. The service
+  itself needs Odoo, so its flow is mirrored here.
+
+The response cache is cleared before every operation, so each one goes to
+the stub. With ``--concurrency`` above 1, operations run from that many
+threads at once (as Odoo workers' requests would); throughput is
+operations per second of wall time. ``--compare`` prints the change
+against an earlier results file.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import core_api  # noqa: E402
+import payloads  # noqa: E402
+import response_cache  # noqa: E402
+from stub_server import TOKEN, StubOneCore  # noqa: E402
+
+RESULTS_VERSION = 1
+PARALLEL_WIDTHS = (1, 5, 10, 25, 50)
+LEASE_COUNTS = (1, 4)
+PROPERTY_COUNTS = (25, 100)
+ROOM_COUNTS = (3, 8, 15)
+
+
+class _Params:
+    def __init__(self, values):
+        self.values = values
+
+    def sudo(self):
+        return self
+
+    def get_param(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set_param(self, key, value):
+        self.values[key] = value
+
+
+class _Cursor:
+    def __init__(self, dbname):
+        self.dbname = dbname
+
+
+class _Env(dict):
+    def __init__(self, values, dbname):
+        super().__init__(values)
+        self.cr = _Cursor(dbname)
+
+
+def _api(stub):
+    params = {
+        "onecore_base_url": stub.url,
+        "onecore_api_token": TOKEN,
+        "onecore_http_prewarm_connections": "0",
+    }
+    # Settings are snapshotted per database; one database per stub.
+    env = _Env({"ir.config_parameter": _Params(params)}, dbname=stub.url)
+    return core_api.CoreApi(env)
+
+
+def _load_components(api, rental_id):
+    """The HTTP and decoding work of ``load_components_for_residence``."""
+    rooms = [payloads.Room.decode(room) for room in api.fetch_rooms(rental_id)]
+    paths = ["/component-categories"] + [
+        "/components/by-room/%s" % urllib.parse.quote(str(room.id), safe="")
+        for room in rooms
+    ]
+    results = api.parallel_get_json(paths)
+    return [payloads.Component.decode_many(found or []) for found in results[1:]]
+
+
+def scenarios():
+    """``[(name, stub settings, operation(api, i))]`` in run order."""
+    found = [
+        (
+            "get_json",
+            {},
+            lambda api, i: api._get_json(f"/residences/by-rental-id/705-022-04-{i:04d}"),
+        )
+    ]
+    for width in PARALLEL_WIDTHS:
+        found.append(
+            (
+                f"parallel_get_json[width={width}]",
+                {},
+                lambda api, i, width=width: api.parallel_get_json(
+                    [f"/components/by-room/{i}-R{room}" for room in range(width)]
+                ),
+            )
+        )
+    for leases in LEASE_COUNTS:
+        found.append(
+            (
+                f"fetch_form_data[leases={leases}]",
+                {"leases": leases},
+                lambda api, i: api.fetch_form_data("pnr", f"19800101-{i:04d}", "Tvättstuga"),
+            )
+        )
+    for count in PROPERTY_COUNTS:
+        found.append(
+            (
+                f"fetch_properties[properties={count}]",
+                {"properties": count},
+                lambda api, i: api.fetch_properties(f"Fastighet {i}", "Byggnad"),
+            )
+        )
+    for rooms in ROOM_COUNTS:
+        found.append(
+            (
+                f"load_components[rooms={rooms}]",
+                {"rooms": rooms, "components_per_room": 8},
+                lambda api, i: _load_components(api, f"705-022-04-{i:04d}"),
+            )
+        )
+    return found
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _timed(operation, api, i):
+    response_cache.cache.invalidate()
+    started = time.perf_counter()
+    try:
+        operation(api, i)
+    except Exception:
+        return time.perf_counter() - started, False
+    return time.perf_counter() - started, True
+
+
+def run_scenario(name, stub_settings, operation, args):
+    with StubOneCore(latency=args.latency, seed=args.seed, **stub_settings) as stub:
+        api = _api(stub)
+        for i in range(args.warmup):
+            _timed(operation, api, -1 - i)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            outcomes = list(
+                pool.map(lambda i: _timed(operation, api, i), range(args.iterations))
+            )
+        wall = time.perf_counter() - started
+        requests_sent = len(stub.requests)
+
+    timings = sorted(seconds for seconds, _ok in outcomes)
+    return {
+        "name": name,
+        "iterations": len(outcomes),
+        "errors": sum(1 for _seconds, ok in outcomes if not ok),
+        "requests": requests_sent,
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "throughput_per_s": round(len(outcomes) / wall, 2),
+    }
+
+
+def compare(results, baseline):
+    """Lines with the p50/p95/throughput change against ``baseline``."""
+    before = {result["name"]: result for result in baseline["results"]}
+    lines = []
+    for result in results:
+        old = before.get(result["name"])
+        if old is None:
+            lines.append(f"  {result['name']:<36} (new)")
+            continue
+        changes = "  ".join(
+            f"{key} {_change(old[key], result[key]):>7}"
+            for key in ("p50_ms", "p95_ms", "throughput_per_s")
+        )
+        lines.append(f"  {result['name']:<36} {changes}")
+    return lines
+
+
+def _change(old, new):
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per stub response")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--only", help="run the scenarios whose name contains this text"
+    )
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name, stub_settings, operation in scenarios():
+        if args.only and args.only not in name:
+            continue
+        result = run_scenario(name, stub_settings, operation, args)
+        results.append(result)
+        print(
+            f"{name:<36} p50 {result['p50_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms"
+            f"  p99 {result['p99_ms']:8.1f} ms  {result['throughput_per_s']:8.1f}/s"
+            + (f"  {result['errors']} errors" if result["errors"] else "")
+        )
+
+    report = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "settings": {
+            "latency": args.latency,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=1, sort_keys=True)
+        output.write("\n")
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as earlier:
+            baseline = json.load(earlier)
+        print(f"Change against {args.compare}:")
+        for line in compare(results, baseline):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
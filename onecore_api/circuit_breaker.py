@@ -0,0 +1,269 @@
+"""Per-endpoint-group circuit breakers for outbound OneCore calls.
+
+When OneCore is down or crawling, every form read, onchange search and
+wizard open would otherwise wait out its full timeout, tying up Odoo
+workers until the whole maintenance UI stalls. A breaker watches the recent
+outcomes of one endpoint group (the first path segment: ``residences``,
+``leases``, ``components``, ``auth``...) and:
+
+* **closed** — calls go through; outcomes are recorded in a rolling window
+  (the last ``window_size`` calls within ``window_seconds``).
+* **open** — tripped when, over at least ``min_calls`` samples, the failure
+  rate reaches ``failure_rate_threshold`` or the share of calls slower than
+  ``slow_call_seconds`` reaches ``slow_call_rate_threshold``. Calls fail
+  immediately with ``CircuitOpenError`` for ``open_seconds``.
+* **half-open** — after that, ``half_open_max_calls`` probe calls are let
+  through; a successful probe closes the breaker, a failed one re-opens it.
+
+Failures are transport errors (connection refused/reset, timeouts) and 5xx
+responses; 4xx means OneCore is up and answering. Breakers are per worker
+process; state changes are logged and ``stats()`` exposes state and trip
+counts for operators.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+
+_logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_SETTINGS = {
+    "window_size": 20,
+    "window_seconds": 60,
+    "min_calls": 10,
+    "failure_rate_threshold": 0.5,
+    "slow_call_seconds": 5.0,
+    "slow_call_rate_threshold": 0.8,
+    "open_seconds": 30,
+    "half_open_max_calls": 1,
+}
+
+_lock = threading.Lock()
+_settings = dict(DEFAULT_SETTINGS)
+_breakers = {}  # (pid, group) -> CircuitBreaker
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling OneCore while a group's breaker is open.
+
+    A ``ConnectionError`` subclass, so code that already treats OneCore being
+    unreachable as a soft failure degrades the same way, only instantly.
+    """
+
+    def __init__(self, group, retry_in):
+        self.group = group
+        self.retry_in = retry_in
+        super().__init__(
+            f"OneCore circuit for '{group}' is open; retrying in {retry_in:.0f}s"
+        )
+
+
+class CircuitBreaker:
+    """Breaker for one endpoint group; thread-safe.
+
+    Args:
+        group: Endpoint group name (for logs and stats).
+        settings: Dict with the keys of ``DEFAULT_SETTINGS``.
+    """
+
+    def __init__(self, group, settings=None):
+        self.group = group
+        self.settings = dict(settings or DEFAULT_SETTINGS)
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=self.settings["window_size"])
+        self.state = CLOSED
+        self.opened_at = None
+        self._probes = 0
+        self.trips = 0
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+
+    def check(self):
+        """Raise ``CircuitOpenError`` if calls are currently being rejected.
+
+        Unlike ``before_call`` this admits nothing; use it to skip work that
+        only makes sense if the call will be attempted.
+        """
+        with self._lock:
+            self._reject_while_open()
+
+    def before_call(self):
+        """Admit a call, or raise ``CircuitOpenError``.
+
+        Every admitted call must be followed by ``record``.
+        """
+        with self._lock:
+            self._reject_while_open()
+            if self.state == OPEN:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes >= self.settings["half_open_max_calls"]:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.group, 0)
+                self._probes += 1
+
+    def _reject_while_open(self):
+        if self.state != OPEN:
+            return
+        retry_in = self.opened_at + self.settings["open_seconds"] - _now()
+        if retry_in > 0:
+            self.rejected += 1
+            raise CircuitOpenError(self.group, retry_in)
+
+    def record(self, failed, duration):
+        """Record the outcome of an admitted call.
+
+        Args:
+            failed: True for a transport error or 5xx response.
+            duration: Seconds the call took.
+        """
+        slow = duration >= self.settings["slow_call_seconds"]
+        now = _now()
+        with self._lock:
+            self.calls += 1
+            self.failures += bool(failed)
+            self.slow_calls += slow
+            if self.state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+                if failed or slow:
+                    self._trip(now)
+                else:
+                    self._transition(CLOSED)
+                    self._outcomes.clear()
+                return
+            if self.state == OPEN:
+                # A call admitted before the trip finished late; ignore it.
+                return
+            self._outcomes.append((now, bool(failed), slow))
+            self._evaluate(now)
+
+    def _evaluate(self, now):
+        horizon = now - self.settings["window_seconds"]
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            self._outcomes.popleft()
+        samples = len(self._outcomes)
+        if samples < self.settings["min_calls"]:
+            return
+        failure_rate = sum(1 for o in self._outcomes if o[1]) / samples
+        slow_rate = sum(1 for o in self._outcomes if o[2]) / samples
+        if (
+            failure_rate >= self.settings["failure_rate_threshold"]
+            or slow_rate >= self.settings["slow_call_rate_threshold"]
+        ):
+            self._trip(now)
+
+    def _trip(self, now):
+        self.trips += 1
+        self.opened_at = now
+        self._probes = 0
+        self._outcomes.clear()
+        self._transition(OPEN)
+
+    def _transition(self, state):
+        if state == self.state:
+            return
+        log = _logger.warning if state == OPEN else _logger.info
+        log(
+            "OneCore circuit '%s': %s -> %s (trips: %s)",
+            self.group,
+            self.state,
+            state,
+            self.trips,
+        )
+        self.state = state
+        if state != OPEN:
+            self._probes = 0
+
+    def stats(self):
+        """State and counters for this breaker."""
+        with self._lock:
+            samples = len(self._outcomes)
+            failed = sum(1 for o in self._outcomes if o[1])
+            return {
+                "state": self.state,
+                "trips": self.trips,
+                "calls": self.calls,
+                "failures": self.failures,
+                "slow_calls": self.slow_calls,
+                "rejected": self.rejected,
+                "window_failure_rate": failed / samples if samples else 0.0,
+                "open_for": (
+                    max(self.opened_at + self.settings["open_seconds"] - _now(), 0)
+                    if self.state == OPEN
+                    else 0
+                ),
+            }
+
+
+def _now():
+    return time.monotonic()
+
+
+def group_for(path):
+    """Endpoint group of a OneCore path: its first segment, without query."""
+    segment = path.split("?", 1)[0].strip("/").split("/", 1)[0]
+    return segment or "root"
+
+
+def breaker_for(path):
+    """Return this worker's breaker for ``path``'s endpoint group."""
+    key = (os.getpid(), group_for(path))
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _lock:
+            breaker = _breakers.get(key)
+            if breaker is None:
+                breaker = _breakers[key] = CircuitBreaker(key[1], _settings)
+    return breaker
+
+
+def is_failure(response=None, error=None):
+    """Whether a call outcome counts against the breaker."""
+    if error is not None:
+        return isinstance(error, requests.RequestException) and not isinstance(
+            error, CircuitOpenError
+        )
+    status = getattr(response, "status_code", None)
+    return isinstance(status, int) and status >= 500
+
+
+def configure(**settings):
+    """Override ``DEFAULT_SETTINGS`` keys; existing breakers are rebuilt.
+
+    Unknown keys and None values are ignored.
+    """
+    updates = {
+        key: value
+        for key, value in settings.items()
+        if key in DEFAULT_SETTINGS and value is not None
+    }
+    with _lock:
+        if any(_settings[key] != value for key, value in updates.items()):
+            _settings.update(updates)
+            _breakers.clear()
+
+
+def stats():
+    """``{group: breaker stats}`` for this worker."""
+    pid = os.getpid()
+    with _lock:
+        breakers = [b for (owner, _g), b in _breakers.items() if owner == pid]
+    return {breaker.group: breaker.stats() for breaker in breakers}
+
+
+def reset():
+    """Forget all breakers and restore the default settings (tests)."""
+    with _lock:
+        _breakers.clear()
+        _settings.clear()
+        _settings.update(DEFAULT_SETTINGS)
@@ -1,65 +1,311 @@
 import requests
+import contextlib
 import logging
+import os
+import time
 import urllib.parse
 import json
-
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future
+
+try:
+    from . import (
+        circuit_breaker,
+        credentials,
+        deadlines,
+        fanout,
+        hedging,
+        http_session,
+        json_codec,
+        json_stream,
+        metrics,
+        response_cache,
+        retries,
+        shared_cache,
+        single_flight,
+        tracing,
+        uploads,
+    )
+except ImportError:  # imported as a top-level module (standalone pytest suite)
+    import circuit_breaker
+    import credentials
+    import deadlines
+    import fanout
+    import hedging
+    import http_session
+    import json_codec
+    import json_stream
+    import metrics
+    import response_cache
+    import retries
+    import shared_cache
+    import single_flight
+    import tracing
+    import uploads
 
 _logger = logging.getLogger(__name__)
 
 DEFAULT_TIMEOUT = 15  # seconds; callers can override per request
-# Cap on concurrent outbound HTTP calls to OneCore when fanning out (e.g.
-# fetching components for every room of an apartment).
-_PARALLEL_GET_MAX_WORKERS = 8
 # (connect, read) timeout for each parallel call — without it a single hung
 # OneCore call would block its worker thread and stall the whole wave.
 _PARALLEL_GET_TIMEOUT = (5, 30)
+# Outcome of a parallel GET that got a 404 (negatively cached, returned as None).
+_NOT_FOUND = object()
+# A name search can match many properties; callers only read these fields.
+_PROPERTY_SEARCH = json_stream.StreamedList(
+    project=json_stream.pick({"code": True, "designation": True}),
+    name="property_search",
+)
+
+# PID of the process whose onecore_api modules have been configured from
+# ir.config_parameter; each forked worker configures (and pre-warms) once.
+_worker_configured_pid = None
+
+# Raised instead of calling OneCore while an endpoint group's circuit is open.
+CircuitOpenError = circuit_breaker.CircuitOpenError
+# Raised instead of calling OneCore once a user action's time budget is spent.
+DeadlineExceeded = deadlines.DeadlineExceeded
 
 
 class CoreApi:
     def __init__(self, env):
         self.env = env
+        # Worker-level token + settings snapshot shared by every CoreApi
+        # built for this database and OneCore environment (see
+        # credentials.py).
+        self._credentials = credentials.store_for(
+            self._credentials_key(),
+            lambda: self._get_env_value("onecore_base_url"),
+        )
+        # Optional cross-worker second cache level (onecore_cache_backend).
+        self._shared_cache = shared_cache.backend_for(
+            self._credentials_key(), self._get_setting("onecore_cache_backend")
+        )
+        self._configure_worker()
+        # GETs started by ``_wave``, taken by the ``_get_json`` of each path.
+        self._started_gets = {}
         if self._get_persisted_token() is None:
-            self._get_auth_token()
+            # Through the single-flight refresh: a cold worker's threads
+            # fetch one token between them.
+            self._refresh_token(None)
+
+    def _credentials_key(self):
+        return getattr(self.env.cr, "dbname", None)
+
+    def _configure_worker(self):
+        """Configure this worker's onecore_api modules from
+        ``ir.config_parameter``: the HTTP session, circuit breakers, retries,
+        fan-out, hedging, uploads, time budgets, metrics and tracing.
+
+        This runs once per worker process, and these parameters are read
+        only then. A change to any of them takes effect when the workers
+        restart.
+        """
+        global _worker_configured_pid
+        pid = os.getpid()
+        if _worker_configured_pid == pid:
+            return
+        _worker_configured_pid = pid
+
+        def _number_param(key, cast=int):
+            value = self._get_env_value(key)
+            try:
+                return cast(value) if value not in (None, "") else None
+            except (TypeError, ValueError):
+                _logger.warning("Ignoring invalid %s=%r", key, value)
+                return None
+
+        def _flag_param(key):
+            value = self._get_env_value(key)
+            if value in (None, ""):
+                return None
+            return str(value).lower() not in ("0", "false", "no")
+
+        http_session.configure(
+            pool_size=_number_param("onecore_http_pool_size"),
+            keepalive=_flag_param("onecore_http_keepalive"),
+            prewarm_connections=_number_param("onecore_http_prewarm_connections"),
+        )
+        circuit_breaker.configure(
+            failure_rate_threshold=_number_param(
+                "onecore_breaker_failure_rate", float
+            ),
+            slow_call_seconds=_number_param("onecore_breaker_slow_call_seconds", float),
+            open_seconds=_number_param("onecore_breaker_open_seconds", float),
+        )
+        retries.configure(
+            max_attempts=_number_param("onecore_retry_max_attempts"),
+            budget_ratio=_number_param("onecore_retry_budget_ratio", float),
+        )
+        max_in_flight = _number_param("onecore_fanout_max_in_flight")
+        fanout.configure(max_in_flight=max_in_flight)
+        hedging.configure(
+            # Both copies of each fan-out call in flight get a thread.
+            max_workers=2 * max_in_flight if max_in_flight else None,
+            enabled=_flag_param("onecore_hedge_enabled"),
+            percentile=_number_param("onecore_hedge_percentile", float),
+            budget_ratio=_number_param("onecore_hedge_budget_ratio", float),
+        )
+        uploads.configure(mode=self._get_env_value("onecore_upload_mode") or None)
+        deadlines.configure(
+            search=_number_param("onecore_budget_search_seconds", float),
+            components=_number_param("onecore_budget_components_seconds", float),
+            form=_number_param("onecore_budget_form_seconds", float),
+        )
+        metrics.configure(
+            enabled=_flag_param("onecore_metrics_enabled"),
+            publish_seconds=_number_param("onecore_metrics_publish_seconds", float),
+        )
+        tracing.configure(
+            path=self._get_env_value("onecore_trace_file") or None,
+            slow_seconds=_number_param("onecore_trace_slow_seconds", float),
+        )
+        http_session.prewarm(self._get_setting("onecore_base_url"))
+
+    @property
+    def session(self):
+        """The worker's pooled, keep-alive ``requests.Session``."""
+        return http_session.get_session()
+
+    @staticmethod
+    def pool_stats():
+        """Connection reuse counters for this worker (see ``http_session``)."""
+        return http_session.pool_stats()
+
+    @staticmethod
+    def breaker_stats():
+        """Circuit breaker state and trip counts per endpoint group."""
+        return circuit_breaker.stats()
+
+    @staticmethod
+    def retry_stats():
+        """Retry counters per endpoint group (see ``retries``)."""
+        return retries.stats()
+
+    @staticmethod
+    def hedge_stats():
+        """Hedged request counters and thresholds per endpoint group (see
+        ``hedging``)."""
+        return hedging.stats()
+
+    @staticmethod
+    def upload_stats():
+        """Upload mode and counters for this worker (see ``uploads``)."""
+        return uploads.stats()
+
+    @staticmethod
+    def deadline_stats():
+        """Time budgets started and calls refused (see ``deadlines``)."""
+        return deadlines.stats()
+
+    @staticmethod
+    def fanout_stats():
+        """Adaptive fan-out limit, utilisation and queue wait (see ``fanout``)."""
+        return fanout.stats()
+
+    @staticmethod
+    def metrics_stats():
+        """Calls, errors, timeouts, retries, bytes and cache hits per
+        endpoint template (see ``metrics``)."""
+        return metrics.stats()
+
+    @staticmethod
+    def single_flight_stats():
+        """Coalesced (deduplicated) GET counters for this worker."""
+        return single_flight.group.stats()
 
     def _get_env_value(self, key):
         return self.env["ir.config_parameter"].sudo().get_param(key, default=None)
 
+    def _get_setting(self, key):
+        """Connection setting from the worker's snapshot (no per-call DB read)."""
+        return self._credentials.get_config(key, self._get_env_value)
+
     def _get_persisted_token(self):
-        return self._get_env_value("onecore_api_token")
+        # The ir.config_parameter token is only a seed for a cold worker;
+        # refreshed tokens live in the credential store.
+        return self._credentials.get_token(
+            seed=lambda: self._get_env_value("onecore_api_token")
+        )
 
     def _persist_token(self, token):
-        self.env["ir.config_parameter"].sudo().set_param("onecore_api_token", token)
+        self._credentials.set_token(token)
+
+    def _refresh_token(self, stale_token):
+        """Refresh the token once, however many threads found it stale."""
+        return self._credentials.refresh(stale_token, self._get_auth_token)
 
     def _get_auth_token(self):
         body = {
-            "username": self._get_env_value("onecore_username"),
-            "password": self._get_env_value("onecore_password"),
+            "username": self._get_setting("onecore_username"),
+            "password": self._get_setting("onecore_password"),
         }
-        base_url = self._get_env_value("onecore_base_url")
-        response = requests.post(
-            f"{base_url}/auth/generateToken", json=body, timeout=DEFAULT_TIMEOUT
+        base_url = self._get_setting("onecore_base_url")
+        session = self.session
+        response = _guarded(
+            "/auth/generateToken",
+            lambda timeout: session.post(
+                f"{base_url}/auth/generateToken", json=body, timeout=timeout
+            ),
+            method="POST",
         )
 
         if response.status_code == 200:
-            new_token = response.json().get("token")
+            new_token = _response_json(response).get("token")
             self._persist_token(new_token)
             return new_token
         else:
             response.raise_for_status()
 
     def request(self, method, url, **kwargs):
-        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        """Send a request to OneCore with auth and the endpoint's breaker.
+
+        Inside a ``deadlines.budget`` the timeout of every attempt is capped
+        to the time left.
+
+        Raises:
+            CircuitOpenError: Immediately, while ``url``'s endpoint group is
+                failing (see ``circuit_breaker``).
+            DeadlineExceeded: Immediately, once the budget is spent.
+        """
+        timeout = kwargs.pop("timeout", DEFAULT_TIMEOUT)
+        deadline = deadlines.current()
+        # Fail fast before spending a token refresh on a dead endpoint or
+        # on an action that is already out of time.
+        try:
+            deadlines.timeout(timeout, deadline)
+            circuit_breaker.breaker_for(url).check()
+        except (DeadlineExceeded, CircuitOpenError) as err:
+            metrics.observe(method, url, 0.0, error=err)
+            raise
         token = self._get_persisted_token()
-        base_url = self._get_env_value("onecore_base_url")
+        if self._credentials.is_expired():
+            token = self._refresh_token(token)
+        base_url = self._get_setting("onecore_base_url")
         full_url = f"{base_url}{url}"
         headers = {"Authorization": f"Bearer {token}"}
+        headers.update(kwargs.pop("headers", None) or {})
+        session = self.session
+
+        def _send(attempt_timeout):
+            return session.request(
+                method, full_url, headers=headers, timeout=attempt_timeout, **kwargs
+            )
 
-        response = requests.request(method, full_url, headers=headers, **kwargs)
+        response = _guarded(
+            url, _send, method=method, timeout=timeout, deadline=deadline, headers=headers
+        )
         if response.status_code == 401:
-            new_token = self._get_auth_token()
+            response.close()
+            new_token = self._refresh_token(token)
             headers["Authorization"] = f"Bearer {new_token}"
-            response = requests.request(method, full_url, headers=headers, **kwargs)
+            response = _guarded(
+                url,
+                _send,
+                method=method,
+                timeout=timeout,
+                deadline=deadline,
+                headers=headers,
+            )
 
             if response.status_code == 401:
                 _logger.error(
@@ -69,21 +315,146 @@ class CoreApi:
 
         return response
 
-    def _get_json(self, url, **kwargs):
-        response = self.request("GET", url, **kwargs)
+    def _get_json(self, url, stream=None, **kwargs):
+        """GET ``url`` and return its ``content``, via the response cache.
+
+        Endpoints with a ``response_cache`` policy are served from the
+        worker's cache while fresh; 404s and empty results are cached for the
+        policy's (shorter) negative TTL. Within a policy's ``stale_ttl`` an
+        expired entry is still returned at once and refreshed in the
+        background (stale-while-revalidate). Otherwise, if the stored
+        response has an ETag/Last-Modified, the GET is conditional and a 304
+        reuses the stored content.
+
+        Concurrent identical GETs in this worker share one HTTP call (see
+        ``single_flight``); a caller waits for another's call no longer than
+        its own timeout.
+
+        With ``stream`` (a ``json_stream.StreamedList``) a list ``content``
+        is decoded item by item, filtered and projected; that content is
+        cached apart from the whole response.
+        """
+        if not kwargs and stream is None and url in self._started_gets:
+            return self._started_result(self._started_gets.pop(url), url)
+        policy = response_cache.cache.policy_for(url)
+        key = self._cache_key(url, kwargs.get("params"), stream)
+        wait = _follower_wait(kwargs.get("timeout", DEFAULT_TIMEOUT))
+        if policy is None:
+            return single_flight.group.do(
+                ("GET", key),
+                lambda: self._fetch_json(url, stream, **kwargs),
+                wait=wait,
+            )
+
+        content = response_cache.cache.get(
+            policy,
+            key,
+            shared=self._shared_cache,
+            revalidate=lambda key: self._revalidate_job(key, stream),
+        )
+        metrics.cache_lookup(url, content is not response_cache.MISS)
+        if content is not response_cache.MISS:
+            return content
+        return single_flight.group.do(
+            ("GET", key),
+            lambda: self._fetch_and_cache(url, policy, key, stream, **kwargs),
+            wait=wait,
+        )
+
+    def _fetch_json(self, url, stream=None, **kwargs):
+        response = self.request("GET", url, **_stream_kwargs(stream), **kwargs)
         response.raise_for_status()
-        return response.json().get("content")
+        return _decode(response, stream)[0]
+
+    def _fetch_and_cache(self, url, policy, key, stream=None, **kwargs):
+        """Fetch a cache miss (conditionally, if validators are stored)."""
+        kwargs.update(_stream_kwargs(stream))
+        validators = response_cache.cache.validators(policy, key)
+        if validators:
+            response = self.request("GET", url, headers=validators, **kwargs)
+            if response.status_code == 304:
+                content = response_cache.cache.revalidated(policy, key)
+                if content is not response_cache.MISS:
+                    return content
+                # Evicted while we asked; fetch the body after all.
+                response = self.request("GET", url, **kwargs)
+        else:
+            response = self.request("GET", url, **kwargs)
+        if response.status_code == 404:
+            response_cache.cache.put_status(
+                policy, key, 404, shared=self._shared_cache
+            )
+        response.raise_for_status()
+        content, size = _decode(response, stream)
+        response_cache.cache.put(
+            policy,
+            key,
+            content,
+            size=size,
+            shared=self._shared_cache,
+            validators=response_cache.validators_from(response),
+        )
+        return content
+
+    def _revalidate_job(self, key, stream=None):
+        """Build a background refresh for cache ``key`` (decoded through
+        ``stream``, as the cached content was).
 
-    def parallel_get_json(self, urls):
+        Called on the requesting thread, so the token and session are
+        captured here; the returned job only does HTTP and never touches
+        ``self.env``.
+        """
+        base_url, path, params = key[:3]
+        headers = {"Authorization": f"Bearer {self._get_persisted_token()}"}
+        policy = response_cache.cache.policy_for(path)
+        headers.update(response_cache.cache.validators(policy, key) or {})
+        session = self.session
+
+        def _job():
+            return _http_get(
+                session, base_url, path, headers, dict(params), stream=stream
+            )
+
+        return _job
+
+    def _cache_key(self, url, params=None, stream=None):
+        return response_cache.make_key(
+            self._get_setting("onecore_base_url"),
+            url,
+            params,
+            variant=stream.name if stream is not None else None,
+        )
+
+    def invalidate_cache(self, path_prefix=None):
+        """Drop cached OneCore responses under ``path_prefix`` (all if None).
+
+        Clears this worker's cache and the shared level, if configured. Other
+        workers' in-process copies expire with their TTL. Call after writes
+        that change cached data, e.g.
+        ``invalidate_cache("/residences/by-rental-id/705-022-04-0201")``.
+        """
+        response_cache.cache.invalidate(path_prefix, shared=self._shared_cache)
+
+    @staticmethod
+    def cache_stats():
+        """Per-policy response cache counters for this worker."""
+        return response_cache.cache.stats()
+
+    @tracing.traced("onecore.parallel_get_json")
+    def parallel_get_json(self, urls, streams=None):
         """Fetch several GET endpoints concurrently and return their ``content``.
 
         Pure outbound HTTP: the auth token and base URL are read ONCE here on
         the calling (main) thread, then each request runs in a worker thread
-        that only touches the captured strings + ``requests`` — never
-        ``self.env``/the ORM (not thread-safe).
+        that only touches the captured strings + the pooled session — never
+        ``self.env``/the ORM (not thread-safe). The threads belong to the
+        worker-wide ``fanout`` executor, whose adaptive limit caps how many
+        calls all concurrent fan-outs have in flight together.
 
         Args:
             urls: list of path strings (same form as ``_get_json``).
+            streams: Optional ``{path: json_stream.StreamedList}``; those
+                paths are decoded item by item (see ``_get_json``).
 
         Returns:
             list aligned with ``urls``; each item is the parsed ``content`` on
@@ -92,51 +463,319 @@ class CoreApi:
         """
         if not urls:
             return []
+        tracing.annotate(paths=len(urls))
+        streams = streams or {}
 
         token = self._get_persisted_token()
-        base_url = self._get_env_value("onecore_base_url")
+        base_url = self._get_setting("onecore_base_url")
 
         # Without a token/base_url we can't do the pure-HTTP threaded path;
         # fall back to the serial (ORM-aware, token-refreshing) client.
         if not token or not base_url:
-            return self._serial_get_json_safe(urls)
+            return self._serial_get_json_safe(urls, streams)
+
+        def _cache_key(path):
+            stream = streams.get(path)
+            return response_cache.make_key(
+                base_url, path, variant=stream.name if stream is not None else None
+            )
+
+        # Serve cached paths on this thread (one bulk lookup per policy);
+        # only misses go to the pool.
+        results = [None] * len(urls)
+        pending = []  # (index, path, policy, cache key, conditional headers)
+        by_policy = {}
+        for index, path in enumerate(urls):
+            policy = response_cache.cache.policy_for(path)
+            if policy is None:
+                pending.append((index, path, None, None, None))
+            else:
+                by_policy.setdefault(policy, []).append((index, path))
+        for policy, items in by_policy.items():
+            keys = [_cache_key(path) for _i, path in items]
+            cached = response_cache.cache.get_many(
+                policy,
+                keys,
+                shared=self._shared_cache,
+                revalidate=lambda key: self._revalidate_job(key, streams.get(key[1])),
+            )
+            for (index, path), key, content in zip(items, keys, cached):
+                metrics.cache_lookup(path, content is not response_cache.MISS)
+                if content is response_cache.MISS:
+                    validators = response_cache.cache.validators(policy, key)
+                    pending.append((index, path, policy, key, validators))
+                else:
+                    # A cached 404 comes back as None, same as a failed fetch.
+                    results[index] = content
+        if not pending:
+            return results
 
         headers = {"Authorization": f"Bearer {token}"}
+        # Resolved on the calling thread; the session itself is thread-safe
+        # and shares its connection pool with the worker threads. The pool
+        # threads don't see the caller's time budget or trace, so pass them
+        # along.
+        session = self.session
+        deadline = deadlines.current()
+        parent = tracing.current()
+
+        def _get(path, validators):
+            return _http_get(
+                session,
+                base_url,
+                path,
+                dict(headers, **validators) if validators else headers,
+                deadline=deadline,
+                parent=parent,
+                stream=streams.get(path),
+            )
 
-        def _fetch(path):
+        def _fetch(item):
             # Runs in a worker thread — no self.env access here.
+            _index, path, _policy, _key, validators = item
             try:
-                response = requests.get(
-                    f"{base_url}{path}",
-                    headers=headers,
-                    timeout=_PARALLEL_GET_TIMEOUT,
+                # Duplicate paths, here or in other threads, share one GET.
+                return single_flight.group.do(
+                    ("parallel", _cache_key(path)),
+                    lambda: _get(path, validators),
+                    copy=_copy_outcome,
+                    wait=_follower_wait(_PARALLEL_GET_TIMEOUT, deadline),
                 )
-                response.raise_for_status()
-                return response.json().get("content")
+            except CircuitOpenError as err:
+                _logger.debug("parallel_get_json skipped %s: %s", path, err)
+                return None
+            except DeadlineExceeded:
+                _logger.info("parallel_get_json skipped %s: time budget spent", path)
+                return None
+            except requests.HTTPError as err:
+                if getattr(err.response, "status_code", None) == 404:
+                    return _NOT_FOUND
+                _logger.warning("parallel_get_json failed for %s: %s", path, err)
+                return None
             except Exception as err:
                 _logger.warning("parallel_get_json failed for %s: %s", path, err)
                 return None
 
         try:
-            max_workers = min(_PARALLEL_GET_MAX_WORKERS, len(urls))
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # executor.map preserves input order.
-                return list(executor.map(_fetch, urls))
+            # Results come back in input order.
+            fetched = fanout.run_all(_fetch, pending)
         except Exception as err:
             _logger.warning("parallel_get_json pool failed, falling back to serial: %s", err)
-            return self._serial_get_json_safe(urls)
+            return self._serial_get_json_safe(urls, streams)
+
+        to_cache = {}
+        for (index, path, policy, key, _validators), outcome in zip(pending, fetched):
+            if outcome is None:
+                continue
+            if outcome is _NOT_FOUND:
+                # Remembered like a serial 404, so a follow-up fetch of the
+                # same path doesn't ask again.
+                if policy is not None:
+                    response_cache.cache.put_status(
+                        policy, key, 404, shared=self._shared_cache
+                    )
+                continue
+            if outcome is response_cache.NOT_MODIFIED:
+                content = response_cache.cache.revalidated(policy, key)
+                if content is response_cache.MISS:
+                    # Evicted while we asked; fetch the body after all.
+                    content = self._serial_get_json_safe([path], streams)[0]
+                results[index] = content
+                continue
+            content, size, validators = outcome
+            results[index] = content
+            if policy is not None:
+                to_cache.setdefault(policy, []).append(
+                    (key, content, size, validators)
+                )
+        for policy, items in to_cache.items():
+            response_cache.cache.put_many(policy, items, shared=self._shared_cache)
+        return results
 
-    def _serial_get_json_safe(self, urls):
+    @contextlib.contextmanager
+    def _wave(self, paths):
+        """Start a GET of every path in ``paths`` at once, for the block.
+
+        The requests run on the fan-out executor (see ``_start_get``); inside
+        the block, the ``_get_json`` of one of the paths (as made by the
+        per-item ``fetch_*`` calls) takes its result instead of sending its
+        own request. A loop over N items thus costs about one round trip
+        instead of N, whatever the cache policy of the paths, while keeping
+        its serial semantics: results are used in the loop's order and
+        errors are raised by the call that wanted the path. GETs nobody
+        took are cancelled (or ignored) when the block ends.
+        """
+        paths = [
+            path for path in dict.fromkeys(paths) if path not in self._started_gets
+        ]
+        started = {}
+        if len(paths) > 1:
+            for path in paths:
+                future = self._start_get(path)
+                if future is not None:
+                    started[path] = future
+        self._started_gets.update(started)
+        try:
+            yield
+        finally:
+            for path, future in started.items():
+                if self._started_gets.get(path) is future:
+                    del self._started_gets[path]
+                    future.cancel()
+
+    def _started_result(self, future, path):
+        """``_get_json(path)`` for a GET started by ``_start_get``.
+
+        Errors are raised as ``_get_json`` raises them (a 404 is also
+        remembered by the path's cache policy). Only a 401, the token having
+        expired meanwhile, is retried with ``_get_json``, which refreshes it.
+        """
+        policy = response_cache.cache.policy_for(path)
+        try:
+            content, size, validators = future.result()
+        except requests.HTTPError as err:
+            status = getattr(err.response, "status_code", None)
+            if status != 401:
+                if status == 404 and policy is not None:
+                    response_cache.cache.put_status(
+                        policy, self._cache_key(path), 404, shared=self._shared_cache
+                    )
+                raise
+            return self._get_json(path)
+        if size is not None and policy is not None:
+            response_cache.cache.put(
+                policy,
+                self._cache_key(path),
+                content,
+                size=size,
+                shared=self._shared_cache,
+                validators=validators,
+            )
+        return content
+
+    def _serial_get_json_safe(self, urls, streams=None):
         """Serial fallback for parallel_get_json: same shape (None on error)."""
         results = []
         for url in urls:
             try:
-                results.append(self._get_json(url))
+                results.append(self._get_json(url, stream=(streams or {}).get(url)))
             except Exception as err:
                 _logger.warning("parallel_get_json (serial) failed for %s: %s", url, err)
                 results.append(None)
         return results
 
+    def _iter_pages(self, path, params=None, page_size=100, max_items=None):
+        """Yield the items of a ``page``/``limit`` paginated list endpoint.
+
+        Pages are fetched lazily; a page with other than ``page_size`` items
+        is the last one. While the caller consumes a page, the next one is
+        already being fetched on the fan-out executor, unless ``max_items``
+        will be reached first. Once the caller stops (``break``, or
+        ``max_items`` items yielded) nothing more is requested.
+
+        Args:
+            path: Endpoint path, e.g. ``"/component-types"``.
+            params: Query params other than ``page``/``limit``.
+            page_size: ``limit`` sent per page.
+            max_items: Stop after this many items (None: all of them).
+
+        Raises:
+            requests.HTTPError: If a page can't be fetched; pages yielded
+                before it stand.
+        """
+        if max_items is not None:
+            if max_items <= 0:
+                return
+            page_size = min(page_size, max_items)
+        params = dict(params or {}, limit=page_size)
+        remaining = max_items
+        page = 1
+        content = self._get_json(path, params=dict(params, page=page))
+        pending = None
+        try:
+            while True:
+                items = content or []
+                more = len(items) == page_size and (
+                    remaining is None or remaining > len(items)
+                )
+                if more:
+                    pending = self._start_get(path, dict(params, page=page + 1))
+                for item in items:
+                    yield item
+                    if remaining is not None:
+                        remaining -= 1
+                        if remaining <= 0:
+                            return
+                if not more:
+                    return
+                page += 1
+                content = self._page_result(pending, path, dict(params, page=page))
+                pending = None
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    def _start_get(self, path, params=None):
+        """Start a GET of ``path`` on the fan-out executor; None if it can't
+        be (no token, or an expired one: ``_get_json`` refreshes it).
+
+        The future's result is ``(content, size, validators)``; ``size`` is
+        None for a response served from the cache (nothing to store).
+        """
+        policy = response_cache.cache.policy_for(path)
+        key = self._cache_key(path, params)
+        if policy is not None:
+            try:
+                content = response_cache.cache.get(
+                    policy, key, shared=self._shared_cache
+                )
+            except requests.HTTPError:
+                return None
+            if content is not response_cache.MISS:
+                future = Future()
+                future.set_result((content, None, None))
+                return future
+        token = self._get_persisted_token()
+        base_url = self._get_setting("onecore_base_url")
+        if not token or not base_url or self._credentials.is_expired():
+            return None
+        headers = {"Authorization": f"Bearer {token}"}
+        return fanout.submit(
+            _http_get,
+            self.session,
+            base_url,
+            path,
+            headers,
+            params,
+            deadlines.current(),
+            tracing.current(),
+        )
+
+    def _page_result(self, future, path, params):
+        """Content of a page started by ``_start_get``.
+
+        A page that couldn't be prefetched is fetched here with
+        ``_get_json``, so errors and token refreshes behave as for page 1.
+        """
+        if future is not None:
+            try:
+                content, size, validators = future.result()
+            except Exception as err:
+                _logger.info("Prefetch of %s failed, fetching again: %s", path, err)
+            else:
+                policy = response_cache.cache.policy_for(path)
+                if size is not None and policy is not None:
+                    response_cache.cache.put(
+                        policy,
+                        self._cache_key(path, params),
+                        content,
+                        size=size,
+                        shared=self._shared_cache,
+                        validators=validators,
+                    )
+                return content
+        return self._get_json(path, params=params)
+
     def fetch_leases(self, identifier, value, location_type):
         paths = {
             "leaseId": "/leases",
@@ -236,35 +875,54 @@ class CoreApi:
             f"/staircases?buildingCode={urllib.parse.quote(str(code), safe='')}"
         )
 
+    def _building_sub_resource_paths(self, code, location_type):
+        """Paths of the sub-resources ``fetch_building`` needs for ``code``."""
+        code = urllib.parse.quote(str(code), safe="")
+        if location_type in ["Tvättstuga", "Miljöbod", "Lekplats"]:
+            return [f"/maintenance-units/by-building-code/{code}"]
+        if location_type == "Uppgång":
+            return [f"/staircases?buildingCode={code}"]
+        return []
+
     def fetch_building(self, id, location_type):
-        building = self._get_json(
+        """Fetch a building with the maintenance units/staircases it needs.
+
+        The search value is normally the building code itself, so the
+        sub-resources are requested speculatively in the same wave as the
+        building, and the calls below take the wave's results. Should the
+        building come back under another code, they fetch for that code.
+        """
+        building_path = (
             f"/buildings/by-building-code/{urllib.parse.quote(str(id), safe='')}"
         )
-        maintenance_unit_types = ["Tvättstuga", "Miljöbod", "Lekplats"]
-        if building:
-            maintenance_units = (
-                self.fetch_maintenance_units_for_building(building["code"])
-                if location_type in maintenance_unit_types
-                else []
-            )
-            # Fetch staircases if location_type is 'Uppgång'
-            staircases = (
-                self.fetch_staircases_for_building(building["code"])
-                if location_type == "Uppgång"
-                else []
-            )
-
-            return {
-                **building,
-                "staircases": staircases,
-                "maintenance_units": (
-                    self.filter_maintenance_units_by_location_type(
-                        maintenance_units, location_type
-                    )
-                    if maintenance_units
+        wave = [building_path] + self._building_sub_resource_paths(id, location_type)
+        with self._wave(wave):
+            building = self._get_json(building_path)
+            maintenance_unit_types = ["Tvättstuga", "Miljöbod", "Lekplats"]
+            if building:
+                maintenance_units = (
+                    self.fetch_maintenance_units_for_building(building["code"])
+                    if location_type in maintenance_unit_types
                     else []
-                ),
-            }
+                )
+                # Fetch staircases if location_type is 'Uppgång'
+                staircases = (
+                    self.fetch_staircases_for_building(building["code"])
+                    if location_type == "Uppgång"
+                    else []
+                )
+
+                return {
+                    **building,
+                    "staircases": staircases,
+                    "maintenance_units": (
+                        self.filter_maintenance_units_by_location_type(
+                            maintenance_units, location_type
+                        )
+                        if maintenance_units
+                        else []
+                    ),
+                }
         return None
 
     def fetch_buildings_for_property(self, property_code):
@@ -272,38 +930,61 @@ class CoreApi:
             f"/buildings/by-property-code/{urllib.parse.quote(str(property_code), safe='')}"
         )
 
+    @tracing.traced("onecore.fetch_properties")
     def fetch_properties(self, name, location_type):
-        properties = self._get_json(f"/properties/search", params={"q": name})
+        properties = self._get_json(
+            "/properties/search", stream=_PROPERTY_SEARCH, params={"q": name}
+        )
         data = []
 
         maintenance_unit_types = ["Tvättstuga", "Miljöbod", "Lekplats"]
         building_types = ["Byggnad", "Övrigt"]
 
+        # One wave for every property's buildings/units; the loop below then
+        # takes their results in order.
+        paths = []
         for property in properties:
-            buildings = (
-                self.fetch_buildings_for_property(property["code"])
-                if location_type in building_types
-                else []
-            )
-            maintenance_units = (
-                self.fetch_maintenance_units(property["code"], location_type)
-                if location_type in maintenance_unit_types
-                else []
-            )
-
-            data.append(
-                {
-                    "property": property,
-                    "buildings": buildings,
-                    "maintenance_units": (
-                        self.filter_maintenance_units_by_location_type(
-                            maintenance_units, location_type
-                        )
-                        if maintenance_units
+            code = urllib.parse.quote(str(property["code"]), safe="")
+            if location_type in building_types:
+                paths.append(f"/buildings/by-property-code/{code}")
+            if location_type in maintenance_unit_types:
+                paths.append(f"/maintenance-units/by-property-code/{code}")
+        with self._wave(paths):
+            for property in properties:
+                try:
+                    buildings = (
+                        self.fetch_buildings_for_property(property["code"])
+                        if location_type in building_types
                         else []
-                    ),
-                }
-            )
+                    )
+                    maintenance_units = (
+                        self.fetch_maintenance_units(property["code"], location_type)
+                        if location_type in maintenance_unit_types
+                        else []
+                    )
+                except DeadlineExceeded:
+                    if not data:
+                        raise
+                    _logger.warning(
+                        "Time budget spent; returning %d of %d properties",
+                        len(data),
+                        len(properties),
+                    )
+                    break
+
+                data.append(
+                    {
+                        "property": property,
+                        "buildings": buildings,
+                        "maintenance_units": (
+                            self.filter_maintenance_units_by_location_type(
+                                maintenance_units, location_type
+                            )
+                            if maintenance_units
+                            else []
+                        ),
+                    }
+                )
 
         return data
 
@@ -394,17 +1075,43 @@ class CoreApi:
             params={"typeId": type_id, "page": page, "limit": limit},
         )
 
+    def iter_component_models(
+        self, model_name, type_id=None, subtype_id=None, page_size=20, max_items=None
+    ):
+        """Yield component models matching ``model_name``, across all pages.
+
+        See ``_iter_pages`` for ``page_size``/``max_items`` and prefetching.
+        """
+        params = {"modelName": model_name}
+        if type_id:
+            params["typeId"] = type_id
+        if subtype_id:
+            params["subtypeId"] = subtype_id
+        return self._iter_pages("/component-models", params, page_size, max_items)
+
+    def iter_component_types(self, category_id, page_size=100, max_items=None):
+        """Yield every component type of a category, across all pages."""
+        return self._iter_pages(
+            "/component-types", {"categoryId": category_id}, page_size, max_items
+        )
+
+    def iter_component_subtypes(self, type_id, page_size=100, max_items=None):
+        """Yield every component subtype of a type, across all pages."""
+        return self._iter_pages(
+            "/component-subtypes", {"typeId": type_id}, page_size, max_items
+        )
+
     def create_component(self, payload):
         """Create a component using the unified add-component process."""
         response = self.request("POST", "/processes/add-component", json=payload)
         response.raise_for_status()
-        return response.json()
+        return _response_json(response)
 
     def update_component(self, component_id, payload):
         """Update a component using PUT /components/{id}."""
         response = self.request("PUT", f"/components/{component_id}", json=payload)
         response.raise_for_status()
-        return response.json()
+        return _response_json(response)
 
     def update_component_installation(self, installation_id, payload):
         """Update component installation via PUT /component-installations/{id}."""
@@ -412,31 +1119,32 @@ class CoreApi:
             "PUT", f"/component-installations/{installation_id}", json=payload
         )
         response.raise_for_status()
-        return response.json()
+        return _response_json(response)
 
     def upload_document(self, file_data, component_instance_id, file_name=None):
         """Upload a document/image to a component instance.
 
+        Sent as a JSON body with the base64 data, or, in ``"stream"`` upload
+        mode, as raw bytes in a streamed multipart body (see ``uploads``).
+
         Args:
-            file_data: Base64 encoded image string
+            file_data: Base64 encoded image (str or bytes, as stored in an
+                Odoo binary field) or a binary file object with the raw
+                image (e.g. an attachment opened from the filestore)
             component_instance_id: The component instance ID to attach the document to
             file_name: Optional filename for the image (auto-generated if not provided)
 
         Returns:
             dict: Response from the API
         """
-        import base64 as b64
         import filetype
 
-        # Ensure file_data is a string
-        if isinstance(file_data, bytes):
-            file_data = file_data.decode("utf-8")
+        source = uploads.source_for(file_data)
 
         # Detect content type from image header bytes
         content_type = "image/jpeg"  # default
         try:
-            header_bytes = b64.b64decode(file_data[:352])
-            kind = filetype.guess(header_bytes)
+            kind = filetype.guess(source.header(264))
             if kind is not None:
                 content_type = kind.mime
         except Exception:
@@ -462,18 +1170,35 @@ class CoreApi:
             f"upload_document: component_id={component_instance_id}, content_type={content_type}, file_name={file_name}"
         )
 
+        path = f"/components/{component_instance_id}/upload"
+        fell_back = False
+        if uploads.streaming() and source.size is not None:
+            body = uploads.MultipartBody(source, file_name, content_type)
+            response = self.request(
+                "POST", path, data=body, headers={"Content-Type": body.content_type}
+            )
+            if not uploads.rejected(response):
+                response.raise_for_status()
+                uploads.record("stream", source.size)
+                return _response_json(response) if response.text else {}
+            _logger.info(
+                "Multipart upload rejected with %s, retrying as JSON",
+                response.status_code,
+            )
+            response.close()
+            fell_back = True
+
         # Build JSON payload
         payload = {
-            "fileData": file_data,
+            "fileData": source.base64(),
             "fileName": file_name,
             "contentType": content_type,
         }
 
-        response = self.request(
-            "POST", f"/components/{component_instance_id}/upload", json=payload
-        )
+        response = self.request("POST", path, json=payload)
         response.raise_for_status()
-        return response.json() if response.text else {}
+        uploads.record("json", len(payload["fileData"]), fell_back=fell_back)
+        return _response_json(response) if response.text else {}
 
     def fetch_component_documents(self, component_instance_id):
         """Fetch documents/images for a component instance.
@@ -489,8 +1214,9 @@ class CoreApi:
             "GET", f"/documents/component-instances/{component_instance_id}"
         )
         response.raise_for_status()
-        return response.json() if response.text else []
+        return _response_json(response) if response.text else []
 
+    @tracing.traced("onecore.fetch_form_data")
     def fetch_form_data(self, identifier, value, location_type):
         fetch_fns = {
             "Bostadskontrakt": lambda id: self.fetch_residence(id),
@@ -499,6 +1225,13 @@ class CoreApi:
             "Garagekontrakt": lambda id: self.fetch_parking_space(id),
             "Lokalkontrakt": lambda id: self.fetch_facility(id),
         }
+        rental_object_paths = {
+            "Bostadskontrakt": "/residences/by-rental-id/",
+            "Kooperativ hyresrätt": "/residences/by-rental-id/",
+            "P-Platskontrakt": "/parking-spaces/by-rental-id/",
+            "Garagekontrakt": "/parking-spaces/by-rental-id/",
+            "Lokalkontrakt": "/facilities/by-rental-id/",
+        }
         lease_types_with_maintenance_units = [
             "Bostadskontrakt",
             "Kooperativ hyresrätt",
@@ -510,28 +1243,64 @@ class CoreApi:
             leases = self.fetch_leases(identifier, value, location_type)
 
             if leases and len(leases) > 0:
-                data = []
-
-                for lease in leases:
-                    # Skip if lease is None or missing required fields.
-                    if not lease or not lease.get("type"):
-                        continue
-
-                    lease_type = lease["type"].strip()
-                    if lease_type in fetch_fns:
-                        try:
-                            fetched_data = fetch_fns[lease_type](
-                                lease["rentalPropertyId"]
-                            )
-                        except Exception:
-                            _logger.warning(
-                                "Skipping lease %s: could not fetch rental property %s as %s",
-                                lease.get("leaseId"),
-                                lease.get("rentalPropertyId"),
-                                lease_type,
-                            )
-                            continue
+                # Skip if lease is None or missing required fields.
+                leases = [lease for lease in leases if lease and lease.get("type")]
+
+                # First wave: every lease's rental object at once.
+                rental_object_wave = [
+                    f"{rental_object_paths[lease['type'].strip()]}"
+                    f"{urllib.parse.quote(str(lease['rentalPropertyId']), safe='')}"
+                    for lease in leases
+                    if lease["type"].strip() in rental_object_paths
+                    and lease.get("rentalPropertyId") is not None
+                ]
+
+                resolved = []
+                with self._wave(rental_object_wave):
+                    for lease in leases:
+                        lease_type = lease["type"].strip()
+                        if lease_type in fetch_fns:
+                            try:
+                                fetched_data = fetch_fns[lease_type](
+                                    lease["rentalPropertyId"]
+                                )
+                            except DeadlineExceeded:
+                                # Out of time: show the leases resolved so far.
+                                _logger.warning(
+                                    "Time budget spent; skipping the remaining leases "
+                                    "after %d of %d",
+                                    len(resolved),
+                                    len(leases),
+                                )
+                                break
+                            except Exception:
+                                _logger.warning(
+                                    "Skipping lease %s: could not fetch rental property %s as %s",
+                                    lease.get("leaseId"),
+                                    lease.get("rentalPropertyId"),
+                                    lease_type,
+                                )
+                                continue
+                            resolved.append((lease, lease_type, fetched_data))
+
+                wants_maintenance_units = location_type in maintenance_unit_types
+                # Second wave: maintenance units, once per property code
+                # (leases often share a property).
+                unit_wave = [
+                    "/maintenance-units/by-property-code/"
+                    + urllib.parse.quote(str(fetched_data["property"]["code"]), safe="")
+                    for _lease, lease_type, fetched_data in resolved
+                    if wants_maintenance_units
+                    and lease_type in lease_types_with_maintenance_units
+                    and isinstance(fetched_data, dict)
+                    and isinstance(fetched_data.get("property"), dict)
+                    and fetched_data["property"].get("code") is not None
+                ]
 
+                data = []
+                units_by_property = {}
+                with self._wave(unit_wave):
+                    for lease, lease_type, fetched_data in resolved:
                         rental_property = (
                             fetched_data
                             if lease_type == "Bostadskontrakt"
@@ -543,18 +1312,23 @@ class CoreApi:
                             if lease_type in ("P-Platskontrakt", "Garagekontrakt")
                             else None
                         )
-                        facility = (
-                            fetched_data if lease_type == "Lokalkontrakt" else None
-                        )
-
-                        maintenance_units = (
-                            self.fetch_maintenance_units(
-                                fetched_data["property"]["code"], location_type
-                            )
-                            if lease_type in lease_types_with_maintenance_units
-                            and location_type in maintenance_unit_types
-                            else []
-                        )
+                        facility = fetched_data if lease_type == "Lokalkontrakt" else None
+
+                        maintenance_units = []
+                        if (
+                            lease_type in lease_types_with_maintenance_units
+                            and wants_maintenance_units
+                        ):
+                            code = fetched_data["property"]["code"]
+                            if code not in units_by_property:
+                                try:
+                                    units_by_property[code] = list(
+                                        self.fetch_maintenance_units(code, location_type)
+                                    )
+                                except DeadlineExceeded:
+                                    # Keep the lease; it just shows no units.
+                                    units_by_property[code] = []
+                            maintenance_units = list(units_by_property[code])
 
                         data.append(
                             {
@@ -641,6 +1415,172 @@ class CoreApi:
             raise err
 
 
+def _guarded(
+    path, send, method="GET", timeout=DEFAULT_TIMEOUT, deadline=None, headers=None
+):
+    """Run ``send(timeout)`` (one HTTP call to ``path``) with retries and
+    breaker.
+
+    Transient failures of idempotent methods are retried (``retries``); each
+    attempt passes the endpoint group's circuit breaker, so an open circuit
+    also ends the retries, and a slow attempt may be hedged (``hedging``).
+    Each attempt gets ``timeout`` capped to the time left before
+    ``deadline`` (default: the current ``deadlines.budget``), and none
+    starts once it has passed. Safe to call from worker threads: only the
+    breaker, the retry and hedge budgets, ``metrics`` and ``send`` are used.
+
+    The call is a ``tracing`` span; ``headers``, the dict ``send`` sends,
+    gets the trace's correlation id.
+    """
+    attempts = [0]
+
+    def _attempt():
+        attempts[0] += 1
+        attempt_timeout = deadlines.timeout(timeout, deadline)
+        return hedging.call(
+            method, path, lambda: _breaker_call(path, lambda: send(attempt_timeout))
+        )
+
+    endpoint = metrics.template_for(path)
+    with tracing.span(f"onecore {method} {endpoint}") as span:
+        if headers is not None:
+            headers[tracing.HEADER] = span.correlation_id
+        started = time.monotonic()
+        try:
+            response = retries.call(method, path, _attempt, deadline)
+        except Exception as err:
+            metrics.observe(
+                method,
+                path,
+                time.monotonic() - started,
+                error=err,
+                attempts=attempts[0],
+            )
+            raise
+        finally:
+            span.set(attempts=attempts[0])
+        metrics.observe(
+            method, path, time.monotonic() - started, response, attempts=attempts[0]
+        )
+        span.set(status=response.status_code)
+    return response
+
+
+def _http_get(
+    session,
+    base_url,
+    path,
+    headers,
+    params=None,
+    deadline=None,
+    parent=None,
+    stream=None,
+):
+    """One GET of ``path`` outside the ORM, safe in any thread.
+
+    ``deadline`` bounds the call like a ``deadlines.budget`` and ``parent``
+    is the ``tracing`` span it belongs to (pool threads inherit neither).
+    ``stream`` is the ``json_stream.StreamedList`` decoding the response,
+    if any.
+
+    Returns:
+        ``(content, size, validators)``, or ``response_cache.NOT_MODIFIED``
+        for a 304 to a conditional request.
+
+    Raises:
+        requests.HTTPError: For an error status.
+    """
+    headers = dict(headers)
+    with tracing.bound(parent):
+        response = _guarded(
+            path,
+            lambda timeout: session.get(
+                f"{base_url}{path}",
+                params=params or None,
+                headers=headers,
+                timeout=timeout,
+                **_stream_kwargs(stream),
+            ),
+            timeout=_PARALLEL_GET_TIMEOUT,
+            deadline=deadline,
+            headers=headers,
+        )
+    if response.status_code == 304:
+        return response_cache.NOT_MODIFIED
+    response.raise_for_status()
+    content, size = _decode(response, stream)
+    return content, size, response_cache.validators_from(response)
+
+
+def _breaker_call(path, send):
+    breaker = circuit_breaker.breaker_for(path)
+    breaker.before_call()
+    started = time.monotonic()
+    try:
+        response = send()
+    except Exception as err:
+        _record(breaker, circuit_breaker.is_failure(error=err), started)
+        raise
+    _record(breaker, circuit_breaker.is_failure(response=response), started)
+    return response
+
+
+def _record(breaker, failed, started):
+    duration = time.monotonic() - started
+    breaker.record(failed, duration)
+    # OneCore's health also steers the fan-out concurrency limit.
+    fanout.observe(failed, duration)
+
+
+def _follower_wait(timeout, deadline=None):
+    """Seconds a coalesced caller waits for another's call: at most its own
+    ``timeout`` (a ``(connect, read)`` tuple counts as their sum) and the
+    time left before ``deadline`` (default: the current one)."""
+    if isinstance(timeout, tuple):
+        timeout = sum(part for part in timeout if part is not None)
+    remaining = deadlines.remaining(deadline)
+    if remaining is None:
+        return timeout
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def _copy_outcome(outcome):
+    """Copy a ``parallel_get_json`` fetch outcome for a coalesced caller."""
+    if outcome is response_cache.NOT_MODIFIED:
+        return outcome
+    content, size, validators = outcome
+    return response_cache.copy_json(content), size, validators
+
+
+def _stream_kwargs(stream):
+    """``stream=True`` for a response decoded by ``stream``, else nothing."""
+    return {"stream": True} if stream is not None else {}
+
+
+def _decode(response, stream=None):
+    """``(content, body size)`` of a successful OneCore response.
+
+    With a ``json_stream.StreamedList``, the body is decoded item by item as
+    it streams in; otherwise in one go with ``json_codec``.
+    """
+    if stream is None:
+        return _response_json(response).get("content"), _body_size(response)
+    try:
+        return stream.decode(response.iter_content(json_stream.CHUNK_SIZE))
+    finally:
+        response.close()
+
+
+def _response_json(response):
+    """Parse a response body with ``json_codec`` (the fast backend if any)."""
+    return json_codec.loads(response.content)
+
+
+def _body_size(response):
+    """Response body length in bytes."""
+    return len(response.content)
+
+
 class OneCoreException(Exception):
     def __init__(self, message):
         super().__init__(message)
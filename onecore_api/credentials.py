@@ -0,0 +1,369 @@
+"""Worker-level OneCore credentials and connection settings.
+
+``CoreApi`` instances are created all over the place (services, computes,
+mail messages), so reading ``onecore_base_url``/``onecore_api_token`` from
+``ir.config_parameter`` and writing the token back on every refresh was both
+a per-call cost and a registry-cache invalidation per refresh. Instead each
+worker process keeps one ``CredentialStore`` per database and OneCore base
+URL holding:
+
+* a snapshot of the connection settings, reloaded every ``CONFIG_TTL``;
+* the current bearer token and its expiry (read from the JWT ``exp`` claim);
+* a single-flight refresh lock, so N threads hitting a 401 at once trigger
+  exactly one ``/auth/generateToken``.
+
+The base URL that picks the store is itself kept per worker and database
+(``store_for``), so building a ``CoreApi`` doesn't query the database either.
+A token stored in ``ir.config_parameter`` only seeds a cold worker, and not
+once its ``exp`` has passed.
+
+Workers on the same node share refreshed tokens through a small signal file
+(written atomically, mode 0600): a worker that refreshes writes it, the
+others notice the new mtime on their next call and adopt the token. An
+advisory file lock guards checking and writing the file; it is not held
+during the token call itself, so a slow ``/auth/generateToken`` never
+blocks the node's other workers.
+
+The signal files hold a live bearer token, so they live in a private
+directory (``ONECORE_TOKEN_DIR``, by default ``onecore_tokens`` in Odoo's
+``data_dir``), created with mode 0700. A directory or file that is not
+owned by the Odoo user, or that others can write to, is never used.
+"""
+
+import base64
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+_logger = logging.getLogger(__name__)
+
+CONFIG_KEYS = (
+    "onecore_base_url",
+    "onecore_username",
+    "onecore_password",
+    "onecore_cache_backend",
+)
+# Seconds a settings snapshot is trusted before it is re-read.
+CONFIG_TTL = 60
+# Refresh this many seconds before the token's ``exp`` to avoid racing it.
+TOKEN_EXPIRY_SKEW = 30
+# Directory for the cross-worker token signal files (None: the default, see
+# ``_default_signal_dir``).
+SIGNAL_DIR = os.getenv("ONECORE_TOKEN_DIR") or None
+
+_O_NOFOLLOW = getattr(os, "O_NOFOLLOW", 0)
+
+_stores = {}
+_stores_lock = threading.Lock()
+_base_urls = {}  # (pid, dbname) -> (base_url, loaded_at)
+
+
+def _default_signal_dir():
+    """``onecore_tokens`` in Odoo's ``data_dir``, or in the user's cache
+    directory outside Odoo (scripts, tests)."""
+    try:
+        from odoo.tools import config
+
+        base = config["data_dir"]
+    except Exception:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "onecore_tokens")
+
+
+def _is_private(st):
+    """True for an ``os.stat`` result owned by this user that nobody else
+    can write to."""
+    getuid = getattr(os, "getuid", None)
+    if getuid is not None and st.st_uid != getuid():
+        return False
+    return not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _private_dir(path):
+    """Create ``path`` (mode 0700) if needed; returns it, or None if it
+    isn't a private directory of this user."""
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+    except OSError as err:
+        _logger.warning("No OneCore token directory %s: %s", path, err)
+        return None
+    if not stat.S_ISDIR(st.st_mode) or not _is_private(st):
+        _logger.warning(
+            "Not sharing OneCore tokens through %s: it is not a private "
+            "directory of this user",
+            path,
+        )
+        return None
+    return path
+
+
+def _token_expiry(token):
+    """Return the JWT ``exp`` claim as an epoch timestamp, or None."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp else None
+    except Exception:
+        return None
+
+
+class CredentialStore:
+    """Token and settings for one database and OneCore environment, shared by
+    a worker's threads.
+
+    ``key`` is ``(dbname, base_url)``; ``signal_path`` is None when there is
+    no private directory to share tokens through.
+    """
+
+    def __init__(self, key, signal_dir=None):
+        self.key = key
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        signal_dir = _private_dir(signal_dir or SIGNAL_DIR or _default_signal_dir())
+        self.signal_path = (
+            os.path.join(signal_dir, f"onecore_token_{digest}.json")
+            if signal_dir
+            else None
+        )
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._config = None
+        self._config_loaded_at = 0.0
+        self._token = None
+        self._token_seeded = False
+        self._expires_at = None
+        self._signal_mtime = None
+        self.refresh_count = 0
+
+    # ------------------------------------------------------------------
+    # Settings snapshot
+    # ------------------------------------------------------------------
+
+    def get_config(self, key, loader):
+        """Return a setting from the snapshot, reloading it via ``loader``.
+
+        Args:
+            key: ``ir.config_parameter`` key.
+            loader: Callable ``loader(key) -> value`` used on a stale snapshot.
+        """
+        now = time.monotonic()
+        config = self._config
+        if config is None or now - self._config_loaded_at > CONFIG_TTL:
+            config = {k: loader(k) for k in CONFIG_KEYS}
+            with self._lock:
+                self._config = config
+                self._config_loaded_at = now
+        if key in config:
+            return config[key]
+        return loader(key)
+
+    def invalidate_config(self):
+        """Force the next ``get_config`` to re-read the settings."""
+        with self._lock:
+            self._config = None
+
+    # ------------------------------------------------------------------
+    # Token
+    # ------------------------------------------------------------------
+
+    def get_token(self, seed=None):
+        """Return the current token, adopting one refreshed by another worker.
+
+        Args:
+            seed: Optional callable returning a previously stored token; only
+                consulted once, when this worker has no token yet. A seed
+                whose ``exp`` has passed is ignored.
+        """
+        self._read_signal()
+        if self._token is None and not self._token_seeded and seed is not None:
+            self._token_seeded = True
+            token = seed()
+            expires_at = _token_expiry(token) if token else None
+            if token and (expires_at is None or expires_at > time.time()):
+                self._set(token)
+        return self._token
+
+    def is_expired(self):
+        """True if the token is missing or within the expiry skew."""
+        if self._token is None:
+            return True
+        if self._expires_at is None:
+            return False
+        return time.time() >= self._expires_at - TOKEN_EXPIRY_SKEW
+
+    def set_token(self, token):
+        """Store a freshly issued token and signal it to the other workers."""
+        self._set(token)
+        self.refresh_count += 1
+        if token:
+            self._write_signal(token)
+
+    def refresh(self, stale_token, fetch):
+        """Single-flight token refresh.
+
+        Only one caller per worker runs ``fetch``; callers that queued
+        behind it get the token it produced instead of issuing their own
+        ``/auth/generateToken``. So do callers in other workers that find
+        the token in the signal file, checked under the file lock; the lock
+        is released before ``fetch`` runs.
+
+        Args:
+            stale_token: The token the caller found to be rejected/expired.
+            fetch: Callable issuing the token request; must call
+                ``set_token`` (``CoreApi._get_auth_token`` does, through
+                ``_persist_token``) and return the new token.
+        """
+        with self._refresh_lock:
+            with self._file_lock():
+                self._read_signal()
+            if self._token and self._token != stale_token and not self.is_expired():
+                return self._token
+            return fetch()
+
+    def _set(self, token):
+        with self._lock:
+            self._token = token
+            self._expires_at = _token_expiry(token) if token else None
+            self._token_seeded = True
+
+    # ------------------------------------------------------------------
+    # Cross-worker signalling
+    # ------------------------------------------------------------------
+
+    def _read_signal(self):
+        if self.signal_path is None:
+            return
+        try:
+            mtime = os.stat(self.signal_path, follow_symlinks=False).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._signal_mtime:
+            return
+        try:
+            fd = os.open(self.signal_path, os.O_RDONLY | _O_NOFOLLOW)
+            with os.fdopen(fd, encoding="utf-8") as signal_file:
+                if not _is_private(os.fstat(signal_file.fileno())):
+                    _logger.warning(
+                        "Ignoring OneCore token signal %s: not private to this user",
+                        self.signal_path,
+                    )
+                    return
+                payload = json.load(signal_file)
+        except (OSError, ValueError) as err:
+            _logger.debug("Ignoring unreadable OneCore token signal: %s", err)
+            return
+        self._signal_mtime = mtime
+        token = payload.get("token") if isinstance(payload, dict) else None
+        if token and token != self._token:
+            self._set(token)
+
+    def _write_signal(self, token):
+        if self.signal_path is None:
+            return
+        with self._file_lock():
+            self._replace_signal(token)
+
+    def _replace_signal(self, token):
+        directory, name = os.path.split(self.signal_path)
+        tmp_path = None
+        try:
+            # mkstemp creates a new file (O_EXCL, mode 0600) under a random
+            # name, so nothing planted in the directory is written through.
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=f"{name}.", suffix=".tmp", dir=directory
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as signal_file:
+                json.dump({"token": token}, signal_file)
+            os.replace(tmp_path, self.signal_path)
+            tmp_path = None
+            self._signal_mtime = os.stat(self.signal_path).st_mtime_ns
+        except OSError as err:
+            # Other workers will refresh on their own 401 instead.
+            _logger.warning("Could not publish OneCore token to other workers: %s", err)
+        finally:
+            if tmp_path is not None:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_path)
+
+    def _file_lock(self):
+        if self.signal_path is None:
+            return _FileLock(None)
+        return _FileLock(f"{self.signal_path}.lock")
+
+
+class _FileLock:
+    """Advisory ``flock`` context manager; a no-op where unavailable."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        if fcntl is None or self.path is None:
+            return self
+        try:
+            self._fd = os.open(
+                self.path, os.O_RDWR | os.O_CREAT | _O_NOFOLLOW, 0o600
+            )
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except OSError:
+            if self._fd is not None:
+                os.close(self._fd)
+            self._fd = None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        return False
+
+
+def get_store(key):
+    """Return this worker's ``CredentialStore`` for ``key``, the database and
+    OneCore base URL: two OneCore environments never share a token."""
+    pid = os.getpid()
+    store = _stores.get((pid, key))
+    if store is None:
+        with _stores_lock:
+            store = _stores.get((pid, key))
+            if store is None:
+                store = _stores[(pid, key)] = CredentialStore(key)
+    return store
+
+
+def store_for(dbname, load_base_url):
+    """``get_store`` for ``dbname`` and its OneCore base URL.
+
+    The base URL comes from this worker's snapshot; ``load_base_url()`` is
+    only called when there is none for ``dbname`` younger than
+    ``CONFIG_TTL``.
+    """
+    pid = os.getpid()
+    now = time.monotonic()
+    cached = _base_urls.get((pid, dbname))
+    if cached is None or now - cached[1] > CONFIG_TTL:
+        cached = (load_base_url(), now)
+        with _stores_lock:
+            _base_urls[(pid, dbname)] = cached
+    return get_store((dbname, cached[0]))
+
+
+def reset():
+    """Forget all stores (tests)."""
+    with _stores_lock:
+        _stores.clear()
+        _base_urls.clear()
@@ -0,0 +1,157 @@
+"""Time budgets for user actions that chain several OneCore calls.
+
+A search onchange can chain ``fetch_leases``, then a residence per lease,
+then maintenance units per property, and each call used to get its own
+15 s timeout, so a slow OneCore could hold the worker for minutes. A user
+action now sets one budget for everything it does::
+
+    with deadlines.budget("search"):
+        handler.handle_search(...)
+
+Inside it every OneCore call (each retry attempt too) gets the remaining
+time as its timeout, capped by the call's own timeout. Once the budget is
+spent, calls raise ``DeadlineExceeded`` without going out; the loops that
+chain calls stop and return what they have, and the action shows a warning
+instead of hanging.
+
+Budgets are per thread of control (a ``ContextVar``); nested budgets can
+only shorten the deadline. Threads of the fan-out executor don't inherit
+the context, so ``parallel_get_json`` passes the caller's deadline to its
+jobs explicitly. Background cache refreshes are not bound by any budget.
+
+A read timeout bounds each wait for data, not the whole transfer, so a
+response that keeps trickling in can overrun its budget by one timeout.
+"""
+
+import contextlib
+import contextvars
+import os
+import threading
+import time
+
+import requests
+
+DEFAULT_SETTINGS = {
+    # Total seconds for the named user actions (see ``budget``).
+    "search": 20.0,
+    "components": 20.0,
+    "form": 8.0,
+    # Less time than this left counts as spent: no call is worth starting.
+    "min_timeout": 0.2,
+}
+
+_lock = threading.Lock()
+_settings = dict(DEFAULT_SETTINGS)
+_counters = {}  # pid -> {"budgets": n, "exceeded": n}
+_deadline = contextvars.ContextVar("onecore_deadline", default=None)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised instead of calling OneCore once the action's budget is spent.
+
+    A ``Timeout`` subclass, so code that already treats a OneCore timeout
+    as a soft failure degrades the same way, only without waiting. It is
+    neither retried nor counted against the circuit breaker.
+    """
+
+
+def _now():
+    return time.monotonic()
+
+
+def _count(name):
+    with _lock:
+        counters = _counters.setdefault(os.getpid(), {"budgets": 0, "exceeded": 0})
+        counters[name] += 1
+
+
+@contextlib.contextmanager
+def budget(seconds):
+    """Bound every OneCore call inside the block to ``seconds`` in total.
+
+    Args:
+        seconds: A number, or the name of an action in ``DEFAULT_SETTINGS``
+            (``"search"``, ``"components"``, ``"form"``).
+    """
+    if isinstance(seconds, str):
+        seconds = _settings[seconds]
+    deadline = _now() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    _count("budgets")
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current():
+    """The deadline (``time.monotonic()`` value) in effect, or None."""
+    return _deadline.get()
+
+
+def remaining(deadline=None):
+    """Seconds left before ``deadline`` (default: the current one), or None
+    without a deadline."""
+    if deadline is None:
+        deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - _now()
+
+
+def spare(deadline=None):
+    """Seconds that may pass before ``deadline`` (default: the current one)
+    while leaving ``min_timeout`` for one more call, or None without a
+    deadline. Zero or less: no further call can start."""
+    left = remaining(deadline)
+    if left is None:
+        return None
+    return left - _settings["min_timeout"]
+
+
+def timeout(value, deadline=None):
+    """``value`` (seconds or a ``(connect, read)`` tuple) capped to the time
+    left before ``deadline`` (default: the current one).
+
+    Raises:
+        DeadlineExceeded: If less than ``min_timeout`` is left.
+    """
+    left = remaining(deadline)
+    if left is None:
+        return value
+    if left < _settings["min_timeout"]:
+        _count("exceeded")
+        raise DeadlineExceeded("OneCore time budget spent")
+    if isinstance(value, tuple):
+        return tuple(left if part is None else min(part, left) for part in value)
+    return left if value is None else min(value, left)
+
+
+def configure(**settings):
+    """Override ``DEFAULT_SETTINGS`` keys (unknown keys/None are ignored)."""
+    with _lock:
+        _settings.update(
+            {
+                key: value
+                for key, value in settings.items()
+                if key in DEFAULT_SETTINGS and value is not None
+            }
+        )
+
+
+def stats():
+    """``{"budgets", "exceeded"}``: budgets started and calls refused in
+    this worker."""
+    with _lock:
+        return dict(_counters.get(os.getpid()) or {"budgets": 0, "exceeded": 0})
+
+
+def reset():
+    """Forget counters and restore the defaults (tests)."""
+    with _lock:
+        _counters.clear()
+        _settings.clear()
+        _settings.update(DEFAULT_SETTINGS)
@@ -0,0 +1,255 @@
+"""Worker-wide executor with adaptive concurrency for OneCore fan-outs.
+
+``parallel_get_json`` used to build and tear down a ``ThreadPoolExecutor``
+with a fixed 8 threads on every call, and nothing stopped several
+concurrent fan-outs (a threaded server, wizard + form loading together)
+from multiplying that against OneCore. Instead every fan-out in a worker
+process runs on one long-lived executor, and tasks only start calling
+OneCore once the worker-wide ``AdaptiveLimiter`` admits them:
+
+* the limit follows AIMD: it grows by ``1/limit`` per fast, successful call
+  (about +1 per round trip at full width) and is halved on an error or a
+  call slower than ``slow_call_seconds`` (at most once per ``cooldown``,
+  so one bad wave doesn't collapse it to the floor);
+* it never exceeds ``max_in_flight``, the hard per-worker cap on concurrent
+  OneCore calls from fan-outs, nor drops below ``min_limit``.
+
+Every OneCore call reports its outcome through ``observe`` (see
+``core_api._breaker_call``), so the limit tracks OneCore's health even
+between fan-outs. ``stats()`` exposes the limit, utilisation and queue wait.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_logger = logging.getLogger(__name__)
+
+THREAD_NAME_PREFIX = "onecore-fanout"
+
+DEFAULT_SETTINGS = {
+    "initial_limit": 8,
+    "min_limit": 2,
+    # Hard cap on concurrent fan-out calls per worker; also the pool size.
+    "max_in_flight": 16,
+    "slow_call_seconds": 2.0,
+    "cooldown": 1.0,
+}
+
+_lock = threading.Lock()
+_settings = dict(DEFAULT_SETTINGS)
+_state = {"pid": None, "executor": None, "limiter": None}
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with blocking admission; thread-safe."""
+
+    def __init__(self, settings=None):
+        self.settings = dict(settings or DEFAULT_SETTINGS)
+        self._cond = threading.Condition()
+        self.limit = float(
+            min(self.settings["initial_limit"], self.settings["max_in_flight"])
+        )
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._last_decrease = None
+        self.increases = 0
+        self.decreases = 0
+        self.acquired = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.busy_seconds = 0.0
+        self._created = _now()
+
+    def acquire(self, queued_at=None):
+        """Block until a slot is free; returns the seconds spent waiting.
+
+        Args:
+            queued_at: When the task was submitted, so time spent queued for
+                a pool thread counts as wait too. Defaults to now.
+        """
+        started = _now() if queued_at is None else queued_at
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            waited = _now() - started
+            self.acquired += 1
+            self.queue_wait_total += waited
+            self.queue_wait_max = max(self.queue_wait_max, waited)
+        return waited
+
+    def release(self, busy_seconds=0.0):
+        with self._cond:
+            self.in_flight -= 1
+            self.busy_seconds += busy_seconds
+            self._cond.notify()
+
+    def observe(self, failed, duration):
+        """Adjust the limit from one OneCore call's outcome."""
+        settings = self.settings
+        now = _now()
+        with self._cond:
+            if failed or duration > settings["slow_call_seconds"]:
+                last = self._last_decrease
+                if last is not None and now - last < settings["cooldown"]:
+                    return
+                self._last_decrease = now
+                self.limit = max(float(settings["min_limit"]), self.limit / 2)
+                self.decreases += 1
+                _logger.info(
+                    "OneCore fan-out limit decreased to %d (%s)",
+                    int(self.limit),
+                    "error" if failed else f"{duration:.1f}s call",
+                )
+            elif self.limit < settings["max_in_flight"]:
+                before = int(self.limit)
+                self.limit = min(
+                    float(settings["max_in_flight"]), self.limit + 1 / self.limit
+                )
+                if int(self.limit) > before:
+                    self.increases += 1
+                    # A slot opened up; wake a queued task.
+                    self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            elapsed = max(_now() - self._created, 1e-9)
+            return {
+                "limit": int(self.limit),
+                "max_in_flight": self.settings["max_in_flight"],
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "utilisation": self.in_flight / max(int(self.limit), 1),
+                # Average number of busy slots over the limiter's lifetime.
+                "avg_busy_slots": self.busy_seconds / elapsed,
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "tasks": self.acquired,
+                "queue_wait_avg": (
+                    self.queue_wait_total / self.acquired if self.acquired else 0.0
+                ),
+                "queue_wait_max": self.queue_wait_max,
+            }
+
+
+def _now():
+    return time.monotonic()
+
+
+def _ensure():
+    pid = os.getpid()
+    if _state["pid"] != pid:
+        with _lock:
+            if _state["pid"] != pid:
+                # First use or a forked worker: the parent's threads are gone.
+                _state["executor"] = ThreadPoolExecutor(
+                    max_workers=_settings["max_in_flight"],
+                    thread_name_prefix=THREAD_NAME_PREFIX,
+                )
+                _state["limiter"] = AdaptiveLimiter(_settings)
+                _state["pid"] = pid
+    return _state["executor"], _state["limiter"]
+
+
+def limiter():
+    """This worker's ``AdaptiveLimiter``."""
+    return _ensure()[1]
+
+
+def observe(failed, duration):
+    """Feed one OneCore call's outcome to the limiter (cheap, thread-safe)."""
+    current = _state["limiter"]
+    if current is not None and _state["pid"] == os.getpid():
+        current.observe(failed, duration)
+
+
+def in_fanout_thread():
+    return threading.current_thread().name.startswith(THREAD_NAME_PREFIX)
+
+
+def submit(fn, *args):
+    """Schedule ``fn(*args)`` on the shared executor; returns a ``Future``.
+
+    The call waits for the adaptive limit like every fan-out task. From a
+    fan-out thread it runs inline (see ``run_all``) and the returned future
+    is already done.
+    """
+    if in_fanout_thread():
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as err:
+            future.set_exception(err)
+        return future
+    executor, current = _ensure()
+    return executor.submit(_admitted, current, fn, args, _now())
+
+
+def _admitted(current, fn, args, queued_at):
+    current.acquire(queued_at)
+    started = _now()
+    try:
+        return fn(*args)
+    finally:
+        current.release(_now() - started)
+
+
+def run_all(fn, items):
+    """Run ``fn(item)`` for every item on the shared executor.
+
+    Returns:
+        list of results in input order. If ``fn`` raises, the first
+        exception in input order is re-raised here.
+
+    Called from a fan-out thread itself (a nested fan-out), the items run
+    inline instead: waiting on the pool from inside it could deadlock.
+    """
+    items = list(items)
+    if not items:
+        return []
+    if in_fanout_thread():
+        return [fn(item) for item in items]
+    futures = [submit(fn, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def configure(**settings):
+    """Override ``DEFAULT_SETTINGS`` keys; the pool is rebuilt on change.
+
+    Unknown keys and None values are ignored.
+    """
+    updates = {
+        key: value
+        for key, value in settings.items()
+        if key in DEFAULT_SETTINGS and value is not None
+    }
+    with _lock:
+        if any(_settings[key] != value for key, value in updates.items()):
+            _settings.update(updates)
+            _discard()
+
+
+def _discard():
+    executor = _state["executor"]
+    _state.update(pid=None, executor=None, limiter=None)
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def stats():
+    """Limiter and pool metrics for this worker (empty before first use)."""
+    if _state["pid"] != os.getpid():
+        return {}
+    return _state["limiter"].stats()
+
+
+def reset():
+    """Drop the pool and restore the default settings (tests)."""
+    with _lock:
+        _settings.clear()
+        _settings.update(DEFAULT_SETTINGS)
+        _discard()
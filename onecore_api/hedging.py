@@ -0,0 +1,279 @@
+"""Hedged requests for idempotent OneCore reads (opt-in).
+
+OneCore's p99 is far above its p50, and a user action waits for its
+slowest call: one slow room in ``parallel_get_json`` or one slow
+``fetch_residence`` sets the time of the whole action. With hedging on, an
+idempotent request that hasn't answered within a threshold is sent a
+second time and whichever copy answers first is used; the other one is
+closed when it completes.
+
+* The threshold adapts per endpoint group: the ``percentile`` of the
+  group's recent latencies (time to response headers), clamped to
+  ``[min_delay, max_delay]``. Until ``min_samples`` latencies are known,
+  requests of the group are not hedged.
+* Hedges are capped by a ``retries.RetryBudget``: over a sliding window
+  at most ``budget_ratio`` of the requests (plus a small floor) may get a
+  second copy, so even a slow OneCore sees only a few percent more load.
+* A copy that fails or answers with a 5xx only wins when the other one
+  fails too.
+
+Both copies run on a worker-wide executor, so the caller can take the
+first answer; each copy passes the circuit breaker on its own. The pool has
+room for both copies of every call a full fan-out has in flight, and the
+threshold counts from when the primary is sent, not from when it was
+queued: waiting for a pool thread is not OneCore being slow, and must not
+turn into hedges. Off by default (``onecore_hedge_enabled``); see
+``stats()``.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+try:
+    from .circuit_breaker import group_for
+    from .retries import IDEMPOTENT_METHODS, RetryBudget
+except ImportError:  # imported as a top-level module (standalone pytest suite)
+    from circuit_breaker import group_for
+    from retries import IDEMPOTENT_METHODS, RetryBudget
+
+_logger = logging.getLogger(__name__)
+
+THREAD_NAME_PREFIX = "onecore-hedge"
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "percentile": 0.95,
+    "min_samples": 20,
+    # Latencies kept per endpoint group.
+    "window": 200,
+    "min_delay": 0.05,
+    "max_delay": 5.0,
+    # Hedges allowed per request sent, plus a floor per second, in a window.
+    "budget_ratio": 0.05,
+    "budget_min_per_second": 0.2,
+    "budget_window": 10.0,
+    # Threads running request copies; both copies of a request hold one, so
+    # twice ``fanout``'s max_in_flight (``CoreApi`` keeps them in step).
+    "max_workers": 32,
+}
+
+_lock = threading.Lock()
+_settings = dict(DEFAULT_SETTINGS)
+_state = {"pid": None, "executor": None, "budget": None}
+_trackers = {}  # (pid, group) -> LatencyTracker
+_counters = {}  # (pid, group) -> {"requests": n, "hedged": n, ...}
+
+
+class LatencyTracker:
+    """The last ``size`` latencies of an endpoint group; thread-safe."""
+
+    def __init__(self, size):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=size)
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, fraction):
+        """The ``fraction`` (0..1) percentile, or None without samples."""
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def _now():
+    return time.monotonic()
+
+
+def _ensure():
+    pid = os.getpid()
+    if _state["pid"] != pid:
+        with _lock:
+            if _state["pid"] != pid:
+                # First use or a forked worker: the parent's threads are gone.
+                _state["executor"] = ThreadPoolExecutor(
+                    max_workers=_settings["max_workers"],
+                    thread_name_prefix=THREAD_NAME_PREFIX,
+                )
+                _state["budget"] = RetryBudget(
+                    _settings["budget_ratio"],
+                    _settings["budget_min_per_second"],
+                    _settings["budget_window"],
+                )
+                _state["pid"] = pid
+    return _state["executor"], _state["budget"]
+
+
+def tracker(path):
+    """The ``LatencyTracker`` of ``path``'s endpoint group in this worker."""
+    key = (os.getpid(), group_for(path))
+    current = _trackers.get(key)
+    if current is None:
+        with _lock:
+            current = _trackers.setdefault(key, LatencyTracker(_settings["window"]))
+    return current
+
+
+def threshold(path):
+    """Seconds to wait before hedging a request to ``path``, or None while
+    too few latencies are known."""
+    latencies = tracker(path)
+    if len(latencies) < _settings["min_samples"]:
+        return None
+    value = latencies.percentile(_settings["percentile"])
+    return min(max(value, _settings["min_delay"]), _settings["max_delay"])
+
+
+def enabled(method):
+    return _settings["enabled"] and method.upper() in IDEMPOTENT_METHODS
+
+
+def call(method, path, send):
+    """Run ``send()`` for ``path``, hedged with a second copy if it is slow.
+
+    Args:
+        method: HTTP method; only idempotent ones are hedged.
+        path: OneCore path, for the group's threshold and counters.
+        send: Zero-argument callable doing one attempt; returns the response
+            or raises. Must be safe to call twice at once.
+
+    Returns:
+        The first usable response; if both copies fail, the first error is
+        raised (or the first 5xx response returned).
+    """
+    if not enabled(method):
+        return send()
+    latencies = tracker(path)
+    executor, hedge_budget = _ensure()
+    hedge_budget.deposit()
+    _count(path, "requests")
+    delay = threshold(path)
+    if delay is None:
+        return _timed(latencies, send)
+
+    sent = threading.Event()
+    primary = executor.submit(_timed, latencies, send, sent)
+    # Time spent queued for a pool thread doesn't count toward the delay.
+    sent.wait()
+    done, _pending = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+    if not hedge_budget.withdraw():
+        _count(path, "budget_exhausted")
+        return primary.result()
+    _count(path, "hedged")
+    _logger.debug("Hedging %s %s after %.3fs", method, path, delay)
+    hedge = executor.submit(_timed, latencies, send)
+    return _first_usable(path, primary, hedge)
+
+
+def _timed(latencies, send, sent=None):
+    if sent is not None:
+        sent.set()
+    started = _now()
+    response = send()
+    latencies.record(_now() - started)
+    return response
+
+
+def _usable(response):
+    status = getattr(response, "status_code", None)
+    return not (isinstance(status, int) and status >= 500)
+
+
+def _first_usable(path, primary, hedge):
+    pending = {primary, hedge}
+    fallback = None  # the first failed copy's error or 5xx response
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            error = future.exception()
+            response = None if error else future.result()
+            if error is None and _usable(response):
+                if future is hedge:
+                    _count(path, "hedge_wins")
+                for other in (primary, hedge):
+                    if other is not future:
+                        other.add_done_callback(_close)
+                return response
+            if fallback is None:
+                fallback = error or response
+            elif error is None:
+                future.add_done_callback(_close)
+    if isinstance(fallback, Exception):
+        raise fallback
+    return fallback
+
+
+def _close(future):
+    """Release the connection of a copy that lost the race."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), "close", None)
+    if close is not None:
+        close()
+
+
+def _count(path, name):
+    key = (os.getpid(), group_for(path))
+    with _lock:
+        counters = _counters.setdefault(
+            key, {"requests": 0, "hedged": 0, "hedge_wins": 0, "budget_exhausted": 0}
+        )
+        counters[name] += 1
+
+
+def configure(**settings):
+    """Override ``DEFAULT_SETTINGS`` keys (unknown keys/None are ignored)."""
+    updates = {
+        key: value
+        for key, value in settings.items()
+        if key in DEFAULT_SETTINGS and value is not None
+    }
+    with _lock:
+        if any(_settings[key] != value for key, value in updates.items()):
+            _settings.update(updates)
+            _discard()
+
+
+def _discard():
+    executor = _state["executor"]
+    _state.update(pid=None, executor=None, budget=None)
+    _trackers.clear()
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def stats():
+    """``{group: {"requests", "hedged", "hedge_wins", "budget_exhausted",
+    "threshold"}}`` for this worker; ``threshold`` is None while the group
+    has too few latencies."""
+    pid = os.getpid()
+    with _lock:
+        counters = {
+            group: dict(values)
+            for (owner, group), values in _counters.items()
+            if owner == pid
+        }
+    for group, values in counters.items():
+        values["threshold"] = threshold(group)
+    return counters
+
+
+def reset():
+    """Forget latencies, counters and the pool; restore the defaults (tests)."""
+    with _lock:
+        _counters.clear()
+        _settings.clear()
+        _settings.update(DEFAULT_SETTINGS)
+        _discard()
@@ -0,0 +1,194 @@
+"""Process-wide pooled HTTP session for outbound OneCore calls.
+
+Every ``CoreApi`` instance (and every ``parallel_get_json`` worker thread)
+shares one ``requests.Session`` per OS process, so TCP/TLS connections to
+OneCore are kept alive and reused instead of being re-established per call.
+Odoo's prefork workers each get their own session: the owning PID is recorded
+and a forked child transparently builds a fresh one instead of sharing the
+parent's sockets.
+"""
+
+import logging
+import os
+import socket
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+# Keep-alive connections held per host. Should be >= the parallel fan-out
+# width, otherwise surplus connections are opened and discarded per wave.
+DEFAULT_POOL_SIZE = 16
+# Connections opened up-front the first time a worker talks to OneCore.
+DEFAULT_PREWARM_CONNECTIONS = 4
+_PREWARM_TIMEOUT = (5, 5)
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_config = {
+    "pool_size": DEFAULT_POOL_SIZE,
+    "keepalive": True,
+    "prewarm_connections": DEFAULT_PREWARM_CONNECTIONS,
+}
+_prewarmed = set()  # (pid, base_url) pairs already pre-warmed
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter that optionally enables TCP keep-alive probes on sockets.
+
+    Without probes an idle pooled connection can be silently dropped by a
+    NAT/load balancer and only discovered on the next request (which then
+    pays a reconnect anyway).
+    """
+
+    def __init__(self, keepalive=True, **kwargs):
+        self._keepalive = keepalive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self._keepalive:
+            from urllib3.connection import HTTPConnection
+
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+            ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = _KeepAliveAdapter(
+        keepalive=_config["keepalive"],
+        pool_connections=_config["pool_size"],
+        pool_maxsize=_config["pool_size"],
+        # Never block a caller waiting for a free connection; an overflow
+        # connection is opened and discarded instead.
+        pool_block=False,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+def configure(pool_size=None, keepalive=None, prewarm_connections=None):
+    """Update pool settings; the session is rebuilt lazily if they changed.
+
+    Args:
+        pool_size: Keep-alive connections held per host.
+        keepalive: Enable TCP keep-alive probes on pooled sockets.
+        prewarm_connections: Connections opened by ``prewarm``.
+    """
+    global _session
+    updates = {
+        "pool_size": pool_size,
+        "keepalive": keepalive,
+        "prewarm_connections": prewarm_connections,
+    }
+    updates = {key: value for key, value in updates.items() if value is not None}
+    with _lock:
+        if any(_config[key] != value for key, value in updates.items()):
+            _config.update(updates)
+            if _session is not None:
+                _session.close()
+            _session = None
+
+
+def get_session():
+    """Return this process' shared ``requests.Session``, creating it if needed."""
+    global _session, _session_pid
+    pid = os.getpid()
+    session = _session
+    if session is not None and _session_pid == pid:
+        return session
+    with _lock:
+        if _session is None or _session_pid != pid:
+            # First use, reconfiguration, or a forked worker: the parent's
+            # sockets are not ours to reuse.
+            _session = _build_session()
+            _session_pid = pid
+        return _session
+
+
+def prewarm(base_url):
+    """Open keep-alive connections to ``base_url`` in the background.
+
+    Called the first time a worker builds a ``CoreApi`` so the first real
+    user request doesn't pay the TCP/TLS handshake. Runs at most once per
+    process and base URL; failures are logged and otherwise ignored.
+    """
+    if not base_url:
+        return
+    key = (os.getpid(), base_url)
+    with _lock:
+        if key in _prewarmed:
+            return
+        _prewarmed.add(key)
+        count = min(_config["prewarm_connections"], _config["pool_size"])
+    if count <= 0:
+        return
+
+    session = get_session()
+
+    def _open_one():
+        try:
+            session.head(base_url, timeout=_PREWARM_TIMEOUT)
+        except Exception as err:
+            _logger.debug("OneCore connection pre-warm failed: %s", err)
+
+    # Concurrent HEADs force distinct connections into the pool; serial ones
+    # would all reuse the first.
+    for _ in range(count):
+        threading.Thread(
+            target=_open_one, name="onecore-prewarm", daemon=True
+        ).start()
+
+
+def pool_stats():
+    """Connection reuse counters for this process' session.
+
+    Returns:
+        dict: ``connections_opened`` (new TCP/TLS handshakes),
+        ``requests`` (requests sent over pooled connections),
+        ``connections_reused`` (requests that skipped a handshake),
+        ``pools`` (host pools currently held) and ``pool_size``.
+    """
+    opened = 0
+    sent = 0
+    pools = 0
+    session = _session
+    if session is not None and _session_pid == os.getpid():
+        seen = set()
+        for adapter in session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            container = adapter.poolmanager.pools
+            for key in list(container.keys()):
+                pool = container.get(key)
+                if pool is None:
+                    continue
+                pools += 1
+                opened += pool.num_connections
+                sent += pool.num_requests
+    return {
+        "connections_opened": opened,
+        "requests": sent,
+        "connections_reused": max(sent - opened, 0),
+        "pools": pools,
+        "pool_size": _config["pool_size"],
+    }
+
+
+def reset():
+    """Drop the shared session (tests, or after a configuration change)."""
+    global _session, _session_pid
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_pid = None
+        _prewarmed.clear()
@@ -0,0 +1,67 @@
+"""JSON encoding/decoding with a fast native backend when available.
+
+Every OneCore response is decoded, and the component wizard serialises room,
+category, type and subtype lists to JSON fields and parses them back on
+every onchange. ``orjson`` does both several times faster than the standard
+library; it is used when installed, with ``json`` as the fallback::
+
+    from odoo.addons.onecore_api import json_codec
+
+    field_value = json_codec.dumps(subtypes)   # always a str
+    subtypes = json_codec.loads(field_value)   # str or bytes
+
+Output is equivalent but not byte-identical between backends: ``orjson``
+writes compact UTF-8 (no ``\\u00e4`` escapes, no spaces after separators).
+Values ``orjson`` can't encode (e.g. non-string dict keys, integers beyond
+64 bits) are passed to ``json`` instead, so both backends accept the same
+input.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library is always there
+    orjson = None
+
+_state = {"backend": "orjson" if orjson is not None else "json"}
+
+
+def backend():
+    """Name of the backend in use: ``"orjson"`` or ``"json"``."""
+    return _state["backend"]
+
+
+def use(name=None):
+    """Select the backend (``"orjson"``/``"json"``); None picks the fastest.
+
+    Raises:
+        ValueError: For an unknown or uninstalled backend.
+    """
+    if name is None:
+        name = "orjson" if orjson is not None else "json"
+    if name not in ("orjson", "json") or (name == "orjson" and orjson is None):
+        raise ValueError(f"JSON backend {name!r} is not available")
+    _state["backend"] = name
+
+
+def loads(data):
+    """Decode a JSON document given as ``str`` or ``bytes``.
+
+    Raises:
+        ValueError: If ``data`` is not valid JSON (both backends' errors
+            subclass it).
+    """
+    if _state["backend"] == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value):
+    """Encode ``value`` as a JSON ``str``."""
+    if _state["backend"] == "orjson":
+        try:
+            return orjson.dumps(value).decode()
+        except TypeError:
+            pass
+    return json.dumps(value)
@@ -0,0 +1,233 @@
+"""Incremental decoding of the ``content`` array of OneCore list responses.
+
+``response.json()`` holds the whole body, then the whole object tree, in
+memory at once, although callers of the big list endpoints keep only some
+items and a handful of fields of each (the component wizard reads a few
+nested names per component). A caller that passes a ``StreamedList`` has
+the body read in chunks instead, and the ``content`` array decoded one item
+at a time; each item goes through ``keep`` and ``project`` as soon as it is
+decoded, so only what survives is ever retained::
+
+    ROOM_COMPONENTS = json_stream.StreamedList(
+        keep=lambda comp: not comp.get("deinstalled"),
+        project=json_stream.pick({"id": True, "model": {"modelName": True}}),
+        name="room_components",
+    )
+    api.parallel_get_json(paths, streams={path: ROOM_COMPONENTS for path in paths})
+
+The projection belongs to the call, not to the endpoint: ``CoreApi`` caches
+the projected content under its own key (with the stream's ``name``), so
+other readers of the same path still get the whole response. Non-list
+``content`` is returned whole. Only the standard library is used;
+``StreamedList.stats()`` counts items decoded and kept.
+"""
+
+import codecs
+import json
+import re
+import threading
+
+# Bytes read from the socket per chunk.
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+class _Reader:
+    """Text cursor over a chunked UTF-8 body; keeps only the unread tail."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.size = 0
+        self.eof = False
+
+    def _read(self):
+        """Append the next chunk; False once the body is exhausted."""
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            self.size += len(chunk)
+            self.buffer = self.buffer[self.pos:] + self._utf8.decode(chunk)
+            self.pos = 0
+            return True
+        if not self.eof:
+            self.eof = True
+            self.buffer = self.buffer[self.pos:] + self._utf8.decode(b"", final=True)
+            self.pos = 0
+        return False
+
+    def _read_more(self):
+        """Read until the unread text has doubled, so retried decodes of a
+        value split across many chunks stay linear overall."""
+        target = 2 * max(len(self.buffer) - self.pos, 1)
+        read = False
+        while len(self.buffer) - self.pos < target and self._read():
+            read = True
+        return read
+
+    def peek(self):
+        """Next non-whitespace character ("" at the end of the body)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._read_more():
+                    continue
+                raise
+            # A number or literal ending with the buffer may go on in the
+            # next chunk.
+            if (
+                end == len(self.buffer)
+                and self.buffer[end - 1] not in '}]"'
+                and self._read_more()
+            ):
+                continue
+            self.pos = end
+            return value
+
+    def drain(self):
+        """Read (and count) the rest of the body."""
+        while self._read():
+            self.pos = len(self.buffer)
+
+
+class StreamedList:
+    """Decoder for responses whose ``content`` is a (possibly large) array.
+
+    Args:
+        keep: Optional predicate; items it rejects are dropped as decoded.
+        project: Optional function mapping each kept item to what is
+            retained (e.g. from ``pick``).
+        name: Identifies the decoded shape in cache keys. Give a stable
+            name to share cached content across workers; without one, the
+            content is cached per instance.
+    """
+
+    def __init__(self, keep=None, project=None, name=None):
+        self.keep = keep
+        self.project = project
+        self.name = name or f"stream-{id(self):x}"
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.items = 0
+        self.kept = 0
+        self.bytes = 0
+
+    def decode(self, chunks):
+        """Decode a response body given as an iterable of byte chunks.
+
+        Returns:
+            ``(content, size)``: the ``content`` member (filtered and
+            projected if it is an array; None if absent) and the body length
+            in bytes.
+
+        Raises:
+            json.JSONDecodeError: If the body is not a JSON object.
+        """
+        reader = _Reader(chunks)
+        content = None
+        decoded = kept = 0
+        reader.expect("{")
+        if reader.peek() == "}":
+            reader.pos += 1
+        else:
+            while True:
+                key = reader.value()
+                reader.expect(":")
+                if key == "content" and reader.peek() == "[":
+                    content, decoded = self._items(reader)
+                    kept = len(content)
+                else:
+                    value = reader.value()
+                    if key == "content":
+                        content = value
+                if reader.peek() == ",":
+                    reader.pos += 1
+                    continue
+                reader.expect("}")
+                break
+        reader.drain()
+        with self._lock:
+            self.responses += 1
+            self.items += decoded
+            self.kept += kept
+            self.bytes += reader.size
+        return content, reader.size
+
+    def _items(self, reader):
+        keep, project = self.keep, self.project
+        items = []
+        decoded = 0
+        reader.expect("[")
+        if reader.peek() == "]":
+            reader.pos += 1
+            return items, decoded
+        while True:
+            item = reader.value()
+            decoded += 1
+            if keep is None or keep(item):
+                items.append(project(item) if project is not None else item)
+            separator = reader.buffer[reader.pos : reader.pos + 1]
+            if separator not in (",", "]"):
+                separator = reader.peek()
+            reader.pos += 1
+            if separator == "]":
+                return items, decoded
+            if separator != ",":
+                raise json.JSONDecodeError(
+                    "Expecting ',' delimiter", reader.buffer, reader.pos - 1
+                )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "items": self.items,
+                "kept": self.kept,
+                "bytes": self.bytes,
+            }
+
+
+def pick(spec):
+    """Build a projection keeping only the fields named in ``spec``.
+
+    ``spec`` maps field names to True (keep the value) or to a nested spec
+    (project a dict value, or each dict in a list value, the same way).
+    Missing fields are left out, so ``.get`` on the result behaves as on
+    the original.
+    """
+    fields = tuple(
+        (key, sub if sub is True else pick(sub)) for key, sub in spec.items()
+    )
+
+    def _project(value):
+        if isinstance(value, dict):
+            result = {}
+            for key, sub in fields:
+                if key in value:
+                    result[key] = value[key] if sub is True else sub(value[key])
+            return result
+        if isinstance(value, list):
+            return [_project(item) for item in value]
+        return value
+
+    return _project
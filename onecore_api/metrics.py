@@ -0,0 +1,525 @@
+"""Per-endpoint OneCore call metrics.
+
+Every OneCore call made through ``CoreApi`` (``request``, the threads of
+``parallel_get_json``, page prefetches and background revalidations) is
+counted per method and endpoint template (``/residences/by-rental-id/{id}``,
+see ``template_for``):
+
+* calls by outcome: the HTTP status, or ``timeout``, ``error``,
+  ``circuit_open`` or ``deadline`` when no response came back;
+* a latency histogram (``BUCKETS``, seconds, retries included);
+* retries, bytes received and sent (``Content-Length``), and response
+  cache hits and misses.
+
+The counters live in the worker. ``render`` formats them in the Prometheus
+text format. For Odoo's many workers, ``maybe_publish`` upserts a worker's
+counters into the UNLOGGED ``onecore_api_metrics`` table at most every
+``publish_seconds`` (on its own cursor, like ``shared_cache``), where the
+``onecore.api.stats`` model and the ``/onecore/metrics`` route of
+onecore_maintenance_extension add them up across workers. That extension
+publishes from its cron and its scrape route, never from a OneCore call.
+Recording is cheap and never raises into the call it measures.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+import requests
+
+try:
+    from .circuit_breaker import CircuitOpenError
+    from .deadlines import DeadlineExceeded
+    from .shared_cache import odoo_cursor_factory
+except ImportError:  # imported as a top-level module (standalone pytest suite)
+    from circuit_breaker import CircuitOpenError
+    from deadlines import DeadlineExceeded
+    from shared_cache import odoo_cursor_factory
+
+_logger = logging.getLogger(__name__)
+
+TABLE = "onecore_api_metrics"
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied.
+BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Endpoint label of the templates beyond ``max_endpoints`` (keeps the number
+# of series bounded if ids slip into templates).
+OTHER = "other"
+
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "max_endpoints": 200,
+    # Seconds between publications to the shared table; 0 disables them.
+    "publish_seconds": 0,
+}
+
+_lock = threading.Lock()
+_settings = dict(DEFAULT_SETTINGS)
+_series = {}  # (pid, method, template) -> counters, see _new_series
+_published = {}  # pid -> monotonic time of the last publication
+_stores = {}  # dbname -> PostgresMetricsStore
+
+
+def template_for(path):
+    """Endpoint template of a OneCore path: the query dropped, and every
+    segment after a ``by-...`` segment or containing a digit replaced by
+    ``{id}``."""
+    segments = path.split("?", 1)[0].strip("/").split("/")
+    template = []
+    previous = ""
+    for segment in segments:
+        if previous.startswith("by-") or any(char.isdigit() for char in segment):
+            template.append("{id}")
+        else:
+            template.append(segment)
+        previous = segment
+    return "/" + "/".join(template)
+
+
+def _new_series():
+    return {
+        "responses": {},
+        "retries": 0,
+        "bytes_in": 0,
+        "bytes_out": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "duration_sum": 0.0,
+        "buckets": {},
+    }
+
+
+def _series_for(method, path):
+    """This worker's counters for ``path``'s template; call under ``_lock``."""
+    pid = os.getpid()
+    template = template_for(path)
+    key = (pid, method, template)
+    series = _series.get(key)
+    if series is None:
+        endpoints = sum(1 for owner, *_rest in _series if owner == pid)
+        if endpoints >= _settings["max_endpoints"]:
+            key = (pid, method, OTHER)
+            series = _series.get(key)
+        if series is None:
+            series = _series[key] = _new_series()
+    return series
+
+
+def bucket_for(seconds):
+    """The ``le`` label of the histogram bucket ``seconds`` falls in."""
+    for bound in BUCKETS:
+        if seconds <= bound:
+            return repr(bound)
+    return "+Inf"
+
+
+def outcome_of(response=None, error=None):
+    """Outcome label of a call: the status code, or the kind of error."""
+    if error is None:
+        return str(getattr(response, "status_code", "error"))
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, DeadlineExceeded):
+        return "deadline"
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    return "error"
+
+
+def _content_length(headers):
+    try:
+        return int(headers.get("Content-Length") or 0)
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
+def observe(method, path, seconds, response=None, error=None, attempts=1):
+    """Count one call to ``path`` that took ``seconds`` over ``attempts``
+    attempts and ended with ``response`` or ``error``."""
+    if not _settings["enabled"]:
+        return
+    outcome = outcome_of(response, error)
+    bytes_in = bytes_out = 0
+    if response is not None:
+        bytes_in = _content_length(getattr(response, "headers", None))
+        sent = getattr(response, "request", None)
+        bytes_out = _content_length(getattr(sent, "headers", None))
+    bucket = bucket_for(seconds)
+    with _lock:
+        series = _series_for(method, path)
+        series["responses"][outcome] = series["responses"].get(outcome, 0) + 1
+        series["retries"] += max(attempts - 1, 0)
+        series["bytes_in"] += bytes_in
+        series["bytes_out"] += bytes_out
+        series["duration_sum"] += seconds
+        series["buckets"][bucket] = series["buckets"].get(bucket, 0) + 1
+
+
+def cache_lookup(path, hit):
+    """Count a response cache hit or miss for ``path``."""
+    if not _settings["enabled"]:
+        return
+    with _lock:
+        series = _series_for("GET", path)
+        series["cache_hits" if hit else "cache_misses"] += 1
+
+
+def is_error(outcome):
+    """Whether an outcome counts as an error: a 5xx or no response at all."""
+    return not outcome.isdigit() or int(outcome) >= 500
+
+
+def snapshot():
+    """This worker's counters: a JSON-safe list of series, each with
+    ``method`` and ``endpoint`` plus the counters (see ``_new_series``)."""
+    pid = os.getpid()
+    with _lock:
+        return [
+            dict(
+                json.loads(json.dumps(series)),
+                method=method,
+                endpoint=template,
+            )
+            for (owner, method, template), series in sorted(_series.items())
+            if owner == pid
+        ]
+
+
+def merge(snapshots):
+    """Add up several workers' ``snapshot()`` lists, per method and endpoint."""
+    merged = {}
+    for series_list in snapshots:
+        for series in series_list:
+            key = (series["method"], series["endpoint"])
+            total = merged.get(key)
+            if total is None:
+                total = merged[key] = dict(
+                    _new_series(), method=key[0], endpoint=key[1]
+                )
+            for name in ("responses", "buckets"):
+                for label, count in series.get(name, {}).items():
+                    total[name][label] = total[name].get(label, 0) + count
+            for name in (
+                "retries",
+                "bytes_in",
+                "bytes_out",
+                "cache_hits",
+                "cache_misses",
+                "duration_sum",
+            ):
+                total[name] += series.get(name, 0)
+    return [merged[key] for key in sorted(merged)]
+
+
+def summary(series):
+    """Flat totals of one series: calls, errors, timeouts and the rest."""
+    responses = series["responses"]
+    calls = sum(responses.values())
+    return {
+        "requests": calls,
+        "errors": sum(
+            count for outcome, count in responses.items() if is_error(outcome)
+        ),
+        "timeouts": responses.get("timeout", 0),
+        "retries": series["retries"],
+        "bytes_in": series["bytes_in"],
+        "bytes_out": series["bytes_out"],
+        "cache_hits": series["cache_hits"],
+        "cache_misses": series["cache_misses"],
+        "duration_sum": series["duration_sum"],
+    }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    pairs = (f'{name}="{_label(value)}"' for name, value in labels.items())
+    return "{%s}" % ",".join(pairs)
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+FAMILIES = (
+    (
+        "onecore_requests_total",
+        "counter",
+        "OneCore calls by outcome (HTTP status, timeout, error, circuit_open, "
+        "deadline).",
+    ),
+    (
+        "onecore_request_duration_seconds",
+        "histogram",
+        "OneCore call latency, retries included.",
+    ),
+    ("onecore_retries_total", "counter", "OneCore call attempts that were retries."),
+    (
+        "onecore_received_bytes_total",
+        "counter",
+        "Response bytes received from OneCore (Content-Length).",
+    ),
+    (
+        "onecore_sent_bytes_total",
+        "counter",
+        "Request bytes sent to OneCore (Content-Length).",
+    ),
+    (
+        "onecore_cache_lookups_total",
+        "counter",
+        "OneCore response cache lookups by result.",
+    ),
+)
+
+
+def render(series_list):
+    """Prometheus text exposition (format 0.0.4) of ``series_list``."""
+    samples = {name: [] for name, _kind, _help in FAMILIES}
+    for series in series_list:
+        base = {"method": series["method"], "endpoint": series["endpoint"]}
+        for outcome, count in sorted(series["responses"].items()):
+            samples["onecore_requests_total"].append(
+                _labels(**base, outcome=outcome) + f" {count}"
+            )
+        calls = sum(series["responses"].values())
+        if calls:
+            histogram = samples["onecore_request_duration_seconds"]
+            cumulative = 0
+            for bound in [repr(bound) for bound in BUCKETS] + ["+Inf"]:
+                cumulative += series["buckets"].get(bound, 0)
+                histogram.append(f"_bucket{_labels(**base, le=bound)} {cumulative}")
+            histogram.append(
+                f"_sum{_labels(**base)} {_number(series['duration_sum'])}"
+            )
+            histogram.append(f"_count{_labels(**base)} {calls}")
+            for name, key in (
+                ("onecore_retries_total", "retries"),
+                ("onecore_received_bytes_total", "bytes_in"),
+                ("onecore_sent_bytes_total", "bytes_out"),
+            ):
+                samples[name].append(f"{_labels(**base)} {series[key]}")
+        for result, key in (("hit", "cache_hits"), ("miss", "cache_misses")):
+            if series[key]:
+                samples["onecore_cache_lookups_total"].append(
+                    f"{_labels(**base, result=result)} {series[key]}"
+                )
+    lines = []
+    for name, kind, help_text in FAMILIES:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{name}{sample}" for sample in samples[name])
+    return "\n".join(lines) + "\n"
+
+
+def worker_id():
+    """Identifies this worker's rows in the shared table."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class PostgresMetricsStore:
+    """Workers' published counters in an UNLOGGED Postgres table.
+
+    One row per worker, method and endpoint, with the totals the
+    ``onecore.api.stats`` view adds up as columns and the histogram and
+    outcomes as JSON.
+
+    Args:
+        cursor_factory: Callable returning a new cursor usable as a context
+            manager that commits on exit (e.g. ``registry.cursor``).
+    """
+
+    COLUMNS = (
+        "requests",
+        "errors",
+        "timeouts",
+        "retries",
+        "bytes_in",
+        "bytes_out",
+        "cache_hits",
+        "cache_misses",
+        "duration_sum",
+    )
+
+    def __init__(self, cursor_factory):
+        self._cursor_factory = cursor_factory
+        self._table_ready = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def ensure_table(cr):
+        """Create the metrics table if missing."""
+        cr.execute(
+            f"""
+            CREATE UNLOGGED TABLE IF NOT EXISTS {TABLE} (
+                worker varchar NOT NULL,
+                method varchar NOT NULL,
+                endpoint varchar NOT NULL,
+                requests bigint NOT NULL DEFAULT 0,
+                errors bigint NOT NULL DEFAULT 0,
+                timeouts bigint NOT NULL DEFAULT 0,
+                retries bigint NOT NULL DEFAULT 0,
+                bytes_in bigint NOT NULL DEFAULT 0,
+                bytes_out bigint NOT NULL DEFAULT 0,
+                cache_hits bigint NOT NULL DEFAULT 0,
+                cache_misses bigint NOT NULL DEFAULT 0,
+                duration_sum double precision NOT NULL DEFAULT 0,
+                detail text NOT NULL,
+                updated_at timestamp NOT NULL,
+                PRIMARY KEY (worker, method, endpoint)
+            )
+            """
+        )
+
+    def _cursor(self):
+        cr = self._cursor_factory()
+        if not self._table_ready:
+            try:
+                with self._lock:
+                    if not self._table_ready:
+                        self.ensure_table(cr)
+                        self._table_ready = True
+            except Exception:
+                cr.close()
+                raise
+        return cr
+
+    def publish(self, worker, series_list):
+        """Replace ``worker``'s rows with ``series_list``."""
+        if not series_list:
+            return
+        rows = []
+        for series in series_list:
+            totals = summary(series)
+            detail = json.dumps(
+                {"responses": series["responses"], "buckets": series["buckets"]}
+            )
+            rows.append(
+                (worker, series["method"], series["endpoint"])
+                + tuple(totals[column] for column in self.COLUMNS)
+                + (detail,)
+            )
+        columns = ("worker", "method", "endpoint") + self.COLUMNS + ("detail",)
+        placeholders = "(%s)" % ", ".join(
+            ["%s"] * len(columns) + ["now() at time zone 'utc'"]
+        )
+        with self._cursor() as cr:
+            cr.execute(
+                f"INSERT INTO {TABLE} ({', '.join(columns)}, updated_at) "
+                f"VALUES {', '.join([placeholders] * len(rows))} "
+                "ON CONFLICT (worker, method, endpoint) DO UPDATE SET "
+                + ", ".join(
+                    f"{column} = EXCLUDED.{column}"
+                    for column in self.COLUMNS + ("detail", "updated_at")
+                ),
+                [value for row in rows for value in row],
+            )
+
+    @staticmethod
+    def read(cr):
+        """Every worker's rows as ``snapshot()`` lists, for ``merge``."""
+        cr.execute(
+            f"SELECT worker, method, endpoint, retries, bytes_in, bytes_out, "
+            f"cache_hits, cache_misses, duration_sum, detail FROM {TABLE}"
+        )
+        by_worker = {}
+        for worker, method, endpoint, *totals, detail in cr.fetchall():
+            series = dict(
+                json.loads(detail),
+                method=method,
+                endpoint=endpoint,
+                **dict(
+                    zip(
+                        (
+                            "retries",
+                            "bytes_in",
+                            "bytes_out",
+                            "cache_hits",
+                            "cache_misses",
+                            "duration_sum",
+                        ),
+                        totals,
+                    )
+                ),
+            )
+            by_worker.setdefault(worker, []).append(series)
+        return list(by_worker.values())
+
+    @staticmethod
+    def delete_stale(cr, max_age_seconds):
+        """Delete rows of workers silent for ``max_age_seconds``; returns
+        the number removed."""
+        cr.execute(
+            f"DELETE FROM {TABLE} "
+            "WHERE updated_at < (now() at time zone 'utc') - %s * interval '1 second'",
+            (max_age_seconds,),
+        )
+        return cr.rowcount
+
+
+def store_for(dbname):
+    """This worker's ``PostgresMetricsStore`` for ``dbname``."""
+    store = _stores.get(dbname)
+    if store is None:
+        with _lock:
+            store = _stores.setdefault(
+                dbname, PostgresMetricsStore(odoo_cursor_factory(dbname))
+            )
+    return store
+
+
+def maybe_publish(dbname, force=False):
+    """Publish this worker's counters for ``dbname`` if ``publish_seconds``
+    have passed since the last time (or ``force``); True if published.
+
+    Failures are logged and swallowed: metrics never fail a OneCore call.
+    """
+    interval = _settings["publish_seconds"]
+    if not dbname or not (interval or force):
+        return False
+    pid = os.getpid()
+    now = time.monotonic()
+    with _lock:
+        last = _published.get(pid)
+        if not force and last is not None and now - last < interval:
+            return False
+        _published[pid] = now
+    try:
+        store_for(dbname).publish(worker_id(), snapshot())
+    except Exception as err:
+        _logger.warning("Could not publish OneCore metrics: %s", err)
+        return False
+    return True
+
+
+def configure(**settings):
+    """Override ``DEFAULT_SETTINGS`` keys (unknown keys/None are ignored)."""
+    with _lock:
+        _settings.update(
+            {
+                key: value
+                for key, value in settings.items()
+                if key in DEFAULT_SETTINGS and value is not None
+            }
+        )
+
+
+def stats():
+    """``{"METHOD /endpoint": summary}`` for this worker (see ``summary``)."""
+    return {
+        f"{series['method']} {series['endpoint']}": summary(series)
+        for series in snapshot()
+    }
+
+
+def reset():
+    """Forget counters and restore the defaults (tests)."""
+    with _lock:
+        _series.clear()
+        _published.clear()
+        _stores.clear()
+        _settings.clear()
+        _settings.update(DEFAULT_SETTINGS)
@@ -0,0 +1,324 @@
+"""Compact typed views of the OneCore payloads the maintenance forms use.
+
+Handlers and services used to chase nested dicts (``lease["tenants"]``,
+``property_data["building"].get("code")``, ``.get(...) or {}`` chains).
+The classes here decode a payload once: required fields are checked up
+front and only the fields we read are kept, flattened into ``__slots__``
+attributes::
+
+    lease = payloads.Lease.decode(item["lease"])
+    for tenant in lease.tenants:
+        tenant.name, tenant.phone_number
+
+``decode`` returns an already-decoded object unchanged, so code can take
+either raw dicts or objects. A missing required field raises
+``PayloadError``; optional fields default to None (or an empty list).
+
+The response cache keeps the raw JSON content: it is shared with other
+workers through Postgres and revalidated in place, so objects are decoded
+from it per request rather than stored in it.
+"""
+
+
+class PayloadError(ValueError):
+    """A OneCore payload is not an object or lacks a required field."""
+
+
+def _section(data, key):
+    """Nested object ``data[key]``, or an empty dict if absent or null."""
+    value = data.get(key)
+    return value if isinstance(value, dict) else {}
+
+
+def _path(*keys, default=None):
+    """Field source reading ``data[keys[0]][keys[1]]...``, through absent or
+    null objects, with ``default`` for a missing last key."""
+    *sections, last = keys
+
+    def _read(data):
+        for key in sections:
+            data = _section(data, key)
+        return data.get(last, default)
+
+    return _read
+
+
+def _year(value):
+    return str(value) if value else None
+
+
+class _Payload:
+    """Base class: slots-only fields, keyword construction and decoding.
+
+    Each subclass declares ``FIELDS``, mapping its attributes (in order) to
+    their source in the raw payload: a key, or a function of the payload
+    dict. ``__slots__`` is ``tuple(FIELDS)``.
+    """
+
+    __slots__ = ()
+
+    # Attribute name -> raw key or ``function(data)``; set by every subclass.
+    FIELDS = None
+    # Keys that must be present in the raw payload.
+    REQUIRED = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.FIELDS is None or cls.__slots__ != tuple(cls.FIELDS):
+            raise TypeError(
+                f"{cls.__name__} must declare FIELDS and __slots__ = tuple(FIELDS)"
+            )
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.pop(name, None))
+        if values:
+            raise TypeError(
+                f"{type(self).__name__} has no field(s) {', '.join(sorted(values))}"
+            )
+
+    @classmethod
+    def decode(cls, data):
+        """Build an object from a raw payload dict.
+
+        Returns:
+            The decoded object; ``data`` itself if it already is one.
+
+        Raises:
+            PayloadError: If ``data`` is not a dict or lacks a required key.
+        """
+        if isinstance(data, cls):
+            return data
+        if not isinstance(data, dict):
+            raise PayloadError(
+                f"{cls.__name__}: expected an object, got {type(data).__name__}"
+            )
+        missing = [key for key in cls.REQUIRED if key not in data]
+        if missing:
+            raise PayloadError(f"{cls.__name__}: missing {', '.join(missing)}")
+        return cls(
+            **{
+                name: source(data) if callable(source) else data.get(source)
+                for name, source in cls.FIELDS.items()
+            }
+        )
+
+    @classmethod
+    def decode_many(cls, items):
+        """Decode each payload of a list (None gives an empty list)."""
+        return [cls.decode(item) for item in items or ()]
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+def _tenant_name(data):
+    first_name, last_name = data.get("firstName"), data.get("lastName")
+    if first_name and last_name:
+        return first_name + " " + last_name
+    return data.get("fullName", "")
+
+
+def _main_phone_number(data):
+    return next(
+        (
+            number.get("phoneNumber")
+            for number in data.get("phoneNumbers") or ()
+            if number.get("isMainNumber") == 1
+        ),
+        None,
+    )
+
+
+class Tenant(_Payload):
+    """A contact on a lease."""
+
+    FIELDS = {
+        "contact_code": "contactCode",
+        "contact_key": "contactKey",
+        "name": _tenant_name,
+        "national_registration_number": "nationalRegistrationNumber",
+        "email_address": "emailAddress",
+        "phone_number": _main_phone_number,
+        "is_tenant": "isTenant",
+        "special_attention": "specialAttention",
+    }
+    __slots__ = tuple(FIELDS)
+    REQUIRED = ("contactCode", "contactKey", "isTenant")
+
+
+class Lease(_Payload):
+    """A lease and its tenants."""
+
+    FIELDS = {
+        "lease_id": "leaseId",
+        "lease_number": "leaseNumber",
+        "type": "type",
+        "status": "status",
+        "start_date": "leaseStartDate",
+        "last_debit_date": "lastDebitDate",
+        "contract_date": "contractDate",
+        "approval_date": "approvalDate",
+        "tenants": lambda data: Tenant.decode_many(data.get("tenants")),
+    }
+    __slots__ = tuple(FIELDS)
+    REQUIRED = (
+        "leaseId",
+        "leaseNumber",
+        "type",
+        "leaseStartDate",
+        "lastDebitDate",
+        "contractDate",
+        "approvalDate",
+    )
+
+
+class Staircase(_Payload):
+    """A staircase of a building."""
+
+    FIELDS = {
+        "id": "id",
+        "name": "name",
+        "code": "code",
+        "floor_plan": _path("features", "floorPlan"),
+        "accessible_by_elevator": _path(
+            "features", "accessibleByElevator", default=False
+        ),
+    }
+    __slots__ = tuple(FIELDS)
+    REQUIRED = ("id", "name", "code")
+
+
+class Residence(_Payload):
+    """A rental property (residence) with its estate and building."""
+
+    FIELDS = {
+        "code": "code",
+        "name": "name",
+        "rental_id": _path("rentalInformation", "rentalId"),
+        "type_name": _path("type", "name"),
+        "area": "areaSize",
+        "entrance": "entrance",
+        "has_elevator": lambda data: bool(_path("accessibility", "elevator")(data)),
+        "estate_code": _path("property", "code"),
+        "estate": _path("property", "name"),
+        "building_code": _path("building", "code"),
+        "building": _path("building", "name"),
+        "staircase": lambda data: (
+            Staircase.decode(data["staircase"]) if data.get("staircase") else None
+        ),
+    }
+    __slots__ = tuple(FIELDS)
+    # The keys the rental property handlers have always indexed directly.
+    REQUIRED = (
+        "code",
+        "name",
+        "areaSize",
+        "entrance",
+        "rentalInformation",
+        "type",
+        "accessibility",
+        "property",
+        "building",
+    )
+
+
+class MaintenanceUnit(_Payload):
+    """A maintenance unit (laundry room, bike storage, ...)."""
+
+    FIELDS = {"id": "id", "caption": "caption", "type": "type", "code": "code"}
+    __slots__ = tuple(FIELDS)
+    REQUIRED = ("id", "caption", "type", "code")
+
+
+class Building(_Payload):
+    """A building, with the sub-resources ``CoreApi`` attached to it."""
+
+    FIELDS = {
+        "code": "code",
+        "name": _path("name", default=""),
+        "type_name": _path("buildingType", "name"),
+        "construction_year": lambda data: _year(
+            _path("construction", "constructionYear")(data)
+        ),
+        "renovation_year": lambda data: _year(
+            _path("construction", "renovationYear")(data)
+        ),
+        "maintenance_units": lambda data: MaintenanceUnit.decode_many(
+            data.get("maintenance_units")
+        ),
+        "staircases": lambda data: Staircase.decode_many(data.get("staircases")),
+    }
+    __slots__ = tuple(FIELDS)
+    REQUIRED = ("code",)
+
+
+class Room(_Payload):
+    """A room (property object) of a residence."""
+
+    FIELDS = {"id": "propertyObjectId", "name": _path("name", default="Okänt rum")}
+    __slots__ = tuple(FIELDS)
+    REQUIRED = ("propertyObjectId",)
+
+
+def _installation(data):
+    """The first installation of a component (an empty dict if none)."""
+    installations = data.get("componentInstallations") or ()
+    return installations[0] if installations else {}
+
+
+def _installation_date(data):
+    # YYYY-MM-DD of an ISO timestamp
+    installation_date = _installation(data).get("installationDate")
+    return installation_date[:10] if installation_date else None
+
+
+class Component(_Payload):
+    """An installed component, flattened with its model, subtype, type and
+    category names."""
+
+    FIELDS = {
+        "id": "id",
+        "serial_number": "serialNumber",
+        "warranty_months": "warrantyMonths",
+        "specifications": "specifications",
+        "ncs_code": "ncsCode",
+        "additional_information": "additionalInformation",
+        "condition": "condition",
+        "price_at_purchase": lambda data: data.get("priceAtPurchase") or 0,
+        "depreciation_price_at_purchase": lambda data: (
+            data.get("depreciationPriceAtPurchase") or 0
+        ),
+        "economic_lifespan": lambda data: data.get("economicLifespan") or 0,
+        "installation_id": lambda data: _installation(data).get("id"),
+        "installation_date": _installation_date,
+        "deinstalled": lambda data: bool(
+            _installation(data).get("deinstallationDate")
+        ),
+        "model_id": _path("model", "id"),
+        "model_name": _path("model", "modelName"),
+        "manufacturer": _path("model", "manufacturer"),
+        "subtype_name": _path("model", "subtype", "subTypeName"),
+        "technical_lifespan": lambda data: (
+            _path("model", "subtype", "technicalLifespan")(data) or 0
+        ),
+        "replacement_interval": lambda data: (
+            _path("model", "subtype", "replacementIntervalMonths")(data) or 0
+        ),
+        "type_name": _path("model", "subtype", "componentType", "typeName"),
+        "category_name": _path(
+            "model", "subtype", "componentType", "category", "categoryName"
+        ),
+    }
+    __slots__ = tuple(FIELDS)
+    REQUIRED = ("id",)
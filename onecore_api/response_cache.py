@@ -0,0 +1,559 @@
+"""In-process TTL/LRU cache for idempotent OneCore GET responses.
+
+``CoreApi._get_json`` consults this cache before going to the network. Which
+endpoints are cached, and for how long, is decided by a ``CachePolicy``
+matched on the request path prefix; paths without a policy are never cached,
+and leases and components (which change under the user's feet) are only kept
+for conditional requests, see below.
+
+Each policy gets its own LRU bounded by entry count and by a byte budget
+(measured on the raw response body), and may cache negative results — 404s
+and empty ``content`` — for a shorter TTL so repeated searches for a
+non-existent object don't hit OneCore either.
+
+Entries are stored once and handed out as copies, so callers may mutate what
+they get back without poisoning the cache.
+
+Policies with a ``stale_ttl`` are stale-while-revalidate: for ``stale_ttl``
+seconds after an entry expires it is still returned immediately, and a
+single background refresh is scheduled to replace it. Reads of rarely
+changing data (building metadata, maintenance units, component categories,
+residence rental blocks) therefore only block on OneCore when the cache is
+cold, never when it is merely old.
+
+Responses carrying an ``ETag`` or ``Last-Modified`` header keep those
+validators next to the parsed content. Once an entry is no longer fresh it is
+not dropped but kept for a conditional GET: ``validators`` returns the
+``If-None-Match``/``If-Modified-Since`` headers to send, and on a 304
+``revalidated`` renews the entry and hands back the stored content, so
+neither the body nor its JSON decode is paid again. Policies with ``ttl=0``
+(leases, components by room) are never served without asking OneCore, but
+still profit from 304s. Validators are kept in this worker only; the shared
+level stores fresh content, as before.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+_logger = logging.getLogger(__name__)
+
+MISS = object()
+# Returned by a revalidation job when OneCore answered 304 Not Modified.
+NOT_MODIFIED = object()
+
+# Background stale-while-revalidate refreshes run on a small per-worker pool.
+_REFRESH_WORKERS = 4
+
+
+class CachePolicy:
+    """How one group of endpoints is cached.
+
+    Args:
+        name: Short label used in stats/logs.
+        ttl: Seconds a positive entry is fresh.
+        max_entries: LRU entry cap.
+        max_bytes: Byte budget (sum of response body sizes).
+        negative_ttl: Seconds a 404/empty result is cached; 0 disables.
+        stale_ttl: Seconds an expired positive entry may still be served while
+            it is refreshed in the background; 0 disables.
+    """
+
+    def __init__(
+        self,
+        name,
+        ttl,
+        max_entries=1000,
+        max_bytes=8 * 1024 * 1024,
+        negative_ttl=60,
+        stale_ttl=0,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+
+
+# (path prefix, policy). First match wins, so list specific prefixes first.
+DEFAULT_POLICIES = [
+    (
+        "/residences/by-rental-id/",
+        CachePolicy("residence", ttl=300, max_entries=2000, stale_ttl=1800),
+    ),
+    (
+        "/buildings/by-building-code/",
+        CachePolicy("building", ttl=900, stale_ttl=6 * 3600),
+    ),
+    (
+        "/buildings/by-property-code/",
+        CachePolicy("buildings_for_property", ttl=900, stale_ttl=6 * 3600),
+    ),
+    (
+        "/maintenance-units/",
+        CachePolicy("maintenance_units", ttl=900, stale_ttl=6 * 3600),
+    ),
+    ("/staircases", CachePolicy("staircases", ttl=900, stale_ttl=6 * 3600)),
+    ("/parking-spaces/by-rental-id/", CachePolicy("parking_space", ttl=300)),
+    ("/facilities/by-rental-id/", CachePolicy("facility", ttl=300)),
+    # Always revalidated with OneCore; stored only for ETag/Last-Modified 304s.
+    ("/leases/", CachePolicy("leases", ttl=0, max_entries=500, negative_ttl=0)),
+    (
+        "/components/by-room/",
+        CachePolicy("components", ttl=0, max_entries=2000, negative_ttl=0),
+    ),
+    ("/rooms", CachePolicy("rooms", ttl=900, max_entries=2000, stale_ttl=3600)),
+    (
+        "/component-categories",
+        CachePolicy(
+            "component_categories", ttl=3600, max_entries=10, stale_ttl=24 * 3600
+        ),
+    ),
+    (
+        "/component-types",
+        CachePolicy("component_types", ttl=3600, max_entries=200, stale_ttl=24 * 3600),
+    ),
+    (
+        "/component-subtypes",
+        CachePolicy(
+            "component_subtypes", ttl=3600, max_entries=1000, stale_ttl=24 * 3600
+        ),
+    ),
+]
+
+
+def copy_json(value):
+    """Copy a JSON-shaped value (much cheaper than ``copy.deepcopy``)."""
+    if isinstance(value, dict):
+        return {key: copy_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_json(item) for item in value]
+    return value
+
+
+def _is_empty(content):
+    return content is None or content == [] or content == {}
+
+
+class _Entry:
+    __slots__ = ("expires_at", "stale_until", "content", "status", "size", "validators")
+
+    def __init__(self, expires_at, content, status, size, stale_ttl=0, validators=None):
+        self.expires_at = expires_at
+        # Negative entries (404s and empty content) are never served stale:
+        # an empty answer may be a transient one.
+        if status is not None or _is_empty(content):
+            stale_ttl = 0
+        self.stale_until = expires_at + stale_ttl
+        self.content = content
+        self.status = status  # None for a positive entry, else the HTTP status
+        self.size = size
+        # Conditional GET headers ({"If-None-Match": ...}) or None.
+        self.validators = validators
+
+
+class _Bucket:
+    """One policy's LRU store plus counters."""
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.not_modified = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+        return entry
+
+    def put(self, key, entry):
+        self.pop(key)
+        self.entries[key] = entry
+        self.bytes += entry.size
+        policy = self.policy
+        while self.entries and (
+            len(self.entries) > policy.max_entries or self.bytes > policy.max_bytes
+        ):
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+
+class ResponseCache:
+    """Thread-safe per-policy LRU cache of parsed ``content`` values."""
+
+    def __init__(self, policies=None):
+        self._lock = threading.Lock()
+        self._policies = list(DEFAULT_POLICIES if policies is None else policies)
+        self._buckets = {}
+        self._refreshing = set()  # keys with a background refresh in flight
+        self._executor = None
+        self._executor_pid = None
+
+    def policy_for(self, path):
+        """Return the ``CachePolicy`` for ``path``, or None if uncached."""
+        for prefix, policy in self._policies:
+            if path.startswith(prefix):
+                return policy
+        return None
+
+    def set_policy(self, prefix, policy):
+        """Add or replace the policy for ``prefix`` (None removes it)."""
+        with self._lock:
+            for existing_prefix, existing in self._policies:
+                if existing_prefix == prefix:
+                    self._buckets.pop(existing.name, None)
+            self._policies = [(p, pol) for p, pol in self._policies if p != prefix]
+            if policy is not None:
+                self._policies.insert(0, (prefix, policy))
+
+    def _bucket(self, policy):
+        bucket = self._buckets.get(policy.name)
+        if bucket is None or bucket.policy is not policy:
+            bucket = self._buckets[policy.name] = _Bucket(policy)
+        return bucket
+
+    def get(self, policy, key, shared=None, revalidate=None):
+        """Return a copy of the fresh cached content, or ``MISS``.
+
+        Args:
+            policy: The path's ``CachePolicy``.
+            key: ``make_key`` tuple.
+            shared: Optional ``shared_cache`` backend consulted on an L1 miss.
+            revalidate: Optional callable ``revalidate(key) -> job``; when a
+                stale entry is served, it is called on the current thread and
+                the returned zero-argument ``job`` (``-> (content, size)``)
+                runs in the background to refresh the entry. The job may also
+                return ``(content, size, validators)``, or ``NOT_MODIFIED``
+                after a 304. It must not touch the ORM.
+
+        Raises:
+            requests.HTTPError: If a negative (404) entry is cached.
+        """
+        entry = self._lookup(policy, [key], shared, revalidate)[0]
+        if entry is None:
+            return MISS
+        if entry.status is not None:
+            _raise_status(entry.status, key)
+        return copy_json(entry.content)
+
+    def get_many(self, policy, keys, shared=None, revalidate=None):
+        """Bulk ``get``: one shared-backend round trip for all L1 misses.
+
+        Returns:
+            list aligned with ``keys``; each item is a copy of the content,
+            ``MISS``, or None for a cached 404 (never raises).
+        """
+        results = []
+        for entry in self._lookup(policy, keys, shared, revalidate):
+            if entry is None:
+                results.append(MISS)
+            elif entry.status is not None:
+                results.append(None)
+            else:
+                results.append(copy_json(entry.content))
+        return results
+
+    def _lookup(self, policy, keys, shared, revalidate=None):
+        now = time.monotonic()
+        found = {}
+        misses = []
+        stale = []
+        with self._lock:
+            bucket = self._bucket(policy)
+            for key in keys:
+                entry = bucket.entries.get(key)
+                if entry is not None and entry.expires_at <= now:
+                    if revalidate is not None and entry.stale_until > now:
+                        bucket.stale_hits += 1
+                        stale.append(key)
+                    else:
+                        if entry.validators is None:
+                            bucket.pop(key)
+                        # else: kept for a conditional GET (see validators()).
+                        entry = None
+                if entry is None:
+                    bucket.misses += 1
+                    misses.append(key)
+                    continue
+                bucket.entries.move_to_end(key)
+                bucket.hits += 1
+                found[key] = entry
+
+        for key in stale:
+            self._schedule_refresh(policy, key, revalidate, shared)
+        if misses and shared is not None:
+            found.update(self._shared_get(policy, shared, misses))
+        return [found.get(key) for key in keys]
+
+    def _schedule_refresh(self, policy, key, revalidate, shared):
+        """Refresh one stale entry off the request path (once per key)."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        try:
+            job = revalidate(key)
+            executor = self._refresh_executor()
+            executor.submit(self._run_refresh, policy, key, job, shared)
+        except Exception as err:
+            with self._lock:
+                self._refreshing.discard(key)
+            _logger.warning("Could not schedule OneCore cache refresh: %s", err)
+
+    def _run_refresh(self, policy, key, job, shared):
+        try:
+            outcome = job()
+            if outcome is NOT_MODIFIED:
+                self.revalidated(policy, key)
+            else:
+                content, size, validators = _pad(outcome, 3)
+                self.put(
+                    policy,
+                    key,
+                    content,
+                    size=size,
+                    shared=shared,
+                    validators=validators,
+                )
+            with self._lock:
+                self._bucket(policy).refreshes += 1
+        except requests.HTTPError as err:
+            status = getattr(err.response, "status_code", None)
+            if status == 404:
+                self.put_status(policy, key, 404, shared=shared)
+            else:
+                _logger.warning("Background refresh of %s failed: %s", key[1], err)
+        except Exception as err:
+            # Keep serving the stale value until it leaves the stale window.
+            _logger.warning("Background refresh of %s failed: %s", key[1], err)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh_executor(self):
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=_REFRESH_WORKERS,
+                        thread_name_prefix="onecore-cache-refresh",
+                    )
+                    self._executor_pid = pid
+        return self._executor
+
+    def _shared_get(self, policy, shared, keys):
+        try:
+            rows = shared.get_many(keys)
+        except Exception as err:
+            _logger.warning("Shared OneCore cache lookup failed: %s", err)
+            return {}
+        now_wall = time.time()
+        now = time.monotonic()
+        entries = {}
+        with self._lock:
+            bucket = self._bucket(policy)
+            for key, (expires_at, status, content, size) in rows.items():
+                # Promote into L1 with the remaining shared TTL.
+                entry = _Entry(
+                    now + (expires_at - now_wall),
+                    content,
+                    status,
+                    size,
+                    stale_ttl=policy.stale_ttl,
+                )
+                bucket.put(key, entry)
+                bucket.shared_hits += 1
+                entries[key] = entry
+        return entries
+
+    def put(self, policy, key, content, size=0, shared=None, validators=None):
+        """Store a successful response (empty content is negatively cached).
+
+        Args:
+            validators: Optional conditional GET headers for the response
+                (see ``validators_from``); with them the entry outlives its
+                TTL as the basis for a 304.
+        """
+        self.put_many(policy, [(key, content, size, validators)], shared=shared)
+
+    def put_many(self, policy, items, shared=None):
+        """Bulk ``put`` of ``(key, content, size[, validators])`` tuples."""
+        now = time.monotonic()
+        shared_items = []
+        with self._lock:
+            bucket = self._bucket(policy)
+            for item in items:
+                key, content, size, validators = _pad(item, 4)
+                ttl = policy.negative_ttl if _is_empty(content) else policy.ttl
+                if ttl <= 0 and not validators:
+                    continue
+                entry = _Entry(
+                    now + max(ttl, 0),
+                    copy_json(content),
+                    None,
+                    size,
+                    stale_ttl=policy.stale_ttl,
+                    validators=validators or None,
+                )
+                bucket.put(key, entry)
+                if ttl > 0:
+                    shared_items.append(
+                        (key, time.time() + ttl, None, entry.content, size)
+                    )
+        self._shared_put(shared, shared_items)
+
+    def validators(self, policy, key):
+        """Conditional GET headers for ``key``'s stored response, or None."""
+        with self._lock:
+            entry = self._bucket(policy).entries.get(key)
+            if entry is None or entry.status is not None:
+                return None
+            return dict(entry.validators) if entry.validators else None
+
+    def revalidated(self, policy, key):
+        """Handle a 304 for ``key``: renew the entry and return its content.
+
+        Returns:
+            A copy of the stored content, or ``MISS`` if the entry was evicted
+            meanwhile (the caller must then fetch unconditionally).
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(policy)
+            entry = bucket.entries.get(key)
+            if entry is None or entry.status is not None:
+                return MISS
+            empty = _is_empty(entry.content)
+            ttl = policy.negative_ttl if empty else policy.ttl
+            entry.expires_at = now + max(ttl, 0)
+            entry.stale_until = entry.expires_at + (0 if empty else policy.stale_ttl)
+            bucket.entries.move_to_end(key)
+            bucket.not_modified += 1
+            return copy_json(entry.content)
+
+    def put_status(self, policy, key, status, shared=None):
+        """Negatively cache an HTTP error status (only 404 is worth it)."""
+        if status != 404 or policy.negative_ttl <= 0:
+            return
+        entry = _Entry(time.monotonic() + policy.negative_ttl, None, status, 0)
+        with self._lock:
+            self._bucket(policy).put(key, entry)
+        self._shared_put(
+            shared, [(key, time.time() + policy.negative_ttl, status, None, 0)]
+        )
+
+    @staticmethod
+    def _shared_put(shared, items):
+        if shared is None or not items:
+            return
+        try:
+            shared.put_many(items)
+        except Exception as err:
+            _logger.warning("Shared OneCore cache write failed: %s", err)
+
+    def invalidate(self, path_prefix=None, shared=None):
+        """Drop cached entries whose path starts with ``path_prefix`` (all if None).
+
+        Keys are ``(base_url, path, params)`` tuples, so the prefix is matched
+        against the path part. With ``shared``, the shared level is purged too.
+        """
+        if shared is not None:
+            try:
+                shared.delete_prefix(path_prefix)
+            except Exception as err:
+                _logger.warning("Shared OneCore cache invalidation failed: %s", err)
+        with self._lock:
+            for bucket in self._buckets.values():
+                if path_prefix is None:
+                    bucket.entries.clear()
+                    bucket.bytes = 0
+                    continue
+                for key in [k for k in bucket.entries if k[1].startswith(path_prefix)]:
+                    bucket.pop(key)
+
+    def stats(self):
+        """Per-policy counters: entries, bytes, hits, misses, evictions.
+
+        ``misses`` are L1 misses; ``shared_hits`` counts those the shared
+        backend answered. ``stale_hits`` are hits served past their TTL and
+        ``refreshes`` the background refreshes that completed.
+        ``not_modified`` counts 304s answered from a stored body.
+        """
+        with self._lock:
+            return {
+                name: {
+                    "entries": len(bucket.entries),
+                    "bytes": bucket.bytes,
+                    "hits": bucket.hits,
+                    "shared_hits": bucket.shared_hits,
+                    "stale_hits": bucket.stale_hits,
+                    "refreshes": bucket.refreshes,
+                    "not_modified": bucket.not_modified,
+                    "misses": bucket.misses,
+                    "evictions": bucket.evictions,
+                }
+                for name, bucket in self._buckets.items()
+            }
+
+
+def validators_from(response):
+    """Conditional GET headers for a response's ``ETag``/``Last-Modified``.
+
+    Returns:
+        dict such as ``{"If-None-Match": '"abc"'}``, or None if the response
+        carries no validators.
+    """
+    headers = getattr(response, "headers", None) or {}
+    validators = {}
+    for response_header, request_header in (
+        ("ETag", "If-None-Match"),
+        ("Last-Modified", "If-Modified-Since"),
+    ):
+        value = headers.get(response_header)
+        if isinstance(value, str) and value:
+            validators[request_header] = value
+    return validators or None
+
+
+def _pad(item, length):
+    """Pad an item tuple whose trailing ``validators`` was left out with None."""
+    return tuple(item) + (None,) * (length - len(item))
+
+
+def _raise_status(status, key):
+    response = requests.Response()
+    response.status_code = status
+    response.url = f"{key[0]}{key[1]}"
+    response.reason = "Not Found (cached)" if status == 404 else "Cached error"
+    response.raise_for_status()
+
+
+def make_key(base_url, path, params=None, variant=None):
+    """Cache key for a GET: base URL, path and normalised query params.
+
+    ``variant`` names a decoded shape other than the whole response (a
+    ``json_stream.StreamedList`` projection), kept apart from it.
+    """
+    if params:
+        params = tuple(sorted((str(k), str(v)) for k, v in params.items()))
+    key = (base_url, path, params or ())
+    return key if variant is None else key + (variant,)
+
+
+# Process-wide cache shared by every CoreApi in this worker.
+cache = ResponseCache()
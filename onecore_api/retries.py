@@ -0,0 +1,275 @@
+"""Retry policy for idempotent OneCore requests.
+
+A connection reset, a read timeout or a 502/503/504 from a gateway is
+usually transient, yet a single one used to fail a form read or drop a room
+from the component wizard. Idempotent requests (GET/HEAD/OPTIONS) are now
+retried a few times with exponential backoff and full jitter, so retries
+from many workers don't arrive at OneCore in lockstep.
+
+To keep retries from amplifying an overload, each worker has a
+``RetryBudget``: over a sliding window, retries may not exceed a fixed
+allowance plus ``ratio`` of the requests sent. When OneCore is really down
+the budget runs dry and requests fail after one attempt, leaving it to the
+circuit breaker (see ``circuit_breaker``) to stop the traffic altogether.
+
+Retries stay within the caller's ``deadlines`` budget: the backoff is cut
+to the time left, and no retry is made once too little is left for one
+more attempt.
+
+Retries are logged and counted per endpoint group; see ``stats()``.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+
+try:
+    from . import deadlines
+    from .circuit_breaker import CircuitOpenError, group_for
+    from .deadlines import DeadlineExceeded
+except ImportError:  # imported as a top-level module (standalone pytest suite)
+    import deadlines
+    from circuit_breaker import CircuitOpenError, group_for
+    from deadlines import DeadlineExceeded
+
+_logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+DEFAULT_SETTINGS = {
+    # Total attempts including the first one.
+    "max_attempts": 3,
+    "base_delay": 0.2,
+    "max_delay": 2.0,
+    # Retries allowed per request sent, plus a floor per second, in a window.
+    "budget_ratio": 0.2,
+    "budget_min_per_second": 1.0,
+    "budget_window": 10.0,
+}
+
+_lock = threading.Lock()
+_settings = dict(DEFAULT_SETTINGS)
+_budgets = {}  # pid -> RetryBudget
+_counters = {}  # (pid, group) -> {"retries": n, "budget_exhausted": n, ...}
+
+
+class RetryBudget:
+    """Sliding-window cap on retries relative to requests; thread-safe."""
+
+    def __init__(self, ratio, min_per_second, window):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self._lock = threading.Lock()
+        self._requests = deque()
+        self._retries = deque()
+
+    def _prune(self, now):
+        horizon = now - self.window
+        for times in (self._requests, self._retries):
+            while times and times[0] < horizon:
+                times.popleft()
+
+    def deposit(self):
+        """Record one request (first attempt)."""
+        now = _now()
+        with self._lock:
+            self._prune(now)
+            self._requests.append(now)
+
+    def withdraw(self):
+        """Take one retry from the budget; False if it is exhausted."""
+        now = _now()
+        with self._lock:
+            self._prune(now)
+            allowance = (
+                self.min_per_second * self.window + self.ratio * len(self._requests)
+            )
+            if len(self._retries) + 1 > allowance:
+                return False
+            self._retries.append(now)
+            return True
+
+
+def _now():
+    return time.monotonic()
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+
+
+def budget():
+    """This worker's ``RetryBudget``."""
+    pid = os.getpid()
+    current = _budgets.get(pid)
+    if current is None:
+        with _lock:
+            current = _budgets.get(pid)
+            if current is None:
+                current = _budgets[pid] = RetryBudget(
+                    _settings["budget_ratio"],
+                    _settings["budget_min_per_second"],
+                    _settings["budget_window"],
+                )
+    return current
+
+
+def is_retryable(method, response=None, error=None):
+    """Whether an outcome of a ``method`` request is worth retrying."""
+    if method.upper() not in IDEMPOTENT_METHODS:
+        return False
+    if error is not None:
+        if isinstance(error, (CircuitOpenError, DeadlineExceeded)):
+            return False
+        return isinstance(
+            error,
+            (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ),
+        )
+    status = getattr(response, "status_code", None)
+    return isinstance(status, int) and status in RETRY_STATUSES
+
+
+def backoff(attempt):
+    """Full-jitter delay before retry number ``attempt`` (1-based)."""
+    cap = min(_settings["max_delay"], _settings["base_delay"] * 2 ** (attempt - 1))
+    return random.uniform(0, cap)
+
+
+def call(method, path, send, deadline=None):
+    """Run ``send()`` and retry transient failures of idempotent requests.
+
+    Args:
+        method: HTTP method; only idempotent ones are retried.
+        path: OneCore path, for logging and per-group counters.
+        send: Zero-argument callable doing one attempt; returns the response
+            or raises. Must be safe to call again.
+        deadline: The ``deadlines`` deadline bounding the retries (default:
+            the current one).
+
+    Returns:
+        The last attempt's response; the last error is re-raised.
+    """
+    retry_budget = budget()
+    retry_budget.deposit()
+    max_attempts = max(int(_settings["max_attempts"]), 1)
+    attempt = 1
+    while True:
+        error = response = None
+        try:
+            response = send()
+        except Exception as err:
+            error = err
+        if (
+            attempt >= max_attempts
+            or not is_retryable(method, response=response, error=error)
+        ):
+            if attempt > 1:
+                _count(path, "exhausted" if _failed(response, error) else "recovered")
+            if error is not None:
+                raise error
+            return response
+        spare = deadlines.spare(deadline)
+        if spare is not None and spare <= 0:
+            _count(path, "out_of_time")
+            _logger.info("Not retrying %s %s: time budget spent", method, path)
+            if error is not None:
+                raise error
+            return response
+        if not retry_budget.withdraw():
+            _count(path, "budget_exhausted")
+            _logger.warning(
+                "Not retrying %s %s: retry budget exhausted", method, path
+            )
+            if error is not None:
+                raise error
+            return response
+        delay = backoff(attempt)
+        if spare is not None:
+            delay = min(delay, spare)
+        _count(path, "retries")
+        _logger.info(
+            "Retrying %s %s after %s (attempt %s/%s, in %.2fs)",
+            method,
+            path,
+            error or f"HTTP {response.status_code}",
+            attempt + 1,
+            max_attempts,
+            delay,
+        )
+        if response is not None:
+            # Give the discarded response's connection back to the pool.
+            response.close()
+        _sleep(delay)
+        attempt += 1
+
+
+def _failed(response, error):
+    return error is not None or (
+        getattr(response, "status_code", None) in RETRY_STATUSES
+    )
+
+
+def _count(path, name):
+    key = (os.getpid(), group_for(path))
+    with _lock:
+        counters = _counters.setdefault(
+            key,
+            {
+                "retries": 0,
+                "recovered": 0,
+                "exhausted": 0,
+                "budget_exhausted": 0,
+                "out_of_time": 0,
+            },
+        )
+        counters[name] += 1
+
+
+def configure(**settings):
+    """Override ``DEFAULT_SETTINGS`` keys (unknown keys/None are ignored)."""
+    updates = {
+        key: value
+        for key, value in settings.items()
+        if key in DEFAULT_SETTINGS and value is not None
+    }
+    with _lock:
+        if any(_settings[key] != value for key, value in updates.items()):
+            _settings.update(updates)
+            _budgets.clear()
+
+
+def stats():
+    """``{group: {"retries", "recovered", "exhausted", "budget_exhausted",
+    "out_of_time"}}``.
+
+    ``recovered`` counts requests that succeeded after retrying,
+    ``exhausted`` those that still failed after ``max_attempts`` and
+    ``out_of_time`` those not retried for lack of time budget.
+    """
+    pid = os.getpid()
+    with _lock:
+        return {
+            group: dict(counters)
+            for (owner, group), counters in _counters.items()
+            if owner == pid
+        }
+
+
+def reset():
+    """Forget budgets and counters and restore the defaults (tests)."""
+    with _lock:
+        _budgets.clear()
+        _counters.clear()
+        _settings.clear()
+        _settings.update(DEFAULT_SETTINGS)
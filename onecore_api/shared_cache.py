@@ -0,0 +1,205 @@
+"""Cross-worker shared backend for the OneCore response cache.
+
+The in-process ``response_cache`` is per worker, so its hit rate is divided
+by the number of workers and it starts cold after every worker recycle. A
+shared backend sits behind it as a second level: an L1 miss is looked up
+here before going to OneCore, and every fetched response is written here as
+well as to L1.
+
+``PostgresCacheBackend`` stores entries in an UNLOGGED table — no WAL, so
+writes are cheap, and the table is simply truncated after a crash, which is
+fine for a cache. It always uses its own cursor (committed immediately),
+never the caller's transaction, so cache writes are neither rolled back with
+a failing request nor hold locks for its duration.
+
+Backends implement ``get_many``/``put_many`` so fan-outs cost one round trip
+to the database each way, plus ``delete_prefix`` for invalidation and
+``cleanup`` for the periodic expiry sweep (see the
+``onecore.api.cache`` cron in onecore_maintenance_extension).
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+TABLE = "onecore_api_cache"
+
+
+def hash_key(key):
+    """Stable text primary key for a ``response_cache.make_key`` tuple."""
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+class SharedCacheBackend:
+    """Interface for shared response cache backends."""
+
+    def get_many(self, keys):
+        """Return ``{key: (expires_at, status, content, size)}`` for fresh entries.
+
+        ``expires_at`` is an epoch timestamp; missing/expired keys are absent.
+        """
+        raise NotImplementedError
+
+    def put_many(self, items):
+        """Store ``(key, expires_at, status, content, size)`` tuples.
+
+        ``status`` is None for a positive entry (``content`` is the parsed
+        response), else the cached HTTP error status.
+        """
+        raise NotImplementedError
+
+    def delete_prefix(self, path_prefix=None):
+        """Remove entries whose path starts with ``path_prefix`` (all if None)."""
+        raise NotImplementedError
+
+    def cleanup(self):
+        """Delete expired entries; returns the number removed."""
+        raise NotImplementedError
+
+
+class PostgresCacheBackend(SharedCacheBackend):
+    """Shared cache in an UNLOGGED Postgres table.
+
+    Args:
+        cursor_factory: Callable returning a new cursor usable as a context
+            manager that commits on exit (e.g. ``registry.cursor``).
+    """
+
+    def __init__(self, cursor_factory):
+        self._cursor_factory = cursor_factory
+        self._table_ready = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def ensure_table(cr):
+        """Create the cache table and its expiry index if missing."""
+        cr.execute(
+            f"""
+            CREATE UNLOGGED TABLE IF NOT EXISTS {TABLE} (
+                key varchar(40) PRIMARY KEY,
+                path varchar NOT NULL,
+                status integer,
+                payload text,
+                expires_at double precision NOT NULL
+            )
+            """
+        )
+        cr.execute(
+            f"CREATE INDEX IF NOT EXISTS {TABLE}_expires_at_idx "
+            f"ON {TABLE} (expires_at)"
+        )
+
+    def _cursor(self):
+        cr = self._cursor_factory()
+        if not self._table_ready:
+            try:
+                with self._lock:
+                    if not self._table_ready:
+                        self.ensure_table(cr)
+                        self._table_ready = True
+            except Exception:
+                cr.close()
+                raise
+        return cr
+
+    def get_many(self, keys):
+        if not keys:
+            return {}
+        by_hash = {hash_key(key): key for key in keys}
+        with self._cursor() as cr:
+            cr.execute(
+                f"SELECT key, expires_at, status, payload FROM {TABLE} "
+                "WHERE key IN %s AND expires_at > %s",
+                (tuple(by_hash), time.time()),
+            )
+            rows = cr.fetchall()
+        found = {}
+        for hashed, expires_at, status, payload in rows:
+            content = json.loads(payload) if payload is not None else None
+            size = len(payload) if payload is not None else 0
+            found[by_hash[hashed]] = (expires_at, status, content, size)
+        return found
+
+    def put_many(self, items):
+        if not items:
+            return
+        rows = []
+        seen = set()
+        # Last write wins; a duplicate key in one INSERT would be an error.
+        for key, expires_at, status, content, _size in reversed(items):
+            hashed = hash_key(key)
+            if hashed in seen:
+                continue
+            seen.add(hashed)
+            payload = json.dumps(content) if status is None else None
+            rows.append((hashed, key[1], status, payload, expires_at))
+        with self._cursor() as cr:
+            values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+            cr.execute(
+                f"INSERT INTO {TABLE} (key, path, status, payload, expires_at) "
+                f"VALUES {values} "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "path = EXCLUDED.path, status = EXCLUDED.status, "
+                "payload = EXCLUDED.payload, expires_at = EXCLUDED.expires_at",
+                [value for row in rows for value in row],
+            )
+
+    def delete_prefix(self, path_prefix=None):
+        with self._cursor() as cr:
+            if path_prefix is None:
+                cr.execute(f"DELETE FROM {TABLE}")
+                return
+            escaped = (
+                path_prefix.replace("\\", "\\\\")
+                .replace("%", "\\%")
+                .replace("_", "\\_")
+            )
+            cr.execute(f"DELETE FROM {TABLE} WHERE path LIKE %s", (escaped + "%",))
+
+    @staticmethod
+    def delete_expired(cr):
+        """Delete expired rows using ``cr``; returns the number removed."""
+        cr.execute(f"DELETE FROM {TABLE} WHERE expires_at <= %s", (time.time(),))
+        return cr.rowcount
+
+    def cleanup(self):
+        with self._cursor() as cr:
+            return self.delete_expired(cr)
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def backend_for(dbname, kind):
+    """Return this worker's shared backend for ``dbname``, or None.
+
+    Args:
+        dbname: Odoo database name.
+        kind: Value of ``onecore_cache_backend``; only ``"postgres"`` is
+            supported, anything else disables the shared level.
+    """
+    if kind != "postgres" or not dbname:
+        return None
+    backend = _backends.get(dbname)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(dbname)
+            if backend is None:
+                backend = _backends[dbname] = PostgresCacheBackend(
+                    odoo_cursor_factory(dbname)
+                )
+    return backend
+
+
+def odoo_cursor_factory(dbname):
+    def _cursor():
+        from odoo.sql_db import db_connect
+
+        return db_connect(dbname).cursor()
+
+    return _cursor
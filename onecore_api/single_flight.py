@@ -0,0 +1,138 @@
+"""Single-flight coalescing of identical concurrent OneCore GETs.
+
+When a kanban and a form for the same rental object load at once, or a
+cache entry expires under several threads, each caller used to send its
+own identical GET. A ``SingleFlight`` group lets the first caller for a key
+(the *leader*) make the call while concurrent callers for the same key
+(*followers*) wait for it and receive its result — or a copy of its
+exception — instead of sending a duplicate. Together with ``response_cache``
+this turns the thundering herd after an expiry into one request.
+
+A follower waits at most ``wait`` seconds (its own timeout and time
+budget): the key does not include either, and a caller with a 5 second
+timeout must not wait out a leader with a 30 second one. A follower that
+stops waiting, or whose leader's exception can't be copied, makes its own
+call. So does one whose leader ran out of its ``deadlines`` budget: that
+says nothing about the follower's own budget.
+
+Coalescing is per worker process: it covers the threads of a threaded
+server, ``parallel_get_json`` fan-outs and background refreshes. Followers
+get a copy of the leader's result, so nobody can mutate another caller's
+data.
+"""
+
+import copy as copy_module
+import threading
+
+try:
+    from .deadlines import DeadlineExceeded
+    from .response_cache import copy_json
+except ImportError:  # imported as a top-level module (standalone pytest suite)
+    from deadlines import DeadlineExceeded
+    from response_cache import copy_json
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key; thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def do(self, key, fn, copy=copy_json, wait=None):
+        """Return ``fn()``, sharing one execution among concurrent callers.
+
+        Args:
+            key: Hashable identity of the call (method, URL and params).
+            fn: Zero-argument callable; run by the leader, and by a follower
+                that stops waiting.
+            copy: Applied to the result handed to each follower.
+            wait: Seconds a follower waits for the leader (None: no limit).
+
+        Raises:
+            Whatever ``fn`` raised; followers get their own copy of the
+            leader's exception, except a ``DeadlineExceeded``.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+            else:
+                call.followers += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            if not call.done.wait(None if wait is None else max(wait, 0)):
+                with self._lock:
+                    self.abandoned += 1
+                return fn()
+            if isinstance(call.error, DeadlineExceeded):
+                return fn()
+            if call.error is not None:
+                error = _fresh(call.error)
+                if error is None:
+                    return fn()
+                raise error
+            return copy(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self):
+        """Number of keys currently being fetched."""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        """``leaders`` (calls made), ``coalesced`` (calls saved) and
+        ``abandoned`` (followers that stopped waiting)."""
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "abandoned": self.abandoned,
+                "in_flight": len(self._calls),
+            }
+
+
+def _fresh(error):
+    """A copy of ``error`` for one follower, or None if it can't be copied.
+
+    Raising one exception object in several threads would have them rewrite
+    each other's ``__traceback__``.
+    """
+    try:
+        fresh = copy_module.copy(error)
+    except Exception:
+        return None
+    if fresh is error or type(fresh) is not type(error):
+        return None
+    return fresh
+
+
+# Process-wide group shared by every CoreApi in this worker.
+group = SingleFlight()
@@ -0,0 +1,643 @@
+"""Local stub OneCore server for integration and performance tests.
+
+``StubOneCore`` serves the endpoints ``CoreApi`` and the Odoo modules use
+(auth, leases, residences, parking spaces, facilities, properties,
+buildings, staircases, maintenance units, rooms, components and their
+catalogue, documents, uploads, image analysis and the work order SMS/email
+endpoints) over real HTTP/1.1 on localhost, so pooling, timeouts, retries
+and concurrency are exercised for real::
+
+    with StubOneCore(latency=0.02, components_per_room=40) as stub:
+        api = CoreApi(env_with(onecore_base_url=stub.url))
+        ...
+        stub.requests  # [("GET", "/rooms?rentalId=..."), ...]
+
+Generated data is deterministic (derived from the ids in the path) and has
+the shapes ``payloads`` decodes. Knobs:
+
+* ``latency``: seconds per response, or ``(low, high)`` for a uniform
+  jitter; ``route_latency`` overrides it per path prefix.
+* ``error_rate``/``error_status``: answer that share of requests with an
+  error (seeded by ``seed``); ``fail(prefix, *statuses)`` scripts exact
+  failures for the next matching requests.
+* ``leases``, ``properties``, ``rooms``, ``components_per_room``,
+  ``items_per_page`` and ``padding`` (extra characters per item) size the
+  payloads.
+
+GET responses carry an ETag and honour If-None-Match.
+
+Record/replay: with ``upstream=<url>`` every request is forwarded to a
+real OneCore and the exchange is kept; ``save(path)`` writes it as a
+fixture file, with personal data (``SCRUBBED_KEYS``) and tokens masked in
+the bodies. Paths are kept as they are (they are what replay matches on),
+so record with test identities, not real personal identity numbers.
+``replay=<path>`` serves the recorded responses instead of generated ones
+(a path recorded more than once answers in recorded order, then repeats
+the last answer); unrecorded paths get a 404. The knobs above still apply
+to replayed responses.
+
+Also a command line tool::
+
+    python stub_server.py --port 8099 --latency 0.05
+    python stub_server.py --upstream https://onecore.example --record rec.json
+    python stub_server.py --replay tests/fixtures/residence_components.json
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+FIXTURE_VERSION = 1
+TOKEN = "stub-token"
+# Keys whose values are masked in recordings.
+SCRUBBED_KEYS = frozenset(
+    {
+        "nationalRegistrationNumber",
+        "emailAddress",
+        "phoneNumber",
+        "firstName",
+        "lastName",
+        "fullName",
+        "token",
+        "fileData",
+    }
+)
+# Response headers kept in recordings and forwarded from the upstream.
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Wide fan-outs open many connections at once.
+    request_queue_size = 256
+
+
+class StubOneCore:
+    """A OneCore double on ``127.0.0.1``; see the module docstring."""
+
+    def __init__(
+        self,
+        port=0,
+        latency=0.0,
+        route_latency=None,
+        error_rate=0.0,
+        error_status=503,
+        seed=0,
+        leases=1,
+        properties=5,
+        rooms=5,
+        components_per_room=5,
+        items_per_page=None,
+        padding=0,
+        token=TOKEN,
+        upstream=None,
+        replay=None,
+    ):
+        self.latency = latency
+        self.route_latency = dict(route_latency or {})
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.leases = leases
+        self.properties = properties
+        self.rooms = rooms
+        self.components_per_room = components_per_room
+        self.items_per_page = items_per_page
+        self.padding = padding
+        self.token = token
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.requests = []
+        self.recorded = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._scripted = []  # [(prefix, deque of statuses)]
+        self._replay = load_fixture(replay) if replay else None
+        self._upstream_session = requests.Session() if upstream else None
+        self._server = _Server(("127.0.0.1", port), _handler_for(self))
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="onecore-stub",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._upstream_session is not None:
+            self._upstream_session.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail(self, prefix, *statuses):
+        """Answer the next requests whose path starts with ``prefix`` with
+        ``statuses`` in turn (0 closes the connection without answering)."""
+        with self._lock:
+            self._scripted.append((prefix, deque(statuses)))
+
+    def save(self, path):
+        """Write the recorded exchanges to a fixture file."""
+        with self._lock:
+            interactions = list(self.recorded)
+        with open(path, "w", encoding="utf-8") as fixture:
+            json.dump(
+                {"version": FIXTURE_VERSION, "interactions": interactions},
+                fixture,
+                ensure_ascii=False,
+                indent=1,
+                sort_keys=True,
+            )
+
+    # -- serving ------------------------------------------------------------
+
+    def _delay(self, path):
+        latency = self.latency
+        for prefix, value in self.route_latency.items():
+            if path.startswith(prefix):
+                latency = value
+                break
+        if isinstance(latency, (tuple, list)):
+            with self._lock:
+                latency = self._random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def _injected_status(self, path):
+        with self._lock:
+            for prefix, statuses in self._scripted:
+                if path.startswith(prefix) and statuses:
+                    return statuses.popleft()
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self.error_status
+        return None
+
+    def _answer(self, method, path, headers, body):
+        """``(status, payload, extra headers)``; payload None for no body."""
+        if self._replay is not None:
+            return self._replayed(method, path)
+        if self.upstream:
+            return self._forwarded(method, path, headers, body)
+        route = path.split("?", 1)[0]
+        if route == "/auth/generateToken":
+            return 200, {"token": self.token}, {}
+        if self.token and headers.get("Authorization") != f"Bearer {self.token}":
+            return 401, {"error": "Unauthorized"}, {}
+        content = _Generator(self).content(method, path, body)
+        if content is _NOT_FOUND:
+            return 404, {"error": "Not found"}, {}
+        return (201 if method == "POST" else 200), {"content": content}, {}
+
+    def _replayed(self, method, path):
+        with self._lock:
+            answers = self._replay.get((method, path))
+            if not answers:
+                return 404, {"error": f"Not recorded: {method} {path}"}, {}
+            answer = answers.popleft() if len(answers) > 1 else answers[0]
+        return answer["status"], answer["body"], dict(answer.get("headers") or {})
+
+    def _forwarded(self, method, path, headers, body):
+        forward = {
+            name: value
+            for name, value in headers.items()
+            if name in ("Authorization", "Content-Type", "If-None-Match", "Accept")
+        }
+        response = self._upstream_session.request(
+            method, self.upstream + path, headers=forward, data=body, timeout=60
+        )
+        try:
+            payload = response.json() if response.content else None
+        except ValueError:
+            payload = {"raw": response.text}
+        kept = {
+            name: response.headers[name]
+            for name in KEPT_HEADERS
+            if name in response.headers
+        }
+        with self._lock:
+            self.recorded.append(
+                {
+                    "method": method,
+                    "path": path,
+                    "status": response.status_code,
+                    "headers": kept,
+                    "body": scrub(payload),
+                }
+            )
+        return response.status_code, payload, kept
+
+
+def _handler_for(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; with Nagle on, the
+        # body waits for the client's delayed ACK (~40 ms per response).
+        disable_nagle_algorithm = True
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            method, path = self.command, self.path
+            with stub._lock:
+                stub.requests.append((method, path))
+            stub._delay(path)
+            status = stub._injected_status(path)
+            if status == 0:
+                self.close_connection = True
+                return
+            if status is not None:
+                return self._send(status, {"error": "Injected failure"}, {})
+            self._send(*stub._answer(method, path, self.headers, body))
+
+        do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+        def _send(self, status, payload, headers):
+            data = b"" if payload is None else json.dumps(payload).encode()
+            if self.command == "GET" and status == 200:
+                etag = headers.get("ETag") or '"%s"' % hashlib.sha1(data).hexdigest()
+                headers = dict(headers, ETag=etag)
+                if self.headers.get("If-None-Match") == etag:
+                    status, data = 304, b""
+            self.send_response(status)
+            if data:
+                self.send_header("Content-Type", "application/json")
+            for name, value in headers.items():
+                if name != "Content-Type":
+                    self.send_header(name, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+_NOT_FOUND = object()
+
+
+class _Generator:
+    """Deterministic OneCore-shaped content for a request."""
+
+    ROUTES = [
+        ("GET", r"/leases(?:/by-[a-z-]+)?/(?P<value>[^/?]+)", "leases"),
+        ("GET", r"/residences/by-rental-id/(?P<id>[^/?]+)", "residence"),
+        ("GET", r"/parking-spaces/by-rental-id/(?P<id>[^/?]+)", "parking_space"),
+        ("GET", r"/facilities/by-rental-id/(?P<id>[^/?]+)", "facility"),
+        ("GET", r"/properties/search", "properties"),
+        ("GET", r"/buildings/by-building-code/(?P<code>[^/?]+)", "building"),
+        ("GET", r"/buildings/by-property-code/(?P<code>[^/?]+)", "buildings"),
+        ("GET", r"/staircases", "staircases"),
+        ("GET", r"/maintenance-units/by-[a-z]+-code/(?P<code>[^/?]+)", "units"),
+        ("GET", r"/rooms", "rooms"),
+        ("GET", r"/components/by-room/(?P<room>[^/?]+)", "components"),
+        ("GET", r"/component-categories", "categories"),
+        ("GET", r"/component-types", "types"),
+        ("GET", r"/component-subtypes", "subtypes"),
+        ("GET", r"/component-models", "models"),
+        ("GET", r"/documents/component-instances/(?P<id>[^/?]+)", "documents"),
+        ("POST", r"/processes/add-component", "created"),
+        ("PUT", r"/components/(?P<id>[^/?]+)", "updated"),
+        ("PUT", r"/component-installations/(?P<id>[^/?]+)", "updated"),
+        ("POST", r"/components/analyze-image", "analysis"),
+        ("POST", r"/components/(?P<id>[^/?]+)/upload", "uploaded"),
+        ("POST", r"/work-orders/send-(?P<channel>sms|email)", "sent"),
+    ]
+
+    def __init__(self, stub):
+        self.stub = stub
+
+    def content(self, method, path, body):
+        route, _sep, query = path.partition("?")
+        self.query = dict(urllib.parse.parse_qsl(query))
+        self.body = body
+        for route_method, pattern, name in self.ROUTES:
+            match = re.fullmatch(pattern, route)
+            if route_method == method and match:
+                args = {k: urllib.parse.unquote(v) for k, v in match.groupdict().items()}
+                return getattr(self, name)(**args)
+        return _NOT_FOUND
+
+    def _pad(self, item):
+        if self.stub.padding:
+            item["notes"] = "x" * self.stub.padding
+        return item
+
+    def _page(self, items):
+        limit = int(self.query.get("limit") or self.stub.items_per_page or len(items))
+        page = int(self.query.get("page") or 1)
+        return items[(page - 1) * limit : page * limit]
+
+    def leases(self, value):
+        return [
+            self._pad(
+                {
+                    "leaseId": f"{value}/{i:02d}",
+                    "leaseNumber": f"{i:02d}",
+                    "type": "Bostadskontrakt",
+                    "status": "Current",
+                    "leaseStartDate": "2020-01-01T00:00:00Z",
+                    "lastDebitDate": None,
+                    "contractDate": "2019-12-01T00:00:00Z",
+                    "approvalDate": "2019-12-02T00:00:00Z",
+                    "rentalPropertyId": f"705-022-04-{i:04d}",
+                    "tenants": [_tenant(f"{value}-{i}")],
+                }
+            )
+            for i in range(1, self.stub.leases + 1)
+        ]
+
+    def residence(self, id):
+        property_code = id.rsplit("-", 2)[0]
+        return self._pad(
+            {
+                "id": f"res-{id}",
+                "code": id,
+                "name": f"Lägenhet {id}",
+                "areaSize": 62.5,
+                "entrance": "A",
+                "rentalInformation": {"rentalId": id},
+                "type": {"name": "2 rum och kök"},
+                "accessibility": {"elevator": True},
+                "property": {"code": property_code, "name": f"Fastighet {property_code}"},
+                "building": {"code": f"{property_code}-B", "name": "Huset"},
+                "staircase": {"id": f"st-{id}", "name": "Uppgång A", "code": "A"},
+                "propertyObject": {"rentalBlocks": []},
+            }
+        )
+
+    def parking_space(self, id):
+        return self._pad(
+            {
+                "rentalId": id,
+                "name": f"Bilplats {id}",
+                "property": {"code": id.rsplit("-", 1)[0]},
+            }
+        )
+
+    def facility(self, id):
+        return self._pad(
+            {
+                "rentalId": id,
+                "name": f"Lokal {id}",
+                "property": {"code": id.rsplit("-", 1)[0]},
+            }
+        )
+
+    def properties(self):
+        return [
+            self._pad({"code": f"P{i:03d}", "designation": f"Fastighet {i}"})
+            for i in range(1, self.stub.properties + 1)
+        ]
+
+    def building(self, code):
+        return self._pad(
+            {
+                "code": code,
+                "name": f"Byggnad {code}",
+                "buildingType": {"name": "Flerbostadshus"},
+                "construction": {"constructionYear": 1965, "renovationYear": 2001},
+            }
+        )
+
+    def buildings(self, code):
+        return [self.building(f"{code}-B{i}") for i in range(1, 3)]
+
+    def staircases(self):
+        code = self.query.get("buildingCode", "B")
+        return [
+            {"id": f"{code}-{letter}", "name": f"Uppgång {letter}", "code": letter}
+            for letter in "AB"
+        ]
+
+    def units(self, code):
+        return [
+            self._pad(
+                {"id": f"{code}-{kind}", "caption": kind, "type": kind, "code": f"{code}-{i}"}
+            )
+            for i, kind in enumerate(("Tvättstuga", "Miljöbod", "Lekplats"), 1)
+        ]
+
+    def rooms(self):
+        rental_id = self.query.get("rentalId", "R")
+        return [
+            self._pad({"propertyObjectId": f"{rental_id}-rum{i}", "name": name})
+            for i, name in zip(
+                range(1, self.stub.rooms + 1),
+                _cycle(("Kök", "Badrum", "Vardagsrum", "Sovrum", "Hall")),
+            )
+        ]
+
+    def components(self, room):
+        return [
+            self._pad(_component(f"{room}-k{i}", i))
+            for i in range(1, self.stub.components_per_room + 1)
+        ]
+
+    def categories(self):
+        return [
+            {"id": f"cat-{i}", "categoryName": name}
+            for i, name in enumerate(("Vitvaror", "Ytskikt", "Installationer"), 1)
+        ]
+
+    def types(self):
+        category = self.query.get("categoryId", "cat")
+        return self._page(
+            [{"id": f"{category}-t{i}", "typeName": f"Typ {i}"} for i in range(1, 31)]
+        )
+
+    def subtypes(self):
+        type_id = self.query.get("typeId", "t")
+        return self._page(
+            [
+                {
+                    "id": f"{type_id}-s{i}",
+                    "subTypeName": f"Undertyp {i}",
+                    "technicalLifespan": 15,
+                    "replacementIntervalMonths": 180,
+                }
+                for i in range(1, 31)
+            ]
+        )
+
+    def models(self):
+        name = self.query.get("modelName", "")
+        return self._page(
+            [
+                self._pad(
+                    {
+                        "id": f"m-{i}",
+                        "modelName": f"{name or 'Modell'} {i}",
+                        "manufacturer": "Electrolux",
+                    }
+                )
+                for i in range(1, 31)
+            ]
+        )
+
+    def documents(self, id):
+        return [
+            {
+                "id": f"doc-{id}",
+                "fileName": "bild.jpg",
+                "contentType": "image/jpeg",
+                "url": f"https://files.example/{id}/bild.jpg",
+            }
+        ]
+
+    def created(self):
+        return {"id": "new-component", "componentInstallationId": "new-installation"}
+
+    def updated(self, id):
+        return {"id": id}
+
+    def analysis(self):
+        return {
+            "componentType": "Kylskåp",
+            "manufacturer": "Electrolux",
+            "model": "ERB 1",
+            "confidence": 0.9,
+        }
+
+    def uploaded(self, id):
+        return {"id": f"doc-{id}", "size": len(self.body)}
+
+    def sent(self, channel):
+        return {"channel": channel, "status": "queued"}
+
+
+def _cycle(values):
+    while True:
+        yield from values
+
+
+def _tenant(key):
+    return {
+        "contactCode": f"P{key}",
+        "contactKey": f"_{key}",
+        "firstName": "Anna",
+        "lastName": "Svensson",
+        "fullName": "Svensson Anna",
+        "nationalRegistrationNumber": "19800101-1234",
+        "emailAddress": "anna@example.com",
+        "phoneNumbers": [{"phoneNumber": "070-1234567", "isMainNumber": 1}],
+        "isTenant": True,
+        "specialAttention": False,
+    }
+
+
+def _component(id, i):
+    return {
+        "id": id,
+        "serialNumber": f"SN-{i:06d}",
+        "warrantyMonths": 24,
+        "priceAtPurchase": 9999.0,
+        "depreciationPriceAtPurchase": 7999.0,
+        "economicLifespan": 15,
+        "condition": "Gott skick",
+        "componentInstallations": [
+            {"id": f"inst-{id}", "installationDate": "2021-05-01T00:00:00Z"}
+        ],
+        "model": {
+            "id": f"m-{i % 7}",
+            "modelName": f"Kylskåp KS{i % 7:03d}",
+            "manufacturer": "Electrolux",
+            "subtype": {
+                "subTypeName": "Kyl/frys",
+                "technicalLifespan": 20,
+                "replacementIntervalMonths": 180,
+                "componentType": {
+                    "typeName": "Kylskåp",
+                    "category": {"categoryName": "Vitvaror"},
+                },
+            },
+        },
+    }
+
+
+def scrub(value):
+    """``value`` with personal data and secrets (``SCRUBBED_KEYS``) masked."""
+    if isinstance(value, dict):
+        return {
+            key: "***" if key in SCRUBBED_KEYS and item is not None else scrub(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [scrub(item) for item in value]
+    return value
+
+
+def load_fixture(path):
+    """``{(method, path): deque of answers}`` from a recorded fixture file."""
+    with open(path, encoding="utf-8") as fixture:
+        data = json.load(fixture)
+    if data.get("version") != FIXTURE_VERSION:
+        raise ValueError(f"Unsupported fixture version in {path}")
+    answers = {}
+    for interaction in data["interactions"]:
+        key = (interaction["method"], interaction["path"])
+        answers.setdefault(key, deque()).append(interaction)
+    return answers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rooms", type=int, default=5)
+    parser.add_argument("--components-per-room", type=int, default=5)
+    parser.add_argument("--padding", type=int, default=0)
+    parser.add_argument("--upstream", help="record: forward to this OneCore")
+    parser.add_argument("--record", help="record: fixture file written on exit")
+    parser.add_argument("--replay", help="serve this recorded fixture file")
+    args = parser.parse_args(argv)
+    if args.record and not args.upstream:
+        parser.error("--record needs --upstream")
+
+    stub = StubOneCore(
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rooms=args.rooms,
+        components_per_room=args.components_per_room,
+        padding=args.padding,
+        upstream=args.upstream,
+        replay=args.replay,
+    ).start()
+    print(f"Stub OneCore on {stub.url} (token {stub.token!r}); Ctrl-C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
+        if args.record:
+            stub.save(args.record)
+            print(f"Recorded {len(stub.recorded)} exchanges to {args.record}")
+
+
+if __name__ == "__main__":
+    main()
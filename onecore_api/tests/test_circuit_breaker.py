@@ -0,0 +1,142 @@
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+SETTINGS = dict(
+    circuit_breaker.DEFAULT_SETTINGS,
+    window_size=10,
+    min_calls=4,
+    failure_rate_threshold=0.5,
+    slow_call_seconds=2.0,
+    slow_call_rate_threshold=0.75,
+    open_seconds=30,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_breakers():
+    circuit_breaker.reset()
+    yield
+    circuit_breaker.reset()
+
+
+@pytest.fixture
+def breaker():
+    return CircuitBreaker("residences", SETTINGS)
+
+
+def _calls(breaker, outcomes, duration=0.1):
+    for failed in outcomes:
+        breaker.before_call()
+        breaker.record(failed, duration)
+
+
+class TestTripping:
+    """Tests for opening the breaker."""
+
+    def test_stays_closed_below_min_calls(self, breaker):
+        """A few failures on a quiet endpoint don't trip it."""
+        _calls(breaker, [True, True, True])
+        assert breaker.state == circuit_breaker.CLOSED
+
+    def test_opens_on_failure_rate(self, breaker):
+        """Half of the window failing trips the breaker."""
+        _calls(breaker, [False, True, False, True])
+        assert breaker.state == circuit_breaker.OPEN
+        assert breaker.stats()["trips"] == 1
+
+    def test_opens_on_slow_calls(self, breaker):
+        """Successful but slow calls trip it too."""
+        _calls(breaker, [False] * 4, duration=3.0)
+        assert breaker.state == circuit_breaker.OPEN
+
+    def test_old_outcomes_leave_the_window(self, breaker):
+        """Failures older than window_seconds no longer count."""
+        with patch("circuit_breaker._now", return_value=1000):
+            _calls(breaker, [True, True])
+        with patch("circuit_breaker._now", return_value=1000 + 61):
+            _calls(breaker, [False, False, False, True])
+        assert breaker.state == circuit_breaker.CLOSED
+
+    def test_open_breaker_rejects_immediately(self, breaker):
+        """While open, calls fail fast with CircuitOpenError."""
+        _calls(breaker, [True] * 4)
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.before_call()
+        assert exc_info.value.group == "residences"
+        assert isinstance(exc_info.value, requests.ConnectionError)
+        assert breaker.stats()["rejected"] == 1
+
+
+class TestHalfOpen:
+    """Tests for probing after open_seconds."""
+
+    def _tripped(self, breaker):
+        with patch("circuit_breaker._now", return_value=1000):
+            _calls(breaker, [True] * 4)
+
+    def test_single_probe_admitted(self, breaker):
+        """After open_seconds one probe goes through; others are rejected."""
+        self._tripped(breaker)
+        with patch("circuit_breaker._now", return_value=1031):
+            breaker.before_call()
+            assert breaker.state == circuit_breaker.HALF_OPEN
+            with pytest.raises(CircuitOpenError):
+                breaker.before_call()
+
+    def test_successful_probe_closes(self, breaker):
+        """A good probe closes the breaker with a clean window."""
+        self._tripped(breaker)
+        with patch("circuit_breaker._now", return_value=1031):
+            _calls(breaker, [False])
+        assert breaker.state == circuit_breaker.CLOSED
+        assert breaker.stats()["window_failure_rate"] == 0.0
+
+    def test_failed_probe_reopens(self, breaker):
+        """A bad probe re-opens the breaker for another open_seconds."""
+        self._tripped(breaker)
+        with patch("circuit_breaker._now", return_value=1031):
+            _calls(breaker, [True])
+            assert breaker.state == circuit_breaker.OPEN
+            assert breaker.stats()["trips"] == 2
+            with pytest.raises(CircuitOpenError):
+                breaker.check()
+
+
+class TestModule:
+    """Tests for groups, failure classification and settings."""
+
+    def test_group_is_first_path_segment(self):
+        """Breakers are per endpoint group, not per URL."""
+        assert circuit_breaker.group_for("/residences/by-rental-id/1") == "residences"
+        assert circuit_breaker.group_for("/rooms?rentalId=1") == "rooms"
+        assert circuit_breaker.breaker_for("/leases/1") is circuit_breaker.breaker_for(
+            "/leases/by-pnr/2"
+        )
+        assert circuit_breaker.breaker_for("/leases/1") is not circuit_breaker.breaker_for(
+            "/rooms"
+        )
+
+    def test_failure_classification(self):
+        """Transport errors and 5xx count; 4xx and open-circuit rejections don't."""
+        assert circuit_breaker.is_failure(error=requests.ReadTimeout())
+        assert circuit_breaker.is_failure(response=Mock(status_code=503))
+        assert not circuit_breaker.is_failure(response=Mock(status_code=404))
+        assert not circuit_breaker.is_failure(error=CircuitOpenError("x", 1))
+
+    def test_configure_rebuilds_breakers(self):
+        """New settings apply to breakers created afterwards."""
+        before = circuit_breaker.breaker_for("/rooms")
+        circuit_breaker.configure(open_seconds=5, unknown=1)
+        after = circuit_breaker.breaker_for("/rooms")
+        assert after is not before
+        assert after.settings["open_seconds"] == 5
+
+    def test_stats_lists_groups(self):
+        """stats() reports each group's state for operators."""
+        circuit_breaker.breaker_for("/rooms")
+        assert circuit_breaker.stats()["rooms"]["state"] == circuit_breaker.CLOSED
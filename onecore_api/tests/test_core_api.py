@@ -1,9 +1,84 @@
+import base64
+import json
+import threading
+
 import pytest
-from unittest.mock import Mock, MagicMock, patch, call
+from unittest.mock import ANY, Mock, MagicMock, patch, call
 import requests
+import circuit_breaker
+import core_api
+import credentials
+import deadlines
+import fanout
+import hedging
+import http_session
+import json_codec
+import json_stream
+import metrics
+import response_cache
+import retries
+import tracing
+import uploads
 from core_api import DEFAULT_TIMEOUT, CoreApi, OneCoreException
 
 
+@pytest.fixture(autouse=True)
+def credential_stores(tmp_path):
+    """Fresh per-test credential stores signalling through a temp dir."""
+    credentials.reset()
+    with patch('credentials.SIGNAL_DIR', str(tmp_path)):
+        yield
+    credentials.reset()
+
+
+@pytest.fixture(autouse=True)
+def empty_response_cache():
+    """Each test starts with an empty worker response cache."""
+    response_cache.cache.invalidate()
+    yield
+    response_cache.cache.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def closed_breakers():
+    """Each test starts with every circuit breaker closed."""
+    circuit_breaker.reset()
+    yield
+    circuit_breaker.reset()
+
+
+@pytest.fixture(autouse=True)
+def fresh_fanout_pool():
+    """Each test starts with a fresh fan-out executor and limit."""
+    fanout.reset()
+    yield
+    fanout.reset()
+
+
+@pytest.fixture(autouse=True)
+def instant_retries():
+    """Retries run without backoff sleeps and with fresh budgets/counters."""
+    retries.reset()
+    with patch('retries._sleep') as sleep:
+        yield sleep
+    retries.reset()
+
+
+def _json_body(payload):
+    """``payload`` as the raw JSON bytes of a response body."""
+    return json.dumps(payload).encode()
+
+
+@pytest.fixture(autouse=True)
+def mock_session():
+    """Route all outbound HTTP through a mocked pooled session."""
+    session = MagicMock()
+    core_api._worker_configured_pid = None
+    with patch('core_api.http_session.get_session', return_value=session):
+        yield session
+    http_session.reset()
+
+
 @pytest.fixture
 def mock_env():
     """Create a mock Odoo environment."""
@@ -178,12 +253,12 @@ class TestTokenManagement:
         api._persist_token("new_token")
         assert api._get_persisted_token() == "new_token"
 
-    @patch('core_api.requests.post')
-    def test_get_auth_token_success(self, mock_post, api):
+    def test_get_auth_token_success(self, mock_session, api):
         """Should fetch and persist new token on successful auth."""
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {"token": "fresh_token"}
+        mock_response.content = _json_body({"token": "fresh_token"})
+        mock_post = mock_session.post
         mock_post.return_value = mock_response
 
         token = api._get_auth_token()
@@ -196,13 +271,12 @@ class TestTokenManagement:
             timeout=DEFAULT_TIMEOUT
         )
 
-    @patch('core_api.requests.post')
-    def test_get_auth_token_failure(self, mock_post, api):
+    def test_get_auth_token_failure(self, mock_session, api):
         """Should raise error on auth failure."""
         mock_response = Mock()
         mock_response.status_code = 401
         mock_response.raise_for_status.side_effect = requests.HTTPError()
-        mock_post.return_value = mock_response
+        mock_session.post.return_value = mock_response
 
         with pytest.raises(requests.HTTPError):
             api._get_auth_token()
@@ -249,9 +323,9 @@ class TestTokenManagement:
 class TestRequest:
     """Tests for request method with token refresh logic."""
 
-    @patch('core_api.requests.request')
-    def test_successful_request(self, mock_request, api):
+    def test_successful_request(self, mock_session, api):
         """Should make successful request with existing token."""
+        mock_request = mock_session.request
         mock_response = Mock()
         mock_response.status_code = 200
         mock_request.return_value = mock_response
@@ -262,13 +336,13 @@ class TestRequest:
         mock_request.assert_called_once_with(
             "GET",
             "https://api.example.com/test",
-            headers={"Authorization": "Bearer existing_token"},
+            headers={"Authorization": "Bearer existing_token", "X-Correlation-ID": ANY},
             timeout=DEFAULT_TIMEOUT
         )
 
-    @patch('core_api.requests.request')
-    def test_refreshes_token_on_401(self, mock_request, api):
+    def test_refreshes_token_on_401(self, mock_session, api):
         """Should refresh token and retry on 401 response."""
+        mock_request = mock_session.request
         mock_401_response = Mock()
         mock_401_response.status_code = 401
 
@@ -287,9 +361,9 @@ class TestRequest:
         # Verify _get_auth_token was called to refresh the token
         mock_get_auth.assert_called_once()
 
-    @patch('core_api.requests.request')
-    def test_raises_on_double_401(self, mock_request, api):
+    def test_raises_on_double_401(self, mock_session, api):
         """Should raise error if 401 persists after token refresh."""
+        mock_request = mock_session.request
         mock_response = Mock()
         mock_response.status_code = 401
         mock_response.text = "Unauthorized"
@@ -300,9 +374,9 @@ class TestRequest:
             with pytest.raises(requests.HTTPError):
                 api.request("GET", "/test")
 
-    @patch('core_api.requests.request')
-    def test_passes_kwargs_to_request(self, mock_request, api):
-        """Should pass through additional kwargs to requests.request."""
+    def test_passes_kwargs_to_request(self, mock_session, api):
+        """Should pass through additional kwargs to the pooled session."""
+        mock_request = mock_session.request
         mock_response = Mock()
         mock_response.status_code = 200
         mock_request.return_value = mock_response
@@ -312,7 +386,7 @@ class TestRequest:
         mock_request.assert_called_once_with(
             "POST",
             "https://api.example.com/test",
-            headers={"Authorization": "Bearer existing_token"},
+            headers={"Authorization": "Bearer existing_token", "X-Correlation-ID": ANY},
             json={"key": "value"},
             timeout=30
         )
@@ -324,7 +398,7 @@ class TestGetJson:
     def test_returns_content_from_response(self, api):
         """Should extract 'content' field from JSON response."""
         mock_response = Mock()
-        mock_response.json.return_value = {"content": {"data": "value"}}
+        mock_response.content = _json_body({"content": {"data": "value"}})
 
         with patch.object(api, 'request', return_value=mock_response):
             result = api._get_json("/test")
@@ -332,6 +406,19 @@ class TestGetJson:
         assert result == {"data": "value"}
         mock_response.raise_for_status.assert_called_once()
 
+    def test_decodes_real_responses_with_json_codec(self, api):
+        """A requests.Response body is parsed by json_codec, not .json()."""
+        response = requests.Response()
+        response.status_code = 200
+        response._content = '{"content": {"name": "Förråd"}}'.encode()
+
+        with patch.object(api, 'request', return_value=response):
+            with patch('json_codec.loads', wraps=json_codec.loads) as loads:
+                result = api._get_json("/test")
+
+        assert result == {"name": "Förråd"}
+        loads.assert_called_once_with(response.content)
+
     def test_raises_on_http_error(self, api):
         """Should raise HTTPError on non-2xx status."""
         mock_response = Mock()
@@ -496,6 +583,27 @@ class TestFetchBuilding:
         mock_fetch.assert_not_called()
         assert result["staircases"] == []
 
+    def test_fetches_building_and_staircases_in_one_wave(self, mock_session, api):
+        """With the code as search value, sub-resources are fetched speculatively."""
+        def _get(url, **kwargs):
+            r = Mock()
+            r.status_code = 200
+            r.raise_for_status.return_value = None
+            if "/staircases" in url:
+                r.content = _json_body({"content": [{"code": "A"}]})
+            else:
+                r.content = _json_body({"content": {"code": "B123", "name": "Hus"}})
+            return r
+
+        mock_session.get.side_effect = _get
+
+        result = api.fetch_building("B123", "Uppgång")
+
+        assert mock_session.get.call_count == 2
+        mock_session.request.assert_not_called()
+        assert result["name"] == "Hus"
+        assert result["staircases"] == [{"code": "A"}]
+
 
 class TestFetchProperties:
     """Tests for fetch_properties method."""
@@ -508,7 +616,11 @@ class TestFetchProperties:
         with patch.object(api, 'fetch_buildings_for_property', return_value=[]):
             api.fetch_properties("Test Property", "Övrigt")
 
-        mock_get_json.assert_called_once_with("/properties/search", params={"q": "Test Property"})
+        mock_get_json.assert_called_once_with(
+            "/properties/search",
+            stream=core_api._PROPERTY_SEARCH,
+            params={"q": "Test Property"},
+        )
 
     @patch.object(CoreApi, '_get_json')
     @patch.object(CoreApi, 'fetch_buildings_for_property')
@@ -569,6 +681,106 @@ class TestFetchProperties:
         assert result[1]["property"]["code"] == "P2"
         assert result[2]["property"]["code"] == "P3"
 
+    def _resp(self, content, status_code=200):
+        r = Mock()
+        r.status_code = status_code
+        r.content = _json_body({"content": content})
+        r.iter_content.side_effect = lambda size: iter([r.content])
+        if status_code >= 400:
+            r.raise_for_status.side_effect = requests.HTTPError(response=r)
+        else:
+            r.raise_for_status.return_value = None
+        return r
+
+    def test_search_is_streamed_and_projected(self, mock_session, api):
+        """Only the fields the form reads are kept of each search hit."""
+        mock_session.request.return_value = self._resp(
+            [{"code": "P1", "designation": "GATAN 1", "area": {"size": 1200}}]
+        )
+
+        result = api.fetch_properties("Gatan", "Uppgång")
+
+        assert mock_session.request.call_args.kwargs["stream"] is True
+        assert result[0]["property"] == {"code": "P1", "designation": "GATAN 1"}
+
+    def test_per_property_calls_run_in_one_wave(self, mock_session, api):
+        """Buildings for every hit are fetched concurrently, then read in order."""
+        properties = [{"code": "P1"}, {"code": "P2"}, {"code": "P3"}]
+        mock_session.request.return_value = self._resp(properties)
+        mock_session.get.side_effect = lambda url, **kwargs: self._resp(
+            [{"code": url.rsplit("/", 1)[1] + "-B1"}]
+        )
+
+        result = api.fetch_properties("Test", "Byggnad")
+
+        # Only the search went through the serial client.
+        mock_session.request.assert_called_once()
+        assert mock_session.get.call_count == 3
+        assert [item["buildings"] for item in result] == [
+            [{"code": "P1-B1"}],
+            [{"code": "P2-B1"}],
+            [{"code": "P3-B1"}],
+        ]
+
+    def test_failed_wave_item_raises_like_serial(self, mock_session, api):
+        """A per-property call whose GET failed in the wave raises like a
+        serial call would."""
+        properties = [{"code": "P1"}, {"code": "P2"}]
+
+        def _request(method, url, **kwargs):
+            if "/properties/search" in url:
+                return self._resp(properties)
+            return self._resp(None, 404)
+
+        mock_session.request.side_effect = _request
+        mock_session.get.side_effect = lambda url, **kwargs: (
+            self._resp(None, 404) if url.endswith("/P2") else self._resp([])
+        )
+
+        with pytest.raises(requests.HTTPError):
+            api.fetch_properties("Test", "Byggnad")
+
+    def test_wave_is_concurrent_without_cache(self, mock_session, api):
+        """The wave doesn't depend on the response cache: with no cache
+        policy, the per-property GETs still run at once."""
+        properties = [{"code": "P1"}, {"code": "P2"}, {"code": "P3"}]
+        mock_session.request.return_value = self._resp(properties)
+        # Every GET waits for the other two; serial GETs would time out.
+        all_started = threading.Barrier(3, timeout=5)
+
+        def _get(url, **kwargs):
+            all_started.wait()
+            return self._resp([{"code": url.rsplit("/", 1)[1] + "-B1"}])
+
+        mock_session.get.side_effect = _get
+
+        with patch.object(response_cache.cache, "policy_for", return_value=None):
+            result = api.fetch_properties("Test", "Byggnad")
+
+        mock_session.request.assert_called_once()
+        assert [item["buildings"] for item in result] == [
+            [{"code": "P1-B1"}],
+            [{"code": "P2-B1"}],
+            [{"code": "P3-B1"}],
+        ]
+
+    def test_wave_item_rejected_for_token_is_fetched_again(self, mock_session, api):
+        """A GET of the wave answered with 401 goes through _get_json, which
+        refreshes the token."""
+        properties = [{"code": "P1"}, {"code": "P2"}]
+        mock_session.request.side_effect = lambda method, url, **kwargs: (
+            self._resp(properties)
+            if "/properties/search" in url
+            else self._resp([{"code": "again"}])
+        )
+        mock_session.get.side_effect = lambda url, **kwargs: (
+            self._resp(None, 401) if url.endswith("/P2") else self._resp([])
+        )
+
+        result = api.fetch_properties("Test", "Byggnad")
+
+        assert [item["buildings"] for item in result] == [[], [{"code": "again"}]]
+
 
 class TestFetchFormData:
     """Tests for fetch_form_data method."""
@@ -773,6 +985,130 @@ class TestFetchFormData:
 
         assert len(result) == 1
 
+    @patch.object(CoreApi, 'fetch_leases')
+    def test_resolves_leases_in_two_waves(self, mock_fetch_leases, mock_session, api):
+        """Rental objects, then units per distinct property, are fetched concurrently."""
+        mock_fetch_leases.return_value = [
+            {"type": "Bostadskontrakt", "rentalPropertyId": "R1"},
+            {"type": "Lokalkontrakt", "rentalPropertyId": "L1"},
+            {"type": "Garagekontrakt", "rentalPropertyId": "G1"},
+            {"type": "Bostadskontrakt", "rentalPropertyId": "R2"},
+        ]
+
+        def _get(url, **kwargs):
+            r = Mock()
+            r.status_code = 200
+            r.raise_for_status.return_value = None
+            if "/maintenance-units/" in url:
+                content = [{"type": "Tvättstuga"}, {"type": "Miljöbod"}]
+            else:
+                rental_id = url.rsplit("/", 1)[1]
+                content = {
+                    "id": rental_id,
+                    "property": {"code": "P2" if rental_id == "R2" else "P1"},
+                }
+            r.content = _json_body({"content": content})
+            return r
+
+        mock_session.get.side_effect = _get
+
+        result = api.fetch_form_data("pnr", "19800101-0000", "Tvättstuga")
+
+        urls = [c.args[0] for c in mock_session.get.call_args_list]
+        assert len(urls) == 6  # four rental objects + two distinct properties
+        assert urls.count(
+            "https://api.example.com/maintenance-units/by-property-code/P1"
+        ) == 1
+        mock_session.request.assert_not_called()
+        assert [item["lease"]["rentalPropertyId"] for item in result] == [
+            "R1", "L1", "G1", "R2"
+        ]
+        assert result[0]["rental_property"]["id"] == "R1"
+        assert result[1]["facility"]["id"] == "L1"
+        assert result[2]["parking_space"]["id"] == "G1"
+        assert result[0]["maintenance_units"] == [{"type": "Tvättstuga"}]
+        assert result[1]["maintenance_units"] == [{"type": "Tvättstuga"}]
+        assert result[2]["maintenance_units"] == []
+
+    @patch.object(CoreApi, 'fetch_leases')
+    def test_waves_are_concurrent_without_cache(
+        self, mock_fetch_leases, mock_session, api
+    ):
+        """Both waves run at once even with no cache policy (as for ttl=0
+        endpoints); serial GETs would time out on the barriers."""
+        mock_fetch_leases.return_value = [
+            {"type": "Bostadskontrakt", "rentalPropertyId": "R1"},
+            {"type": "Lokalkontrakt", "rentalPropertyId": "L1"},
+            {"type": "Garagekontrakt", "rentalPropertyId": "G1"},
+        ]
+        rental_objects = threading.Barrier(3, timeout=5)
+        units = threading.Barrier(2, timeout=5)
+
+        def _get(url, **kwargs):
+            r = Mock(status_code=200, headers={})
+            r.raise_for_status.return_value = None
+            if "/maintenance-units/" in url:
+                units.wait()
+                content = [{"type": "Tvättstuga"}]
+            else:
+                rental_objects.wait()
+                rental_id = url.rsplit("/", 1)[1]
+                content = {"id": rental_id, "property": {"code": f"P-{rental_id}"}}
+            r.content = _json_body({"content": content})
+            return r
+
+        mock_session.get.side_effect = _get
+
+        with patch.object(response_cache.cache, "policy_for", return_value=None):
+            result = api.fetch_form_data("pnr", "19800101-0000", "Tvättstuga")
+
+        mock_session.request.assert_not_called()
+        assert mock_session.get.call_count == 5
+        assert [item["lease"]["rentalPropertyId"] for item in result] == [
+            "R1", "L1", "G1"
+        ]
+        assert result[0]["maintenance_units"] == [{"type": "Tvättstuga"}]
+        assert result[1]["maintenance_units"] == [{"type": "Tvättstuga"}]
+
+    @patch.object(CoreApi, 'fetch_leases')
+    @patch.object(CoreApi, 'fetch_residence')
+    @patch.object(CoreApi, 'fetch_maintenance_units')
+    def test_fetches_units_once_per_property(
+        self, mock_fetch_units, mock_fetch_residence, mock_fetch_leases, api
+    ):
+        """Leases on the same property share one maintenance-unit lookup."""
+        mock_fetch_leases.return_value = [
+            {"type": "Bostadskontrakt", "rentalPropertyId": "R1"},
+            {"type": "Bostadskontrakt", "rentalPropertyId": "R2"},
+        ]
+        mock_fetch_residence.return_value = {"property": {"code": "P1"}}
+        mock_fetch_units.return_value = [{"type": "Tvättstuga"}]
+
+        result = api.fetch_form_data("pnr", "19800101-0000", "Tvättstuga")
+
+        mock_fetch_units.assert_called_once_with("P1", "Tvättstuga")
+        assert result[0]["maintenance_units"] == result[1]["maintenance_units"]
+
+    @patch.object(CoreApi, 'fetch_leases')
+    @patch.object(CoreApi, 'fetch_residence')
+    def test_skips_lease_whose_rental_object_fails(
+        self, mock_fetch_residence, mock_fetch_leases, api
+    ):
+        """A failing rental-object fetch skips only that lease."""
+        mock_fetch_leases.return_value = [
+            {"type": "Bostadskontrakt", "rentalPropertyId": "R1"},
+            {"type": "Bostadskontrakt", "rentalPropertyId": "R2"},
+        ]
+        mock_fetch_residence.side_effect = [
+            requests.HTTPError("404"),
+            {"property": {"code": "P2"}},
+        ]
+
+        result = api.fetch_form_data("pnr", "19800101-0000", "Bostad")
+
+        assert len(result) == 1
+        assert result[0]["rental_property"]["property"]["code"] == "P2"
+
     @patch.object(CoreApi, 'fetch_leases')
     def test_raises_and_logs_on_exception(self, mock_fetch_leases, api):
         """Should log and re-raise exceptions."""
@@ -789,7 +1125,7 @@ class TestParallelGetJson:
 
     def _resp(self, content):
         r = Mock()
-        r.json.return_value = {"content": content}
+        r.content = _json_body({"content": content})
         r.raise_for_status.return_value = None
         return r
 
@@ -797,11 +1133,10 @@ class TestParallelGetJson:
         """No URLs -> no work, empty list."""
         assert api.parallel_get_json([]) == []
 
-    def test_returns_results_in_input_order(self, api):
+    def test_returns_results_in_input_order(self, mock_session, api):
         """Results align with the input path order."""
-        with patch('core_api.requests.get') as mock_get:
-            mock_get.side_effect = lambda url, **kwargs: self._resp(url)
-            result = api.parallel_get_json(["/a", "/b", "/c"])
+        mock_session.get.side_effect = lambda url, **kwargs: self._resp(url)
+        result = api.parallel_get_json(["/a", "/b", "/c"])
 
         # base_url from mock_env fixture is https://api.example.com
         assert result == [
@@ -810,27 +1145,1207 @@ class TestParallelGetJson:
             "https://api.example.com/c",
         ]
 
-    def test_per_path_error_becomes_none(self, api):
+    def test_per_path_error_becomes_none(self, mock_session, api):
         """A failing path yields None without failing the batch."""
         def _side_effect(url, **kwargs):
             if url.endswith("/bad"):
                 raise requests.HTTPError("500")
             return self._resp("ok")
 
-        with patch('core_api.requests.get', side_effect=_side_effect):
-            result = api.parallel_get_json(["/good", "/bad"])
+        mock_session.get.side_effect = _side_effect
+        result = api.parallel_get_json(["/good", "/bad"])
 
         assert result == ["ok", None]
 
+    def test_404_is_negatively_cached(self, mock_session, api):
+        """A 404 in the wave is remembered, like one from _get_json."""
+        def _get(url, **kwargs):
+            r = self._resp({"code": "B1"})
+            if url.endswith("/NOPE"):
+                r.status_code = 404
+                r.raise_for_status.side_effect = requests.HTTPError(response=r)
+            return r
+
+        mock_session.get.side_effect = _get
+        result = api.parallel_get_json(
+            ["/buildings/by-building-code/B1", "/buildings/by-building-code/NOPE"]
+        )
+
+        assert result == [{"code": "B1"}, None]
+        with pytest.raises(requests.HTTPError):
+            api.fetch_building("NOPE", "Byggnad")
+        mock_session.request.assert_not_called()
+
+    def test_runs_on_shared_fanout_pool(self, mock_session, api):
+        """Fan-outs reuse the worker's executor and report its metrics."""
+        mock_session.get.side_effect = lambda url, **kwargs: self._resp(url)
+        api.parallel_get_json(["/a", "/b"])
+        executor = fanout._state["executor"]
+        api.parallel_get_json(["/c"])
+
+        assert fanout._state["executor"] is executor
+        stats = api.fanout_stats()
+        assert stats["tasks"] == 3
+        assert stats["in_flight"] == 0
+
     def test_falls_back_to_serial_without_token(self, mock_env):
         """With no token, uses the serial _get_json path."""
         with patch('core_api.CoreApi._get_auth_token'):
             api = CoreApi(mock_env)
         # Drop the token so the threaded precondition fails
-        mock_env["ir.config_parameter"].sudo().set_param("onecore_api_token", None)
+        api._persist_token(None)
 
-        with patch.object(api, '_get_json', side_effect=lambda url: f"serial:{url}") as mock_serial:
+        with patch.object(api, '_get_json', side_effect=lambda url, stream=None: f"serial:{url}") as mock_serial:
             result = api.parallel_get_json(["/x", "/y"])
 
         assert result == ["serial:/x", "serial:/y"]
         assert mock_serial.call_count == 2
+
+
+class TestHttpSessionConfiguration:
+    """Tests for pooled session setup from CoreApi."""
+
+    def test_configures_and_prewarms_once_per_worker(self, mock_env):
+        """Pool settings and pre-warm are applied on the first CoreApi only."""
+        with patch('core_api.http_session.prewarm') as mock_prewarm, \
+                patch('core_api.http_session.configure') as mock_configure:
+            CoreApi(mock_env)
+            CoreApi(mock_env)
+
+        mock_configure.assert_called_once_with(
+            pool_size=None, keepalive=None, prewarm_connections=None
+        )
+        mock_prewarm.assert_called_once_with("https://api.example.com")
+
+    def test_reads_pool_settings_from_config(self, mock_env):
+        """onecore_http_* parameters are passed to the session layer."""
+        params = mock_env["ir.config_parameter"].sudo()
+        params.set_param("onecore_http_pool_size", "32")
+        params.set_param("onecore_http_keepalive", "false")
+        params.set_param("onecore_http_prewarm_connections", "bogus")
+
+        with patch('core_api.http_session.prewarm'), \
+                patch('core_api.http_session.configure') as mock_configure:
+            CoreApi(mock_env)
+
+        mock_configure.assert_called_once_with(
+            pool_size=32, keepalive=False, prewarm_connections=None
+        )
+
+
+class TestCredentialStore:
+    """Tests for CoreApi's use of the worker-level credential store."""
+
+    def test_refresh_does_not_write_config_parameter(self, mock_session, mock_env, api):
+        """Token refreshes stay in memory instead of writing ir.config_parameter."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = _json_body({"token": "fresh_token"})
+        mock_session.post.return_value = mock_response
+
+        api._get_auth_token()
+
+        mock_env["ir.config_parameter"].sudo().set_param.assert_not_called()
+        assert api._get_persisted_token() == "fresh_token"
+
+    def test_cold_start_goes_through_single_flight(self, mock_env):
+        """The first CoreApi of a worker fetches its token via the
+        single-flight refresh."""
+        with patch.object(
+            CoreApi, "_get_persisted_token", return_value=None
+        ), patch.object(CoreApi, "_refresh_token") as refresh, patch.object(
+            CoreApi, "_get_auth_token"
+        ) as fetch:
+            CoreApi(mock_env)
+
+        refresh.assert_called_once_with(None)
+        fetch.assert_not_called()
+
+    def test_instances_share_token(self, mock_env, api):
+        """A token refreshed by one CoreApi is used by the next one."""
+        api._persist_token("shared_token")
+
+        other = CoreApi(mock_env)
+
+        assert other._get_persisted_token() == "shared_token"
+
+    def test_settings_not_reread_per_request(self, mock_session, mock_env, api):
+        """Base URL comes from the snapshot rather than a get_param per call."""
+        mock_session.request.return_value = Mock(status_code=200)
+        get_param = mock_env["ir.config_parameter"].sudo().get_param
+        get_param.reset_mock()
+
+        api.request("GET", "/a")
+        api.request("GET", "/b")
+
+        get_param.assert_not_called()
+
+    def test_settings_not_reread_per_construction(self, mock_env, api):
+        """A worker's next CoreApi is built from the snapshot alone."""
+        get_param = mock_env["ir.config_parameter"].sudo().get_param
+        get_param.reset_mock()
+
+        CoreApi(mock_env)
+
+        get_param.assert_not_called()
+
+    def test_expired_token_refreshed_before_request(self, mock_session, api):
+        """A locally expired token is refreshed up front instead of eating a 401."""
+        mock_session.request.return_value = Mock(status_code=200)
+        with patch.object(api._credentials, 'is_expired', return_value=True), \
+                patch.object(api, '_get_auth_token', return_value='new_token') as mock_auth:
+            api.request("GET", "/test")
+
+        mock_auth.assert_called_once()
+        assert mock_session.request.call_args.kwargs["headers"] == {
+            "Authorization": "Bearer new_token",
+            "X-Correlation-ID": ANY,
+        }
+
+
+class TestResponseCaching:
+    """Tests for the response cache inside _get_json."""
+
+    def _resp(self, content, status_code=200):
+        r = Mock()
+        r.status_code = status_code
+        r.content = _json_body({"content": content})
+        if status_code >= 400:
+            r.raise_for_status.side_effect = requests.HTTPError(response=r)
+        else:
+            r.raise_for_status.return_value = None
+        return r
+
+    def test_cached_endpoint_hits_network_once(self, api):
+        """A second fetch of a cached endpoint is served from memory."""
+        with patch.object(api, 'request', return_value=self._resp({"id": "R1"})) as mock_request:
+            first = api.fetch_residence("R1")
+            second = api.fetch_residence("R1")
+
+        assert first == second == {"id": "R1"}
+        mock_request.assert_called_once()
+
+    def test_uncached_endpoint_always_fetches(self, api):
+        """Endpoints without a policy go to the network every time."""
+        with patch.object(api, 'request', return_value=self._resp([])) as mock_request:
+            api.fetch_components_by_room("ROOM1")
+            api.fetch_components_by_room("ROOM1")
+
+        assert mock_request.call_count == 2
+
+    def test_404_is_negatively_cached(self, api):
+        """A 404 is remembered and re-raised without another request."""
+        with patch.object(api, 'request', return_value=self._resp(None, 404)) as mock_request:
+            for _ in range(2):
+                with pytest.raises(requests.HTTPError):
+                    api.fetch_building("NOPE", "Byggnad")
+
+        mock_request.assert_called_once()
+
+    def test_server_errors_are_not_cached(self, api):
+        """5xx responses are never cached."""
+        with patch.object(api, 'request', return_value=self._resp(None, 503)) as mock_request:
+            for _ in range(2):
+                with pytest.raises(requests.HTTPError):
+                    api.fetch_residence("R1")
+
+        assert mock_request.call_count == 2
+
+    def test_invalidate_cache_forces_refetch(self, api):
+        """invalidate_cache drops entries under the given path."""
+        with patch.object(api, 'request', return_value=self._resp({"id": "R1"})) as mock_request:
+            api.fetch_residence("R1")
+            api.invalidate_cache("/residences/by-rental-id/R1")
+            api.fetch_residence("R1")
+
+        assert mock_request.call_count == 2
+
+    def test_cache_stats_reports_hits(self, api):
+        """cache_stats exposes per-policy counters."""
+        before = api.cache_stats().get("residence", {"hits": 0, "misses": 0})
+        with patch.object(api, 'request', return_value=self._resp({"id": "R1"})):
+            api.fetch_residence("R1")
+            api.fetch_residence("R1")
+
+        stats = api.cache_stats()["residence"]
+        assert stats["hits"] - before["hits"] == 1
+        assert stats["misses"] - before["misses"] == 1
+
+    def test_parallel_get_json_uses_cache(self, mock_session, api):
+        """Cached paths are served without a worker-thread request."""
+        with patch.object(api, 'request', return_value=self._resp([{"id": 1}])):
+            api.fetch_component_categories()
+
+        mock_session.get.side_effect = lambda url, **kwargs: self._resp(url)
+        result = api.parallel_get_json(["/component-categories", "/components/by-room/1"])
+
+        assert result == [[{"id": 1}], "https://api.example.com/components/by-room/1"]
+        assert mock_session.get.call_count == 1
+
+    def test_stale_residence_served_and_refreshed_in_background(self, mock_session, api):
+        """An expired residence is returned at once; the pool refreshes it."""
+        refreshed = threading.Event()
+        mock_session.get.return_value = self._resp({"id": "R1", "v": 2})
+        real_put = response_cache.cache.put
+
+        def _put(*args, **kwargs):
+            real_put(*args, **kwargs)
+            refreshed.set()
+        with patch("response_cache.time.monotonic", return_value=1000), \
+                patch.object(api, 'request', return_value=self._resp({"id": "R1", "v": 1})):
+            api.fetch_residence("R1")
+
+        with patch("response_cache.time.monotonic", return_value=1000 + 301), \
+                patch.object(response_cache.cache, 'put', side_effect=_put), \
+                patch.object(api, 'request') as mock_request:
+            stale = api.fetch_residence("R1")
+            assert refreshed.wait(5)
+            mock_request.assert_not_called()
+            assert api.fetch_residence("R1") == {"id": "R1", "v": 2}
+
+        assert stale == {"id": "R1", "v": 1}
+        url = mock_session.get.call_args.args[0]
+        assert url == "https://api.example.com/residences/by-rental-id/R1"
+        assert mock_session.get.call_args.kwargs["headers"]["Authorization"].startswith("Bearer ")
+
+
+class TestConditionalRequests:
+    """Tests for ETag/If-Modified-Since revalidation in CoreApi."""
+
+    def _resp(self, content, status_code=200, headers=None):
+        r = Mock()
+        r.status_code = status_code
+        r.headers = headers or {}
+        r.content = _json_body({"content": content})
+        r.raise_for_status.return_value = None
+        return r
+
+    def test_304_reuses_stored_content(self, api):
+        """A second lease lookup is conditional and a 304 skips the body."""
+        first = self._resp([{"leaseId": "L1"}], headers={"ETag": '"v1"'})
+        with patch.object(api, 'request', side_effect=[first, self._resp(None, 304)]) as mock_request:
+            assert api._get_json("/leases/by-pnr/1") == [{"leaseId": "L1"}]
+            assert api._get_json("/leases/by-pnr/1") == [{"leaseId": "L1"}]
+
+        assert "headers" not in mock_request.call_args_list[0].kwargs
+        assert mock_request.call_args_list[1].kwargs["headers"] == {"If-None-Match": '"v1"'}
+        assert api.cache_stats()["leases"]["not_modified"] == 1
+
+    def test_changed_resource_replaces_stored_content(self, api):
+        """A 200 to a conditional GET stores the new body and validators."""
+        with patch.object(api, 'request', side_effect=[
+            self._resp([1], headers={"ETag": '"v1"'}),
+            self._resp([2], headers={"ETag": '"v2"'}),
+            self._resp(None, 304),
+        ]) as mock_request:
+            api._get_json("/leases/by-pnr/1")
+            assert api._get_json("/leases/by-pnr/1") == [2]
+            assert api._get_json("/leases/by-pnr/1") == [2]
+
+        assert mock_request.call_args_list[2].kwargs["headers"] == {"If-None-Match": '"v2"'}
+
+    def test_request_merges_extra_headers(self, mock_session, api):
+        """Caller headers are sent next to the Authorization header."""
+        mock_session.request.return_value = Mock(status_code=200)
+        api.request("GET", "/test", headers={"If-None-Match": '"v1"'})
+
+        headers = mock_session.request.call_args.kwargs["headers"]
+        assert headers["If-None-Match"] == '"v1"'
+        assert headers["Authorization"].startswith("Bearer ")
+
+    def test_parallel_get_json_sends_conditional_requests(self, mock_session, api):
+        """Components by room are revalidated from the worker threads."""
+        mock_session.get.return_value = self._resp([{"id": 1}], headers={"ETag": '"c1"'})
+        api.parallel_get_json(["/components/by-room/R1"])
+
+        mock_session.get.return_value = self._resp(None, 304)
+        assert api.parallel_get_json(["/components/by-room/R1"]) == [[{"id": 1}]]
+        assert mock_session.get.call_args.kwargs["headers"]["If-None-Match"] == '"c1"'
+
+
+class TestCircuitBreaker:
+    """Tests for the circuit breaker around CoreApi calls."""
+
+    def _trip(self, path):
+        breaker = circuit_breaker.breaker_for(path)
+        breaker._trip(circuit_breaker._now())
+        return breaker
+
+    def test_open_circuit_fails_fast(self, mock_session, api):
+        """No request (and no token refresh) while the group is open."""
+        self._trip("/leases")
+        with patch.object(api, '_refresh_token') as mock_refresh:
+            with pytest.raises(core_api.CircuitOpenError):
+                api.request("GET", "/leases/1")
+
+        mock_session.request.assert_not_called()
+        mock_refresh.assert_not_called()
+
+    def test_other_groups_unaffected(self, mock_session, api):
+        """State is per endpoint group."""
+        self._trip("/leases")
+        mock_session.request.return_value = Mock(status_code=200)
+        assert api.request("GET", "/rooms?rentalId=1").status_code == 200
+
+    def test_server_errors_trip_the_breaker(self, mock_session, api):
+        """Repeated 5xx responses open the circuit."""
+        mock_session.request.return_value = Mock(status_code=503)
+        with pytest.raises(core_api.CircuitOpenError):
+            for _ in range(circuit_breaker.DEFAULT_SETTINGS["min_calls"] + 1):
+                api.request("GET", "/leases/1")
+
+        assert mock_session.request.call_count == circuit_breaker.DEFAULT_SETTINGS["min_calls"]
+        assert api.breaker_stats()["leases"]["trips"] == 1
+
+    def test_connection_errors_are_recorded(self, mock_session, api):
+        """Transport errors count as failures (every attempt) and are re-raised."""
+        mock_session.request.side_effect = requests.ConnectionError("refused")
+        with pytest.raises(requests.ConnectionError):
+            api.request("GET", "/leases/1")
+        failures = api.breaker_stats()["leases"]["failures"]
+        assert failures == retries.DEFAULT_SETTINGS["max_attempts"]
+
+    def test_stale_cache_still_served_while_open(self, api):
+        """Fresh cache entries are served without asking the breaker."""
+        r = Mock(status_code=200, headers={})
+        r.content = _json_body({"content": {"id": "R1"}})
+        with patch.object(api, 'request', return_value=r):
+            api.fetch_residence("R1")
+        self._trip("/residences")
+
+        assert api.fetch_residence("R1") == {"id": "R1"}
+
+    def test_parallel_get_json_skips_open_group(self, mock_session, api):
+        """Paths in an open group come back as None without a request."""
+        self._trip("/components")
+        ok = Mock(status_code=200, headers={})
+        ok.content = _json_body({"content": [{"id": 1}]})
+        mock_session.get.return_value = ok
+
+        result = api.parallel_get_json(["/components/by-room/1", "/component-categories"])
+
+        assert result == [None, [{"id": 1}]]
+        assert mock_session.get.call_count == 1
+
+    def test_breaker_settings_from_config(self, mock_env):
+        """onecore_breaker_* parameters configure the breakers."""
+        params = {
+            "onecore_base_url": "https://api.example.com",
+            "onecore_breaker_open_seconds": "5",
+            "onecore_breaker_failure_rate": "0.25",
+        }
+        mock_env["ir.config_parameter"].sudo().get_param.side_effect = (
+            lambda key, default=None: params.get(key, default)
+        )
+        with patch.object(CoreApi, '_get_persisted_token', return_value="t"):
+            CoreApi(mock_env)
+
+        settings = circuit_breaker.breaker_for("/rooms").settings
+        assert settings["open_seconds"] == 5.0
+        assert settings["failure_rate_threshold"] == 0.25
+
+
+class TestRetries:
+    """Tests for retrying transient failures of idempotent requests."""
+
+    def _ok(self):
+        r = Mock(status_code=200, headers={})
+        r.content = _json_body({"content": [{"id": 1}]})
+        return r
+
+    def test_get_retried_after_503(self, mock_session, api, instant_retries):
+        """A gateway error followed by success returns the success."""
+        mock_session.request.side_effect = [Mock(status_code=503), self._ok()]
+
+        assert api._get_json("/components/by-room/1") == [{"id": 1}]
+        assert mock_session.request.call_count == 2
+        instant_retries.assert_called_once()
+        assert api.retry_stats()["components"] == {
+            "retries": 1,
+            "recovered": 1,
+            "exhausted": 0,
+            "budget_exhausted": 0,
+            "out_of_time": 0,
+        }
+
+    def test_connection_reset_retried(self, mock_session, api):
+        """Connection errors are retried for GETs."""
+        mock_session.request.side_effect = [
+            requests.ConnectionError("reset by peer"),
+            self._ok(),
+        ]
+        assert api.request("GET", "/leases/1").status_code == 200
+
+    def test_gives_up_after_max_attempts(self, mock_session, api):
+        """The last error surfaces after max_attempts."""
+        mock_session.request.side_effect = requests.ReadTimeout("slow")
+        with pytest.raises(requests.ReadTimeout):
+            api.request("GET", "/leases/1")
+
+        assert mock_session.request.call_count == retries.DEFAULT_SETTINGS["max_attempts"]
+        assert api.retry_stats()["leases"]["exhausted"] == 1
+
+    def test_non_idempotent_requests_not_retried(self, mock_session, api):
+        """POSTs are sent once even on a 503."""
+        mock_session.request.return_value = Mock(status_code=503)
+        api.request("POST", "/workOrders", json={})
+        assert mock_session.request.call_count == 1
+
+    def test_client_errors_not_retried(self, mock_session, api):
+        """4xx responses are final."""
+        mock_session.request.return_value = Mock(status_code=404)
+        api.request("GET", "/leases/1")
+        assert mock_session.request.call_count == 1
+
+    def test_parallel_get_json_retries_in_threads(self, mock_session, api):
+        """A transient error no longer drops a room's components."""
+        mock_session.get.side_effect = [requests.ConnectionError("reset"), self._ok()]
+        assert api.parallel_get_json(["/components/by-room/1"]) == [[{"id": 1}]]
+
+
+class TestPagination:
+    """Tests for the auto-paginating iter_component_* generators."""
+
+    def _serve(self, mock_session, total, fail_pages=()):
+        """Answer /component-types pages from ``total`` numbered items."""
+        def _respond(url, params=None, **kwargs):
+            page, limit = int(params["page"]), int(params["limit"])
+            r = Mock()
+            if page in fail_pages:
+                r.status_code = 503
+                r.raise_for_status.side_effect = requests.HTTPError(response=r)
+                return r
+            r.status_code = 200
+            r.raise_for_status.return_value = None
+            start = (page - 1) * limit
+            r.content = _json_body(
+                {"content": [{"id": i} for i in range(start, min(start + limit, total))]}
+            )
+            return r
+
+        mock_session.request.side_effect = lambda method, url, **kw: _respond(url, **kw)
+        mock_session.get.side_effect = _respond
+
+    def _pages(self, mock_session):
+        calls = mock_session.request.call_args_list + mock_session.get.call_args_list
+        return sorted(int(c.kwargs["params"]["page"]) for c in calls)
+
+    def test_yields_every_page(self, mock_session, api):
+        """Items beyond the first page are no longer dropped."""
+        self._serve(mock_session, total=250)
+
+        items = list(api.iter_component_types("CAT1"))
+
+        assert [item["id"] for item in items] == list(range(250))
+        assert self._pages(mock_session) == [1, 2, 3]
+        # Page 1 goes through _get_json; later pages are prefetched.
+        assert mock_session.request.call_count == 1
+
+    def test_max_items_caps_and_stops(self, mock_session, api):
+        """max_items limits the items and the pages requested."""
+        self._serve(mock_session, total=500)
+
+        items = list(api.iter_component_types("CAT1", max_items=150))
+
+        assert len(items) == 150
+        assert self._pages(mock_session) == [1, 2]
+
+    def test_small_cap_shrinks_the_page(self, mock_session, api):
+        """A cap below the page size is sent as the limit."""
+        self._serve(mock_session, total=500)
+
+        items = list(api.iter_component_models("Kyl", max_items=5))
+
+        assert len(items) == 5
+        assert mock_session.request.call_args.kwargs["params"]["limit"] == 5
+        mock_session.get.assert_not_called()
+
+    def test_consumer_stopping_early_fetches_no_more(self, mock_session, api):
+        """Breaking out only leaves the already-started prefetch."""
+        self._serve(mock_session, total=1000)
+
+        for item in api.iter_component_subtypes("T1", page_size=10):
+            break
+
+        assert self._pages(mock_session) in ([1], [1, 2])
+
+    def test_failed_prefetch_is_retried_and_raises(self, mock_session, api):
+        """A page that keeps failing raises after the earlier pages."""
+        self._serve(mock_session, total=300, fail_pages={2})
+        seen = []
+
+        with pytest.raises(requests.HTTPError):
+            for item in api.iter_component_types("CAT1"):
+                seen.append(item)
+
+        assert len(seen) == 100
+
+    def test_oversized_page_ends_iteration(self, mock_session, api):
+        """A server ignoring limit (one big page) isn't asked for page 2."""
+        response = Mock(status_code=200)
+        response.content = _json_body({"content": [{"id": i} for i in range(150)]})
+        mock_session.request.return_value = response
+
+        assert len(list(api.iter_component_types("CAT1"))) == 150
+        mock_session.get.assert_not_called()
+
+
+class TestUploadDocument:
+    """Tests for upload_document in JSON and streamed multipart mode."""
+
+    PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 300
+
+    @pytest.fixture(autouse=True)
+    def fresh_uploads(self):
+        uploads.reset()
+        yield
+        uploads.reset()
+
+    def _resp(self, status_code=201):
+        r = Mock()
+        r.status_code = status_code
+        r.text = '{"content": {"id": "doc-1"}}'
+        r.content = _json_body({"content": {"id": "doc-1"}})
+        r.raise_for_status.return_value = None
+        return r
+
+    def test_json_mode_posts_base64(self, mock_session, api):
+        """By default the image goes base64-encoded in a JSON body."""
+        mock_session.request.return_value = self._resp()
+        data = base64.b64encode(self.PNG)
+
+        api.upload_document(data, "C1", file_name="a.png")
+
+        method, url = mock_session.request.call_args.args
+        payload = mock_session.request.call_args.kwargs["json"]
+        assert (method, url) == ("POST", "https://api.example.com/components/C1/upload")
+        assert payload == {
+            "fileData": data.decode(),
+            "fileName": "a.png",
+            "contentType": "image/png",
+        }
+
+    def test_stream_mode_posts_raw_bytes(self, mock_session, api):
+        """In stream mode the raw image goes in a sized multipart body."""
+        uploads.configure(mode="stream")
+        mock_session.request.return_value = self._resp()
+
+        api.upload_document(base64.b64encode(self.PNG), "C1")
+
+        kwargs = mock_session.request.call_args.kwargs
+        body = kwargs["data"]
+        assert "json" not in kwargs
+        assert kwargs["headers"]["Content-Type"] == body.content_type
+        assert self.PNG in b"".join(body)
+        assert len(b"".join(body)) == len(body)
+        assert api.upload_stats()["stream"] == 1
+
+    def test_rejected_multipart_falls_back_to_json(self, mock_session, api):
+        """A 415 is retried as JSON, and later uploads go straight to JSON."""
+        uploads.configure(mode="stream")
+        mock_session.request.side_effect = [
+            self._resp(415),
+            self._resp(),
+            self._resp(),
+        ]
+        data = base64.b64encode(self.PNG)
+
+        api.upload_document(data, "C1")
+        api.upload_document(data, "C1")
+
+        calls = mock_session.request.call_args_list
+        assert "data" in calls[0].kwargs
+        assert calls[1].kwargs["json"]["fileData"] == data.decode()
+        assert "json" in calls[2].kwargs
+        assert api.upload_stats()["fallbacks"] == 1
+
+    def test_invalid_base64_is_posted_as_json_unchanged(self, mock_session, api):
+        """Data of an invalid base64 length is not rejected nor streamed."""
+        uploads.configure(mode="stream")
+        mock_session.request.return_value = self._resp()
+
+        api.upload_document("not-base64", "C1", file_name="a.jpg")
+
+        (call,) = mock_session.request.call_args_list
+        assert call.kwargs["json"]["fileData"] == "not-base64"
+        assert "data" not in call.kwargs
+        assert api.upload_stats()["json"] == 1
+        assert uploads.streaming()
+
+    def test_bad_request_is_not_retried_as_json(self, mock_session, api):
+        """A 400 is raised, not taken as multipart being unsupported."""
+        uploads.configure(mode="stream")
+        bad_request = self._resp(400)
+        bad_request.raise_for_status.side_effect = requests.HTTPError(
+            response=bad_request
+        )
+        mock_session.request.return_value = bad_request
+
+        with pytest.raises(requests.HTTPError):
+            api.upload_document(base64.b64encode(self.PNG), "C1")
+
+        assert mock_session.request.call_count == 1
+        assert api.upload_stats()["fallbacks"] == 0
+        assert uploads.streaming()
+
+    def test_mode_is_read_from_config(self, mock_env, mock_session):
+        """onecore_upload_mode selects the mode when the worker configures."""
+        mock_env["ir.config_parameter"].sudo().set_param("onecore_upload_mode", "stream")
+
+        CoreApi(mock_env)
+
+        assert uploads.streaming()
+
+
+class TestStreamedDecoding:
+    """Tests for list endpoints decoded with a json_stream.StreamedList."""
+
+    BODY = (
+        b'{"content": [{"id": "C1", "serialNumber": "S1", "notes": "long"},'
+        b' {"id": "C2", "removed": true}]}'
+    )
+    STREAM = json_stream.StreamedList(
+        keep=lambda comp: not comp.get("removed"),
+        project=json_stream.pick({"id": True, "serialNumber": True}),
+        name="room_components",
+    )
+
+    def _resp(self):
+        r = Mock()
+        r.status_code = 200
+        r.headers = {}
+        r.content = self.BODY
+        r.raise_for_status.return_value = None
+        r.iter_content.side_effect = lambda size: iter(
+            [self.BODY[:20], self.BODY[20:]]
+        )
+        return r
+
+    def test_get_json_streams_and_projects(self, mock_session, api):
+        """A GET given a stream is requested streamed and decoded item by item."""
+        response = self._resp()
+        mock_session.request.return_value = response
+
+        result = api._get_json("/components/by-room/ROOM1", stream=self.STREAM)
+
+        assert result == [{"id": "C1", "serialNumber": "S1"}]
+        assert mock_session.request.call_args.kwargs["stream"] is True
+        response.json.assert_not_called()
+        response.close.assert_called_once()
+
+    def test_parallel_get_json_streams(self, mock_session, api):
+        """Fan-out threads decode the paths given a stream the same way."""
+        mock_session.get.side_effect = lambda url, **kwargs: self._resp()
+        paths = ["/components/by-room/R1", "/components/by-room/R2"]
+
+        result = api.parallel_get_json(
+            paths, streams={path: self.STREAM for path in paths}
+        )
+
+        assert result == [[{"id": "C1", "serialNumber": "S1"}]] * 2
+        assert all(
+            c.kwargs["stream"] is True for c in mock_session.get.call_args_list
+        )
+
+    def test_other_readers_of_the_path_get_full_content(self, mock_session, api):
+        """A stream applies to its call only, not to every GET of the path."""
+        mock_session.request.side_effect = lambda *args, **kwargs: self._resp()
+
+        projected = api._get_json("/components/by-room/ROOM1", stream=self.STREAM)
+        full = api._get_json("/components/by-room/ROOM1")
+
+        assert projected == [{"id": "C1", "serialNumber": "S1"}]
+        assert full == [
+            {"id": "C1", "serialNumber": "S1", "notes": "long"},
+            {"id": "C2", "removed": True},
+        ]
+        assert "stream" not in mock_session.request.call_args.kwargs
+
+    def test_paths_without_a_stream_are_not_streamed(self, mock_session, api):
+        """Other endpoints keep decoding the whole body."""
+        response = Mock(status_code=200)
+        response.content = _json_body({"content": [{"code": "A"}]})
+        mock_session.request.return_value = response
+
+        assert api.fetch_staircases_for_building("B1") == [{"code": "A"}]
+        assert "stream" not in mock_session.request.call_args.kwargs
+
+
+class TestSingleFlight:
+    """Tests for coalescing identical concurrent GETs in CoreApi."""
+
+    def test_concurrent_identical_gets_share_one_request(self, mock_session, api):
+        """Threads asking for the same lease at once trigger one HTTP call."""
+        release = threading.Event()
+        started = threading.Event()
+        response = Mock(status_code=200, headers={})
+        response.content = _json_body({"content": [{"leaseId": "L1"}]})
+
+        def _slow_request(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return response
+
+        mock_session.request.side_effect = _slow_request
+        coalesced_before = core_api.single_flight.group.stats()["coalesced"]
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(api._get_json("/leases/1")))
+            for _ in range(3)
+        ]
+        threads[0].start()
+        assert started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while core_api.single_flight.group.stats()["coalesced"] < coalesced_before + 2:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert mock_session.request.call_count == 1
+        assert results == [[{"leaseId": "L1"}]] * 3
+
+    def test_follower_waits_no_longer_than_its_timeout(self, mock_session, api):
+        """A caller with a short timeout doesn't wait out a slow leader."""
+        release = threading.Event()
+        started = threading.Event()
+        response = Mock(status_code=200, headers={})
+        response.content = _json_body({"content": [{"leaseId": "L1"}]})
+
+        def _request(*args, **kwargs):
+            if kwargs["timeout"] == 30:
+                started.set()
+                release.wait(5)
+            return response
+
+        mock_session.request.side_effect = _request
+        leader = threading.Thread(
+            target=lambda: api._get_json("/leases/1", timeout=30)
+        )
+        leader.start()
+        assert started.wait(5)
+
+        try:
+            assert api._get_json("/leases/1", timeout=0.05) == [{"leaseId": "L1"}]
+            assert not release.is_set()
+        finally:
+            release.set()
+            leader.join(5)
+        assert mock_session.request.call_count == 2
+
+    def test_follower_waits_no_longer_than_its_budget(self, mock_session, api):
+        """Callers with different budgets share a call only while both can."""
+        release = threading.Event()
+        started = threading.Event()
+        response = Mock(status_code=200, headers={})
+        response.content = _json_body({"content": [{"leaseId": "L1"}]})
+
+        def _request(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return response
+
+        mock_session.request.side_effect = _request
+        results = []
+
+        def _lead():
+            with deadlines.budget(30):
+                results.append(api._get_json("/leases/1"))
+
+        leader = threading.Thread(target=_lead)
+        leader.start()
+        assert started.wait(5)
+
+        try:
+            with deadlines.budget(0.3):
+                with pytest.raises(core_api.DeadlineExceeded):
+                    api._get_json("/leases/1")
+            assert not release.is_set()
+        finally:
+            release.set()
+            leader.join(5)
+            deadlines.reset()
+        assert results == [[{"leaseId": "L1"}]]
+        assert mock_session.request.call_count == 1
+
+    def test_duplicate_paths_in_parallel_get_json(self, mock_session, api):
+        """A fan-out listing the same path twice returns it twice."""
+        response = Mock(status_code=200, headers={})
+        response.content = _json_body({"content": [{"id": 1}]})
+        mock_session.get.return_value = response
+
+        result = api.parallel_get_json(["/components/by-room/1", "/components/by-room/1"])
+
+        assert result == [[{"id": 1}], [{"id": 1}]]
+
+
+class TestSharedCacheBackend:
+    """Tests for CoreApi's shared (cross-worker) cache level."""
+
+    def test_shared_backend_selected_from_config(self, mock_env):
+        """onecore_cache_backend picks the backend for this database."""
+        mock_env["ir.config_parameter"].sudo().set_param("onecore_cache_backend", "postgres")
+        sentinel = Mock()
+        with patch('core_api.shared_cache.backend_for', return_value=sentinel) as mock_for:
+            api = CoreApi(mock_env)
+
+        mock_for.assert_called_once_with(mock_env.cr.dbname, "postgres")
+        assert api._shared_cache is sentinel
+
+    def test_get_json_passes_shared_backend(self, api):
+        """Cache reads and writes go through the shared level."""
+        shared = Mock()
+        shared.get_many.return_value = {}
+        api._shared_cache = shared
+        response = Mock(status_code=200)
+        response.content = _json_body({"content": {"id": 1}})
+
+        with patch.object(api, 'request', return_value=response):
+            api.fetch_residence("R1")
+
+        shared.get_many.assert_called_once()
+        shared.put_many.assert_called_once()
+
+    def test_parallel_get_json_bulk_writes_shared(self, mock_session, api):
+        """A fan-out writes its cacheable results in one bulk put."""
+        shared = Mock()
+        shared.get_many.return_value = {}
+        api._shared_cache = shared
+        response = Mock()
+        response.content = _json_body({"content": [{"id": 1}]})
+        response.raise_for_status.return_value = None
+        mock_session.get.return_value = response
+
+        api.parallel_get_json(["/rooms?rentalId=1", "/rooms?rentalId=2"])
+
+        shared.get_many.assert_called_once()
+        shared.put_many.assert_called_once()
+        assert len(shared.put_many.call_args.args[0]) == 2
+
+
+class TestDeadlines:
+    """Tests for time budgets across chained CoreApi calls."""
+
+    @pytest.fixture(autouse=True)
+    def clock(self):
+        """Fresh budgets on a manual monotonic clock."""
+        deadlines.reset()
+
+        class Clock:
+            now = 100.0
+
+        clock = Clock()
+        with patch('deadlines._now', side_effect=lambda: clock.now):
+            yield clock
+        deadlines.reset()
+
+    def _ok(self, content):
+        r = Mock(status_code=200, headers={})
+        r.content = _json_body({"content": content})
+        return r
+
+    def test_timeout_capped_to_time_left(self, mock_session, api):
+        mock_session.request.return_value = Mock(status_code=200)
+
+        with deadlines.budget(4):
+            api.request("GET", "/leases/1")
+
+        assert mock_session.request.call_args.kwargs["timeout"] == 4.0
+
+    def test_spent_budget_fails_without_a_call(self, mock_session, api, clock):
+        """No request, no retry and nothing recorded by the breaker."""
+        with deadlines.budget(1):
+            clock.now = 101.0
+            with pytest.raises(core_api.DeadlineExceeded):
+                api.request("GET", "/leases/1")
+
+        mock_session.request.assert_not_called()
+        assert "leases" not in api.breaker_stats()
+        assert api.deadline_stats()["exceeded"] == 1
+
+    def test_budget_ends_retries(self, mock_session, api, clock):
+        """A retry is not attempted once the budget is spent."""
+
+        def _slow(*args, **kwargs):
+            clock.now += 3
+            raise requests.ReadTimeout("slow")
+
+        mock_session.request.side_effect = _slow
+
+        with deadlines.budget(5):
+            with pytest.raises(requests.ReadTimeout):
+                api.request("GET", "/leases/1")
+
+        assert mock_session.request.call_count == 2
+        second_timeout = mock_session.request.call_args.kwargs["timeout"]
+        assert second_timeout == 2.0
+        assert api.retry_stats()["leases"]["out_of_time"] == 1
+
+    def test_parallel_jobs_get_the_callers_deadline(self, mock_session, api):
+        """Pool threads are bound by the budget of the calling thread."""
+        mock_session.get.return_value = self._ok([{"id": 1}])
+
+        with deadlines.budget(3):
+            result = api.parallel_get_json(["/components/by-room/1"])
+
+        assert result == [[{"id": 1}]]
+        assert mock_session.get.call_args.kwargs["timeout"] == (3.0, 3.0)
+
+    def test_parallel_paths_dropped_when_spent(self, mock_session, api, clock):
+        with deadlines.budget(1):
+            clock.now = 101.0
+            result = api.parallel_get_json(["/components/by-room/1"])
+
+        assert result == [None]
+        mock_session.get.assert_not_called()
+
+    @patch.object(CoreApi, 'fetch_leases')
+    @patch.object(CoreApi, 'fetch_residence')
+    def test_form_data_returns_leases_resolved_in_time(
+        self, mock_fetch_residence, mock_fetch_leases, api
+    ):
+        """Leases after the budget ran out are left out, not an error."""
+        mock_fetch_leases.return_value = [
+            {"type": "Bostadskontrakt", "rentalPropertyId": "R1"},
+            {"type": "Bostadskontrakt", "rentalPropertyId": "R2"},
+        ]
+        mock_fetch_residence.side_effect = [
+            {"property": {"code": "P1"}},
+            core_api.DeadlineExceeded("spent"),
+        ]
+
+        with patch.object(
+            api, 'fetch_maintenance_units', side_effect=core_api.DeadlineExceeded
+        ):
+            result = api.fetch_form_data("leaseId", "123", "Tvättstuga")
+
+        assert len(result) == 1
+        assert result[0]["rental_property"] == {"property": {"code": "P1"}}
+        assert result[0]["maintenance_units"] == []
+
+    def test_properties_returned_so_far(self, api):
+        properties = [{"code": "P1"}, {"code": "P2"}]
+        with patch.object(api, '_get_json', return_value=properties), \
+                patch.object(api, '_wave'), \
+                patch.object(
+                    api,
+                    'fetch_buildings_for_property',
+                    side_effect=[[{"code": "B1"}], core_api.DeadlineExceeded],
+                ):
+            result = api.fetch_properties("Gatan", "Byggnad")
+
+        assert [item["property"]["code"] for item in result] == ["P1"]
+
+    def test_budgets_from_config(self, mock_env):
+        mock_env["ir.config_parameter"].sudo().set_param(
+            "onecore_budget_search_seconds", "7.5"
+        )
+        CoreApi(mock_env)
+
+        with deadlines.budget("search"):
+            assert deadlines.remaining() == 7.5
+
+
+class TestHedging:
+    """Tests for hedged GETs through CoreApi."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_hedging(self):
+        hedging.reset()
+        yield
+        hedging.reset()
+
+    def _api(self, mock_env):
+        """A CoreApi with hedging enabled in the config and a known
+        threshold for /components."""
+        mock_env["ir.config_parameter"].sudo().set_param("onecore_hedge_enabled", "1")
+        api = CoreApi(mock_env)
+        hedging.configure(min_samples=1, min_delay=0.01, max_delay=0.01)
+        hedging.tracker("/components").record(0.01)
+        return api
+
+    def test_off_by_default(self, mock_session, api):
+        mock_session.request.return_value = Mock(status_code=200)
+
+        api.request("GET", "/leases/1")
+
+        assert api.hedge_stats() == {}
+
+    def test_slow_room_call_is_hedged(self, mock_session, mock_env):
+        """A hung first copy no longer holds up the wave."""
+        api = self._api(mock_env)
+        release = threading.Event()
+        ok = Mock(status_code=200, headers={})
+        ok.content = _json_body({"content": [{"id": 1}]})
+        calls = []
+
+        def _get(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                release.wait(5)
+            return ok
+
+        mock_session.get.side_effect = _get
+        try:
+            result = api.parallel_get_json(["/components/by-room/1"])
+        finally:
+            release.set()
+
+        assert result == [[{"id": 1}]]
+        assert len(calls) == 2
+        assert api.hedge_stats()["components"]["hedge_wins"] == 1
+
+    def test_posts_are_never_hedged(self, mock_session, mock_env):
+        api = self._api(mock_env)
+        mock_session.request.return_value = Mock(status_code=201)
+
+        api.request("POST", "/components", json={})
+
+        assert mock_session.request.call_count == 1
+
+    def test_pool_follows_the_fanout_cap(self, mock_env):
+        """Every fan-out call in flight has room for both of its copies."""
+        mock_env["ir.config_parameter"].sudo().set_param(
+            "onecore_fanout_max_in_flight", "10"
+        )
+        CoreApi(mock_env)
+
+        assert hedging._settings["max_workers"] == 20
+
+
+class TestMetrics:
+    """Tests for the per-endpoint call metrics of CoreApi."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_metrics(self):
+        metrics.reset()
+        yield
+        metrics.reset()
+
+    def _ok(self, content, size=100):
+        r = Mock(status_code=200, headers={"Content-Length": str(size)})
+        r.content = _json_body({"content": content})
+        return r
+
+    def test_request_is_counted_per_template(self, mock_session, api):
+        mock_session.request.side_effect = [Mock(status_code=503), self._ok({})]
+
+        api.request("GET", "/residences/by-rental-id/705-1")
+
+        stats = api.metrics_stats()["GET /residences/by-rental-id/{id}"]
+        assert stats["requests"] == 1
+        assert stats["retries"] == 1
+        assert stats["bytes_in"] == 100
+
+    def test_timeouts_are_counted(self, mock_session, api):
+        mock_session.request.side_effect = requests.ReadTimeout("slow")
+
+        with pytest.raises(requests.Timeout):
+            api.request("GET", "/rooms?rentalId=1")
+
+        stats = api.metrics_stats()["GET /rooms"]
+        assert stats["timeouts"] == stats["errors"] == 1
+        assert stats["retries"] == retries.DEFAULT_SETTINGS["max_attempts"] - 1
+
+    def test_refused_calls_are_counted(self, mock_session, api):
+        circuit_breaker.breaker_for("/leases")._trip(circuit_breaker._now())
+
+        with pytest.raises(core_api.CircuitOpenError):
+            api.request("GET", "/leases/by-pnr/1")
+
+        (series,) = metrics.snapshot()
+        assert series["responses"] == {"circuit_open": 1}
+
+    def test_cache_hits_and_misses(self, mock_session, api):
+        mock_session.request.return_value = self._ok({"id": "R1"})
+
+        api.fetch_residence("R1")
+        api.fetch_residence("R1")
+
+        stats = api.metrics_stats()["GET /residences/by-rental-id/{id}"]
+        assert (stats["cache_hits"], stats["cache_misses"]) == (1, 1)
+        assert stats["requests"] == 1
+
+    def test_parallel_get_json(self, mock_session, api):
+        ok = self._ok([{"id": 1}], size=40)
+        missing = Mock(status_code=404, content=b"{}", headers={})
+        missing.raise_for_status.side_effect = requests.HTTPError(response=missing)
+        mock_session.get.side_effect = lambda url, **kwargs: (
+            missing if url.endswith("/3") else ok
+        )
+
+        api.parallel_get_json([f"/components/by-room/{i}" for i in range(1, 4)])
+
+        (series,) = metrics.snapshot()
+        assert series["endpoint"] == "/components/by-room/{id}"
+        assert series["responses"] == {"200": 2, "404": 1}
+        assert series["bytes_in"] == 80
+
+    def test_never_published_from_a_call(self, mock_session, mock_env):
+        """Publishing writes to Postgres; it is left to the cron and the
+        scrape route, off the request path."""
+        mock_env["ir.config_parameter"].sudo().set_param(
+            "onecore_metrics_publish_seconds", "30"
+        )
+        api = CoreApi(mock_env)
+        mock_session.request.return_value = self._ok({})
+        mock_session.get.side_effect = lambda url, **kwargs: self._ok([])
+
+        with patch("metrics.store_for") as store_for:
+            api.request("GET", "/rooms?rentalId=1")
+            api.parallel_get_json(["/components/by-room/1"])
+
+        store_for.assert_not_called()
+
+
+class TestTracing:
+    """Tests for the spans and correlation ids of CoreApi calls."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_tracing(self):
+        tracing.reset()
+        yield
+        tracing.reset()
+
+    def _ok(self, content):
+        r = Mock(status_code=200, headers={})
+        r.content = _json_body({"content": content})
+        return r
+
+    def test_correlation_id_is_sent(self, mock_session, api):
+        mock_session.request.return_value = self._ok({})
+
+        with tracing.span("search") as root:
+            api.request("GET", "/rooms?rentalId=1")
+
+        sent = mock_session.request.call_args.kwargs["headers"]
+        assert sent[tracing.HEADER] == root.correlation_id
+
+    def test_each_call_is_a_span(self, mock_session, api, tmp_path):
+        tracing.configure(path=str(tmp_path / "trace.json"))
+        mock_session.request.side_effect = [Mock(status_code=503), self._ok({})]
+
+        api.request("GET", "/residences/by-rental-id/705-1")
+
+        (event,) = tracing.load(tmp_path / "trace.json")
+        assert event["name"] == "onecore GET /residences/by-rental-id/{id}"
+        assert (event["args"]["status"], event["args"]["attempts"]) == (200, 2)
+
+    def test_parallel_calls_share_the_trace(self, mock_session, api, tmp_path):
+        tracing.configure(path=str(tmp_path / "trace.json"))
+        mock_session.get.return_value = self._ok([])
+
+        api.parallel_get_json([f"/components/by-room/{i}" for i in range(1, 4)])
+
+        events = tracing.load(tmp_path / "trace.json")
+        (root,) = [e for e in events if e["name"] == "onecore.parallel_get_json"]
+        calls = [e for e in events if e["name"].startswith("onecore GET")]
+        assert root["args"]["paths"] == 3
+        assert len(calls) == 3
+        assert {e["args"]["parent_id"] for e in calls} == {root["args"]["span_id"]}
+        sent = {
+            c.kwargs["headers"][tracing.HEADER]
+            for c in mock_session.get.call_args_list
+        }
+        assert sent == {root["args"]["correlation_id"]}
@@ -0,0 +1,274 @@
+import base64
+import json
+import os
+import stat
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+import credentials
+from credentials import CredentialStore
+
+
+def _jwt(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode())
+    return f"header.{payload.decode().rstrip('=')}.signature"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CredentialStore("testdb", signal_dir=str(tmp_path))
+
+
+class TestConfigSnapshot:
+    """Tests for the settings snapshot."""
+
+    def test_loads_once_within_ttl(self, store):
+        """Settings are read from the loader once, then served from memory."""
+        loader = Mock(side_effect=lambda key: f"value-{key}")
+
+        assert store.get_config("onecore_base_url", loader) == "value-onecore_base_url"
+        assert store.get_config("onecore_username", loader) == "value-onecore_username"
+
+        assert loader.call_count == len(credentials.CONFIG_KEYS)
+
+    def test_reloads_after_ttl(self, store):
+        """A snapshot older than CONFIG_TTL is re-read."""
+        loader = Mock(return_value="x")
+        store.get_config("onecore_base_url", loader)
+        store._config_loaded_at -= credentials.CONFIG_TTL + 1
+
+        store.get_config("onecore_base_url", loader)
+
+        assert loader.call_count == 2 * len(credentials.CONFIG_KEYS)
+
+    def test_unknown_key_goes_to_loader(self, store):
+        """Keys outside the snapshot are read through directly."""
+        loader = Mock(return_value="direct")
+        assert store.get_config("some_other_key", loader) == "direct"
+
+
+class TestToken:
+    """Tests for token storage and expiry."""
+
+    def test_seed_consulted_once(self, store):
+        """The persisted seed is only read while the worker has no token."""
+        seed = Mock(return_value=None)
+        assert store.get_token(seed=seed) is None
+        assert store.get_token(seed=seed) is None
+        seed.assert_called_once()
+
+    def test_seed_token_is_adopted(self, store):
+        """A seeded token becomes the current token."""
+        assert store.get_token(seed=lambda: "seeded") == "seeded"
+
+    def test_expired_seed_is_ignored(self, store):
+        """A stored token past its exp is not adopted."""
+        assert store.get_token(seed=lambda: _jwt(time.time() - 60)) is None
+        assert store.is_expired()
+
+    def test_expiry_read_from_jwt(self, store):
+        """A JWT past its exp (minus skew) counts as expired."""
+        store.set_token(_jwt(time.time() + credentials.TOKEN_EXPIRY_SKEW - 1))
+        assert store.is_expired()
+
+        store.set_token(_jwt(time.time() + 3600))
+        assert not store.is_expired()
+
+    def test_opaque_token_never_expires_locally(self, store):
+        """Tokens without a decodable exp are trusted until OneCore rejects them."""
+        store.set_token("opaque")
+        assert not store.is_expired()
+
+    def test_missing_token_is_expired(self, store):
+        """No token at all must trigger a refresh."""
+        assert store.is_expired()
+
+
+class TestRefresh:
+    """Tests for single-flight refresh."""
+
+    def test_concurrent_refreshes_fetch_once(self, store):
+        """N threads refreshing the same stale token issue one fetch."""
+        store.set_token("stale")
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            store.set_token("fresh")
+            return "fresh"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(store.refresh("stale", fetch)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        assert len(calls) == 1
+        assert results == ["fresh"] * 8
+
+    def test_refresh_fetches_when_token_unchanged(self, store):
+        """A caller holding the current token triggers a fetch."""
+        store.set_token("current")
+        fetch = Mock(return_value="new")
+        assert store.refresh("current", fetch) == "new"
+        fetch.assert_called_once()
+
+
+    @pytest.mark.skipif(credentials.fcntl is None, reason="needs fcntl")
+    def test_file_lock_not_held_during_fetch(self, store):
+        """Other workers can check the signal file while a token is fetched."""
+        store.set_token("stale")
+        held = []
+
+        def fetch():
+            fd = os.open(f"{store.signal_path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                credentials.fcntl.flock(
+                    fd, credentials.fcntl.LOCK_EX | credentials.fcntl.LOCK_NB
+                )
+                held.append(False)
+            except BlockingIOError:
+                held.append(True)
+            finally:
+                os.close(fd)
+            store.set_token("fresh")
+            return "fresh"
+
+        assert store.refresh("stale", fetch) == "fresh"
+        assert held == [False]
+
+
+class TestSignalling:
+    """Tests for cross-worker token signalling."""
+
+    def test_other_worker_adopts_refreshed_token(self, tmp_path):
+        """A token set by one worker is picked up by another without a fetch."""
+        worker_a = CredentialStore("testdb", signal_dir=str(tmp_path))
+        worker_b = CredentialStore("testdb", signal_dir=str(tmp_path))
+        worker_b.set_token("old")
+
+        worker_a.set_token("refreshed")
+
+        assert worker_b.get_token() == "refreshed"
+
+    def test_refresh_reuses_token_from_other_worker(self, tmp_path):
+        """A refresh finding a newer token from another worker skips the fetch."""
+        worker_a = CredentialStore("testdb", signal_dir=str(tmp_path))
+        worker_b = CredentialStore("testdb", signal_dir=str(tmp_path))
+        worker_b.set_token("stale")
+        worker_a.set_token("refreshed")
+        fetch = Mock()
+
+        assert worker_b.refresh("stale", fetch) == "refreshed"
+        fetch.assert_not_called()
+
+    def test_signal_file_is_private(self, store):
+        """The token file is only readable by the Odoo user."""
+        store.set_token("secret")
+        mode = stat.S_IMODE(os.stat(store.signal_path).st_mode)
+        assert mode == 0o600
+
+    def test_write_failure_is_not_fatal(self, tmp_path):
+        """An unusable signal dir only loses cross-worker sharing."""
+        (tmp_path / "taken").write_text("")
+        store = CredentialStore("testdb", signal_dir=str(tmp_path / "taken"))
+        assert store.signal_path is None
+        store.set_token("token")
+        assert store.get_token() == "token"
+
+    def test_signal_dir_is_created_private(self, tmp_path):
+        """A missing signal dir is created with mode 0700."""
+        store = CredentialStore("testdb", signal_dir=str(tmp_path / "tokens"))
+        store.set_token("token")
+        assert stat.S_IMODE(os.stat(tmp_path / "tokens").st_mode) == 0o700
+
+    def test_shared_signal_dir_is_not_used(self, tmp_path):
+        """A directory others can write to (such as /tmp) is refused."""
+        shared = tmp_path / "shared"
+        shared.mkdir()
+        shared.chmod(0o1777)
+        store = CredentialStore("testdb", signal_dir=str(shared))
+        store.set_token("token")
+        assert store.signal_path is None
+        assert list(shared.iterdir()) == []
+
+    def test_planted_symlink_is_not_written_through(self, store, tmp_path):
+        """Publishing replaces a symlink at the signal path, not its target."""
+        victim = tmp_path / "victim"
+        victim.write_text("precious")
+        os.symlink(victim, store.signal_path)
+
+        store.set_token("token")
+
+        assert victim.read_text() == "precious"
+        assert not os.path.islink(store.signal_path)
+
+    def test_symlinked_signal_is_not_read(self, store, tmp_path):
+        """A token behind a symlink is never adopted."""
+        planted = tmp_path / "planted.json"
+        planted.write_text(json.dumps({"token": "injected"}))
+        os.symlink(planted, store.signal_path)
+
+        assert store.get_token() is None
+
+    def test_writable_signal_is_not_read(self, tmp_path):
+        """A signal file others can write to is ignored."""
+        worker_a = CredentialStore("testdb", signal_dir=str(tmp_path))
+        worker_b = CredentialStore("testdb", signal_dir=str(tmp_path))
+        worker_a.set_token("refreshed")
+        os.chmod(worker_a.signal_path, 0o666)
+
+        assert worker_b.get_token() is None
+
+    def test_environments_do_not_share_tokens(self, tmp_path):
+        """The same database on two OneCore environments keeps two tokens."""
+        test_env = CredentialStore(("db", "https://test"), signal_dir=str(tmp_path))
+        prod_env = CredentialStore(("db", "https://prod"), signal_dir=str(tmp_path))
+
+        test_env.set_token("test-token")
+
+        assert test_env.signal_path != prod_env.signal_path
+        assert prod_env.get_token() is None
+
+
+class TestGetStore:
+    """Tests for the per-worker store registry."""
+
+    def test_store_for_reads_base_url_once_within_ttl(self, tmp_path):
+        """The base URL picking the store is loaded once per TTL."""
+        credentials.reset()
+        loader = Mock(return_value="https://onecore")
+        with patch("credentials.SIGNAL_DIR", str(tmp_path)):
+            first = credentials.store_for("db1", loader)
+            assert credentials.store_for("db1", loader) is first
+            loader.assert_called_once()
+
+            with patch("credentials.time.monotonic", return_value=time.monotonic() + 61):
+                loader.return_value = "https://onecore-test"
+                assert credentials.store_for("db1", loader).key == (
+                    "db1",
+                    "https://onecore-test",
+                )
+        credentials.reset()
+
+    def test_one_store_per_key(self, tmp_path):
+        """The same database and URL share a store; other keys don't."""
+        credentials.reset()
+        with patch("credentials.SIGNAL_DIR", str(tmp_path)):
+            db1 = ("db1", "https://onecore")
+            assert credentials.get_store(db1) is credentials.get_store(db1)
+            assert credentials.get_store(db1) is not credentials.get_store(
+                ("db2", "https://onecore")
+            )
+            assert credentials.get_store(db1) is not credentials.get_store(
+                ("db1", "https://onecore-test")
+            )
+        credentials.reset()
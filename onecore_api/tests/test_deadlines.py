@@ -0,0 +1,99 @@
+from unittest.mock import patch
+
+import pytest
+
+import deadlines
+from deadlines import DeadlineExceeded
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    deadlines.reset()
+    yield
+    deadlines.reset()
+
+
+@pytest.fixture
+def clock():
+    """A manual monotonic clock, advanced by assigning ``clock.now``."""
+
+    class Clock:
+        now = 100.0
+
+    clock = Clock()
+    with patch("deadlines._now", side_effect=lambda: clock.now):
+        yield clock
+
+
+class TestBudget:
+    """Tests for setting and nesting budgets."""
+
+    def test_no_budget_leaves_timeouts_alone(self):
+        assert deadlines.current() is None
+        assert deadlines.remaining() is None
+        assert deadlines.timeout(15) == 15
+        assert deadlines.timeout((5, 30)) == (5, 30)
+
+    def test_budget_sets_and_restores_the_deadline(self, clock):
+        with deadlines.budget(10):
+            assert deadlines.current() == 110.0
+            clock.now = 104.0
+            assert deadlines.remaining() == 6.0
+
+        assert deadlines.current() is None
+
+    def test_named_budgets_use_the_settings(self, clock):
+        deadlines.configure(search=3.0)
+
+        with deadlines.budget("search"):
+            assert deadlines.remaining() == 3.0
+        with deadlines.budget("form"):
+            assert deadlines.remaining() == deadlines.DEFAULT_SETTINGS["form"]
+
+    def test_nested_budgets_only_shorten(self, clock):
+        """An inner budget can't extend the outer deadline."""
+        with deadlines.budget(5):
+            with deadlines.budget(60):
+                assert deadlines.current() == 105.0
+            with deadlines.budget(2):
+                assert deadlines.current() == 102.0
+            assert deadlines.current() == 105.0
+
+
+class TestTimeout:
+    """Tests for capping call timeouts to the time left."""
+
+    def test_caps_scalar_and_tuple_timeouts(self, clock):
+        with deadlines.budget(4):
+            assert deadlines.timeout(15) == 4.0
+            assert deadlines.timeout(1) == 1
+            assert deadlines.timeout((5, 30)) == (4.0, 4.0)
+            assert deadlines.timeout((2, None)) == (2, 4.0)
+
+    def test_explicit_deadline_wins(self, clock):
+        """Worker threads pass the caller's deadline explicitly."""
+        assert deadlines.timeout((5, 30), deadline=103.0) == (3.0, 3.0)
+
+    def test_spent_budget_raises_and_counts(self, clock):
+        with deadlines.budget(1):
+            clock.now = 100.9
+            with pytest.raises(DeadlineExceeded):
+                deadlines.timeout(15)
+
+        assert deadlines.stats() == {"budgets": 1, "exceeded": 1}
+
+    def test_is_a_requests_timeout(self):
+        """Existing soft-failure handling of timeouts covers it."""
+        import requests
+
+        assert issubclass(DeadlineExceeded, requests.Timeout)
+
+
+def test_configure_ignores_unknown_keys_and_none():
+    deadlines.configure(search=None, colour="red", form=2.5)
+
+    with patch("deadlines._now", return_value=0.0):
+        with deadlines.budget("search"):
+            assert deadlines.remaining() == deadlines.DEFAULT_SETTINGS["search"]
+        with deadlines.budget("form"):
+            assert deadlines.remaining() == 2.5
@@ -0,0 +1,154 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+import fanout
+from fanout import AdaptiveLimiter
+
+SETTINGS = dict(
+    fanout.DEFAULT_SETTINGS,
+    initial_limit=4,
+    min_limit=1,
+    max_in_flight=8,
+    slow_call_seconds=1.0,
+    cooldown=1.0,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    fanout.reset()
+    yield
+    fanout.reset()
+
+
+@pytest.fixture
+def limiter():
+    return AdaptiveLimiter(SETTINGS)
+
+
+class TestAdaptiveLimiter:
+    """Tests for the AIMD limit."""
+
+    def test_additive_increase(self, limiter):
+        """About one extra slot per `limit` fast successes."""
+        for _ in range(5):
+            limiter.observe(False, 0.1)
+        assert limiter.stats()["limit"] == 5
+        assert limiter.stats()["increases"] == 1
+
+    def test_never_exceeds_max_in_flight(self, limiter):
+        for _ in range(200):
+            limiter.observe(False, 0.1)
+        assert limiter.stats()["limit"] == 8
+
+    def test_multiplicative_decrease_on_error(self, limiter):
+        limiter.observe(True, 0.1)
+        assert limiter.stats()["limit"] == 2
+
+    def test_slow_call_decreases(self, limiter):
+        limiter.observe(False, 1.5)
+        assert limiter.stats()["limit"] == 2
+
+    def test_decrease_cooldown(self, limiter):
+        """A burst of failures from one wave halves the limit only once."""
+        with patch("fanout._now", return_value=100.0):
+            limiter.observe(True, 0.1)
+            limiter.observe(True, 0.1)
+        assert limiter.stats()["limit"] == 2
+        with patch("fanout._now", return_value=101.5):
+            limiter.observe(True, 0.1)
+        assert limiter.stats()["limit"] == 1
+
+    def test_acquire_blocks_at_limit(self, limiter):
+        """A task waits until a slot is released."""
+        limiter.limit = 1.0
+        limiter.acquire()
+        acquired = threading.Event()
+
+        def _second():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=_second)
+        thread.start()
+        assert not acquired.wait(0.05)
+        limiter.release()
+        assert acquired.wait(5)
+        thread.join(5)
+        stats = limiter.stats()
+        assert stats["tasks"] == 2
+        assert stats["queue_wait_max"] >= 0.05
+
+
+class TestRunAll:
+    """Tests for the shared executor."""
+
+    def test_results_in_input_order(self):
+        assert fanout.run_all(lambda n: n * 2, [3, 1, 2]) == [6, 2, 4]
+
+    def test_pool_is_reused(self):
+        """Successive fan-outs share one long-lived executor."""
+        fanout.run_all(lambda n: n, [1])
+        executor = fanout._state["executor"]
+        fanout.run_all(lambda n: n, [1, 2])
+        assert fanout._state["executor"] is executor
+
+    def test_concurrency_capped_by_limit(self):
+        """No more than `limit` items run at once across the pool."""
+        fanout.configure(initial_limit=2, max_in_flight=8)
+        running, peak = [0], [0]
+        lock = threading.Lock()
+
+        def _work(_item):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        fanout.run_all(_work, range(10))
+        assert peak[0] <= 2
+        assert fanout.stats()["tasks"] == 10
+
+    def test_exception_propagates(self):
+        def _fail(item):
+            if item == 2:
+                raise ValueError("boom")
+            return item
+
+        with pytest.raises(ValueError):
+            fanout.run_all(_fail, [1, 2, 3])
+
+    def test_nested_fanout_runs_inline(self):
+        """A fan-out started from a pool thread doesn't wait on the pool."""
+        fanout.configure(max_in_flight=1, initial_limit=1)
+        assert fanout.run_all(lambda n: fanout.run_all(lambda m: m + n, [1, 2]), [10]) == [
+            [11, 12]
+        ]
+
+    def test_submit_returns_future_under_the_limit(self):
+        """Single background tasks are admitted and counted like fan-outs."""
+        future = fanout.submit(lambda a, b: a + b, 1, 2)
+
+        assert future.result(timeout=5) == 3
+        assert fanout.stats()["tasks"] == 1
+
+    def test_submit_from_pool_thread_runs_inline(self):
+        """A submit from a fan-out thread completes before it returns."""
+        fanout.configure(max_in_flight=1, initial_limit=1)
+
+        def _nested(_item):
+            future = fanout.submit(lambda: threading.current_thread().name)
+            assert future.done()
+            return future.result()
+
+        [name] = fanout.run_all(_nested, [None])
+        assert name.startswith(fanout.THREAD_NAME_PREFIX)
+
+    def test_observe_before_first_use_is_noop(self):
+        fanout.observe(True, 1.0)
+        assert fanout.stats() == {}
@@ -0,0 +1,179 @@
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+import hedging
+from hedging import LatencyTracker
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    hedging.reset()
+    hedging.configure(enabled=True, min_samples=5, min_delay=0.01, max_delay=0.05)
+    yield
+    hedging.reset()
+
+
+def _warm(path, seconds=0.01, count=5):
+    """Give the endpoint group a known latency distribution."""
+    for _ in range(count):
+        hedging.tracker(path).record(seconds)
+
+
+class Sender:
+    """``send`` whose first call blocks until released; later calls return
+    ``responses`` in order."""
+
+    def __init__(self, first, *responses):
+        self.release = threading.Event()
+        self.first = first
+        self.responses = list(responses)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if call == 1:
+            self.release.wait(5)
+            if isinstance(self.first, Exception):
+                raise self.first
+            return self.first
+        outcome = self.responses.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class TestLatencyTracker:
+    def test_percentile(self):
+        latencies = LatencyTracker(100)
+        for ms in range(1, 101):
+            latencies.record(ms / 1000)
+
+        assert latencies.percentile(0.5) == 0.051
+        assert latencies.percentile(0.95) == 0.096
+        assert latencies.percentile(1.0) == 0.1
+
+    def test_keeps_only_the_window(self):
+        latencies = LatencyTracker(3)
+        for seconds in (9, 1, 2, 3):
+            latencies.record(seconds)
+
+        assert len(latencies) == 3
+        assert latencies.percentile(1.0) == 3
+
+    def test_empty(self):
+        assert LatencyTracker(3).percentile(0.95) is None
+
+
+class TestThreshold:
+    def test_none_until_enough_samples(self):
+        _warm("/rooms", count=4)
+        assert hedging.threshold("/rooms?rentalId=1") is None
+
+        _warm("/rooms", count=1)
+        assert hedging.threshold("/rooms?rentalId=1") == 0.01
+
+    def test_clamped(self):
+        _warm("/rooms", seconds=10)
+        assert hedging.threshold("/rooms") == 0.05
+
+        _warm("/leases", seconds=0.0001)
+        assert hedging.threshold("/leases") == 0.01
+
+
+class TestCall:
+    """Tests for sending the second copy and picking the winner."""
+
+    def test_disabled_or_not_idempotent_sends_once(self):
+        send = Mock(return_value="ok")
+        _warm("/workOrders")
+
+        assert hedging.call("POST", "/workOrders", send) == "ok"
+        hedging.configure(enabled=False)
+        assert hedging.call("GET", "/rooms", send) == "ok"
+        assert send.call_count == 2
+        assert hedging.stats() == {}
+
+    def test_fast_answer_is_not_hedged(self):
+        _warm("/rooms", seconds=0.05)
+        send = Mock(return_value="ok")
+
+        assert hedging.call("GET", "/rooms", send) == "ok"
+        assert send.call_count == 1
+        assert hedging.stats()["rooms"]["hedged"] == 0
+
+    def test_slow_answer_loses_to_the_hedge(self):
+        """The hedge's response is used and the late primary is closed."""
+        _warm("/rooms")
+        primary, hedge = Mock(status_code=200), Mock(status_code=200)
+        send = Sender(primary, hedge)
+
+        assert hedging.call("GET", "/rooms", send) is hedge
+
+        send.release.set()
+        stats = hedging.stats()["rooms"]
+        assert stats["hedged"] == stats["hedge_wins"] == 1
+        assert send.calls == 2
+        for _ in range(100):  # the primary's thread closes it
+            if primary.close.called:
+                break
+            time.sleep(0.01)
+        primary.close.assert_called_once()
+        hedge.close.assert_not_called()
+
+    def test_delay_counts_from_when_the_primary_is_sent(self):
+        """A primary that waited for a pool thread isn't hedged for it."""
+        hedging.configure(max_workers=1)
+        _warm("/rooms")
+        executor, _budget = hedging._ensure()
+        busy = threading.Event()
+        executor.submit(busy.wait, 5)
+        threading.Timer(0.2, busy.set).start()
+        send = Mock(return_value="ok")
+
+        assert hedging.call("GET", "/rooms", send) == "ok"
+        assert send.call_count == 1
+        assert hedging.stats()["rooms"]["hedged"] == 0
+
+    def test_failed_hedge_waits_for_the_primary(self):
+        _warm("/rooms")
+        primary = Mock(status_code=200)
+        send = Sender(primary, requests.ConnectionError("reset"))
+        threading.Timer(0.2, send.release.set).start()
+
+        assert hedging.call("GET", "/rooms", send) is primary
+        assert hedging.stats()["rooms"]["hedge_wins"] == 0
+
+    def test_both_failing_raises_the_first_error(self):
+        _warm("/rooms")
+        send = Sender(requests.ReadTimeout("slow"), requests.ConnectionError("reset"))
+        threading.Timer(0.2, send.release.set).start()
+
+        with pytest.raises(requests.ConnectionError):
+            hedging.call("GET", "/rooms", send)
+
+    def test_server_error_only_wins_when_nothing_better_comes(self):
+        _warm("/rooms")
+        error_response, ok = Mock(status_code=503), Mock(status_code=200)
+        send = Sender(ok, error_response)
+        threading.Timer(0.2, send.release.set).start()
+
+        assert hedging.call("GET", "/rooms", send) is ok
+
+    def test_budget_caps_hedges(self):
+        """Without budget left the caller just waits for the first copy."""
+        hedging.configure(budget_ratio=0.0, budget_min_per_second=0.0)
+        _warm("/rooms")
+        primary = Mock(status_code=200)
+        send = Sender(primary)
+        threading.Timer(0.2, send.release.set).start()
+
+        assert hedging.call("GET", "/rooms", send) is primary
+        assert send.calls == 1
+        assert hedging.stats()["rooms"]["budget_exhausted"] == 1
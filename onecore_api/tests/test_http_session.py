@@ -0,0 +1,140 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+import http_session
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"content": "ok"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Local keep-alive HTTP server."""
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    # Close pooled client sockets first so the server doesn't log resets.
+    http_session.reset()
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    http_session.reset()
+    http_session.configure(
+        pool_size=http_session.DEFAULT_POOL_SIZE,
+        keepalive=True,
+        prewarm_connections=http_session.DEFAULT_PREWARM_CONNECTIONS,
+    )
+    yield
+    http_session.reset()
+
+
+class TestGetSession:
+    """Tests for the process-wide session singleton."""
+
+    def test_returns_same_session(self):
+        """Repeated calls share one session."""
+        assert http_session.get_session() is http_session.get_session()
+
+    def test_forked_worker_gets_new_session(self):
+        """A different PID (forked worker) must not reuse the parent's session."""
+        parent = http_session.get_session()
+        with patch("http_session.os.getpid", return_value=-1):
+            child = http_session.get_session()
+        assert child is not parent
+
+    def test_configure_rebuilds_on_change(self):
+        """Changing the pool size drops the current session."""
+        first = http_session.get_session()
+        http_session.configure(pool_size=3)
+        second = http_session.get_session()
+        assert second is not first
+        assert second.get_adapter("https://x")._pool_maxsize == 3
+
+    def test_configure_keeps_session_when_unchanged(self):
+        """Re-applying identical settings is a no-op."""
+        first = http_session.get_session()
+        http_session.configure(pool_size=http_session.DEFAULT_POOL_SIZE)
+        assert http_session.get_session() is first
+
+
+class TestPoolStats:
+    """Tests for connection reuse counters."""
+
+    def test_empty_before_first_request(self):
+        """No session yet -> all counters zero."""
+        stats = http_session.pool_stats()
+        assert stats["connections_opened"] == 0
+        assert stats["requests"] == 0
+
+    def test_connections_are_reused(self, server):
+        """Serial requests share one keep-alive connection."""
+        session = http_session.get_session()
+        for _ in range(5):
+            assert session.get(f"{server}/x", timeout=5).json() == {"content": "ok"}
+
+        stats = http_session.pool_stats()
+        assert stats["connections_opened"] == 1
+        assert stats["requests"] == 5
+        assert stats["connections_reused"] == 4
+
+
+class TestPrewarm:
+    """Tests for connection pre-warming."""
+
+    def test_prewarm_runs_once_per_base_url(self):
+        """Only the first prewarm for a base URL issues requests."""
+        with patch("http_session.threading.Thread") as mock_thread:
+            http_session.prewarm("https://api.example.com")
+            http_session.prewarm("https://api.example.com")
+
+        assert mock_thread.call_count == http_session.DEFAULT_PREWARM_CONNECTIONS
+
+    def test_prewarm_without_base_url_is_noop(self):
+        """Nothing to warm without a base URL."""
+        with patch("http_session.threading.Thread") as mock_thread:
+            http_session.prewarm(None)
+
+        mock_thread.assert_not_called()
+
+    def test_prewarm_opens_connections(self, server):
+        """Pre-warm leaves open connections in the pool."""
+        http_session.configure(prewarm_connections=2)
+        threads = []
+        real_thread = threading.Thread
+
+        def _capture(*args, **kwargs):
+            thread = real_thread(*args, **kwargs)
+            threads.append(thread)
+            return thread
+
+        with patch("http_session.threading.Thread", side_effect=_capture):
+            http_session.prewarm(server)
+        # threading.Thread is patched module-wide, so the server's handler
+        # threads (alive while connections are kept open) are captured too.
+        for thread in threads:
+            if thread.name == "onecore-prewarm":
+                thread.join(5)
+
+        assert http_session.pool_stats()["connections_opened"] >= 1
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+import json_codec
+
+BACKENDS = ["json"] + (["orjson"] if json_codec.orjson is not None else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    json_codec.use(request.param)
+    yield request.param
+    json_codec.use()
+
+
+class TestCodec:
+    """Tests for json_codec with every installed backend."""
+
+    def test_round_trip(self, backend):
+        """dumps gives a str that loads (and stdlib json) read back."""
+        value = [{"id": 1, "subTypeName": "Kylskåp", "price": 1.5, "tags": None}]
+
+        encoded = json_codec.dumps(value)
+
+        assert isinstance(encoded, str)
+        assert json_codec.loads(encoded) == value
+        assert json.loads(encoded) == value
+
+    def test_loads_accepts_bytes(self, backend):
+        """Response bodies can be decoded without decoding to str first."""
+        assert json_codec.loads('{"content": "Tvättstuga"}'.encode()) == {
+            "content": "Tvättstuga"
+        }
+
+    def test_invalid_json_raises_value_error(self, backend):
+        """Both backends raise a ValueError subclass."""
+        with pytest.raises(ValueError):
+            json_codec.loads("[1,")
+
+    def test_falls_back_for_unsupported_values(self, backend):
+        """Non-string keys are encoded the stdlib way."""
+        assert json.loads(json_codec.dumps({1: "a"})) == {"1": "a"}
+
+    def test_unknown_backend_rejected(self):
+        """use() refuses backends that don't exist."""
+        with pytest.raises(ValueError):
+            json_codec.use("ujson-nope")
+
+    def test_default_prefers_native_backend(self):
+        """orjson is picked when installed."""
+        json_codec.use()
+        expected = "orjson" if json_codec.orjson is not None else "json"
+        assert json_codec.backend() == expected
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+import json_stream
+from json_stream import StreamedList
+
+
+def _chunks(body, size):
+    data = body.encode() if isinstance(body, str) else body
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+BODY = json.dumps(
+    {
+        "ok": True,
+        "content": [
+            {"id": 1, "name": "Kök", "price": 1234.5, "tags": ["a"]},
+            {"id": 2, "name": "Förråd", "price": 10, "tags": []},
+            {"id": 3, "name": "Bad", "price": -7e3, "tags": None},
+        ],
+        "statusCode": 200,
+    },
+    ensure_ascii=False,
+)
+
+
+class TestDecoding:
+    """Tests for StreamedList.decode."""
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 100000])
+    def test_matches_json_loads_at_any_chunk_size(self, size):
+        """Values, numbers and multi-byte characters split across chunks decode intact."""
+        content, length = StreamedList().decode(_chunks(BODY, size))
+
+        assert content == json.loads(BODY)["content"]
+        assert length == len(BODY.encode())
+
+    def test_keep_and_project_apply_per_item(self):
+        """Rejected items are dropped and kept ones projected while decoding."""
+        stream = StreamedList(
+            keep=lambda item: item["price"] > 0,
+            project=lambda item: item["name"],
+        )
+
+        content, _size = stream.decode(_chunks(BODY, 5))
+
+        assert content == ["Kök", "Förråd"]
+        assert stream.stats() == {
+            "responses": 1,
+            "items": 3,
+            "kept": 2,
+            "bytes": len(BODY.encode()),
+        }
+
+    def test_streams_are_named(self):
+        """The name keeps a stream's projected results apart in the cache."""
+        assert StreamedList(name="room_components").name == "room_components"
+        assert StreamedList().name != StreamedList().name
+
+    def test_non_list_content_is_returned_whole(self):
+        """A single object as content is not filtered."""
+        stream = StreamedList(keep=lambda item: False)
+        body = '{"content": {"code": "B1"}, "message": "ok"}'
+
+        assert stream.decode(_chunks(body, 4))[0] == {"code": "B1"}
+
+    def test_missing_and_empty_content(self):
+        """No content member gives None, an empty array an empty list."""
+        assert StreamedList().decode([b"{}"])[0] is None
+        assert StreamedList().decode([b'{"message": "x"}'])[0] is None
+        assert StreamedList().decode([b'{"content": [ ]}'])[0] == []
+
+    def test_number_at_chunk_boundary(self):
+        """A number cut off by a chunk boundary is not decoded early."""
+        content, _size = StreamedList().decode([b'{"content": [12', b"34, 5]}"])
+
+        assert content == [1234, 5]
+
+    @pytest.mark.parametrize(
+        "body",
+        [b"", b"[]", b'{"content": [1 2]}', b'{"content": [1,', b'{"content": '],
+    )
+    def test_invalid_body_raises(self, body):
+        """Malformed or truncated bodies raise JSONDecodeError."""
+        with pytest.raises(json.JSONDecodeError):
+            StreamedList().decode(_chunks(body, 3) or [b""])
+
+
+class TestPick:
+    """Tests for pick projections."""
+
+    def test_keeps_named_fields_recursively(self):
+        """Nested specs apply to dicts and to each dict in a list."""
+        project = json_stream.pick(
+            {"id": True, "model": {"name": True}, "installs": {"date": True}}
+        )
+        item = {
+            "id": 1,
+            "big": "x" * 100,
+            "model": {"name": "M", "doc": "..."},
+            "installs": [{"date": "2024-01-01", "by": "A"}],
+        }
+
+        assert project(item) == {
+            "id": 1,
+            "model": {"name": "M"},
+            "installs": [{"date": "2024-01-01"}],
+        }
+
+    def test_missing_and_null_fields(self):
+        """Absent fields stay absent; None values pass through."""
+        project = json_stream.pick({"id": True, "model": {"name": True}})
+
+        assert project({"model": None}) == {"model": None}
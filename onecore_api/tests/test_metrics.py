@@ -0,0 +1,210 @@
+import json
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+import requests
+
+import metrics
+from circuit_breaker import CircuitOpenError
+from deadlines import DeadlineExceeded
+from metrics import PostgresMetricsStore
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _response(status, received=None, sent=None):
+    response = Mock(status_code=status, headers={})
+    response.request.headers = {}
+    if received is not None:
+        response.headers["Content-Length"] = str(received)
+    if sent is not None:
+        response.request.headers["Content-Length"] = str(sent)
+    return response
+
+
+class TestTemplates:
+    @pytest.mark.parametrize(
+        "path, template",
+        [
+            ("/residences/by-rental-id/705-022-04-0201", "/residences/by-rental-id/{id}"),
+            ("/leases/by-pnr/19800101-1234?includeContacts=true", "/leases/by-pnr/{id}"),
+            ("/rooms?rentalId=705", "/rooms"),
+            ("/components/by-room/KOK", "/components/by-room/{id}"),
+            ("/components/c0a8-77/upload", "/components/{id}/upload"),
+            ("/components/analyze-image", "/components/analyze-image"),
+            ("/auth/generateToken", "/auth/generateToken"),
+        ],
+    )
+    def test_ids_are_replaced(self, path, template):
+        assert metrics.template_for(path) == template
+
+    def test_endpoint_count_is_bounded(self):
+        metrics.configure(max_endpoints=2)
+
+        for name in ("a", "b", "c", "d"):
+            metrics.observe("GET", f"/{name}", 0.01, _response(200))
+
+        assert set(metrics.stats()) == {"GET /a", "GET /b", "GET other"}
+        assert metrics.stats()["GET other"]["requests"] == 2
+
+
+class TestObserve:
+    def test_counts_outcomes_retries_and_bytes(self):
+        metrics.observe("GET", "/rooms?rentalId=1", 0.02, _response(200, 512), attempts=3)
+        metrics.observe("POST", "/components/1/upload", 0.3, _response(201, 20, 4096))
+        metrics.observe("GET", "/rooms?rentalId=2", 0.6, _response(503))
+
+        stats = metrics.stats()
+        assert stats["GET /rooms"]["requests"] == 2
+        assert stats["GET /rooms"]["errors"] == 1
+        assert stats["GET /rooms"]["retries"] == 2
+        assert stats["GET /rooms"]["bytes_in"] == 512
+        assert stats["POST /components/{id}/upload"]["bytes_out"] == 4096
+
+    @pytest.mark.parametrize(
+        "error, outcome",
+        [
+            (requests.ReadTimeout("slow"), "timeout"),
+            (DeadlineExceeded("spent"), "deadline"),
+            (CircuitOpenError("rooms", 5), "circuit_open"),
+            (requests.ConnectionError("reset"), "error"),
+        ],
+    )
+    def test_errors_are_labelled(self, error, outcome):
+        metrics.observe("GET", "/rooms", 1.0, error=error)
+
+        (series,) = metrics.snapshot()
+        assert series["responses"] == {outcome: 1}
+        assert metrics.stats()["GET /rooms"]["errors"] == 1
+
+    def test_client_errors_are_not_errors(self):
+        metrics.observe("GET", "/residences/by-rental-id/1", 0.01, _response(404))
+
+        assert metrics.stats()["GET /residences/by-rental-id/{id}"]["errors"] == 0
+
+    def test_cache_lookups(self):
+        metrics.cache_lookup("/rooms?rentalId=1", hit=True)
+        metrics.cache_lookup("/rooms?rentalId=2", hit=False)
+        metrics.cache_lookup("/rooms?rentalId=3", hit=True)
+
+        stats = metrics.stats()["GET /rooms"]
+        assert (stats["cache_hits"], stats["cache_misses"]) == (2, 1)
+        assert stats["requests"] == 0
+
+    def test_disabled(self):
+        metrics.configure(enabled=False)
+
+        metrics.observe("GET", "/rooms", 0.01, _response(200))
+        metrics.cache_lookup("/rooms", hit=True)
+
+        assert metrics.stats() == {}
+
+
+class TestRender:
+    def test_prometheus_text(self):
+        metrics.observe("GET", "/rooms?rentalId=1", 0.02, _response(200, 100))
+        metrics.observe("GET", "/rooms?rentalId=2", 0.7, _response(200, 50), attempts=2)
+        metrics.cache_lookup("/rooms?rentalId=1", hit=True)
+
+        text = metrics.render(metrics.snapshot())
+
+        labels = 'method="GET",endpoint="/rooms"'
+        assert "# TYPE onecore_request_duration_seconds histogram" in text
+        assert f'onecore_requests_total{{{labels},outcome="200"}} 2' in text
+        assert f'onecore_request_duration_seconds_bucket{{{labels},le="0.025"}} 1' in text
+        assert f'onecore_request_duration_seconds_bucket{{{labels},le="0.5"}} 1' in text
+        assert f'onecore_request_duration_seconds_bucket{{{labels},le="1.0"}} 2' in text
+        assert f'onecore_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+        assert f"onecore_request_duration_seconds_count{{{labels}}} 2" in text
+        assert f"onecore_retries_total{{{labels}}} 1" in text
+        assert f"onecore_received_bytes_total{{{labels}}} 150" in text
+        assert f'onecore_cache_lookups_total{{{labels},result="hit"}} 1' in text
+        assert text.endswith("\n")
+
+    def test_label_values_are_escaped(self):
+        metrics.observe("GET", '/a"b', 0.01, _response(200))
+
+        assert 'endpoint="/a\\"b"' in metrics.render(metrics.snapshot())
+
+    def test_merge_adds_up_workers(self):
+        metrics.observe("GET", "/rooms", 0.02, _response(200, 10))
+        worker = metrics.snapshot()
+
+        merged = metrics.merge([worker, worker, []])
+
+        (series,) = merged
+        assert series["responses"] == {"200": 2}
+        assert series["buckets"] == {"0.025": 2}
+        assert series["bytes_in"] == 20
+
+
+class TestPostgresMetricsStore:
+    """SQL issued by the shared metrics table."""
+
+    @pytest.fixture
+    def cursor(self):
+        cr = MagicMock()
+        cr.__enter__.return_value = cr
+        return cr
+
+    @pytest.fixture
+    def store(self, cursor):
+        return PostgresMetricsStore(lambda: cursor)
+
+    def test_publish_is_single_upsert(self, store, cursor):
+        metrics.observe("GET", "/rooms", 0.02, _response(200))
+        metrics.observe("GET", "/leases/by-pnr/1", 0.02, error=requests.Timeout())
+
+        store.publish("host:1", metrics.snapshot())
+
+        ddl, upsert = [c.args for c in cursor.execute.call_args_list]
+        assert "UNLOGGED" in ddl[0]
+        sql, params = upsert
+        assert "ON CONFLICT (worker, method, endpoint) DO UPDATE" in sql
+        assert params[:6] == ["host:1", "GET", "/leases/by-pnr/{id}", 1, 1, 1]
+        assert json.loads(params[12]) == {
+            "responses": {"timeout": 1},
+            "buckets": {"0.025": 1},
+        }
+
+    def test_read_returns_snapshots_per_worker(self, cursor):
+        detail = json.dumps({"responses": {"200": 3}, "buckets": {"0.05": 3}})
+        cursor.fetchall.return_value = [
+            ("host:1", "GET", "/rooms", 0, 30, 0, 1, 2, 0.12, detail),
+            ("host:2", "GET", "/rooms", 1, 30, 0, 0, 0, 0.12, detail),
+        ]
+
+        (series,) = metrics.merge(PostgresMetricsStore.read(cursor))
+
+        assert series["responses"] == {"200": 6}
+        assert (series["retries"], series["bytes_in"], series["cache_misses"]) == (1, 60, 2)
+
+    def test_publishes_at_most_every_interval(self):
+        store = Mock()
+        metrics.configure(publish_seconds=30)
+        metrics.observe("GET", "/rooms", 0.02, _response(200))
+
+        with patch("metrics.store_for", return_value=store):
+            assert metrics.maybe_publish("db") is True
+            assert metrics.maybe_publish("db") is False
+            assert metrics.maybe_publish("db", force=True) is True
+
+        assert store.publish.call_count == 2
+
+    def test_off_without_an_interval(self):
+        with patch("metrics.store_for") as store_for:
+            assert metrics.maybe_publish("db") is False
+        store_for.assert_not_called()
+
+    def test_publish_failures_are_swallowed(self):
+        metrics.configure(publish_seconds=30)
+        store = Mock()
+        store.publish.side_effect = RuntimeError("database is down")
+
+        with patch("metrics.store_for", return_value=store):
+            assert metrics.maybe_publish("db") is False
@@ -0,0 +1,311 @@
+import pytest
+
+from payloads import (
+    Building,
+    Component,
+    Lease,
+    MaintenanceUnit,
+    PayloadError,
+    Residence,
+    _Payload,
+    Room,
+    Tenant,
+)
+
+
+TENANT = {
+    "contactCode": "P1",
+    "contactKey": "K1",
+    "firstName": "Anna",
+    "lastName": "Svensson",
+    "fullName": "Svensson Anna",
+    "nationalRegistrationNumber": "19800101-1234",
+    "emailAddress": "anna@example.com",
+    "phoneNumbers": [
+        {"phoneNumber": "070-1", "isMainNumber": 0},
+        {"phoneNumber": "070-2", "isMainNumber": 1},
+    ],
+    "isTenant": True,
+    "specialAttention": False,
+    "addresses": [{"street": "Gatan 1"}],
+}
+
+LEASE = {
+    "leaseId": "L1",
+    "leaseNumber": "01",
+    "type": "Bostadskontrakt",
+    "status": "Current",
+    "leaseStartDate": "2020-01-01",
+    "lastDebitDate": None,
+    "contractDate": "2019-12-01",
+    "approvalDate": "2019-12-02",
+    "tenants": [TENANT],
+    "rentInfo": {"currentRent": 1},
+}
+
+RESIDENCE = {
+    "code": "R1",
+    "name": "Gatan 1",
+    "areaSize": 62.5,
+    "entrance": "A",
+    "rentalInformation": {"rentalId": "123-456"},
+    "type": {"name": "2 rok"},
+    "accessibility": {"elevator": True},
+    "property": {"code": "P1", "name": "Fastigheten"},
+    "building": {"code": "B1", "name": "Huset"},
+    "staircase": {"id": "S1", "name": "Uppgång A", "code": "A", "features": None},
+}
+
+COMPONENT = {
+    "id": "C1",
+    "serialNumber": "SN1",
+    "priceAtPurchase": None,
+    "componentInstallations": [
+        {"id": "I1", "installationDate": "2024-01-15T00:00:00Z"}
+    ],
+    "model": {
+        "id": "M1",
+        "modelName": "Frys",
+        "manufacturer": "Acme",
+        "subtype": {
+            "subTypeName": "Frys 60",
+            "technicalLifespan": 15,
+            "componentType": {"typeName": "Frys", "category": {"categoryName": "Vitvaror"}},
+        },
+    },
+}
+
+
+class TestTenant:
+    """Tests for the name and main phone number a Tenant derives."""
+
+    CONTACT = {"contactCode": "P", "contactKey": "K", "isTenant": 1}
+
+    @pytest.mark.parametrize(
+        "names, expected",
+        [
+            (
+                {"firstName": "Anna", "lastName": "Svensson", "fullName": "Svensson A"},
+                "Anna Svensson",
+            ),
+            ({"firstName": "Anna", "fullName": "Svensson Anna"}, "Svensson Anna"),
+            ({"fullName": "Svensson Anna"}, "Svensson Anna"),
+            ({}, ""),
+        ],
+    )
+    def test_name(self, names, expected):
+        """First and last name together, else fullName, else an empty string."""
+        assert Tenant.decode({**self.CONTACT, **names}).name == expected
+
+    @pytest.mark.parametrize(
+        "phones, expected",
+        [
+            (
+                {
+                    "phoneNumbers": [
+                        {"phoneNumber": "070-1", "isMainNumber": 0},
+                        {"phoneNumber": "070-2", "isMainNumber": 1},
+                        {"phoneNumber": "070-3", "isMainNumber": 0},
+                    ]
+                },
+                "070-2",
+            ),
+            (
+                {
+                    "phoneNumbers": [
+                        {"phoneNumber": "070-1", "isMainNumber": 0},
+                        {"phoneNumber": "070-2", "isMainNumber": 0},
+                    ]
+                },
+                None,
+            ),
+            ({"phoneNumbers": []}, None),
+            ({"phoneNumbers": None}, None),
+            ({}, None),
+        ],
+    )
+    def test_main_phone_number(self, phones, expected):
+        """The number marked as main, or None when there is none."""
+        assert Tenant.decode({**self.CONTACT, **phones}).phone_number == expected
+
+
+class TestDecode:
+    """Tests for decoding and validation."""
+
+    def test_tenant_derives_name_and_main_phone(self):
+        """First and last name win over fullName; the main number is picked."""
+        tenant = Tenant.decode(TENANT)
+
+        assert tenant.name == "Anna Svensson"
+        assert tenant.phone_number == "070-2"
+        assert tenant.contact_code == "P1"
+        assert not hasattr(tenant, "__dict__")
+
+    def test_tenant_falls_back_to_full_name(self):
+        """Without both first and last name, fullName (or "") is used."""
+        tenant = Tenant.decode({"contactCode": "P", "contactKey": "K", "isTenant": 1})
+
+        assert tenant.name == ""
+        assert tenant.phone_number is None
+
+    def test_lease_decodes_tenants(self):
+        """A lease holds decoded tenants; absent tenants give an empty list."""
+        lease = Lease.decode(LEASE)
+
+        assert lease.lease_id == "L1"
+        assert lease.last_debit_date is None
+        assert lease.tenants == [Tenant.decode(TENANT)]
+        assert Lease.decode({**LEASE, "tenants": None}).tenants == []
+
+    def test_residence_flattens_nested_sections(self):
+        """Nested objects become flat fields; missing sections give None."""
+        residence = Residence.decode(RESIDENCE)
+
+        assert residence.rental_id == "123-456"
+        assert residence.has_elevator is True
+        assert residence.estate_code == "P1"
+        assert residence.building == "Huset"
+        assert residence.staircase.accessible_by_elevator is False
+
+        bare = Residence.decode(
+            {
+                **{key: None for key in Residence.REQUIRED},
+                "code": "R",
+                "name": "N",
+            }
+        )
+        assert bare.type_name is None
+        assert bare.has_elevator is False
+        assert bare.staircase is None
+
+    @pytest.mark.parametrize(
+        "key",
+        [
+            "code",
+            "name",
+            "areaSize",
+            "entrance",
+            "rentalInformation",
+            "type",
+            "accessibility",
+            "property",
+            "building",
+        ],
+    )
+    def test_residence_requires_every_indexed_key(self, key):
+        """A residence lacking any key the handlers index is rejected."""
+        data = {name: value for name, value in RESIDENCE.items() if name != key}
+
+        with pytest.raises(PayloadError, match=key):
+            Residence.decode(data)
+
+    def test_building_with_sub_resources(self):
+        """Years are strings (None when unset) and sub-resources are decoded."""
+        building = Building.decode(
+            {
+                "code": "B1",
+                "construction": {"constructionYear": 1965, "renovationYear": 0},
+                "maintenance_units": [
+                    {"id": 1, "caption": "Tvätt", "type": "Tvättstuga", "code": "T1"}
+                ],
+                "staircases": [{"id": "S1", "name": "A", "code": "A"}],
+            }
+        )
+
+        assert building.name == ""
+        assert building.construction_year == "1965"
+        assert building.renovation_year is None
+        assert building.maintenance_units[0].caption == "Tvätt"
+        assert building.staircases[0].code == "A"
+
+    def test_component_flattens_model_hierarchy(self):
+        """Model, subtype, type and category names are flattened."""
+        component = Component.decode(COMPONENT)
+
+        assert component.installation_date == "2024-01-15"
+        assert component.installation_id == "I1"
+        assert component.deinstalled is False
+        assert component.price_at_purchase == 0
+        assert component.category_name == "Vitvaror"
+        assert component.replacement_interval == 0
+
+    def test_room_defaults_name(self):
+        assert Room.decode({"propertyObjectId": "X"}).name == "Okänt rum"
+
+    @pytest.mark.parametrize(
+        "cls, data",
+        [
+            (Lease, {**LEASE, "leaseNumber": None}),
+            (MaintenanceUnit, {"id": 1, "caption": "c", "type": "t", "code": "k"}),
+        ],
+    )
+    def test_present_none_satisfies_required(self, cls, data):
+        """Required means present; a null value is kept as None."""
+        assert cls.decode(data) is not None
+
+    @pytest.mark.parametrize(
+        "cls, data, message",
+        [
+            (Lease, {"leaseId": "L1"}, "leaseNumber"),
+            (Tenant, {"contactCode": "P1", "isTenant": True}, "contactKey"),
+            (Room, {"name": "Kök"}, "propertyObjectId"),
+            (Component, None, "expected an object"),
+            (Building, ["B1"], "expected an object"),
+        ],
+    )
+    def test_invalid_payloads_raise(self, cls, data, message):
+        """Missing required keys or non-objects raise PayloadError."""
+        with pytest.raises(PayloadError, match=message):
+            cls.decode(data)
+
+    def test_nested_errors_propagate(self):
+        """An invalid tenant makes the whole lease invalid."""
+        with pytest.raises(PayloadError, match="Tenant"):
+            Lease.decode({**LEASE, "tenants": [{"contactCode": "P"}]})
+
+    def test_decode_returns_objects_unchanged(self):
+        lease = Lease.decode(LEASE)
+
+        assert Lease.decode(lease) is lease
+        assert Lease.decode_many([lease, LEASE]) == [lease, lease]
+        assert Lease.decode_many(None) == []
+
+
+class TestObjects:
+    """Tests for the slots-based objects themselves."""
+
+    def test_keyword_construction(self):
+        """Unset fields are None; unknown fields are rejected."""
+        unit = MaintenanceUnit(id=1, caption="Tvätt")
+
+        assert unit.type is None
+        assert unit == MaintenanceUnit(id=1, caption="Tvätt", type=None)
+        with pytest.raises(TypeError, match="colour"):
+            MaintenanceUnit(colour="red")
+
+    def test_no_instance_dict(self):
+        """Only the declared fields can be set."""
+        room = Room(id="X", name="Kök")
+
+        with pytest.raises(AttributeError):
+            room.extra = 1
+        assert "Room(id='X', name='Kök')" == repr(room)
+
+    @pytest.mark.parametrize(
+        "cls", [Building, Component, Lease, MaintenanceUnit, Residence, Room, Tenant]
+    )
+    def test_payload_classes_have_no_instance_dict(self, cls):
+        assert not hasattr(cls(), "__dict__")
+
+    def test_subclass_must_declare_fields(self):
+        """FIELDS is what decode reads; __slots__ must follow it."""
+        with pytest.raises(TypeError, match="FIELDS"):
+
+            class Bare(_Payload):
+                __slots__ = ("id",)
+
+        with pytest.raises(TypeError, match="FIELDS"):
+
+            class Mismatched(_Payload):
+                FIELDS = {"id": "id"}
+                __slots__ = ("id", "name")
@@ -0,0 +1,364 @@
+from unittest.mock import patch
+
+import pytest
+import requests
+
+import response_cache
+from response_cache import MISS, CachePolicy, ResponseCache, make_key
+
+
+@pytest.fixture
+def policy():
+    return CachePolicy("test", ttl=60, max_entries=3, max_bytes=1000, negative_ttl=10)
+
+
+@pytest.fixture
+def cache(policy):
+    return ResponseCache(policies=[("/things/", policy)])
+
+
+def _key(path, params=None):
+    return make_key("https://api.example.com", path, params)
+
+
+class TestPolicyLookup:
+    """Tests for matching paths to policies."""
+
+    def test_matches_prefix(self, cache, policy):
+        """Paths under a configured prefix get its policy."""
+        assert cache.policy_for("/things/1") is policy
+
+    def test_unmatched_path_is_uncached(self, cache):
+        """Paths without a policy are not cached."""
+        assert cache.policy_for("/leases/1") is None
+
+    def test_default_policies_never_serve_leases_and_components_unasked(self):
+        """Volatile endpoints are only kept for conditional requests (ttl 0)."""
+        default = ResponseCache()
+        assert default.policy_for("/leases/by-pnr/1").ttl == 0
+        assert default.policy_for("/components/by-room/1").ttl == 0
+        assert default.policy_for("/components/1") is None
+        assert default.policy_for("/residences/by-rental-id/1").name == "residence"
+
+    def test_set_policy_overrides(self, cache):
+        """set_policy replaces and removes policies."""
+        other = CachePolicy("other", ttl=1)
+        cache.set_policy("/things/", other)
+        assert cache.policy_for("/things/1") is other
+        cache.set_policy("/things/", None)
+        assert cache.policy_for("/things/1") is None
+
+
+class TestGetPut:
+    """Tests for storing and retrieving entries."""
+
+    def test_miss_then_hit(self, cache, policy):
+        """A stored value is returned on the next lookup."""
+        key = _key("/things/1")
+        assert cache.get(policy, key) is MISS
+        cache.put(policy, key, {"a": 1}, size=10)
+        assert cache.get(policy, key) == {"a": 1}
+
+    def test_returns_copies(self, cache, policy):
+        """Mutating a returned value does not change the cache."""
+        key = _key("/things/1")
+        cache.put(policy, key, {"list": [1]})
+        cache.get(policy, key)["list"].append(2)
+        assert cache.get(policy, key) == {"list": [1]}
+
+    def test_expired_entry_is_miss(self, cache, policy):
+        """Entries past their TTL are dropped."""
+        key = _key("/things/1")
+        with patch("response_cache.time.monotonic", return_value=1000):
+            cache.put(policy, key, {"a": 1})
+        with patch("response_cache.time.monotonic", return_value=1061):
+            assert cache.get(policy, key) is MISS
+
+    def test_params_are_part_of_key(self, cache, policy):
+        """Different query params are different entries, order-insensitive."""
+        cache.put(policy, _key("/things/", {"a": 1, "b": 2}), ["x"])
+        assert cache.get(policy, _key("/things/", {"b": 2, "a": 1})) == ["x"]
+        assert cache.get(policy, _key("/things/", {"a": 2})) is MISS
+
+
+class TestNegativeCaching:
+    """Tests for 404 and empty-result caching."""
+
+    def test_empty_content_uses_negative_ttl(self, cache, policy):
+        """Empty results expire after negative_ttl, not ttl."""
+        key = _key("/things/1")
+        with patch("response_cache.time.monotonic", return_value=1000):
+            cache.put(policy, key, [])
+        with patch("response_cache.time.monotonic", return_value=1005):
+            assert cache.get(policy, key) == []
+        with patch("response_cache.time.monotonic", return_value=1011):
+            assert cache.get(policy, key) is MISS
+
+    def test_cached_404_raises_http_error(self, cache, policy):
+        """A cached 404 re-raises the same HTTPError as the network would."""
+        key = _key("/things/missing")
+        cache.put_status(policy, key, 404)
+        with pytest.raises(requests.HTTPError) as exc_info:
+            cache.get(policy, key)
+        assert exc_info.value.response.status_code == 404
+
+    def test_other_statuses_not_cached(self, cache, policy):
+        """Only 404 is negatively cached; 5xx must be retried."""
+        key = _key("/things/1")
+        cache.put_status(policy, key, 503)
+        assert cache.get(policy, key) is MISS
+
+    def test_negative_ttl_zero_disables(self, cache):
+        """negative_ttl=0 turns negative caching off."""
+        policy = CachePolicy("noneg", ttl=60, negative_ttl=0)
+        key = _key("/things/1")
+        cache.put(policy, key, None)
+        cache.put_status(policy, key, 404)
+        assert cache.get(policy, key) is MISS
+
+
+class TestLimits:
+    """Tests for LRU eviction."""
+
+    def test_evicts_least_recently_used(self, cache, policy):
+        """max_entries evicts the least recently used entry."""
+        for i in range(3):
+            cache.put(policy, _key(f"/things/{i}"), [i])
+        cache.get(policy, _key("/things/0"))  # touch 0 so 1 is oldest
+        cache.put(policy, _key("/things/3"), [3])
+
+        assert cache.get(policy, _key("/things/1")) is MISS
+        assert cache.get(policy, _key("/things/0")) == [0]
+        assert cache.stats()["test"]["evictions"] == 1
+
+    def test_byte_budget(self, cache, policy):
+        """Entries are evicted once the byte budget is exceeded."""
+        cache.put(policy, _key("/things/a"), ["a"], size=600)
+        cache.put(policy, _key("/things/b"), ["b"], size=600)
+
+        assert cache.get(policy, _key("/things/a")) is MISS
+        assert cache.stats()["test"]["bytes"] == 600
+
+
+class _InlineExecutor:
+    """Runs submitted refreshes immediately, so tests stay deterministic."""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        fn(*args)
+
+
+class TestStaleWhileRevalidate:
+    """Tests for serving expired entries while refreshing in the background."""
+
+    @pytest.fixture
+    def swr_policy(self):
+        return CachePolicy("swr", ttl=60, stale_ttl=600, negative_ttl=10)
+
+    @pytest.fixture
+    def executor(self, cache):
+        inline = _InlineExecutor()
+        with patch.object(cache, "_refresh_executor", return_value=inline):
+            yield inline
+
+    def _put_at(self, cache, policy, key, content, when=1000):
+        with patch("response_cache.time.monotonic", return_value=when):
+            cache.put(policy, key, content)
+
+    def test_stale_entry_served_and_refreshed(self, cache, swr_policy, executor):
+        """An expired entry is returned as-is and replaced by one refresh."""
+        key = _key("/things/1")
+        self._put_at(cache, swr_policy, key, {"v": 1})
+
+        with patch("response_cache.time.monotonic", return_value=1100):
+            served = cache.get(
+                swr_policy, key, revalidate=lambda k: lambda: ({"v": 2}, 5)
+            )
+            assert served == {"v": 1}
+            assert cache.get(swr_policy, key) == {"v": 2}
+
+        stats = cache.stats()["swr"]
+        assert stats["stale_hits"] == 1
+        assert stats["refreshes"] == 1
+
+    def test_only_one_refresh_in_flight_per_key(self, cache, swr_policy):
+        """Concurrent stale reads schedule a single refresh."""
+        key = _key("/things/1")
+        self._put_at(cache, swr_policy, key, [1])
+        queued = []
+
+        class _Deferred:
+            def submit(self, fn, *args):
+                queued.append((fn, args))
+
+        with patch.object(cache, "_refresh_executor", return_value=_Deferred()):
+            with patch("response_cache.time.monotonic", return_value=1100):
+                for _ in range(3):
+                    cache.get(swr_policy, key, revalidate=lambda k: lambda: ([2], 0))
+        assert len(queued) == 1
+
+        fn, args = queued[0]
+        fn(*args)
+        assert key not in cache._refreshing
+
+    def test_without_revalidate_expired_is_miss(self, cache, swr_policy):
+        """Callers that can't refresh get the normal TTL behaviour."""
+        key = _key("/things/1")
+        self._put_at(cache, swr_policy, key, [1])
+        with patch("response_cache.time.monotonic", return_value=1100):
+            assert cache.get(swr_policy, key) is MISS
+
+    def test_beyond_stale_window_is_miss(self, cache, swr_policy, executor):
+        """Entries older than ttl + stale_ttl are not served."""
+        key = _key("/things/1")
+        self._put_at(cache, swr_policy, key, [1])
+        with patch("response_cache.time.monotonic", return_value=1661):
+            assert cache.get(swr_policy, key, revalidate=lambda k: None) is MISS
+        assert executor.submitted == 0
+
+    def test_failed_refresh_keeps_stale_value(self, cache, swr_policy, executor):
+        """A refresh error is logged and the stale value stays in place."""
+        key = _key("/things/1")
+        self._put_at(cache, swr_policy, key, [1])
+
+        def _boom():
+            raise requests.ConnectionError("down")
+
+        with patch("response_cache.time.monotonic", return_value=1100):
+            cache.get(swr_policy, key, revalidate=lambda k: _boom)
+            assert cache.get_many(swr_policy, [key], revalidate=lambda k: _boom) == [[1]]
+
+    def test_refresh_404_becomes_negative_entry(self, cache, swr_policy, executor):
+        """A resource deleted upstream turns into a cached 404."""
+        key = _key("/things/1")
+        self._put_at(cache, swr_policy, key, [1])
+        response = requests.Response()
+        response.status_code = 404
+
+        def _gone():
+            raise requests.HTTPError(response=response)
+
+        with patch("response_cache.time.monotonic", return_value=1100):
+            cache.get(swr_policy, key, revalidate=lambda k: _gone)
+            with pytest.raises(requests.HTTPError):
+                cache.get(swr_policy, key)
+
+    def test_negative_entries_are_never_stale(self, cache, swr_policy, executor):
+        """A cached 404 expires normally even under a stale_ttl policy."""
+        key = _key("/things/1")
+        with patch("response_cache.time.monotonic", return_value=1000):
+            cache.put_status(swr_policy, key, 404)
+        with patch("response_cache.time.monotonic", return_value=1011):
+            assert cache.get(swr_policy, key, revalidate=lambda k: None) is MISS
+
+    def test_empty_results_are_never_stale(self, cache, swr_policy, executor):
+        """An empty list gets the negative TTL and no stale window."""
+        key = _key("/things/1")
+        self._put_at(cache, swr_policy, key, [])
+
+        with patch("response_cache.time.monotonic", return_value=1009):
+            assert cache.get(swr_policy, key) == []
+        with patch("response_cache.time.monotonic", return_value=1011):
+            assert cache.get(swr_policy, key, revalidate=lambda k: None) is MISS
+        assert executor.submitted == 0
+
+
+class TestConditionalRequests:
+    """Tests for ETag/Last-Modified validators kept with cached bodies."""
+
+    ETAG = {"If-None-Match": '"v1"'}
+
+    def test_expired_entry_with_validators_is_kept(self, cache, policy):
+        """Past its TTL the entry is a miss but still offers validators."""
+        key = _key("/things/1")
+        with patch("response_cache.time.monotonic", return_value=1000):
+            cache.put(policy, key, {"a": 1}, validators=self.ETAG)
+        with patch("response_cache.time.monotonic", return_value=1061):
+            assert cache.get(policy, key) is MISS
+            assert cache.validators(policy, key) == self.ETAG
+
+    def test_expired_entry_without_validators_is_dropped(self, cache, policy):
+        """Plain entries are removed once they expire."""
+        key = _key("/things/1")
+        with patch("response_cache.time.monotonic", return_value=1000):
+            cache.put(policy, key, {"a": 1})
+        with patch("response_cache.time.monotonic", return_value=1061):
+            cache.get(policy, key)
+            assert cache.validators(policy, key) is None
+
+    def test_revalidated_renews_and_returns_copy(self, cache, policy):
+        """A 304 makes the stored content fresh again."""
+        key = _key("/things/1")
+        with patch("response_cache.time.monotonic", return_value=1000):
+            cache.put(policy, key, {"list": [1]}, validators=self.ETAG)
+        with patch("response_cache.time.monotonic", return_value=1061):
+            content = cache.revalidated(policy, key)
+            content["list"].append(2)
+            assert cache.get(policy, key) == {"list": [1]}
+        assert cache.stats()["test"]["not_modified"] == 1
+
+    def test_revalidated_after_eviction_is_miss(self, cache, policy):
+        """If the entry is gone the caller must refetch."""
+        assert cache.revalidated(policy, _key("/things/1")) is MISS
+
+    def test_zero_ttl_policy_stores_only_with_validators(self, cache):
+        """ttl=0 entries exist only to answer 304s and are never served."""
+        policy = CachePolicy("volatile", ttl=0, negative_ttl=0)
+        cache.put(policy, _key("/things/1"), [1], validators=self.ETAG)
+        cache.put(policy, _key("/things/2"), [2])
+
+        assert cache.get(policy, _key("/things/1")) is MISS
+        assert cache.validators(policy, _key("/things/1")) == self.ETAG
+        assert cache.stats()["volatile"]["entries"] == 1
+
+    def test_validators_from_response(self):
+        """ETag and Last-Modified map to the matching request headers."""
+        response = requests.Response()
+        response.headers["ETag"] = '"v1"'
+        response.headers["Last-Modified"] = "Wed, 01 Oct 2025 10:00:00 GMT"
+
+        assert response_cache.validators_from(response) == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Wed, 01 Oct 2025 10:00:00 GMT",
+        }
+        assert response_cache.validators_from(requests.Response()) is None
+
+
+class TestInvalidate:
+    """Tests for explicit invalidation."""
+
+    def test_invalidate_prefix(self, cache, policy):
+        """Only entries under the prefix are dropped."""
+        cache.put(policy, _key("/things/1"), [1])
+        cache.put(policy, _key("/things/2"), [2])
+        cache.invalidate("/things/1")
+        assert cache.get(policy, _key("/things/1")) is MISS
+        assert cache.get(policy, _key("/things/2")) == [2]
+
+    def test_invalidate_all(self, cache, policy):
+        """No prefix clears everything."""
+        cache.put(policy, _key("/things/1"), [1])
+        cache.invalidate()
+        assert cache.get(policy, _key("/things/1")) is MISS
+        assert cache.stats()["test"]["bytes"] == 0
+
+
+def test_module_cache_uses_default_policies():
+    """The process-wide cache is configured with DEFAULT_POLICIES."""
+    assert response_cache.cache.policy_for("/rooms?rentalId=1").name == "rooms"
+
+
+def test_default_policies_serve_slow_changing_data_stale():
+    """Building, maintenance unit and residence lookups are stale-while-revalidate."""
+    default = ResponseCache()
+    for path in (
+        "/buildings/by-building-code/1",
+        "/maintenance-units/by-property-code/1",
+        "/component-categories",
+        "/residences/by-rental-id/1",
+    ):
+        assert default.policy_for(path).stale_ttl > 0
+    assert default.policy_for("/parking-spaces/by-rental-id/1").stale_ttl == 0
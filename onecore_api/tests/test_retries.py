@@ -0,0 +1,145 @@
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+import circuit_breaker
+import deadlines
+import retries
+from retries import RetryBudget
+
+
+@pytest.fixture(autouse=True)
+def fresh_retries():
+    retries.reset()
+    with patch("retries._sleep") as sleep:
+        yield sleep
+    retries.reset()
+
+
+def _send(*outcomes):
+    """A send() returning/raising ``outcomes`` in turn."""
+    calls = Mock(side_effect=list(outcomes))
+    return calls
+
+
+class TestIsRetryable:
+    """Tests for which outcomes are retried."""
+
+    @pytest.mark.parametrize("status", [502, 503, 504])
+    def test_gateway_statuses(self, status):
+        assert retries.is_retryable("GET", response=Mock(status_code=status))
+
+    @pytest.mark.parametrize("status", [200, 400, 404, 500])
+    def test_other_statuses(self, status):
+        assert not retries.is_retryable("GET", response=Mock(status_code=status))
+
+    def test_transport_errors(self):
+        assert retries.is_retryable("GET", error=requests.ConnectionError())
+        assert retries.is_retryable("GET", error=requests.ReadTimeout())
+        assert not retries.is_retryable("GET", error=ValueError())
+
+    def test_open_circuit_is_final(self):
+        """An open breaker is not a transient error."""
+        error = circuit_breaker.CircuitOpenError("leases", 30)
+        assert not retries.is_retryable("GET", error=error)
+
+    def test_spent_budget_is_final(self):
+        """A spent time budget is a timeout that no retry can fix."""
+        error = deadlines.DeadlineExceeded("spent")
+        assert not retries.is_retryable("GET", error=error)
+
+    def test_only_idempotent_methods(self):
+        assert retries.is_retryable("head", error=requests.ConnectionError())
+        assert not retries.is_retryable("POST", error=requests.ConnectionError())
+        assert not retries.is_retryable("PUT", response=Mock(status_code=503))
+
+
+class TestCall:
+    """Tests for the retry loop."""
+
+    def test_success_first_time_sends_once(self):
+        send = _send(Mock(status_code=200))
+        assert retries.call("GET", "/rooms", send).status_code == 200
+        assert send.call_count == 1
+        assert retries.stats() == {}
+
+    def test_backoff_grows_and_is_jittered(self, fresh_retries):
+        """Delays are drawn from [0, base * 2**n], capped at max_delay."""
+        send = _send(requests.ConnectionError(), requests.ConnectionError(), Mock(status_code=200))
+        with patch("retries.random.uniform", side_effect=lambda lo, hi: hi) as uniform:
+            retries.call("GET", "/rooms", send)
+
+        assert [c.args for c in uniform.call_args_list] == [(0, 0.2), (0, 0.4)]
+        assert [c.args[0] for c in fresh_retries.call_args_list] == [0.2, 0.4]
+
+    def test_returns_last_response_when_attempts_run_out(self):
+        send = _send(*[Mock(status_code=503)] * 3)
+        assert retries.call("GET", "/rooms", send).status_code == 503
+        assert retries.stats()["rooms"]["exhausted"] == 1
+
+    def test_budget_exhaustion_stops_retries(self):
+        """With the budget spent, a failure is returned after one attempt."""
+        retries.configure(budget_min_per_second=0.0, budget_ratio=0.0)
+        send = _send(Mock(status_code=503), Mock(status_code=200))
+
+        assert retries.call("GET", "/rooms", send).status_code == 503
+        assert send.call_count == 1
+        assert retries.stats()["rooms"]["budget_exhausted"] == 1
+
+    def test_backoff_capped_to_the_time_budget(self, fresh_retries):
+        """A retry never sleeps past the point where it could still start."""
+        send = _send(Mock(status_code=503), Mock(status_code=200))
+        with patch("deadlines._now", return_value=100.0), patch(
+            "retries.backoff", return_value=2.0
+        ):
+            retries.call("GET", "/rooms", send, deadline=100.5)
+
+        assert fresh_retries.call_args.args[0] == pytest.approx(0.3)
+
+    def test_no_retry_without_time_for_another_attempt(self, fresh_retries):
+        """With less than min_timeout left, the last outcome is final."""
+        failed = Mock(status_code=503)
+        send = _send(failed, Mock(status_code=200))
+        with patch("deadlines._now", return_value=100.0):
+            assert retries.call("GET", "/rooms", send, deadline=100.1) is failed
+
+        assert send.call_count == 1
+        fresh_retries.assert_not_called()
+        failed.close.assert_not_called()
+        assert retries.stats()["rooms"]["out_of_time"] == 1
+
+    def test_discarded_response_is_closed(self):
+        """A 5xx that is retried releases its connection first."""
+        failed = Mock(status_code=503)
+
+        retries.call("GET", "/rooms", _send(failed, Mock(status_code=200)))
+
+        failed.close.assert_called_once()
+
+
+class TestRetryBudget:
+    """Tests for the sliding-window retry budget."""
+
+    def test_floor_allows_retries_without_traffic(self):
+        budget = RetryBudget(ratio=0.0, min_per_second=0.2, window=10)
+        assert budget.withdraw()
+        assert budget.withdraw()
+        assert not budget.withdraw()
+
+    def test_ratio_of_requests(self):
+        """Each request adds ``ratio`` retries to the allowance."""
+        budget = RetryBudget(ratio=0.5, min_per_second=0.0, window=10)
+        for _ in range(4):
+            budget.deposit()
+        assert budget.withdraw()
+        assert budget.withdraw()
+        assert not budget.withdraw()
+
+    def test_window_expires_old_retries(self):
+        budget = RetryBudget(ratio=0.0, min_per_second=0.1, window=10)
+        with patch("retries._now", return_value=100):
+            assert budget.withdraw()
+            assert not budget.withdraw()
+        with patch("retries._now", return_value=111):
+            assert budget.withdraw()
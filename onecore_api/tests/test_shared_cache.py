@@ -0,0 +1,208 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import shared_cache
+from response_cache import MISS, CachePolicy, ResponseCache, make_key
+from shared_cache import PostgresCacheBackend, SharedCacheBackend, hash_key
+
+
+class FakeSharedBackend(SharedCacheBackend):
+    """In-memory stand-in for a shared backend (one 'node')."""
+
+    def __init__(self):
+        self.rows = {}
+        self.get_calls = 0
+        self.put_calls = 0
+
+    def get_many(self, keys):
+        self.get_calls += 1
+        now = time.time()
+        return {
+            key: self.rows[key]
+            for key in keys
+            if key in self.rows and self.rows[key][0] > now
+        }
+
+    def put_many(self, items):
+        self.put_calls += 1
+        for key, expires_at, status, content, size in items:
+            self.rows[key] = (expires_at, status, content, size)
+
+    def delete_prefix(self, path_prefix=None):
+        for key in list(self.rows):
+            if path_prefix is None or key[1].startswith(path_prefix):
+                del self.rows[key]
+
+    def cleanup(self):
+        now = time.time()
+        expired = [key for key, row in self.rows.items() if row[0] <= now]
+        for key in expired:
+            del self.rows[key]
+        return len(expired)
+
+
+@pytest.fixture
+def policy():
+    return CachePolicy("test", ttl=60, negative_ttl=10)
+
+
+@pytest.fixture
+def shared():
+    return FakeSharedBackend()
+
+
+def _key(path):
+    return make_key("https://api.example.com", path)
+
+
+class TestTwoLevelCache:
+    """ResponseCache with a shared second level."""
+
+    def test_other_worker_hits_shared_level(self, policy, shared):
+        """A value stored by one worker is found by another worker's L1 miss."""
+        worker_a = ResponseCache(policies=[("/things/", policy)])
+        worker_b = ResponseCache(policies=[("/things/", policy)])
+
+        worker_a.put(policy, _key("/things/1"), {"a": 1}, size=10, shared=shared)
+
+        assert worker_b.get(policy, _key("/things/1"), shared=shared) == {"a": 1}
+        assert worker_b.stats()["test"]["shared_hits"] == 1
+
+    def test_shared_hit_is_promoted_to_l1(self, policy, shared):
+        """After a shared hit the next lookup is served from L1."""
+        ResponseCache().put(policy, _key("/things/1"), [1], shared=shared)
+        worker = ResponseCache(policies=[("/things/", policy)])
+
+        worker.get(policy, _key("/things/1"), shared=shared)
+        worker.get(policy, _key("/things/1"), shared=shared)
+
+        assert shared.get_calls == 1
+
+    def test_get_many_is_one_round_trip(self, policy, shared):
+        """Bulk lookups query the shared level once for all L1 misses."""
+        writer = ResponseCache()
+        writer.put_many(
+            policy, [(_key("/things/1"), [1], 0), (_key("/things/2"), [2], 0)], shared=shared
+        )
+        reader = ResponseCache()
+
+        result = reader.get_many(
+            policy, [_key("/things/1"), _key("/things/2"), _key("/things/3")], shared=shared
+        )
+
+        assert result == [[1], [2], MISS]
+        assert shared.get_calls == 1
+        assert shared.put_calls == 1
+
+    def test_negative_entries_are_shared(self, policy, shared):
+        """A 404 cached by one worker is a 404 for the others too."""
+        ResponseCache().put_status(policy, _key("/things/x"), 404, shared=shared)
+
+        assert ResponseCache().get_many(policy, [_key("/things/x")], shared=shared) == [None]
+
+    def test_invalidate_purges_shared_level(self, policy, shared):
+        """invalidate with a shared backend deletes there too."""
+        cache = ResponseCache()
+        cache.put(policy, _key("/things/1"), [1], shared=shared)
+        cache.invalidate("/things/", shared=shared)
+        assert shared.rows == {}
+
+    def test_backend_errors_degrade_to_miss(self, policy):
+        """A failing shared backend never fails the request."""
+        broken = MagicMock(spec=SharedCacheBackend)
+        broken.get_many.side_effect = RuntimeError("db down")
+        broken.put_many.side_effect = RuntimeError("db down")
+        cache = ResponseCache()
+
+        cache.put(policy, _key("/things/1"), [1], shared=broken)
+        assert cache.get(policy, _key("/things/2"), shared=broken) is MISS
+
+
+class TestPostgresCacheBackend:
+    """SQL issued by the UNLOGGED table backend."""
+
+    @pytest.fixture
+    def cursor(self):
+        cr = MagicMock()
+        cr.__enter__.return_value = cr
+        return cr
+
+    @pytest.fixture
+    def backend(self, cursor):
+        return PostgresCacheBackend(lambda: cursor)
+
+    def test_creates_unlogged_table_once(self, backend, cursor):
+        """The DDL runs on first use only."""
+        cursor.fetchall.return_value = []
+        backend.get_many([_key("/a")])
+        backend.get_many([_key("/b")])
+
+        ddl = [c.args[0] for c in cursor.execute.call_args_list if "CREATE" in c.args[0]]
+        assert len(ddl) == 2  # table + index
+        assert "UNLOGGED" in ddl[0]
+
+    def test_get_many_decodes_rows(self, backend, cursor):
+        """Rows come back keyed by the original key tuple."""
+        key = _key("/rooms")
+        cursor.fetchall.return_value = [(hash_key(key), 123.0, None, '[{"id": 1}]')]
+
+        result = backend.get_many([key])
+
+        assert result == {key: (123.0, None, [{"id": 1}], len('[{"id": 1}]'))}
+        select = cursor.execute.call_args_list[-1]
+        assert "expires_at > %s" in select.args[0]
+
+    def test_put_many_is_single_upsert(self, backend, cursor):
+        """All rows go in one INSERT ... ON CONFLICT statement."""
+        backend.put_many([
+            (_key("/a"), 100.0, None, {"x": 1}, 5),
+            (_key("/b"), 100.0, 404, None, 0),
+        ])
+
+        sql, params = cursor.execute.call_args_list[-1].args
+        assert "ON CONFLICT (key) DO UPDATE" in sql
+        assert params[:5] == [hash_key(_key("/b")), "/b", 404, None, 100.0]
+        assert json.loads(params[8]) == {"x": 1}
+
+    def test_put_many_deduplicates_keys(self, backend, cursor):
+        """The last write for a key wins; duplicates would break the upsert."""
+        backend.put_many([
+            (_key("/a"), 100.0, None, [1], 0),
+            (_key("/a"), 200.0, None, [2], 0),
+        ])
+
+        _sql, params = cursor.execute.call_args_list[-1].args
+        assert len(params) == 5
+        assert params[4] == 200.0
+
+    def test_delete_prefix_escapes_like(self, backend, cursor):
+        """LIKE wildcards in the prefix are matched literally."""
+        backend.delete_prefix("/rooms?rentalId=1_2%")
+
+        _sql, params = cursor.execute.call_args_list[-1].args
+        assert params == ("/rooms?rentalId=1\\_2\\%%",)
+
+    def test_cleanup_returns_rowcount(self, backend, cursor):
+        """cleanup reports how many rows it deleted."""
+        cursor.rowcount = 7
+        assert backend.cleanup() == 7
+
+
+class TestBackendFor:
+    """Backend selection from onecore_cache_backend."""
+
+    def test_disabled_by_default(self):
+        """No/unknown setting means no shared level."""
+        assert shared_cache.backend_for("db", None) is None
+        assert shared_cache.backend_for("db", "redis") is None
+
+    def test_postgres_backend_is_per_database(self):
+        """One backend per database, reused across calls."""
+        with patch.dict(shared_cache._backends, clear=True):
+            first = shared_cache.backend_for("db1", "postgres")
+            assert isinstance(first, PostgresCacheBackend)
+            assert shared_cache.backend_for("db1", "postgres") is first
+            assert shared_cache.backend_for("db2", "postgres") is not first
@@ -0,0 +1,177 @@
+import threading
+
+import pytest
+
+from deadlines import DeadlineExceeded
+from single_flight import SingleFlight
+
+
+@pytest.fixture
+def group():
+    return SingleFlight()
+
+
+def _run_concurrently(group, key, fn, callers):
+    """Start ``callers`` threads on ``key``; returns (results, errors)."""
+    results, errors = [], []
+
+    def _call():
+        try:
+            results.append(group.do(key, fn))
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=_call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def _blocking(release, calls, result=None, error=None):
+    def _fn():
+        calls.append(1)
+        release.wait(5)
+        if error is not None:
+            raise error
+        return result
+
+    return _fn
+
+
+def _wait_for_followers(group, key, count):
+    for _ in range(500):
+        with group._lock:
+            call = group._calls.get(key)
+            if call is not None and call.followers >= count:
+                return
+        threading.Event().wait(0.01)
+    raise AssertionError("followers did not queue")
+
+
+class TestSingleFlight:
+    """Tests for coalescing concurrent identical calls."""
+
+    def test_concurrent_callers_share_one_call(self, group):
+        """Only the leader runs fn; everyone gets the result."""
+        release, calls = threading.Event(), []
+        fn = _blocking(release, calls, result={"rooms": [1]})
+        threads, results, errors = _run_concurrently(group, "k", fn, 4)
+        _wait_for_followers(group, "k", 3)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert calls == [1]
+        assert results == [{"rooms": [1]}] * 4
+        assert errors == []
+        assert group.stats() == {
+            "leaders": 1,
+            "coalesced": 3,
+            "abandoned": 0,
+            "in_flight": 0,
+        }
+
+    def test_followers_get_copies(self, group):
+        """Results handed to followers are independent copies."""
+        release, calls = threading.Event(), []
+        fn = _blocking(release, calls, result={"rooms": [1]})
+        threads, results, _errors = _run_concurrently(group, "k", fn, 2)
+        _wait_for_followers(group, "k", 1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        results[0]["rooms"].append(2)
+        assert results[1] == {"rooms": [1]}
+
+    def test_error_is_shared(self, group):
+        """If the leader fails, every waiting caller gets its own copy of
+        the error."""
+        release, calls = threading.Event(), []
+        fn = _blocking(release, calls, error=ConnectionError("down"))
+        threads, results, errors = _run_concurrently(group, "k", fn, 3)
+        _wait_for_followers(group, "k", 2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert calls == [1]
+        assert results == []
+        assert len(errors) == 3
+        assert len({id(err) for err in errors}) == 3
+        assert all(isinstance(err, ConnectionError) for err in errors)
+        assert {err.args for err in errors} == {("down",)}
+
+    def test_uncopyable_error_makes_followers_call(self, group):
+        """A follower that can't get a copy of the error makes its own call."""
+
+        class _Refused(Exception):
+            def __init__(self, group, retry_in):
+                super().__init__(f"{group} refused for {retry_in}s")
+
+        release, calls = threading.Event(), []
+
+        def fn():
+            calls.append(1)
+            release.wait(5)
+            raise _Refused("rooms", 5)
+
+        threads, _results, errors = _run_concurrently(group, "k", fn, 2)
+        _wait_for_followers(group, "k", 1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert calls == [1, 1]
+        assert len({id(err) for err in errors}) == 2
+
+    def test_leaders_spent_budget_is_not_shared(self, group):
+        """A leader's DeadlineExceeded sends followers to make their own call."""
+        release, calls = threading.Event(), []
+
+        def fn():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(5)
+                raise DeadlineExceeded("budget spent")
+            return "own"
+
+        threads, results, errors = _run_concurrently(group, "k", fn, 3)
+        _wait_for_followers(group, "k", 2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert len(calls) == 3
+        assert results == ["own", "own"]
+        assert [type(err) for err in errors] == [DeadlineExceeded]
+
+    def test_follower_waits_no_longer_than_its_timeout(self, group):
+        """A follower with a short wait stops waiting and calls itself."""
+        release, calls = threading.Event(), []
+        threads, _results, _errors = _run_concurrently(
+            group, "k", _blocking(release, calls, result="leader"), 1
+        )
+        while group.in_flight() == 0:
+            threading.Event().wait(0.01)
+
+        result = group.do("k", lambda: "own", wait=0.05)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert result == "own"
+        assert group.stats()["abandoned"] == 1
+
+    def test_sequential_calls_are_not_coalesced(self, group):
+        """Once a call finishes, the next one goes out again."""
+        calls = []
+        group.do("k", lambda: calls.append(1))
+        group.do("k", lambda: calls.append(1))
+        assert len(calls) == 2
+        assert group.in_flight() == 0
+
+    def test_different_keys_do_not_wait(self, group):
+        """Unrelated keys run independently."""
+        assert group.do("a", lambda: 1) == 1
+        assert group.do("b", lambda: 2) == 2
@@ -0,0 +1,221 @@
+import base64
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+
+import circuit_breaker
+import core_api
+import credentials
+import http_session
+import payloads
+import response_cache
+import retries
+from stub_server import StubOneCore, load_fixture, scrub
+
+
+class _Params:
+    def __init__(self, values):
+        self.values = values
+
+    def sudo(self):
+        return self
+
+    def get_param(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set_param(self, key, value):
+        self.values[key] = value
+
+
+class _Cursor:
+    def __init__(self, dbname):
+        self.dbname = dbname
+
+
+class _Env(dict):
+    def __init__(self, values, dbname):
+        super().__init__(values)
+        self.cr = _Cursor(dbname)
+
+
+@pytest.fixture(autouse=True)
+def fresh_client_state(tmp_path):
+    """Real HTTP, with fresh worker-level state around every test."""
+    credentials.reset()
+    circuit_breaker.reset()
+    retries.reset()
+    response_cache.cache.invalidate()
+    core_api._worker_configured_pid = None
+    with patch("credentials.SIGNAL_DIR", str(tmp_path)), patch("retries._sleep"):
+        yield
+    http_session.reset()
+    response_cache.cache.invalidate()
+    retries.reset()
+    circuit_breaker.reset()
+    credentials.reset()
+
+
+@pytest.fixture
+def stub():
+    with StubOneCore(rooms=3, components_per_room=4) as server:
+        yield server
+
+
+def _api(stub, token="stub-token"):
+    params = {
+        "onecore_base_url": stub.url,
+        "onecore_api_token": token,
+        "onecore_username": "user",
+        "onecore_password": "secret",
+        "onecore_http_prewarm_connections": "0",
+    }
+    # Settings are snapshotted per database; one database per stub.
+    env = _Env({"ir.config_parameter": _Params(params)}, dbname=stub.url)
+    return core_api.CoreApi(env)
+
+
+class TestEndpoints:
+    """CoreApi against the generated data, over real HTTP."""
+
+    def test_payloads_decode(self, stub):
+        api = _api(stub)
+
+        leases = api.fetch_leases("pnr", "19800101-1234", "Lägenhet")
+        residence = api.fetch_residence(leases[0]["rentalPropertyId"])
+        rooms = api.fetch_rooms(residence["rentalInformation"]["rentalId"])
+        components = api.fetch_components_by_room(rooms[0]["propertyObjectId"])
+
+        assert payloads.Lease.decode(leases[0]).tenants[0].name == "Anna Svensson"
+        assert payloads.Residence.decode(residence).estate_code == "705-022"
+        assert [payloads.Room.decode(room).name for room in rooms] == [
+            "Kök",
+            "Badrum",
+            "Vardagsrum",
+        ]
+        assert len(payloads.Component.decode_many(components)) == 4
+
+    def test_fan_out_and_pagination(self, stub):
+        api = _api(stub)
+        paths = [f"/components/by-room/R{i}" for i in range(10)]
+
+        assert all(len(result) == 4 for result in api.parallel_get_json(paths))
+        assert len(list(api.iter_component_types("cat-1", page_size=7))) == 30
+
+    def test_writes_and_uploads(self, stub):
+        api = _api(stub)
+        image = base64.b64encode(b"\xff\xd8\xff" + b"\x00" * 100)
+
+        assert api.create_component({"modelId": "m-1"})["content"]["id"]
+        assert api.upload_document(image, "C1", "a.jpg")["content"]["id"] == "doc-C1"
+        sent = api.request("POST", "/work-orders/send-sms", data={"text": "Hej"})
+        assert sent.json()["content"] == {"channel": "sms", "status": "queued"}
+
+    def test_expired_token_is_refreshed(self, stub):
+        api = _api(stub, token="expired")
+
+        assert api.fetch_component_categories()[0]["categoryName"] == "Vitvaror"
+        assert ("POST", "/auth/generateToken") in stub.requests
+
+    def test_etag_revalidation(self, stub):
+        first = requests.get(
+            f"{stub.url}/rooms?rentalId=1",
+            headers={"Authorization": "Bearer stub-token"},
+            timeout=5,
+        )
+        second = requests.get(
+            f"{stub.url}/rooms?rentalId=1",
+            headers={
+                "Authorization": "Bearer stub-token",
+                "If-None-Match": first.headers["ETag"],
+            },
+            timeout=5,
+        )
+
+        assert second.status_code == 304
+
+
+class TestKnobs:
+    def test_latency(self):
+        with StubOneCore(route_latency={"/rooms": 0.2}) as stub:
+            api = _api(stub)
+            started = time.monotonic()
+            api.fetch_component_categories()
+            fast = time.monotonic() - started
+            started = time.monotonic()
+            api.fetch_rooms("1")
+            slow = time.monotonic() - started
+
+        assert slow >= 0.2 > fast
+
+    def test_scripted_failures_are_retried(self, stub):
+        stub.fail("/rooms", 503, 502)
+
+        assert len(_api(stub).fetch_rooms("1")) == 3
+        assert retries.stats()["rooms"]["recovered"] == 1
+
+    def test_dropped_connection(self, stub):
+        stub.fail("/residences", 0, 0, 0)
+
+        with pytest.raises(requests.ConnectionError):
+            _api(stub).fetch_residence("1-2-3")
+
+    def test_error_rate_is_seeded(self):
+        outcomes = []
+        for _ in range(2):
+            with StubOneCore(error_rate=0.5, seed=7, token=None) as stub:
+                outcomes.append(
+                    [
+                        requests.get(f"{stub.url}/component-categories", timeout=5).status_code
+                        for _ in range(20)
+                    ]
+                )
+
+        assert outcomes[0] == outcomes[1]
+        assert {200, 503} == set(outcomes[0])
+
+    def test_payload_size(self):
+        with StubOneCore(components_per_room=50, padding=1000) as stub:
+            components = _api(stub).fetch_components_by_room("R1")
+
+        assert len(components) == 50
+        assert len(json.dumps(components)) > 50 * 1000
+
+
+class TestRecordReplay:
+    def test_record_then_replay(self, tmp_path):
+        fixture = tmp_path / "residence.json"
+        with StubOneCore() as upstream:
+            with StubOneCore(upstream=upstream.url) as recorder:
+                recorded = _api(recorder)
+                leases = recorded.fetch_leases("pnr", "19800101-1234", "Lägenhet")
+                residence = recorded.fetch_residence(leases[0]["rentalPropertyId"])
+            recorder.save(fixture)
+
+        assert len(load_fixture(fixture)) == 2
+        with StubOneCore(replay=fixture, latency=0.01) as replay:
+            replayed = _api(replay)
+            assert replayed.fetch_residence(leases[0]["rentalPropertyId"]) == residence
+            with pytest.raises(requests.HTTPError):
+                replayed.fetch_residence("never-recorded")
+
+    def test_personal_data_is_scrubbed(self, tmp_path):
+        fixture = tmp_path / "leases.json"
+        with StubOneCore() as upstream:
+            with StubOneCore(upstream=upstream.url) as recorder:
+                _api(recorder).fetch_leases("pnr", "19800101-1234", "Lägenhet")
+            recorder.save(fixture)
+
+        (interaction,) = json.loads(fixture.read_text(encoding="utf-8"))["interactions"]
+        tenant = interaction["body"]["content"][0]["tenants"][0]
+        assert tenant["nationalRegistrationNumber"] == "***"
+        assert tenant["emailAddress"] == "***"
+        assert tenant["contactCode"] != "***"
+
+    def test_scrub_keeps_structure(self):
+        assert scrub({"a": [{"emailAddress": "x", "b": 1}], "fullName": None}) == {
+            "a": [{"emailAddress": "***", "b": 1}],
+            "fullName": None,
+        }
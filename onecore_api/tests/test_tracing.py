@@ -0,0 +1,144 @@
+import logging
+import threading
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture(autouse=True)
+def fresh_tracing():
+    tracing.reset()
+    yield
+    tracing.reset()
+
+
+class TestSpans:
+    def test_nested_spans_share_the_trace(self):
+        with tracing.span("search") as root:
+            with tracing.span("fetch") as child:
+                assert tracing.current() is child
+            assert tracing.current() is root
+
+        assert tracing.current() is None
+        assert child.trace_id == root.trace_id
+        assert child.parent_id == root.span_id
+        assert root.parent_id is None
+        assert root.duration >= child.duration
+
+    def test_each_root_starts_a_new_trace(self):
+        with tracing.span("first") as first:
+            pass
+        with tracing.span("second") as second:
+            pass
+
+        assert first.correlation_id != second.correlation_id
+        assert tracing.correlation_id() is None
+
+    def test_errors_are_recorded_and_raised(self):
+        with pytest.raises(KeyError):
+            with tracing.span("search") as failed:
+                raise KeyError("missing")
+
+        assert failed.error == "KeyError"
+        assert failed.duration is not None
+
+    def test_traced_and_annotate(self):
+        @tracing.traced("lookup")
+        def lookup(code):
+            tracing.annotate(code=code)
+            return tracing.current()
+
+        found = lookup("KOK")
+
+        assert found.name == "lookup"
+        assert found.attributes == {"code": "KOK"}
+        assert lookup.__name__ == "lookup"
+
+    def test_annotate_outside_a_span_does_nothing(self):
+        tracing.annotate(code="KOK")
+
+        assert tracing.stats()["spans"] == 0
+
+    def test_bound_carries_the_trace_to_other_threads(self):
+        children = []
+
+        def work(parent):
+            with tracing.bound(parent):
+                with tracing.span("child") as child:
+                    children.append(child)
+
+        with tracing.span("search") as root:
+            thread = threading.Thread(target=work, args=(tracing.current(),))
+            thread.start()
+            thread.join()
+
+        (child,) = children
+        assert child.trace_id == root.trace_id
+        assert child.parent_id == root.span_id
+
+    def test_slow_roots_are_logged(self, caplog):
+        tracing.configure(slow_seconds=0.000001)
+
+        with caplog.at_level(logging.INFO, logger="tracing"):
+            with tracing.span("search") as root:
+                with tracing.span("fetch"):
+                    pass
+
+        (record,) = caplog.records
+        assert "Slow search" in record.getMessage()
+        assert root.correlation_id in record.getMessage()
+
+
+class TestExport:
+    def test_spans_are_written_as_trace_events(self, tmp_path):
+        path = tmp_path / "trace.json"
+        tracing.configure(path=str(path))
+
+        with tracing.span("search", search_type="pnr") as root:
+            with tracing.span("onecore GET /rooms", status=200):
+                pass
+
+        child, parent = tracing.load(path)
+        assert (parent["name"], parent["ph"], parent["cat"]) == ("search", "X", "search")
+        assert parent["args"] == {
+            "search_type": "pnr",
+            "correlation_id": root.trace_id,
+            "span_id": root.span_id,
+        }
+        assert child["cat"] == "onecore"
+        assert child["args"]["parent_id"] == root.span_id
+        assert parent["ts"] <= child["ts"]
+        assert child["dur"] <= parent["dur"]
+        assert tracing.stats() == {"spans": 2, "exported": 2, "export_errors": 0}
+
+    def test_appends_to_an_existing_file(self, tmp_path):
+        path = tmp_path / "trace.json"
+        tracing.configure(path=str(path))
+        with tracing.span("first"):
+            pass
+        tracing.reset()
+        tracing.configure(path=str(path))
+
+        with tracing.span("second"):
+            pass
+
+        assert [event["name"] for event in tracing.load(path)] == ["first", "second"]
+
+    def test_pid_in_the_path(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("os.getpid", lambda: 4242)
+        tracing.configure(path=str(tmp_path / "trace-{pid}.json"))
+
+        with tracing.span("search"):
+            pass
+
+        (event,) = tracing.load(tmp_path / "trace-4242.json")
+        assert event["pid"] == 4242
+
+    def test_export_failures_are_counted(self, tmp_path):
+        tracing.configure(path=str(tmp_path / "missing" / "trace.json"))
+
+        with tracing.span("search"):
+            pass
+
+        assert tracing.stats() == {"spans": 1, "exported": 0, "export_errors": 1}
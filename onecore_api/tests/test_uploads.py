@@ -0,0 +1,188 @@
+import base64
+import io
+import threading
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+import uploads
+from uploads import Base64Source, FileSource, MultipartBody
+
+IMAGE = bytes(range(256)) * 500 + b"tail"  # spans several chunks, odd length
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    uploads.reset()
+    yield
+    uploads.reset()
+
+
+def _parts(body, content_type):
+    """Parse a multipart body into ``{name: payload bytes}``."""
+    message = BytesParser().parsebytes(
+        b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): part.get_payload(
+            decode=True
+        )
+        for part in message.get_payload()
+    }
+
+
+class TestSources:
+    """Tests for the base64 and file sources."""
+
+    @pytest.mark.parametrize("encode", [base64.b64encode, base64.encodebytes])
+    @pytest.mark.parametrize("as_str", [False, True])
+    def test_base64_chunks_decode_to_the_image(self, encode, as_str):
+        """Plain and line-wrapped base64, str or bytes, decode chunk-wise."""
+        data = encode(IMAGE)
+        source = Base64Source(data.decode() if as_str else data)
+
+        chunks = list(source.chunks())
+
+        assert len(chunks) > 1
+        assert b"".join(chunks) == IMAGE
+        assert source.size == len(IMAGE)
+        assert source.header(264) == IMAGE[:264]
+        assert source.base64() == base64.b64encode(IMAGE).decode()
+
+    @pytest.mark.parametrize("image", [b"", b"a", b"ab", b"abc"])
+    def test_base64_size_accounts_for_padding(self, image):
+        assert Base64Source(base64.b64encode(image)).size == len(image)
+
+    @pytest.mark.parametrize("data", ["abcde", b"abcde", "ab\ncde"])
+    def test_invalid_base64_length_is_kept_as_given(self, data):
+        """Not streamable (no size), but still sendable in the JSON body."""
+        source = Base64Source(data)
+
+        assert source.size is None
+        assert source.base64() == (data.decode() if isinstance(data, bytes) else data)
+
+    def test_file_source_reads_from_current_position(self):
+        """A file object is read in chunks from where it was positioned."""
+        fileobj = io.BytesIO(b"skip" + IMAGE)
+        fileobj.seek(4)
+        source = FileSource(fileobj)
+
+        assert source.size == len(IMAGE)
+        assert source.header(8) == IMAGE[:8]
+        assert b"".join(source.chunks()) == IMAGE
+        assert b"".join(source.chunks()) == IMAGE
+        assert source.base64() == base64.b64encode(IMAGE).decode()
+
+    def test_source_for(self):
+        assert isinstance(uploads.source_for(b"YQ=="), Base64Source)
+        assert isinstance(uploads.source_for(io.BytesIO(b"a")), FileSource)
+
+
+class TestMultipartBody:
+    """Tests for the streamed multipart body."""
+
+    def test_parts_and_length(self):
+        """The body parses as multipart and its length is exact."""
+        body = MultipartBody(
+            Base64Source(base64.b64encode(IMAGE)), 'bild "1".png', "image/png"
+        )
+
+        data = b"".join(body)
+
+        assert len(data) == len(body)
+        assert body.content_type.startswith("multipart/form-data; boundary=")
+        parts = _parts(data, body.content_type)
+        assert parts["file"] == IMAGE
+        assert parts["fileName"] == b'bild "1".png'
+        assert parts["contentType"] == b"image/png"
+
+    def test_can_be_sent_again(self):
+        """Iterating twice yields the same bytes (resend after a 401)."""
+        body = MultipartBody(FileSource(io.BytesIO(IMAGE)), "a.jpg", "image/jpeg")
+
+        assert b"".join(body) == b"".join(body)
+
+
+class _UploadHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    received = []
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        self.received.append((dict(self.headers), self.rfile.read(length)))
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _UploadHandler.received = []
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _UploadHandler)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_requests_sends_body_with_content_length(server):
+    """requests streams the body with a Content-Length, not chunked."""
+    body = MultipartBody(Base64Source(base64.b64encode(IMAGE)), "a.jpg", "image/jpeg")
+
+    response = requests.post(
+        server, data=body, headers={"Content-Type": body.content_type}, timeout=5
+    )
+
+    assert response.status_code == 201
+    headers, data = _UploadHandler.received[0]
+    assert "Transfer-Encoding" not in headers
+    assert int(headers["Content-Length"]) == len(body)
+    assert _parts(data, headers["Content-Type"])["file"] == IMAGE
+
+
+class TestModes:
+    """Tests for the upload mode, fallback and counters."""
+
+    def test_json_by_default(self):
+        assert not uploads.streaming()
+        assert uploads.stats()["mode"] == "json"
+
+    def test_stream_mode_until_multipart_is_rejected(self):
+        """A successful JSON fallback turns multipart off for the worker."""
+        uploads.configure(mode="stream")
+        assert uploads.streaming()
+
+        uploads.record("json", 100, fell_back=True)
+
+        assert not uploads.streaming()
+        stats = uploads.stats()
+        assert stats["multipart_rejected"] is True
+        assert stats["fallbacks"] == 1
+        assert stats["json_bytes"] == 100
+
+    def test_unknown_mode_is_ignored(self):
+        uploads.configure(mode="carrier-pigeon")
+
+        assert uploads.stats()["mode"] == "json"
+
+    @pytest.mark.parametrize(
+        "status, expected",
+        [
+            (415, True),
+            (405, True),
+            (404, True),
+            (400, False),
+            (501, False),
+            (500, False),
+            (201, False),
+        ],
+    )
+    def test_rejected(self, status, expected):
+        assert uploads.rejected(Mock(status_code=status)) is expected
@@ -0,0 +1,275 @@
+"""Lightweight tracing spans with a per-request correlation id.
+
+A slow search in the maintenance form goes through the handler, the
+``CoreApi`` fetches and many HTTP calls, often on fan-out threads; nothing
+tied those together. ``span(name)`` times a block as a span of the current
+trace, or starts a new trace (with a new correlation id) when there is
+none::
+
+    with tracing.span("maintenance.search", search_type="pnr"):
+        handler.handle_search(...)
+
+Every OneCore call is a span of its own (see ``core_api._guarded``) and
+sends the trace's correlation id as the ``X-Correlation-ID`` header, so
+OneCore's logs can be matched to ours. Spans follow the ``contextvars``
+context; threads that don't inherit it (the fan-out executor) run under
+``bound(parent)``.
+
+With ``path`` set (``onecore_trace_file``, or the ``ONECORE_TRACE_FILE``
+environment variable), finished spans are appended to that file in the
+Chrome trace event format (JSON array, one complete event per line), which
+Perfetto (ui.perfetto.dev) and chrome://tracing open as a timeline. A
+``{pid}`` in the path gives each worker its own file. Without a path,
+spans only carry the correlation id and cost a few microseconds. Root
+spans slower than ``slow_seconds`` are logged with their correlation id.
+
+Attributes are written to the file as they are: keep personal data
+(personal identity numbers, names) out of them.
+"""
+
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+_logger = logging.getLogger(__name__)
+
+HEADER = "X-Correlation-ID"
+
+DEFAULT_SETTINGS = {
+    # Trace file; None exports nothing.
+    "path": os.getenv("ONECORE_TRACE_FILE") or None,
+    # Root spans taking at least this long are logged (0: never).
+    "slow_seconds": 5.0,
+}
+
+_lock = threading.Lock()
+_settings = dict(DEFAULT_SETTINGS)
+_counters = {}  # pid -> {"spans": n, "exported": n, "export_errors": n}
+_files = {}  # (pid, path) -> open file
+_current = contextvars.ContextVar("onecore_span", default=None)
+
+
+class Span:
+    """One timed block of a trace."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "started_at",
+        "_started",
+        "duration",
+        "error",
+        "thread",
+    )
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+        self.error = None
+        self.thread = threading.get_ident()
+
+    @property
+    def correlation_id(self):
+        return self.trace_id
+
+    def set(self, **attributes):
+        """Add attributes to the span."""
+        self.attributes.update(attributes)
+
+    def _finish(self):
+        self.duration = time.perf_counter() - self._started
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """Time the block as span ``name`` of the current trace (or of a new
+    one); yields the ``Span``. An exception is recorded and re-raised."""
+    parent = _current.get()
+    current = Span(name, parent, attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as err:
+        current.error = type(err).__name__
+        raise
+    finally:
+        _current.reset(token)
+        current._finish()
+        _finished(current, root=parent is None)
+
+
+def traced(name):
+    """Decorator: run the function inside ``span(name)``."""
+
+    def _decorator(fn):
+        @functools.wraps(fn)
+        def _wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return _wrapper
+
+    return _decorator
+
+
+@contextlib.contextmanager
+def bound(parent):
+    """Run the block under ``parent``, a ``current()`` span taken elsewhere
+    (another thread); None means no trace."""
+    token = _current.set(parent)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def current():
+    """The span in effect, or None."""
+    return _current.get()
+
+
+def correlation_id():
+    """The current trace's correlation id, or None outside any span."""
+    current_span = _current.get()
+    return current_span.trace_id if current_span else None
+
+
+def annotate(**attributes):
+    """Add attributes to the current span, if any."""
+    current_span = _current.get()
+    if current_span is not None:
+        current_span.set(**attributes)
+
+
+def _count(name):
+    with _lock:
+        counters = _counters.setdefault(
+            os.getpid(), {"spans": 0, "exported": 0, "export_errors": 0}
+        )
+        counters[name] += 1
+
+
+def _finished(finished, root):
+    _count("spans")
+    slow = _settings["slow_seconds"]
+    if root and slow and finished.duration >= slow:
+        _logger.info(
+            "Slow %s: %.2fs (correlation id %s)",
+            finished.name,
+            finished.duration,
+            finished.trace_id,
+        )
+    if _settings["path"]:
+        _export(finished)
+
+
+def to_event(finished):
+    """The Chrome trace event (a complete, ``"X"``, event) of a span."""
+    args = dict(
+        finished.attributes,
+        correlation_id=finished.trace_id,
+        span_id=finished.span_id,
+    )
+    if finished.parent_id:
+        args["parent_id"] = finished.parent_id
+    if finished.error:
+        args["error"] = finished.error
+    return {
+        "name": finished.name,
+        "cat": finished.name.split(".", 1)[0].split(" ", 1)[0],
+        "ph": "X",
+        "ts": round(finished.started_at * 1e6),
+        "dur": round(finished.duration * 1e6),
+        "pid": os.getpid(),
+        "tid": finished.thread,
+        "args": args,
+    }
+
+
+def _trace_file(path):
+    """This worker's open trace file; a new file starts the JSON array."""
+    pid = os.getpid()
+    path = path.replace("{pid}", str(pid))
+    handle = _files.get((pid, path))
+    if handle is None:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL)
+            created = True
+        except FileExistsError:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+            created = False
+        handle = _files[(pid, path)] = os.fdopen(fd, "a", encoding="utf-8")
+        if created:
+            # The closing bracket is optional in this format, so the file
+            # is valid while it grows.
+            handle.write("[\n")
+            handle.flush()
+    return handle
+
+
+def _export(finished):
+    line = json.dumps(to_event(finished), default=str) + ",\n"
+    try:
+        with _lock:
+            handle = _trace_file(_settings["path"])
+            handle.write(line)
+            handle.flush()
+    except (OSError, TypeError, ValueError) as err:
+        _count("export_errors")
+        _logger.debug("Could not export span %s: %s", finished.name, err)
+        return
+    _count("exported")
+
+
+def load(path):
+    """The events of a trace file (for tests and scripts)."""
+    with open(path, encoding="utf-8") as trace_file:
+        text = trace_file.read().rstrip().rstrip(",")
+    return json.loads(text + "]" if not text.endswith("]") else text)
+
+
+def configure(**settings):
+    """Override ``DEFAULT_SETTINGS`` keys (unknown keys/None are ignored)."""
+    with _lock:
+        _settings.update(
+            {
+                key: value
+                for key, value in settings.items()
+                if key in DEFAULT_SETTINGS and value is not None
+            }
+        )
+
+
+def stats():
+    """``{"spans", "exported", "export_errors"}`` for this worker."""
+    with _lock:
+        return dict(
+            _counters.get(os.getpid())
+            or {"spans": 0, "exported": 0, "export_errors": 0}
+        )
+
+
+def reset():
+    """Close trace files, forget counters and restore the defaults (tests)."""
+    with _lock:
+        for handle in _files.values():
+            handle.close()
+        _files.clear()
+        _counters.clear()
+        _settings.clear()
+        _settings.update(DEFAULT_SETTINGS)
@@ -0,0 +1,225 @@
+"""Streamed multipart uploads of component documents.
+
+``upload_document`` sends an image as base64 inside a JSON body: a third
+larger on the wire than the image itself, and built in memory as a ``str``
+copy of the Odoo binary plus the JSON document around it. In ``"stream"``
+mode the image is sent as raw bytes in a ``multipart/form-data`` body that
+is produced chunk by chunk while it is being sent:
+
+- base64 from an Odoo binary field is decoded one chunk at a time, so no
+  decoded (or re-encoded) copy of the whole image is ever built;
+- a binary file object, e.g. an attachment opened from the filestore, is
+  read in chunks.
+
+The body length is known up front, so it goes out with a Content-Length
+rather than chunked transfer encoding (which some proxies reject), and the
+body can be iterated again, so a send repeated after a token refresh works.
+
+``"json"`` (the default) keeps the JSON body. In ``"stream"`` mode a server
+that rejects multipart (see ``FALLBACK_STATUSES``) gets the JSON body
+instead; once that works, the worker stops trying multipart. See
+``stats()``.
+"""
+
+import base64
+import binascii
+import logging
+import os
+import threading
+import uuid
+
+_logger = logging.getLogger(__name__)
+
+# Raw bytes per body chunk; a multiple of 3 so base64 input is sliced at
+# 4-character boundaries.
+CHUNK_SIZE = 48 * 1024
+# Responses meaning "this server does not take a multipart upload here"; a
+# 400 is about the upload itself and is raised like any other error.
+FALLBACK_STATUSES = frozenset({404, 405, 415})
+MODES = ("json", "stream")
+
+DEFAULT_SETTINGS = {
+    "mode": "json",
+}
+
+_lock = threading.Lock()
+_settings = dict(DEFAULT_SETTINGS)
+_rejected_pids = set()  # workers whose server turned multipart down
+_counters = {}  # pid -> {"stream": n, "json": n, "fallbacks": n, ...}
+
+
+def _new_counters():
+    return {"stream": 0, "json": 0, "stream_bytes": 0, "json_bytes": 0, "fallbacks": 0}
+
+
+class Base64Source:
+    """Image given as base64 (``str`` or ``bytes``), decoded per chunk.
+
+    Data of an invalid base64 length has no ``size`` (``None``): it can't be
+    streamed, and goes in the JSON body exactly as given, as it always has.
+    """
+
+    def __init__(self, data):
+        is_bytes = isinstance(data, bytes)
+        self._data = data
+        self.size = None
+        if any(char in data for char in (b" \r\n" if is_bytes else " \r\n")):
+            # Line-wrapped base64 (``encodebytes``); rare, so a copy is fine.
+            data = data[:0].join(data.split())
+        if len(data) % 4 == 0:
+            self._data = data
+            padding = len(data) - len(data.rstrip(b"=" if is_bytes else "="))
+            self.size = len(data) // 4 * 3 - padding
+
+    def header(self, size):
+        """The first ``size`` (a multiple of 3) raw bytes."""
+        return binascii.a2b_base64(self._data[: size // 3 * 4])
+
+    def chunks(self):
+        step = CHUNK_SIZE // 3 * 4
+        for start in range(0, len(self._data), step):
+            yield binascii.a2b_base64(self._data[start : start + step])
+
+    def base64(self):
+        """The data as a base64 ``str`` (for the JSON body)."""
+        data = self._data
+        return data.decode("ascii") if isinstance(data, bytes) else data
+
+
+class FileSource:
+    """Raw image in a seekable binary file object, read per chunk."""
+
+    def __init__(self, fileobj):
+        self._file = fileobj
+        self._start = fileobj.tell()
+        self.size = fileobj.seek(0, os.SEEK_END) - self._start
+        fileobj.seek(self._start)
+
+    def header(self, size):
+        self._file.seek(self._start)
+        header = self._file.read(size)
+        self._file.seek(self._start)
+        return header
+
+    def chunks(self):
+        self._file.seek(self._start)
+        while True:
+            chunk = self._file.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def base64(self):
+        self._file.seek(self._start)
+        return base64.b64encode(self._file.read()).decode("ascii")
+
+
+def source_for(file_data):
+    """Wrap base64 data or a binary file object for uploading."""
+    if hasattr(file_data, "read"):
+        return FileSource(file_data)
+    return Base64Source(file_data)
+
+
+def _quote(value):
+    return str(value).replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+class MultipartBody:
+    """``multipart/form-data`` upload body streaming a source's raw bytes.
+
+    Iterable (again and again) and sized, so ``requests`` sends it with a
+    Content-Length. The parts are ``fileName``, ``contentType`` and the
+    ``file`` itself.
+    """
+
+    def __init__(self, source, file_name, content_type):
+        self.source = source
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self._head = (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="fileName"\r\n\r\n'
+            f"{file_name}\r\n"
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="contentType"\r\n\r\n'
+            f"{content_type}\r\n"
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="file"; '
+            f'filename="{_quote(file_name)}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        self._tail = f"\r\n--{boundary}--\r\n".encode()
+
+    def __len__(self):
+        return len(self._head) + self.source.size + len(self._tail)
+
+    def __iter__(self):
+        yield self._head
+        yield from self.source.chunks()
+        yield self._tail
+
+
+def streaming():
+    """Whether this worker should send uploads as multipart."""
+    return _settings["mode"] == "stream" and os.getpid() not in _rejected_pids
+
+
+def rejected(response):
+    """Whether ``response`` to a multipart upload calls for the JSON body."""
+    return response.status_code in FALLBACK_STATUSES
+
+
+def record(mode, size, fell_back=False):
+    """Count an upload sent in ``mode``; ``fell_back`` marks a JSON upload
+    that worked after multipart was rejected, which disables multipart for
+    this worker."""
+    pid = os.getpid()
+    with _lock:
+        counters = _counters.setdefault(pid, _new_counters())
+        counters[mode] += 1
+        counters[f"{mode}_bytes"] += size
+        if fell_back:
+            counters["fallbacks"] += 1
+            if pid not in _rejected_pids:
+                _rejected_pids.add(pid)
+                _logger.warning(
+                    "OneCore rejected a multipart upload; sending JSON from now on"
+                )
+
+
+def configure(**settings):
+    """Override ``DEFAULT_SETTINGS`` keys (unknown keys/None are ignored)."""
+    mode = settings.get("mode")
+    if mode is not None and mode not in MODES:
+        _logger.warning("Ignoring unknown upload mode %r", mode)
+        settings = dict(settings, mode=None)
+    with _lock:
+        _settings.update(
+            {
+                key: value
+                for key, value in settings.items()
+                if key in DEFAULT_SETTINGS and value is not None
+            }
+        )
+
+
+def stats():
+    """``{"mode", "multipart_rejected", "stream", "json", "stream_bytes",
+    "json_bytes", "fallbacks"}`` for this worker; bytes are raw image
+    bytes for ``stream`` and base64 characters for ``json``."""
+    pid = os.getpid()
+    with _lock:
+        counters = dict(_counters.get(pid) or _new_counters())
+        counters["mode"] = _settings["mode"]
+        counters["multipart_rejected"] = pid in _rejected_pids
+        return counters
+
+
+def reset():
+    """Forget counters and rejections and restore the defaults (tests)."""
+    with _lock:
+        _counters.clear()
+        _rejected_pids.clear()
+        _settings.clear()
+        _settings.update(DEFAULT_SETTINGS)
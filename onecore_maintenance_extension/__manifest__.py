@@ -3,7 +3,7 @@
 {
     "author": "Bostads-AB-Mimer",
     "name": "ONECore Maintenance Extension",
-    "version": "19.0.1.0.3",
+    "version": "19.0.1.0.5",
     "sequence": 100,
     "category": "Manufacturing/Maintenance",
     "description": "Extends the maintenance module with ONECore features.",
@@ -17,10 +17,13 @@
         "views/maintenance_team_view.xml",
         "views/mobile_view.xml",
         "views/maintenance_component_wizard_view.xml",
+        "views/onecore_api_stats_views.xml",
         # Load initial Data
         "data/maintenance.team.csv",
         "data/maintenance.request.category.csv",
         "data/mail_message_subtype.xml",
+        "data/onecore_api_cache.xml",
+        "data/onecore_api_stats.xml",
     ],
     "assets": {
         "web.assets_backend": [
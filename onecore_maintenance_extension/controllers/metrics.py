@@ -0,0 +1,35 @@
+import hmac
+
+from odoo import http
+from odoo.http import request
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class OneCoreMetricsController(http.Controller):
+    @http.route(
+        "/onecore/metrics",
+        type="http",
+        auth="public",
+        methods=["GET"],
+        csrf=False,
+        save_session=False,
+    )
+    def onecore_metrics(self, **kwargs):
+        # Scraped by Prometheus with "Authorization: Bearer <token>", where the
+        # token is the onecore_metrics_token system parameter; without one set
+        # the route doesn't exist.
+        token = request.env["ir.config_parameter"].sudo().get_param(
+            "onecore_metrics_token"
+        )
+        if not token:
+            return request.not_found()
+        sent = request.httprequest.headers.get("Authorization", "")
+        if not hmac.compare_digest(sent.encode(), f"Bearer {token}".encode()):
+            return request.make_response(
+                "Unauthorized", status=401, headers=[("Content-Type", "text/plain")]
+            )
+        text = request.env["onecore.api.stats"].sudo()._prometheus_text()
+        return request.make_response(
+            text, headers=[("Content-Type", PROMETHEUS_CONTENT_TYPE)]
+        )
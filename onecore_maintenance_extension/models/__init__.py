@@ -13,3 +13,5 @@ from . import maintenance_parking_space
 from . import maintenance_facility
 from . import maintenance_component_wizard
 from . import maintenance_component_line
+from . import onecore_api_cache
+from . import onecore_api_stats
@@ -1,6 +1,7 @@
 import logging
 from odoo import _, exceptions
-from ..utils.helpers import get_tenant_name, get_main_phone_number, select_active_lease
+from ....onecore_api import payloads
+from ..utils.helpers import select_active_lease
 from ..constants import LEASE_STATUS_LABELS
 
 _logger = logging.getLogger(__name__)
@@ -73,22 +74,26 @@ class BaseMaintenanceHandler:
         rental_property_option_id=None,
         facility_option_id=None,
     ):
-        """Create a lease option record with common lease data."""
-        status = self._normalize_lease_status(lease.get("status"))
+        """Create a lease option record with common lease data.
+
+        ``lease`` is a ``payloads.Lease`` or the raw lease payload.
+        """
+        lease = payloads.Lease.decode(lease)
+        status = self._normalize_lease_status(lease.status)
         status_label = LEASE_STATUS_LABELS.get(status, "")
         lease_name = (
-            f"{lease['leaseId']} ({status_label})" if status_label else lease["leaseId"]
+            f"{lease.lease_id} ({status_label})" if status_label else lease.lease_id
         )
         lease_data = {
             "user_id": self.env.user.id,
             "name": lease_name,
-            "lease_number": lease["leaseNumber"],
-            "lease_type": lease["type"],
+            "lease_number": lease.lease_number,
+            "lease_type": lease.type,
             "lease_status": status,
-            "lease_start_date": lease["leaseStartDate"],
-            "lease_end_date": lease["lastDebitDate"],
-            "contract_date": lease["contractDate"],
-            "approval_date": lease["approvalDate"],
+            "lease_start_date": lease.start_date,
+            "lease_end_date": lease.last_debit_date,
+            "contract_date": lease.contract_date,
+            "approval_date": lease.approval_date,
         }
 
         if parking_space_option_id:
@@ -106,28 +111,72 @@ class BaseMaintenanceHandler:
         `name` holds the bare person name; the lease status is shown only in the
         dropdown via the option's computed display_name (see maintenance_tenant).
         """
-        for tenant in tenants:
-            name = get_tenant_name(tenant)
-            phone_number = get_main_phone_number(tenant)
-
+        for tenant in payloads.Tenant.decode_many(tenants):
             tenant_data = {
                 "user_id": self.env.user.id,
-                "name": name,
-                "contact_code": tenant["contactCode"],
-                "contact_key": tenant["contactKey"],
-                "national_registration_number": tenant.get(
-                    "nationalRegistrationNumber"
-                ),
-                "email_address": tenant.get("emailAddress"),
-                "phone_number": phone_number,
-                "is_tenant": tenant["isTenant"],
-                "special_attention": tenant.get("specialAttention"),
+                "name": tenant.name,
+                "contact_code": tenant.contact_code,
+                "contact_key": tenant.contact_key,
+                "national_registration_number": tenant.national_registration_number,
+                "email_address": tenant.email_address,
+                "phone_number": tenant.phone_number,
+                "is_tenant": tenant.is_tenant,
+                "special_attention": tenant.special_attention,
             }
             if lease_option_id:
                 tenant_data["lease_option_id"] = lease_option_id
 
             self.env["maintenance.tenant.option"].create(tenant_data)
 
+    def _create_rental_property_option(self, residence):
+        """Create a rental property option from a ``payloads.Residence``."""
+        return self.env["maintenance.rental.property.option"].create(
+            {
+                "user_id": self.env.user.id,
+                "name": residence.rental_id,
+                "address": residence.name,
+                "code": residence.code,
+                "property_type": residence.type_name,
+                "area": residence.area,
+                "entrance": residence.entrance,
+                "has_elevator": "Ja" if residence.has_elevator else "Nej",
+                "estate_code": residence.estate_code,
+                "estate": residence.estate,
+                "building_code": residence.building_code,
+                "building": residence.building,
+            }
+        )
+
+    def _create_maintenance_unit_options(self, maintenance_units, **link):
+        """Create maintenance unit options linked via ``link`` (e.g.
+        ``building_option_id=...``)."""
+        for unit in maintenance_units:
+            self.env["maintenance.maintenance.unit.option"].create(
+                {
+                    "user_id": self.env.user.id,
+                    "id": unit.id,
+                    "name": unit.caption,
+                    "caption": unit.caption,
+                    "type": unit.type,
+                    "code": unit.code,
+                    **link,
+                }
+            )
+
+    def _create_staircase_option(self, staircase, **link):
+        """Create a staircase option from a ``payloads.Staircase``."""
+        return self.env["maintenance.staircase.option"].create(
+            {
+                "user_id": self.env.user.id,
+                "staircase_id": staircase.id,
+                "name": staircase.name,
+                "code": staircase.code,
+                "floor_plan": staircase.floor_plan,
+                "accessible_by_elevator": staircase.accessible_by_elevator,
+                **link,
+            }
+        )
+
     def _select_active_lease_option(self, lease_records):
         return select_active_lease(lease_records)
 
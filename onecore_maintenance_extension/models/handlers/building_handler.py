@@ -1,4 +1,5 @@
 import logging
+from ....onecore_api import payloads, tracing
 from .base_handler import BaseMaintenanceHandler
 
 _logger = logging.getLogger(__name__)
@@ -21,7 +22,8 @@ class BuildingHandler(BaseMaintenanceHandler):
                 _logger.info("No data found in response.")
                 return self._return_no_results_warning(search_value)
 
-            self.update_form_options(building)
+            with tracing.span("handler.options"):
+                self.update_form_options(building)
             self._set_form_selections()
 
         elif search_type in ["pnr", "contactCode", "leaseId", "rentalObjectId"]:
@@ -34,7 +36,8 @@ class BuildingHandler(BaseMaintenanceHandler):
                 _logger.info("No data found in response.")
                 return self._return_no_results_warning(search_value)
 
-            self.update_form_options_from_lease_data(work_order_data)
+            with tracing.span("handler.options"):
+                self.update_form_options_from_lease_data(work_order_data)
             self._set_form_selections()
         else:
             raise ValueError(
@@ -43,93 +46,45 @@ class BuildingHandler(BaseMaintenanceHandler):
 
     def update_form_options(self, building):
         """Update form options with building data from direct building lookup."""
-        maintenance_units = building.get("maintenance_units", [])
-        staircases = building.get("staircases", [])
+        building = payloads.Building.decode(building)
 
         building_option = self.env["maintenance.building.option"].create(
             {
                 "user_id": self.env.user.id,
-                "name": building["name"],
-                "code": building["code"],
-                "building_type_name": building.get("buildingType", {}).get("name"),
-                "construction_year": (
-                    str(building.get("construction", {}).get("constructionYear"))
-                    if building.get("construction", {}).get("constructionYear")
-                    else None
-                ),
-                "renovation_year": (
-                    str(building.get("construction", {}).get("renovationYear"))
-                    if building.get("construction", {}).get("renovationYear")
-                    else None
-                ),
+                "name": building.name,
+                "code": building.code,
+                "building_type_name": building.type_name,
+                "construction_year": building.construction_year,
+                "renovation_year": building.renovation_year,
             }
         )
 
-        for maintenance_unit in maintenance_units:
-            self.env["maintenance.maintenance.unit.option"].create(
-                {
-                    "user_id": self.env.user.id,
-                    "id": maintenance_unit["id"],
-                    "name": maintenance_unit["caption"],
-                    "caption": maintenance_unit["caption"],
-                    "type": maintenance_unit["type"],
-                    "code": maintenance_unit["code"],
-                    "building_option_id": building_option.id,
-                }
-            )
+        self._create_maintenance_unit_options(
+            building.maintenance_units, building_option_id=building_option.id
+        )
 
-        for staircase in staircases:
-            self.env["maintenance.staircase.option"].create(
-                {
-                    "user_id": self.env.user.id,
-                    "staircase_id": staircase["id"],
-                    "name": staircase["name"],
-                    "code": staircase["code"],
-                    "floor_plan": staircase.get("features", {}).get("floorPlan"),
-                    "accessible_by_elevator": staircase.get("features", {}).get(
-                        "accessibleByElevator", False
-                    ),
-                    "building_option_id": building_option.id,
-                }
+        for staircase in building.staircases:
+            self._create_staircase_option(
+                staircase, building_option_id=building_option.id
             )
 
     def update_form_options_from_lease_data(self, work_order_data):
         """Update form options with rental property data."""
         for item in work_order_data:
-            property_data = item["rental_property"]
-            lease = item["lease"]
-            maintenance_units = item.get("maintenance_units", [])
-            staircase = property_data.get("staircase")
-
-            rental_property_option = self.env[
-                "maintenance.rental.property.option"
-            ].create(
-                {
-                    "user_id": self.env.user.id,
-                    "name": property_data["rentalInformation"].get("rentalId"),
-                    "address": property_data["name"],
-                    "code": property_data["code"],
-                    "property_type": property_data["type"].get("name"),
-                    "area": property_data["areaSize"],
-                    "entrance": property_data["entrance"],
-                    "has_elevator": (
-                        "Ja"
-                        if property_data["accessibility"].get("elevator")
-                        else "Nej"
-                    ),
-                    "estate_code": property_data["property"].get("code"),
-                    "estate": property_data["property"].get("name"),
-                    "building_code": property_data["building"].get("code"),
-                    "building": property_data["building"].get("name"),
-                }
+            residence = payloads.Residence.decode(item["rental_property"])
+            lease = payloads.Lease.decode(item["lease"])
+            maintenance_units = payloads.MaintenanceUnit.decode_many(
+                item.get("maintenance_units")
             )
 
+            rental_property_option = self._create_rental_property_option(residence)
+
             # Add building option based on rental property building info
             self.env["maintenance.building.option"].create(
                 {
                     "user_id": self.env.user.id,
-                    "name": property_data["building"].get("name"),
-                    "code": property_data["building"].get("code"),
+                    "name": residence.building,
+                    "code": residence.building_code,
                 }
             )
 
@@ -137,35 +92,17 @@ class BuildingHandler(BaseMaintenanceHandler):
                 lease, rental_property_option_id=rental_property_option.id
             )
 
-            self._create_tenant_options(lease["tenants"])
-
-            for maintenance_unit in maintenance_units:
-                self.env["maintenance.maintenance.unit.option"].create(
-                    {
-                        "user_id": self.env.user.id,
-                        "id": maintenance_unit["id"],
-                        "name": maintenance_unit["caption"],
-                        "caption": maintenance_unit["caption"],
-                        "type": maintenance_unit["type"],
-                        "code": maintenance_unit["code"],
-                        "rental_property_option_id": rental_property_option.id,
-                    }
-                )
+            self._create_tenant_options(lease.tenants)
+
+            self._create_maintenance_unit_options(
+                maintenance_units, rental_property_option_id=rental_property_option.id
+            )
 
             # Create staircase option if staircase data is available
-            if staircase:
-                self.env["maintenance.staircase.option"].create(
-                    {
-                        "user_id": self.env.user.id,
-                        "staircase_id": staircase["id"],
-                        "name": staircase["name"],
-                        "code": staircase["code"],
-                        "floor_plan": staircase.get("features", {}).get("floorPlan"),
-                        "accessible_by_elevator": staircase.get("features", {}).get(
-                            "accessibleByElevator", False
-                        ),
-                        "rental_property_option_id": rental_property_option.id,
-                    }
+            if residence.staircase:
+                self._create_staircase_option(
+                    residence.staircase,
+                    rental_property_option_id=rental_property_option.id,
                 )
 
     def _set_form_selections(self):
@@ -1,3 +1,4 @@
+from ....onecore_api import payloads
 from .rental_object_base_handler import RentalObjectBaseHandler
 
 
@@ -8,7 +9,7 @@ class FacilityHandler(RentalObjectBaseHandler):
         """Update form options with facility data."""
         for item in work_order_data:
             facility = item.get("facility")
-            lease = item["lease"]
+            lease = payloads.Lease.decode(item["lease"]) if item["lease"] else None
 
             if not facility:
                 continue
@@ -34,7 +35,7 @@ class FacilityHandler(RentalObjectBaseHandler):
             # Only create lease and tenant options if lease data exists
             if lease:
                 lease_option = self._create_lease_option(lease, facility_option_id=facility_option.id)
-                self._create_tenant_options(lease["tenants"], lease_option_id=lease_option.id)
+                self._create_tenant_options(lease.tenants, lease_option_id=lease_option.id)
             else:
                 self._clear_lease_and_tenant_options()
 
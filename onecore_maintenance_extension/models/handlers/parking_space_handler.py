@@ -1,3 +1,4 @@
+from ....onecore_api import payloads
 from .rental_object_base_handler import RentalObjectBaseHandler
 
 
@@ -8,7 +9,7 @@ class ParkingSpaceHandler(RentalObjectBaseHandler):
         """Update form options with parking space data."""
         for item in work_order_data:
             parking_space = item.get("parking_space")
-            lease = item["lease"]
+            lease = payloads.Lease.decode(item["lease"]) if item["lease"] else None
 
             parking_space_info = (
                 parking_space.get("parkingSpace", {}) if parking_space else {}
@@ -40,7 +41,7 @@ class ParkingSpaceHandler(RentalObjectBaseHandler):
                 lease_option = self._create_lease_option(
                     lease, parking_space_option_id=parking_space_option.id
                 )
-                self._create_tenant_options(lease["tenants"], lease_option_id=lease_option.id)
+                self._create_tenant_options(lease.tenants, lease_option_id=lease_option.id)
             else:
                 self._clear_lease_and_tenant_options()
 
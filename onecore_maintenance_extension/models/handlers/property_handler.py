@@ -1,4 +1,5 @@
 import logging
+from ....onecore_api import payloads, tracing
 from .base_handler import BaseMaintenanceHandler
 
 _logger = logging.getLogger(__name__)
@@ -22,7 +23,8 @@ class PropertyHandler(BaseMaintenanceHandler):
                 _logger.info("No data found in response.")
                 return self._return_no_results_warning(search_value)
 
-            self.update_form_options(properties)
+            with tracing.span("handler.options"):
+                self.update_form_options(properties)
             self._set_form_selections()
 
         elif search_type in ["pnr", "contactCode", "leaseId", "rentalObjectId"]:
@@ -34,7 +36,8 @@ class PropertyHandler(BaseMaintenanceHandler):
                 _logger.info("No data found in response.")
                 return self._return_no_results_warning(search_value)
 
-            self.update_form_options_from_lease_data(work_order_data)
+            with tracing.span("handler.options"):
+                self.update_form_options_from_lease_data(work_order_data)
             self._set_form_selections()
         else:
             raise ValueError(
@@ -45,8 +48,10 @@ class PropertyHandler(BaseMaintenanceHandler):
         """Update form options with property data."""
         for item in properties:
             property_data = item["property"]
-            buildings = item.get("buildings", [])
-            maintenance_units = item.get("maintenance_units", [])
+            buildings = payloads.Building.decode_many(item.get("buildings"))
+            maintenance_units = payloads.MaintenanceUnit.decode_many(
+                item.get("maintenance_units")
+            )
 
             property_option = self.env["maintenance.property.option"].create(
                 {
@@ -60,96 +65,47 @@ class PropertyHandler(BaseMaintenanceHandler):
                 self.env["maintenance.building.option"].create(
                     {
                         "user_id": self.env.user.id,
-                        "name": building.get("name", ""),
-                        "code": building.get("code", ""),
-                        "building_type_name": building.get("buildingType", {}).get(
-                            "name"
-                        ),
-                        "construction_year": (
-                            str(
-                                building.get("construction", {}).get("constructionYear")
-                            )
-                            if building.get("construction", {}).get("constructionYear")
-                            else None
-                        ),
-                        "renovation_year": (
-                            str(building.get("construction", {}).get("renovationYear"))
-                            if building.get("construction", {}).get("renovationYear")
-                            else None
-                        ),
+                        "name": building.name,
+                        "code": building.code,
+                        "building_type_name": building.type_name,
+                        "construction_year": building.construction_year,
+                        "renovation_year": building.renovation_year,
                         "property_option_id": property_option.id,
                     }
                 )
 
-            for maintenance_unit in maintenance_units:
-                self.env["maintenance.maintenance.unit.option"].create(
-                    {
-                        "user_id": self.env.user.id,
-                        "id": maintenance_unit["id"],
-                        "name": maintenance_unit["caption"],
-                        "caption": maintenance_unit["caption"],
-                        "type": maintenance_unit["type"],
-                        "code": maintenance_unit["code"],
-                        "property_option_id": property_option.id,
-                    }
-                )
+            self._create_maintenance_unit_options(
+                maintenance_units, property_option_id=property_option.id
+            )
 
     def update_form_options_from_lease_data(self, work_order_data):
         """Update form options with rental property data."""
         for item in work_order_data:
-            property_data = item["rental_property"]
-            lease = item["lease"]
-            maintenance_units = item.get("maintenance_units", [])
+            residence = payloads.Residence.decode(item["rental_property"])
+            lease = payloads.Lease.decode(item["lease"])
+            maintenance_units = payloads.MaintenanceUnit.decode_many(
+                item.get("maintenance_units")
+            )
 
             self.env["maintenance.property.option"].create(
                 {
                     "user_id": self.env.user.id,
-                    "designation": property_data["property"].get("name"),
-                    "code": property_data["property"].get("code"),
+                    "designation": residence.estate,
+                    "code": residence.estate_code,
                 }
             )
 
-            rental_property_option = self.env[
-                "maintenance.rental.property.option"
-            ].create(
-                {
-                    "user_id": self.env.user.id,
-                    "name": property_data["rentalInformation"].get("rentalId"),
-                    "address": property_data["name"],
-                    "code": property_data["code"],
-                    "property_type": property_data["type"].get("name"),
-                    "area": property_data["areaSize"],
-                    "entrance": property_data["entrance"],
-                    "has_elevator": (
-                        "Ja"
-                        if property_data["accessibility"].get("elevator")
-                        else "Nej"
-                    ),
-                    "estate_code": property_data["property"].get("code"),
-                    "estate": property_data["property"].get("name"),
-                    "building_code": property_data["building"].get("code"),
-                    "building": property_data["building"].get("name"),
-                }
-            )
+            rental_property_option = self._create_rental_property_option(residence)
 
             self._create_lease_option(
                 lease, rental_property_option_id=rental_property_option.id
             )
 
-            self._create_tenant_options(lease["tenants"])
+            self._create_tenant_options(lease.tenants)
 
-            for maintenance_unit in maintenance_units:
-                self.env["maintenance.maintenance.unit.option"].create(
-                    {
-                        "user_id": self.env.user.id,
-                        "id": maintenance_unit["id"],
-                        "name": maintenance_unit["caption"],
-                        "caption": maintenance_unit["caption"],
-                        "type": maintenance_unit["type"],
-                        "code": maintenance_unit["code"],
-                        "rental_property_option_id": rental_property_option.id,
-                    }
-                )
+            self._create_maintenance_unit_options(
+                maintenance_units, rental_property_option_id=rental_property_option.id
+            )
 
     def _set_form_selections(self):
         """Set the form field selections after creating options."""
@@ -1,4 +1,5 @@
 import logging
+from ....onecore_api import tracing
 from .base_handler import BaseMaintenanceHandler
 
 _logger = logging.getLogger(__name__)
@@ -17,7 +18,8 @@ class RentalObjectBaseHandler(BaseMaintenanceHandler):
                 _logger.info("No data found in response.")
                 return self._return_no_results_warning(search_value)
 
-            self.update_form_options(work_order_data)
+            with tracing.span("handler.options"):
+                self.update_form_options(work_order_data)
             self._set_form_selections(search_type, search_value)
         else:
             raise ValueError(
@@ -1,3 +1,4 @@
+from ....onecore_api import payloads
 from .rental_object_base_handler import RentalObjectBaseHandler
 from ..constants import BUILDING_SPACE_TYPES
 
@@ -8,64 +9,35 @@ class RentalPropertyHandler(RentalObjectBaseHandler):
     def update_form_options(self, work_order_data):
         """Update form options with rental property data."""
         for item in work_order_data:
-            property_data = item["rental_property"]
-            lease = item["lease"]
-            maintenance_units = item.get("maintenance_units", [])
+            residence = payloads.Residence.decode(item["rental_property"])
+            lease = payloads.Lease.decode(item["lease"]) if item["lease"] else None
+            maintenance_units = payloads.MaintenanceUnit.decode_many(
+                item.get("maintenance_units")
+            )
 
             # Reuse existing rental property option if one already exists for this property
-            property_code = property_data["code"]
             rental_property_option = self.env[
                 "maintenance.rental.property.option"
             ].search(
-                [("user_id", "=", self.env.user.id), ("code", "=", property_code)],
+                [("user_id", "=", self.env.user.id), ("code", "=", residence.code)],
                 limit=1,
             )
 
             if not rental_property_option:
-                rental_property_option = self.env[
-                    "maintenance.rental.property.option"
-                ].create(
-                    {
-                        "user_id": self.env.user.id,
-                        "name": property_data["rentalInformation"].get("rentalId"),
-                        "address": property_data["name"],
-                        "code": property_code,
-                        "property_type": property_data["type"].get("name"),
-                        "area": property_data["areaSize"],
-                        "entrance": property_data["entrance"],
-                        "has_elevator": (
-                            "Ja"
-                            if property_data["accessibility"].get("elevator")
-                            else "Nej"
-                        ),
-                        "estate_code": property_data["property"].get("code"),
-                        "estate": property_data["property"].get("name"),
-                        "building_code": property_data["building"].get("code"),
-                        "building": property_data["building"].get("name"),
-                    }
-                )
+                rental_property_option = self._create_rental_property_option(residence)
 
             # Only create lease and tenant options if lease data exists
             if lease:
                 lease_option = self._create_lease_option(
                     lease, rental_property_option_id=rental_property_option.id
                 )
-                self._create_tenant_options(lease["tenants"], lease_option_id=lease_option.id)
+                self._create_tenant_options(lease.tenants, lease_option_id=lease_option.id)
             else:
                 self._clear_lease_and_tenant_options()
 
-            for maintenance_unit in maintenance_units:
-                self.env["maintenance.maintenance.unit.option"].create(
-                    {
-                        "user_id": self.env.user.id,
-                        "id": maintenance_unit["id"],
-                        "name": maintenance_unit["caption"],
-                        "caption": maintenance_unit["caption"],
-                        "type": maintenance_unit["type"],
-                        "code": maintenance_unit["code"],
-                        "rental_property_option_id": rental_property_option.id,
-                    }
-                )
+            self._create_maintenance_unit_options(
+                maintenance_units, rental_property_option_id=rental_property_option.id
+            )
 
     def _set_form_selections(self, search_type=None, search_value=None):
         """Set the form field selections after creating options."""
@@ -2,12 +2,11 @@ import urllib.parse
 import uuid
 import logging
 import json
-import time
 
 from markupsafe import Markup
 from odoo import api, fields, models, _
 
-from ...onecore_api import core_api
+from ...onecore_api import core_api, deadlines, tracing
 from .handlers import HandlerFactory, BaseMaintenanceHandler
 from .utils import validators
 from .services import (
@@ -39,11 +38,6 @@ from .mixins import (
 
 _logger = logging.getLogger(__name__)
 
-# Per-worker cache so the pest control badge doesn't trigger a OneCore call on
-# every form read (web_save re-reads included). Worst-case staleness = TTL.
-PEST_CONTROL_CACHE_TTL = 300  # seconds
-_pest_control_cache = {}  # rental_id -> (expires_at_monotonic, bool)
-
 
 class OneCoreMaintenanceRequest(
     SearchFieldsMixin,
@@ -281,42 +275,44 @@ class OneCoreMaintenanceRequest(
     @api.depends("rental_property_id", "rental_property_option_id")
     def _compute_requires_pest_control(self):
         api = None
-        for record in self:
-            rental_id = None
-            if record.rental_property_id:
-                rental_id = record.rental_property_id.rental_property_id
-            elif record.rental_property_option_id:
-                rental_id = record.rental_property_option_id.name
-
-            if not rental_id:
-                record.requires_pest_control = False
-                continue
-
-            cached = _pest_control_cache.get(rental_id)
-            if cached and time.monotonic() < cached[0]:
-                record.requires_pest_control = cached[1]
-                continue
-
-            try:
-                if api is None:
-                    api = record.get_core_api()
-                data = api.fetch_residence(rental_id, timeout=5)
-                blocks = (data or {}).get("propertyObject", {}).get("rentalBlocks") or []
-                value = any(
-                    (b or {}).get("blockReason") == "SKADEDJUR" for b in blocks
-                )
-                _pest_control_cache[rental_id] = (
-                    time.monotonic() + PEST_CONTROL_CACHE_TTL,
-                    value,
-                )
-                record.requires_pest_control = value
-            except Exception as err:
-                _logger.warning(
-                    "Could not fetch pest control status for rental_id %s: %s",
-                    rental_id,
-                    err,
-                )
-                record.requires_pest_control = False
+        # One budget for the whole recordset, so a slow OneCore can't hold
+        # up a form read by 5 s per record.
+        with deadlines.budget("form"):
+            for record in self:
+                rental_id = None
+                if record.rental_property_id:
+                    rental_id = record.rental_property_id.rental_property_id
+                elif record.rental_property_option_id:
+                    rental_id = record.rental_property_option_id.name
+
+                if not rental_id:
+                    record.requires_pest_control = False
+                    continue
+
+                # Residences are cached stale-while-revalidate by CoreApi, so
+                # after the first read this never waits on OneCore: an expired
+                # entry is returned at once and refreshed in the background.
+                try:
+                    if api is None:
+                        api = record.get_core_api()
+                    data = api.fetch_residence(rental_id, timeout=5)
+                    blocks = (data or {}).get("propertyObject", {}).get("rentalBlocks") or []
+                    value = any(
+                        (b or {}).get("blockReason") == "SKADEDJUR" for b in blocks
+                    )
+                    record.requires_pest_control = value
+                except (core_api.CircuitOpenError, core_api.DeadlineExceeded) as err:
+                    # OneCore is known to be failing or out of time: don't wait,
+                    # don't warn per record.
+                    _logger.debug("Pest control status unavailable: %s", err)
+                    record.requires_pest_control = False
+                except Exception as err:
+                    _logger.warning(
+                        "Could not fetch pest control status for rental_id %s: %s",
+                        rental_id,
+                        err,
+                    )
+                    record.requires_pest_control = False
 
     @api.depends(
         "message_ids.notification_ids.is_read",
@@ -645,6 +641,7 @@ class OneCoreMaintenanceRequest(
     # ============================================================================
 
     @api.onchange("search_value", "search_type", "space_caption")
+    @tracing.traced("maintenance.search")
     def _compute_search(self):
         if not self.space_caption:
             return
@@ -673,7 +670,8 @@ class OneCoreMaintenanceRequest(
 
         # Only delete old options when we're about to perform a valid search.
         base_handler = BaseMaintenanceHandler(self, self.get_core_api())
-        base_handler._delete_options()
+        with tracing.span("options.delete"):
+            base_handler._delete_options()
 
         # Restore search values after deletion.
         self.search_value = saved_search_value
@@ -691,13 +689,39 @@ class OneCoreMaintenanceRequest(
         if not handler:
             return
 
-        for record in self:
-            result = handler.handle_search(
-                record.search_type, record.search_value, record.space_caption
+        # The search value itself is personal data; it stays out of the trace.
+        tracing.annotate(
+            search_type=self.search_type,
+            space_caption=self.space_caption,
+            handler=type(handler).__name__,
+        )
+        try:
+            # Every OneCore call of the search shares one time budget; the
+            # handlers show what was found in time.
+            with deadlines.budget("search"):
+                for record in self:
+                    with tracing.span("handler.search"):
+                        result = handler.handle_search(
+                            record.search_type,
+                            record.search_value,
+                            record.space_caption,
+                        )
+                    # If handler returns a warning, propagate it to the UI
+                    if result and isinstance(result, dict) and result.get("warning"):
+                        return result
+        except core_api.DeadlineExceeded:
+            # Like the trace, the log leaves the (personal) search value out.
+            _logger.warning(
+                "OneCore search by %s ran out of time (correlation id %s)",
+                self.search_type,
+                tracing.correlation_id(),
             )
-            # If handler returns a warning, propagate it to the UI
-            if result and isinstance(result, dict) and result.get("warning"):
-                return result
+            return {
+                "warning": {
+                    "title": "OneCore svarar långsamt",
+                    "message": "Sökningen tog för lång tid. Försök igen om en stund.",
+                }
+            }
 
         # After search, check if a specific maintenance unit was requested via URL context.
         # Check both direct context (Odoo 19 client action path) and params.context
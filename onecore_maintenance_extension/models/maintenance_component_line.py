@@ -41,8 +41,8 @@ class MaintenanceComponentLine(models.TransientModel):
     )
 
     # New image upload fields (for adding images during update)
-    new_image_1 = fields.Binary(string="Ny bild 1", attachment=False)
-    new_image_2 = fields.Binary(string="Ny bild 2", attachment=False)
+    new_image_1 = fields.Binary(string="Ny bild 1", attachment=True)
+    new_image_2 = fields.Binary(string="Ny bild 2", attachment=True)
 
     # AI-extracted component data (maps to API response)
     typ = fields.Char(string="Typ")  
@@ -237,16 +237,19 @@ class MaintenanceComponentLine(models.TransientModel):
         Returns:
             bool: True if images were uploaded, False otherwise
         """
+        service = ComponentOneCoreService(self.env)
         images = []
-        if self.new_image_1:
-            images.append((self.new_image_1, "Ny bild 1"))
-        if self.new_image_2:
-            images.append((self.new_image_2, "Ny bild 2"))
+        for field_name, caption in (
+            ('new_image_1', "Ny bild 1"),
+            ('new_image_2', "Ny bild 2"),
+        ):
+            image = service.field_image(self, field_name)
+            if image:
+                images.append((image, caption))
 
         if not images:
             return False
 
-        service = ComponentOneCoreService(self.env)
         _logger.info(f"Uploading {len(images)} new image(s) to component {self.onecore_component_id}")
 
         result = service.upload_component_images(self.onecore_component_id, images)
@@ -1,11 +1,11 @@
 # -*- coding: utf-8 -*-
 """Wizard for creating and managing maintenance components."""
 
-import json
 import logging
 
 from odoo import models, fields, api, exceptions
 
+from ...onecore_api import json_codec
 from .services.component_hierarchy_service import ComponentHierarchyService
 from .services.component_onecore_service import ComponentOneCoreService
 from .services.component_ai_analysis_service import ComponentAIAnalysisService
@@ -39,16 +39,17 @@ class MaintenanceComponentWizard(models.TransientModel):
     ], default='upload', string="Formulärstatus")
 
     # ==================== Image Upload ====================
-    temp_image = fields.Binary(string="Bild", attachment=False)
-    temp_additional_image = fields.Binary(string="Ytterligare bild", attachment=False)
+    # Kept as attachments so uploads to OneCore stream them from the filestore.
+    temp_image = fields.Binary(string="Bild", attachment=True)
+    temp_additional_image = fields.Binary(string="Ytterligare bild", attachment=True)
     has_image = fields.Boolean(
         string="Has Image",
         compute="_compute_has_image",
         store=False,
     )
     # Extra image fields for adding more images in review state
-    form_extra_image_1 = fields.Binary(string="Extra bild 1", attachment=False)
-    form_extra_image_2 = fields.Binary(string="Extra bild 2", attachment=False)
+    form_extra_image_1 = fields.Binary(string="Extra bild 1", attachment=True)
+    form_extra_image_2 = fields.Binary(string="Extra bild 2", attachment=True)
 
     # ==================== Component Form Fields ====================
     form_type = fields.Char(string="Typ")
@@ -146,7 +147,7 @@ class MaintenanceComponentWizard(models.TransientModel):
 
         service = ComponentHierarchyService(self.env)
         types = service.load_types_for_category(self.form_category_id)
-        self.available_types_json = json.dumps(types)
+        self.available_types_json = json_codec.dumps(types)
 
     @api.onchange('form_type_id', 'form_type')
     def _onchange_form_type_id(self):
@@ -160,7 +161,7 @@ class MaintenanceComponentWizard(models.TransientModel):
 
         service = ComponentHierarchyService(self.env)
         subtypes = service.load_subtypes_for_type(self.form_type_id)
-        self.available_subtypes_json = json.dumps(subtypes)
+        self.available_subtypes_json = json_codec.dumps(subtypes)
 
 
     @api.onchange('form_subtype_id')
@@ -378,14 +379,15 @@ class MaintenanceComponentWizard(models.TransientModel):
         # Collect all images with their captions
         images = []
 
-        if self.temp_image:
-            images.append((self.temp_image, "Huvudbild"))
-        if self.temp_additional_image:
-            images.append((self.temp_additional_image, "Ytterligare bild"))
-        if self.form_extra_image_1:
-            images.append((self.form_extra_image_1, "Extra bild 1"))
-        if self.form_extra_image_2:
-            images.append((self.form_extra_image_2, "Extra bild 2"))
+        for field_name, caption in (
+            ('temp_image', "Huvudbild"),
+            ('temp_additional_image', "Ytterligare bild"),
+            ('form_extra_image_1', "Extra bild 1"),
+            ('form_extra_image_2', "Extra bild 2"),
+        ):
+            image = service.field_image(self, field_name)
+            if image:
+                images.append((image, caption))
 
         if not images:
             _logger.info("No images to upload for component")
@@ -0,0 +1,28 @@
+import logging
+
+from odoo import api, models
+
+from ...onecore_api import shared_cache
+
+_logger = logging.getLogger(__name__)
+
+
+class OneCoreApiCache(models.AbstractModel):
+    """Housekeeping for the shared OneCore response cache table.
+
+    The table itself is plain SQL (UNLOGGED, see ``onecore_api.shared_cache``)
+    and is read/written by ``CoreApi`` through its own cursors; this model
+    only creates it on install/update and sweeps expired rows from a cron.
+    """
+
+    _name = "onecore.api.cache"
+    _description = "OneCore API shared response cache"
+
+    def init(self):
+        shared_cache.PostgresCacheBackend.ensure_table(self.env.cr)
+
+    @api.model
+    def _gc_expired_entries(self):
+        removed = shared_cache.PostgresCacheBackend.delete_expired(self.env.cr)
+        _logger.info("Removed %s expired OneCore cache entries", removed)
+        return removed
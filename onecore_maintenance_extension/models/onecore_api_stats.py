@@ -0,0 +1,89 @@
+import logging
+
+from odoo import api, fields, models, tools
+
+from ...onecore_api import metrics
+
+_logger = logging.getLogger(__name__)
+
+# Rows of workers that have published nothing for this long are removed.
+STALE_WORKER_SECONDS = 24 * 60 * 60
+
+
+class OneCoreApiStats(models.Model):
+    """OneCore calls per endpoint, added up over every worker.
+
+    A read-only SQL view over the UNLOGGED ``onecore_api_metrics`` table, to
+    which each worker publishes its counters (``onecore_api.metrics``) when
+    it serves ``/onecore/metrics`` or runs the cleanup cron, never while
+    calling OneCore. Counters are totals since each worker started; the
+    ``/onecore/metrics`` route serves the same data, with latency
+    histograms, to Prometheus.
+    """
+
+    _name = "onecore.api.stats"
+    _description = "OneCore API statistics"
+    _auto = False
+    _order = "errors desc, requests desc"
+
+    method = fields.Char("Metod", readonly=True)
+    endpoint = fields.Char("Endpoint", readonly=True)
+    workers = fields.Integer("Arbetsprocesser", readonly=True)
+    requests = fields.Integer("Anrop", readonly=True)
+    errors = fields.Integer("Fel", readonly=True)
+    timeouts = fields.Integer("Timeouts", readonly=True)
+    retries = fields.Integer("Omförsök", readonly=True)
+    error_rate = fields.Float("Felandel (%)", readonly=True, digits=(16, 1))
+    avg_ms = fields.Float("Snittid (ms)", readonly=True, digits=(16, 1))
+    bytes_in = fields.Float("Mottagna byte", readonly=True, digits=(16, 0))
+    bytes_out = fields.Float("Skickade byte", readonly=True, digits=(16, 0))
+    cache_hits = fields.Integer("Cacheträffar", readonly=True)
+    cache_misses = fields.Integer("Cachemissar", readonly=True)
+    last_update = fields.Datetime("Senast uppdaterad", readonly=True)
+
+    def init(self):
+        metrics.PostgresMetricsStore.ensure_table(self.env.cr)
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(
+            f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT
+                    row_number() OVER (ORDER BY method, endpoint) AS id,
+                    method,
+                    endpoint,
+                    count(*) AS workers,
+                    sum(requests) AS requests,
+                    sum(errors) AS errors,
+                    sum(timeouts) AS timeouts,
+                    sum(retries) AS retries,
+                    100.0 * sum(errors) / NULLIF(sum(requests), 0) AS error_rate,
+                    1000.0 * sum(duration_sum) / NULLIF(sum(requests), 0) AS avg_ms,
+                    sum(bytes_in) AS bytes_in,
+                    sum(bytes_out) AS bytes_out,
+                    sum(cache_hits) AS cache_hits,
+                    sum(cache_misses) AS cache_misses,
+                    max(updated_at) AS last_update
+                FROM {metrics.TABLE}
+                GROUP BY method, endpoint
+            )
+            """
+        )
+
+    @api.model
+    def _prometheus_text(self):
+        """Every worker's counters in the Prometheus text format."""
+        # This worker's counters would otherwise be up to one interval old.
+        metrics.maybe_publish(self.env.cr.dbname, force=True)
+        snapshots = metrics.PostgresMetricsStore.read(self.env.cr)
+        return metrics.render(metrics.merge(snapshots))
+
+    @api.model
+    def _gc_stale_workers(self):
+        removed = metrics.PostgresMetricsStore.delete_stale(
+            self.env.cr, STALE_WORKER_SECONDS
+        )
+        _logger.info("Removed %s OneCore metrics rows of stopped workers", removed)
+        # The cron's worker publishes here (at most every
+        # onecore_metrics_publish_seconds); the others when they are scraped.
+        metrics.maybe_publish(self.env.cr.dbname)
+        return removed
@@ -1,9 +1,8 @@
 """Service for component category/type/subtype hierarchy management."""
 
-import json
 import logging
 
-from ....onecore_api import core_api
+from ....onecore_api import core_api, json_codec
 
 _logger = logging.getLogger(__name__)
 
@@ -48,8 +47,7 @@ class ComponentHierarchyService:
             return []
 
         try:
-            types = self.api.fetch_component_types(category_id)
-            return types or []
+            return list(self.api.iter_component_types(category_id))
         except Exception as e:
             _logger.warning(f"Failed to fetch component types: {e}")
             return []
@@ -67,8 +65,7 @@ class ComponentHierarchyService:
             return []
 
         try:
-            subtypes = self.api.fetch_component_subtypes(type_id)
-            return subtypes or []
+            return list(self.api.iter_component_subtypes(type_id))
         except Exception as e:
             _logger.warning(f"Failed to fetch component subtypes: {e}")
             return []
@@ -93,7 +90,7 @@ class ComponentHierarchyService:
         if not subtype_id:
             return default_data
 
-        subtypes = json.loads(available_subtypes_json or '[]')
+        subtypes = json_codec.loads(available_subtypes_json or '[]')
         subtype = next(
             (s for s in subtypes if str(s.get('id')) == str(subtype_id)),
             None
@@ -199,7 +196,7 @@ class ComponentHierarchyService:
 
             # Load types for matched category
             types = self.load_types_for_category(result['category_id'])
-            result['available_types_json'] = json.dumps(types)
+            result['available_types_json'] = json_codec.dumps(types)
 
             if types and type_name:
                 matched_type = next(
@@ -211,7 +208,7 @@ class ComponentHierarchyService:
 
                     # Load subtypes for matched type
                     subtypes = self.load_subtypes_for_type(result['type_id'])
-                    result['available_subtypes_json'] = json.dumps(subtypes)
+                    result['available_subtypes_json'] = json_codec.dumps(subtypes)
 
                     if subtypes and subtype_name:
                         matched_subtype = next(
@@ -1,13 +1,17 @@
 """Service for OneCore component CRUD operations."""
 
-import json
+import contextlib
 import logging
+import os
 import urllib.parse
 from datetime import datetime
 
-from odoo import fields
+from werkzeug.security import safe_join
 
-from ....onecore_api import core_api
+from odoo import fields, models
+from odoo.tools import config
+
+from ....onecore_api import core_api, deadlines, json_codec, json_stream, payloads
 
 _logger = logging.getLogger(__name__)
 
@@ -16,6 +20,55 @@ APARTMENT_SPACE_CAPTION = 'Lägenhet'
 # Space type for property objects (rooms)
 PROPERTY_OBJECT_SPACE_TYPE = 'PropertyObject'
 
+# The fields of a room's components that payloads.Component reads;
+# everything else is dropped while the response is decoded.
+COMPONENT_FIELDS = {
+    'id': True,
+    'serialNumber': True,
+    'warrantyMonths': True,
+    'specifications': True,
+    'ncsCode': True,
+    'additionalInformation': True,
+    'condition': True,
+    'priceAtPurchase': True,
+    'depreciationPriceAtPurchase': True,
+    'economicLifespan': True,
+    'componentInstallations': {
+        'id': True,
+        'installationDate': True,
+        'deinstallationDate': True,
+    },
+    'model': {
+        'id': True,
+        'modelName': True,
+        'manufacturer': True,
+        'subtype': {
+            'subTypeName': True,
+            'technicalLifespan': True,
+            'replacementIntervalMonths': True,
+            'componentType': {
+                'typeName': True,
+                'category': {'categoryName': True},
+            },
+        },
+    },
+}
+
+
+def _is_installed(comp):
+    """False for components whose latest installation has ended."""
+    installations = comp.get('componentInstallations') if isinstance(comp, dict) else None
+    return not (installations and installations[0].get('deinstallationDate'))
+
+
+# Room components are decoded item by item, keeping only installed ones and
+# the fields in COMPONENT_FIELDS; passed to parallel_get_json per room path.
+ROOM_COMPONENTS = json_stream.StreamedList(
+    keep=_is_installed,
+    project=json_stream.pick(COMPONENT_FIELDS),
+    name='room_components',
+)
+
 
 class ComponentOneCoreService:
     """Service for handling OneCore component CRUD operations."""
@@ -126,110 +179,118 @@ class ComponentOneCoreService:
             return '[]', '[]', []
 
         try:
-            # Fetch rooms first (serial): primes/refreshes the auth token so
-            # the parallel wave below runs with a valid token.
-            rooms = self.api.fetch_rooms(rental_property_id)
-            if not rooms:
-                return '[]', '[]', []
-
-            # Build rooms JSON
-            rooms_json = json.dumps([
-                {'id': r.get('propertyObjectId'), 'name': r.get('name', 'Okänt rum')}
-                for r in rooms
-            ])
-
-            # Fan out concurrently: component categories + components for every
-            # room in a single parallel wave (was a serial call per room, which
-            # dominated the wizard's load time).
-            categories_path = "/component-categories"
-            room_paths = [
-                "/components/by-room/%s"
-                % urllib.parse.quote(str(room.get('propertyObjectId')), safe='')
-                for room in rooms
-            ]
-            results = self.api.parallel_get_json([categories_path] + room_paths)
-
-            categories = results[0]
-            categories_json = json.dumps(categories) if categories else '[]'
-
-            # Transform components (main thread — pure dict work, no HTTP/ORM).
-            # Image URLs are intentionally NOT loaded here; the wizard loads a
-            # component's images lazily when its detail is opened.
-            component_data_list = []
-            for room, room_components in zip(rooms, results[1:]):
-                room_name = room.get('name', 'Okänt rum')
-                room_id = room.get('propertyObjectId')
-                for comp in room_components or []:
-                    comp_data = self._transform_component_data(comp, room_name, room_id)
-                    if comp_data:
-                        component_data_list.append(comp_data)
-
-            return rooms_json, categories_json, component_data_list
-
+            # Rooms, categories and components share one time budget; rooms
+            # whose components didn't arrive in time are shown empty.
+            with deadlines.budget("components"):
+                # Fetch rooms first (serial): primes/refreshes the auth token so
+                # the parallel wave below runs with a valid token.
+                rooms = self._decode_rooms(self.api.fetch_rooms(rental_property_id))
+                if not rooms:
+                    return '[]', '[]', []
+
+                # Build rooms JSON
+                rooms_json = json_codec.dumps([
+                    {'id': room.id, 'name': room.name} for room in rooms
+                ])
+
+                # Fan out concurrently: component categories + components for every
+                # room in a single parallel wave (was a serial call per room, which
+                # dominated the wizard's load time).
+                categories_path = "/component-categories"
+                room_paths = [
+                    "/components/by-room/%s" % urllib.parse.quote(str(room.id), safe='')
+                    for room in rooms
+                ]
+                results = self.api.parallel_get_json(
+                    [categories_path] + room_paths,
+                    streams={path: ROOM_COMPONENTS for path in room_paths},
+                )
+
+                categories = results[0]
+                categories_json = json_codec.dumps(categories) if categories else '[]'
+
+                # Transform components (main thread — pure dict work, no HTTP/ORM).
+                # Image URLs are intentionally NOT loaded here; the wizard loads a
+                # component's images lazily when its detail is opened.
+                component_data_list = []
+                for room, room_components in zip(rooms, results[1:]):
+                    for comp in room_components or []:
+                        comp_data = self._transform_component_data(comp, room.name, room.id)
+                        if comp_data:
+                            component_data_list.append(comp_data)
+
+                return rooms_json, categories_json, component_data_list
+        except core_api.CircuitOpenError as e:
+            # OneCore is known to be failing; open the wizard empty at once.
+            _logger.info(f"OneCore unavailable, skipping components: {e}")
+            return '[]', '[]', []
+        except core_api.DeadlineExceeded as e:
+            _logger.info(f"OneCore too slow, skipping components: {e}")
+            return '[]', '[]', []
         except Exception as e:
             _logger.warning(f"Failed to fetch components from OneCore: {e}")
             return '[]', '[]', []
 
+    def _decode_rooms(self, rooms):
+        """Decode room payloads, dropping (with a warning) any without an id."""
+        decoded = []
+        for room in rooms or []:
+            try:
+                decoded.append(payloads.Room.decode(room))
+            except payloads.PayloadError as e:
+                _logger.warning(f"Skipping invalid room from OneCore: {e}")
+        return decoded
+
     def _transform_component_data(self, comp, room_name, room_id):
         """Transform OneCore component data to wizard format.
 
         Args:
-            comp: Raw component data from OneCore API
+            comp: Raw component data from OneCore API (or a decoded
+                ``payloads.Component``)
             room_name: Name of the room
             room_id: ID of the room
 
         Returns:
             dict: Transformed component data for wizard line, or None if skipped
         """
-        # Extract nested data
-        model_data = comp.get('model', {}) or {}
-        subtype_data = model_data.get('subtype', {}) or {}
-        component_type_data = subtype_data.get('componentType', {}) or {}
-        category_data = component_type_data.get('category', {}) or {}
-
-        # Get installation data
-        installations = comp.get('componentInstallations', [])
-        install_date = None
-        installation_id = None
-
-        if installations:
-            # Skip components that have been uninstalled
-            if installations[0].get('deinstallationDate'):
-                return None
-
-            install_date_str = installations[0].get('installationDate')
-            if install_date_str:
-                install_date = install_date_str[:10]  # Extract YYYY-MM-DD
-            installation_id = installations[0].get('id')
+        try:
+            comp = payloads.Component.decode(comp)
+        except payloads.PayloadError as e:
+            _logger.warning(f"Skipping invalid component from OneCore: {e}")
+            return None
+
+        # Skip components that have been uninstalled
+        if comp.deinstalled:
+            return None
 
         # NOTE: image URLs are intentionally NOT fetched here — that used to
         # cost one documents-call per component and dominated the wizard's
         # load time. maintenance.component.line fetches them lazily via the
         # image_urls_json compute when a component's detail form is opened.
         return {
-            'typ': component_type_data.get('typeName'),
-            'subtype': subtype_data.get('subTypeName'),
-            'category': category_data.get('categoryName'),
-            'model': model_data.get('modelName'),
-            'manufacturer': model_data.get('manufacturer'),
-            'serial_number': comp.get('serialNumber'),
-            'warranty_months': comp.get('warrantyMonths'),
-            'specifications': comp.get('specifications'),
-            'ncs_code': comp.get('ncsCode'),
-            'additional_information': comp.get('additionalInformation'),
-            'condition': comp.get('condition'),
-            'installation_date': install_date,
+            'typ': comp.type_name,
+            'subtype': comp.subtype_name,
+            'category': comp.category_name,
+            'model': comp.model_name,
+            'manufacturer': comp.manufacturer,
+            'serial_number': comp.serial_number,
+            'warranty_months': comp.warranty_months,
+            'specifications': comp.specifications,
+            'ncs_code': comp.ncs_code,
+            'additional_information': comp.additional_information,
+            'condition': comp.condition,
+            'installation_date': comp.installation_date,
             'room_name': room_name,
             'room_id': room_id,
-            'onecore_component_id': comp.get('id'),
-            'model_id': model_data.get('id'),
-            'installation_id': installation_id,
+            'onecore_component_id': comp.id,
+            'model_id': comp.model_id,
+            'installation_id': comp.installation_id,
             # Economic fields
-            'price_at_purchase': comp.get('priceAtPurchase') or 0,
-            'depreciation_price_at_purchase': comp.get('depreciationPriceAtPurchase') or 0,
-            'economic_lifespan': comp.get('economicLifespan') or 0,
-            'technical_lifespan': subtype_data.get('technicalLifespan') or 0,
-            'replacement_interval': subtype_data.get('replacementIntervalMonths') or 0,
+            'price_at_purchase': comp.price_at_purchase,
+            'depreciation_price_at_purchase': comp.depreciation_price_at_purchase,
+            'economic_lifespan': comp.economic_lifespan,
+            'technical_lifespan': comp.technical_lifespan,
+            'replacement_interval': comp.replacement_interval,
         }
 
     def search_models(self, search_text, type_id=None, subtype_id=None):
@@ -272,6 +333,7 @@ class ComponentOneCoreService:
         Args:
             component_instance_id: The component instance ID to attach images to
             images: List of tuples (image_data, caption) where image_data is base64
+                or an ir.attachment record (see ``field_image``)
 
         Returns:
             dict: Result with 'success_count' and 'errors' list
@@ -290,7 +352,8 @@ class ComponentOneCoreService:
                 continue
 
             try:
-                self.api.upload_document(image_data, component_instance_id)
+                with self._open_image(image_data) as file_data:
+                    self.api.upload_document(file_data, component_instance_id)
                 result['success_count'] += 1
                 _logger.info(f"Successfully uploaded image '{caption}' to component {component_instance_id}")
             except Exception as e:
@@ -308,6 +371,44 @@ class ComponentOneCoreService:
 
         return result
 
+    def field_image(self, record, field_name):
+        """The image in Binary field ``field_name`` of ``record``, for
+        upload_component_images.
+
+        Returns:
+            The field's ir.attachment if it is stored as one (so the upload
+            can read it from the filestore), else the field's base64 value;
+            None if the field is empty.
+        """
+        if not record.with_context(bin_size=True)[field_name]:
+            return None
+        attachment = self.env['ir.attachment'].search([
+            ('res_model', '=', record._name),
+            ('res_field', '=', field_name),
+            ('res_id', '=', record.id),
+        ], limit=1)
+        return attachment or record[field_name]
+
+    @contextlib.contextmanager
+    def _open_image(self, image_data):
+        """Yield ``image_data`` in a form upload_document takes.
+
+        An ir.attachment kept in the local filestore is opened there, so its
+        raw bytes are streamed from disk. Other attachments (in the database,
+        or in a storage that overrides how attachments are read) give their
+        base64 ``datas``; base64 data is passed through.
+        """
+        if isinstance(image_data, models.BaseModel) and image_data._name == 'ir.attachment':
+            path = image_data.store_fname and safe_join(
+                config.filestore(image_data.env.cr.dbname), image_data.store_fname
+            )
+            if path and os.path.isfile(path):
+                with open(path, 'rb') as fileobj:
+                    yield fileobj
+                return
+            image_data = image_data.with_context(bin_size=False).datas
+        yield image_data
+
     def fetch_all_component_image_urls(self, component_instance_id):
         """Fetch all image URLs for a component instance.
 
@@ -4,8 +4,7 @@ import base64
 import datetime
 import logging
 from odoo import fields
-from ..utils.helpers import get_tenant_name, get_main_phone_number
-from ....onecore_api import core_api
+from ....onecore_api import core_api, payloads
 
 _logger = logging.getLogger(__name__)
 
@@ -311,44 +310,40 @@ class RecordManagementService:
                 )
                 return
 
+            lease = payloads.Lease.decode(lease)
             new_lease_record = self._create_lease(lease, record)
             record.lease_id = new_lease_record.id
 
-            if new_lease_record and lease.get("tenants"):
-                self._create_tenant(lease["tenants"], record)
+            if new_lease_record and lease.tenants:
+                self._create_tenant(lease.tenants, record)
 
     def _create_lease(self, lease, record):
-        """Create a lease record from API data."""
+        """Create a lease record from a ``payloads.Lease``."""
         return self.env["maintenance.lease"].create(
             {
-                "lease_id": lease["leaseId"],
-                "name": lease["leaseId"],
-                "lease_number": lease["leaseNumber"],
-                "lease_type": lease["type"],
-                "lease_start_date": lease["leaseStartDate"],
-                "lease_end_date": lease["lastDebitDate"],
-                "contract_date": lease["contractDate"],
-                "approval_date": lease["approvalDate"],
+                "lease_id": lease.lease_id,
+                "name": lease.lease_id,
+                "lease_number": lease.lease_number,
+                "lease_type": lease.type,
+                "lease_start_date": lease.start_date,
+                "lease_end_date": lease.last_debit_date,
+                "contract_date": lease.contract_date,
+                "approval_date": lease.approval_date,
             }
         )
 
     def _create_tenant(self, tenants, record):
-        """Create tenant records from API data."""
+        """Create tenant records from ``payloads.Tenant`` objects."""
         for tenant in tenants:
-            name = get_tenant_name(tenant)
-            phone_number = get_main_phone_number(tenant)
-
             recently_added_tenant_record = self.env["maintenance.tenant"].create(
                 {
-                    "name": name,
-                    "contact_code": tenant["contactCode"],
-                    "contact_key": tenant["contactKey"],
-                    "national_registration_number": tenant.get(
-                        "nationalRegistrationNumber"
-                    ),
-                    "email_address": tenant.get("emailAddress"),
-                    "phone_number": phone_number,
-                    "is_tenant": tenant["isTenant"],
+                    "name": tenant.name,
+                    "contact_code": tenant.contact_code,
+                    "contact_key": tenant.contact_key,
+                    "national_registration_number": tenant.national_registration_number,
+                    "email_address": tenant.email_address,
+                    "phone_number": tenant.phone_number,
+                    "is_tenant": tenant.is_tenant,
                 }
             )
 
@@ -10,6 +10,8 @@ import logging
 
 import filetype
 
+from ....onecore_api import tracing
+
 try:
     from PIL import Image
     HAS_PIL = True
@@ -49,6 +51,7 @@ def detect_image_mime_type(image_data):
     return DEFAULT_MIME_TYPE
 
 
+@tracing.traced("image.compress")
 def compress_image(image_base64, logger=None):
     """Compress and resize image if too large.
 
@@ -16,6 +16,8 @@ from . import test_dialog_indicator
 from . import test_master_key_change_indicator
 from . import test_maintenance_floor_plan
 from . import test_maintenance_pest_control
+from . import test_onecore_api_cache
+from . import test_onecore_api_stats
 from .handlers import test_base_handler
 from .handlers import test_handler_factory
 from .services import test_record_management_service
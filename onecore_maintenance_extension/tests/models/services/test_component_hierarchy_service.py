@@ -61,13 +61,13 @@ class TestComponentHierarchyService(TransactionCase):
             {'id': self.fake.component_type_id(), 'typeName': self.fake.component_type_name()},
             {'id': self.fake.component_type_id(), 'typeName': self.fake.component_type_name()},
         ]
-        self.mock_api.fetch_component_types.return_value = types
+        self.mock_api.iter_component_types.return_value = types
 
         cat_id = self.fake.component_category_id()
         result = service.load_types_for_category(cat_id)
 
         self.assertEqual(result, types)
-        self.mock_api.fetch_component_types.assert_called_once_with(cat_id)
+        self.mock_api.iter_component_types.assert_called_once_with(cat_id)
 
     def test_hierarchy_load_types_empty_id(self):
         """Returns empty list when no category_id provided."""
@@ -87,13 +87,13 @@ class TestComponentHierarchyService(TransactionCase):
             {'id': self.fake.component_subtype_id(), 'subTypeName': self.fake.component_subtype_name()},
             {'id': self.fake.component_subtype_id(), 'subTypeName': self.fake.component_subtype_name()},
         ]
-        self.mock_api.fetch_component_subtypes.return_value = subtypes
+        self.mock_api.iter_component_subtypes.return_value = subtypes
 
         type_id = self.fake.component_type_id()
         result = service.load_subtypes_for_type(type_id)
 
         self.assertEqual(result, subtypes)
-        self.mock_api.fetch_component_subtypes.assert_called_once_with(type_id)
+        self.mock_api.iter_component_subtypes.assert_called_once_with(type_id)
 
     def test_hierarchy_load_subtypes_empty_id(self):
         """Returns empty list when no type_id provided."""
@@ -224,8 +224,8 @@ class TestComponentHierarchyService(TransactionCase):
         subtypes = [{'id': sub_id, 'subTypeName': sub_name}]
 
         self.mock_api.fetch_component_categories.return_value = categories
-        self.mock_api.fetch_component_types.return_value = types
-        self.mock_api.fetch_component_subtypes.return_value = subtypes
+        self.mock_api.iter_component_types.return_value = types
+        self.mock_api.iter_component_subtypes.return_value = subtypes
 
         result = service.match_ai_values_to_hierarchy(cat_name, type_name, sub_name)
 
@@ -245,7 +245,7 @@ class TestComponentHierarchyService(TransactionCase):
         types = [{'id': self.fake.component_type_id(), 'typeName': type_name}]
 
         self.mock_api.fetch_component_categories.return_value = categories
-        self.mock_api.fetch_component_types.return_value = types
+        self.mock_api.iter_component_types.return_value = types
 
         result = service.match_ai_values_to_hierarchy(cat_name, 'NonExistentType', 'NonExistentSubtype')
 
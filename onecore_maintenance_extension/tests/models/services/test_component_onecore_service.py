@@ -1,17 +1,27 @@
 # -*- coding: utf-8 -*-
 """Tests for ComponentOneCoreService."""
 
+import base64
 import json
 from datetime import date
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 from odoo.tests import tagged
 from odoo.tests.common import TransactionCase
 
 from odoo.addons.onecore_maintenance_extension.models.services.component_onecore_service import (
+    ROOM_COMPONENTS,
     ComponentOneCoreService,
 )
-from odoo.addons.onecore_maintenance_extension.tests.utils.test_utils import setup_faker
+from odoo.addons.onecore_maintenance_extension.tests.utils.test_utils import (
+    create_component_wizard,
+    setup_faker,
+)
+from odoo.addons.onecore_api.core_api import CircuitOpenError
+
+SERVICE_PATH = (
+    'odoo.addons.onecore_maintenance_extension.models.services.component_onecore_service'
+)
 
 
 @tagged("onecore")
@@ -169,6 +179,12 @@ class TestComponentOneCoreService(TransactionCase):
         # calls, and image URLs are NOT fetched during load (deferred to the
         # gallery widget) — both used to dominate the wizard's load time.
         self.mock_api.parallel_get_json.assert_called_once()
+        streams = self.mock_api.parallel_get_json.call_args.kwargs['streams']
+        self.assertEqual(len(streams), 2)
+        self.assertTrue(all(
+            stream is ROOM_COMPONENTS
+            for stream in streams.values()
+        ))
         self.mock_api.fetch_component_documents.assert_not_called()
         self.assertNotIn('image_urls_json', components[0])
 
@@ -211,6 +227,19 @@ class TestComponentOneCoreService(TransactionCase):
         self.assertEqual(categories_json, '[]')
         self.assertEqual(components, [])
 
+    def test_onecore_load_components_circuit_open(self):
+        """Returns empty at once while the OneCore circuit is open."""
+        service = self._create_service()
+
+        self.mock_api.fetch_rooms.side_effect = CircuitOpenError('rooms', 30)
+
+        rooms_json, categories_json, components = service.load_components_for_residence(
+            'rental-prop-123', 'Lägenhet'
+        )
+
+        self.assertEqual((rooms_json, categories_json, components), ('[]', '[]', []))
+        self.mock_api.parallel_get_json.assert_not_called()
+
     def test_onecore_upload_images_success(self):
         """Uploads images to component successfully."""
         service = self._create_service()
@@ -253,6 +282,67 @@ class TestComponentOneCoreService(TransactionCase):
         self.assertEqual(len(result['errors']), 1)
         self.assertEqual(result['errors'][0]['caption'], caption_fail)
 
+    def test_onecore_upload_images_streams_filestore_attachments(self):
+        """A filestore attachment is handed over as an open file, not base64."""
+        service = self._create_service()
+        raw = b'\xff\xd8\xff\xe0 jpeg bytes'
+        attachment = self.env['ir.attachment'].create({
+            'name': 'bild.jpg',
+            'raw': raw,
+        })
+        sent = []
+        self.mock_api.upload_document.side_effect = (
+            lambda file_data, comp_id: sent.append(file_data.read())
+        )
+
+        result = service.upload_component_images(
+            self.fake.component_instance_id(), [(attachment, 'Bild')]
+        )
+
+        self.assertTrue(attachment.store_fname)
+        self.assertEqual(result['success_count'], 1)
+        self.assertEqual(sent, [raw])
+
+    def test_onecore_field_image_streams_from_the_filestore(self):
+        """An image field's attachment is found and uploaded from disk."""
+        service = self._create_service()
+        raw = b'\xff\xd8\xff\xe0 jpeg bytes'
+        wizard = create_component_wizard(self.env, temp_image=base64.b64encode(raw))
+        sent = []
+        self.mock_api.upload_document.side_effect = (
+            lambda file_data, comp_id: sent.append(file_data.read())
+        )
+
+        image = service.field_image(wizard, 'temp_image')
+        result = service.upload_component_images(
+            self.fake.component_instance_id(), [(image, 'Bild')]
+        )
+
+        self.assertEqual(image._name, 'ir.attachment')
+        self.assertEqual(result['success_count'], 1)
+        self.assertEqual(sent, [raw])
+        self.assertIsNone(service.field_image(wizard, 'temp_additional_image'))
+
+    def test_onecore_upload_images_reads_attachments_off_the_filestore(self):
+        """An attachment whose file is not in the local filestore is sent as
+        its base64 datas."""
+        service = self._create_service()
+        attachment = self.env['ir.attachment'].create({
+            'name': 'bild.jpg',
+            'raw': b'jpeg bytes',
+        })
+        sent = []
+        self.mock_api.upload_document.side_effect = (
+            lambda file_data, comp_id: sent.append(file_data)
+        )
+
+        with patch(f'{SERVICE_PATH}.os.path.isfile', return_value=False):
+            service.upload_component_images(
+                self.fake.component_instance_id(), [(attachment, 'Bild')]
+            )
+
+        self.assertEqual(sent, [base64.b64encode(b'jpeg bytes')])
+
     def test_onecore_upload_images_no_component_id(self):
         """Returns empty result when no component_id provided."""
         service = self._create_service()
@@ -314,6 +404,42 @@ class TestComponentOneCoreService(TransactionCase):
 
         self.assertIsNone(result)
 
+    def test_onecore_transform_skips_component_without_id(self):
+        """Components failing validation are skipped instead of failing the load."""
+        service = self._create_service()
+
+        component = {'model': {'modelName': self.fake.component_model_name()}}
+
+        result = service._transform_component_data(
+            component, self.fake.component_category_name(), self.fake.component_room_id()
+        )
+
+        self.assertIsNone(result)
+
+    def test_onecore_room_components_are_decoded_slim(self):
+        """Room components are streamed with only the fields the wizard uses."""
+        stream = ROOM_COMPONENTS
+        body = json.dumps({'content': [
+            {
+                'id': 'C1',
+                'serialNumber': 'S1',
+                'documents': [{'url': 'x'}],
+                'model': {'modelName': 'M', 'subtype': {'subTypeName': 'T', 'extra': 1}},
+                'componentInstallations': [{'id': 'I1', 'installationDate': '2024-01-15'}],
+            },
+            {
+                'id': 'C2',
+                'componentInstallations': [{'deinstallationDate': '2025-01-01'}],
+            },
+        ]}).encode()
+
+        content, _size = stream.decode([body[:50], body[50:]])
+
+        self.assertEqual(len(content), 1)
+        self.assertNotIn('documents', content[0])
+        self.assertEqual(content[0]['model'], {'modelName': 'M', 'subtype': {'subTypeName': 'T'}})
+        self.assertIsNotNone(self._create_service()._transform_component_data(content[0], 'Kök', 'ROOM1'))
+
     def test_onecore_fetch_image_urls_success(self):
         """Returns valid image URLs."""
         service = self._create_service()
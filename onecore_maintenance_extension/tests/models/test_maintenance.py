@@ -2,6 +2,9 @@ from odoo.tests.common import TransactionCase
 from odoo.tests import tagged
 from odoo.exceptions import UserError
 from datetime import date, timedelta
+from unittest.mock import Mock, patch
+
+from odoo.addons.onecore_api import core_api
 
 from ..utils.test_utils import (
     setup_faker,
@@ -12,7 +15,6 @@ from ..utils.test_utils import (
     create_property,
     create_building,
 )
-from ...models.utils.helpers import get_tenant_name, get_main_phone_number
 
 
 class FakerMixin:
@@ -191,82 +193,6 @@ class TestMaintenanceRequestUtilityMethods(FakerMixin, TransactionCase):
         self._setup_faker()
         self.internal_user = create_internal_user(self.env)
 
-    def test_get_tenant_name_with_first_last_name(self):
-        """_get_tenant_name should construct name from firstName and lastName"""
-        first_name = self.fake.first_name()
-        last_name = self.fake.last_name()
-        full_name = self.fake.tenant_full_name()
-
-        tenant_data = {
-            "firstName": first_name,
-            "lastName": last_name,
-            "fullName": full_name,
-        }
-
-        name = get_tenant_name(tenant_data)
-        self.assertEqual(name, f"{first_name} {last_name}")
-
-    def test_get_tenant_name_with_full_name_only(self):
-        """_get_tenant_name should use fullName when firstName/lastName not available"""
-        full_name = self.fake.tenant_full_name()
-        tenant_data = {"fullName": full_name}
-
-        name = get_tenant_name(tenant_data)
-        self.assertEqual(name, full_name)
-
-    def test_get_tenant_name_with_empty_data(self):
-        """_get_tenant_name should return empty string for empty data"""
-        tenant_data = {}
-
-        name = get_tenant_name(tenant_data)
-        self.assertEqual(name, "")
-
-    def test_get_main_phone_number_finds_main_number(self):
-        """_get_main_phone_number should find the phone number marked as main"""
-        phone1 = self.fake.phone_number()
-        phone2 = self.fake.phone_number()
-        phone3 = self.fake.phone_number()
-
-        tenant_data = {
-            "phoneNumbers": [
-                {"phoneNumber": phone1, "isMainNumber": 0},
-                {"phoneNumber": phone2, "isMainNumber": 1},
-                {"phoneNumber": phone3, "isMainNumber": 0},
-            ]
-        }
-
-        phone = get_main_phone_number(tenant_data)
-        self.assertEqual(phone, phone2)
-
-    def test_get_main_phone_number_no_main_number(self):
-        """_get_main_phone_number should return None when no main number exists"""
-        phone1 = self.fake.phone_number()
-        phone2 = self.fake.phone_number()
-
-        tenant_data = {
-            "phoneNumbers": [
-                {"phoneNumber": phone1, "isMainNumber": 0},
-                {"phoneNumber": phone2, "isMainNumber": 0},
-            ]
-        }
-
-        phone = get_main_phone_number(tenant_data)
-        self.assertIsNone(phone)
-
-    def test_get_main_phone_number_empty_phone_numbers(self):
-        """_get_main_phone_number should return None for empty phoneNumbers"""
-        tenant_data = {"phoneNumbers": []}
-
-        phone = get_main_phone_number(tenant_data)
-        self.assertIsNone(phone)
-
-    def test_get_main_phone_number_no_phone_numbers_key(self):
-        """_get_main_phone_number should return None when phoneNumbers key missing"""
-        tenant_data = {}
-
-        phone = get_main_phone_number(tenant_data)
-        self.assertIsNone(phone)
-
     def test_maintenance_team_domain_computation(self):
         """_compute_maintenance_team_domain should set correct user domain"""
         # Create maintenance team with specific members
@@ -280,3 +206,31 @@ class TestMaintenanceRequestUtilityMethods(FakerMixin, TransactionCase):
         # Should have correct domain
         expected_domain = [("id", "in", [self.internal_user.id])]
         self.assertEqual(request.maintenance_team_domain, expected_domain)
+
+
+MAINTENANCE_PATH = "odoo.addons.onecore_maintenance_extension.models.maintenance"
+
+
+@tagged("onecore")
+class TestMaintenanceRequestSearchTimeout(TransactionCase):
+    def test_timeout_log_leaves_the_search_value_out(self):
+        """A search out of time is logged by type and correlation id only."""
+        pnr = "199001011234"
+        request = create_maintenance_request(self.env, space_caption="Lägenhet")
+        request.search_type = "pnr"
+        request.search_value = pnr
+        handler = Mock()
+        handler.handle_search.side_effect = core_api.DeadlineExceeded("spent")
+
+        with patch(f"{MAINTENANCE_PATH}.HandlerFactory") as factory, patch(
+            f"{MAINTENANCE_PATH}.BaseMaintenanceHandler"
+        ), patch.object(type(request), "get_core_api"), self.assertLogs(
+            f"{MAINTENANCE_PATH}", level="WARNING"
+        ) as logs:
+            factory.is_combination_supported.return_value = True
+            factory.get_handler.return_value = handler
+            result = request._compute_search()
+
+        self.assertIn("warning", result)
+        self.assertIn("by pnr ran out of time", logs.output[0])
+        self.assertNotIn(pnr, "".join(logs.output))
@@ -16,6 +16,9 @@ from odoo.addons.onecore_maintenance_extension.tests.utils.test_utils import (
     create_rental_property,
     create_component_wizard,
 )
+from odoo.addons.onecore_maintenance_extension.models.services.component_onecore_service import (
+    ComponentOneCoreService,
+)
 
 WIZARD_PATH = (
     'odoo.addons.onecore_maintenance_extension.models.maintenance_component_wizard'
@@ -676,25 +679,53 @@ class TestWizardCrudAndHelpers(TransactionCase):
             form_extra_image_2=base64.b64encode(b'img4'),
         )
 
-        mock_service = Mock()
-        mock_service.upload_component_images.return_value = {
-            'success_count': 4, 'errors': []
-        }
+        service = ComponentOneCoreService(self.env)
 
-        wizard._upload_images_to_component(mock_service, 'comp-123')
+        with patch.object(
+            service, 'upload_component_images',
+            return_value={'success_count': 4, 'errors': []},
+        ) as upload:
+            wizard._upload_images_to_component(service, 'comp-123')
 
-        mock_service.upload_component_images.assert_called_once()
-        images_arg = mock_service.upload_component_images.call_args[0][1]
+        upload.assert_called_once()
+        images_arg = upload.call_args[0][1]
         self.assertEqual(len(images_arg), 4)
 
+    def test_upload_images_passes_field_attachments(self):
+        """Each image goes to the upload as its filestore attachment."""
+        wizard = create_component_wizard(
+            self.env,
+            temp_image=base64.b64encode(b'img1'),
+            form_extra_image_2=base64.b64encode(b'img4'),
+        )
+        service = ComponentOneCoreService(self.env)
+
+        with patch.object(
+            service, 'upload_component_images',
+            return_value={'success_count': 2, 'errors': []},
+        ) as upload:
+            wizard._upload_images_to_component(service, 'comp-123')
+
+        images_arg = upload.call_args[0][1]
+        self.assertEqual(
+            [caption for _image, caption in images_arg],
+            ["Huvudbild", "Extra bild 2"],
+        )
+        for image, _caption in images_arg:
+            self.assertEqual(image._name, 'ir.attachment')
+            self.assertEqual(image.res_id, wizard.id)
+            self.assertTrue(image.store_fname)
+        self.assertEqual(images_arg[0][0].raw, b'img1')
+
     def test_upload_images_skips_when_no_images(self):
         """Returns early when all image fields are empty."""
         wizard = create_component_wizard(self.env)
+        service = ComponentOneCoreService(self.env)
 
-        mock_service = Mock()
-        wizard._upload_images_to_component(mock_service, 'comp-123')
+        with patch.object(service, 'upload_component_images') as upload:
+            wizard._upload_images_to_component(service, 'comp-123')
 
-        mock_service.upload_component_images.assert_not_called()
+        upload.assert_not_called()
 
     def test_get_form_data_maps_all_fields(self):
         """Returns dict with all expected keys."""
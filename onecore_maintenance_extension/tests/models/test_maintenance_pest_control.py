@@ -1,11 +1,10 @@
-import time
 from unittest.mock import patch
 
 from odoo.tests import tagged
 from odoo.tests.common import TransactionCase
 
 from ..utils.test_utils import create_maintenance_request, create_rental_property
-from ...models import maintenance as maintenance_module
+from ....onecore_api import core_api
 
 CORE_API_PATH = "odoo.addons.onecore_api.core_api.CoreApi"
 
@@ -20,11 +19,10 @@ def _residence_payload(block_reasons):
 
 @tagged("onecore")
 class TestRequiresPestControl(TransactionCase):
-    """Pest control status is cached per rental id with a TTL."""
+    """Pest control status is read from the (cached) residence lookup."""
 
     def setUp(self):
         super().setUp()
-        maintenance_module._pest_control_cache.clear()
         self.rental_property = create_rental_property(
             self.env, rental_property_id="705-022-04-0201"
         )
@@ -58,25 +56,19 @@ class TestRequiresPestControl(TransactionCase):
         value, _ = self._read_pest_control([])
         self.assertFalse(value)
 
-    def test_result_is_cached_within_ttl(self):
-        value, fetch = self._read_pest_control(["SKADEDJUR"])
-        self.assertTrue(value)
-        with patch(CORE_API_PATH) as MockApi:
-            self.request.invalidate_recordset(["requires_pest_control"])
-            self.assertTrue(self.request.requires_pest_control)
-            MockApi.return_value.fetch_residence.assert_not_called()
-
-    def test_expired_cache_entry_is_refetched(self):
+    def test_each_read_goes_through_core_api_cache(self):
+        """No model-level cache: staleness is handled by CoreApi's SWR cache."""
         self._read_pest_control(["SKADEDJUR"])
-        maintenance_module._pest_control_cache["705-022-04-0201"] = (
-            time.monotonic() - 1,
-            True,
-        )
         value, fetch = self._read_pest_control([])
         self.assertFalse(value)
-        fetch.assert_called_once()
+        fetch.assert_called_once_with("705-022-04-0201", timeout=5)
 
-    def test_fetch_error_defaults_to_false_and_is_not_cached(self):
+    def test_fetch_error_defaults_to_false(self):
         value, _ = self._read_pest_control(side_effect=Exception("boom"))
         self.assertFalse(value)
-        self.assertNotIn("705-022-04-0201", maintenance_module._pest_control_cache)
+
+    def test_open_circuit_defaults_to_false(self):
+        value, _ = self._read_pest_control(
+            side_effect=core_api.CircuitOpenError("residences", 30)
+        )
+        self.assertFalse(value)
@@ -0,0 +1,43 @@
+import time
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+from ....onecore_api import shared_cache
+
+
+@tagged("onecore")
+class TestOneCoreApiCache(TransactionCase):
+    """The shared cache table exists and expired rows are swept by the cron."""
+
+    def _insert(self, key, expires_at):
+        self.env.cr.execute(
+            f"INSERT INTO {shared_cache.TABLE} (key, path, payload, expires_at) "
+            "VALUES (%s, %s, %s, %s)",
+            (key, "/rooms", "[]", expires_at),
+        )
+
+    def _keys(self):
+        self.env.cr.execute(f"SELECT key FROM {shared_cache.TABLE}")
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    def test_table_is_unlogged(self):
+        self.env.cr.execute(
+            "SELECT relpersistence FROM pg_class WHERE relname = %s",
+            (shared_cache.TABLE,),
+        )
+        self.assertEqual(self.env.cr.fetchone()[0], "u")
+
+    def test_gc_removes_only_expired_entries(self):
+        self._insert("expired", time.time() - 10)
+        self._insert("fresh", time.time() + 600)
+
+        self.env["onecore.api.cache"]._gc_expired_entries()
+
+        keys = self._keys()
+        self.assertNotIn("expired", keys)
+        self.assertIn("fresh", keys)
+
+    def test_cron_is_registered(self):
+        cron = self.env.ref("onecore_maintenance_extension.ir_cron_onecore_api_cache_gc")
+        self.assertEqual(cron.model_id.model, "onecore.api.cache")
@@ -0,0 +1,99 @@
+import json
+from unittest.mock import patch
+
+from odoo.tests import HttpCase, tagged
+from odoo.tests.common import TransactionCase
+
+from ....onecore_api import metrics
+
+
+def _insert(cr, worker, endpoint, requests, errors, duration_sum=1.0):
+    detail = {"responses": {"200": requests - errors, "503": errors}, "buckets": {}}
+    cr.execute(
+        f"INSERT INTO {metrics.TABLE} (worker, method, endpoint, requests, errors, "
+        "duration_sum, detail, updated_at) "
+        "VALUES (%s, 'GET', %s, %s, %s, %s, %s, now() at time zone 'utc')",
+        (worker, endpoint, requests, errors, duration_sum, json.dumps(detail)),
+    )
+
+
+@tagged("onecore")
+class TestOneCoreApiStats(TransactionCase):
+    """Workers' published OneCore metrics, added up per endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        self.env.cr.execute(f"DELETE FROM {metrics.TABLE}")
+
+    def test_table_is_unlogged(self):
+        self.env.cr.execute(
+            "SELECT relpersistence FROM pg_class WHERE relname = %s",
+            (metrics.TABLE,),
+        )
+        self.assertEqual(self.env.cr.fetchone()[0], "u")
+
+    def test_view_adds_up_workers(self):
+        _insert(self.env.cr, "host:1", "/rooms", 10, 1)
+        _insert(self.env.cr, "host:2", "/rooms", 30, 3)
+        _insert(self.env.cr, "host:1", "/leases/by-pnr/{id}", 5, 0)
+
+        stats = self.env["onecore.api.stats"].search([("endpoint", "=", "/rooms")])
+
+        self.assertEqual(stats.workers, 2)
+        self.assertEqual(stats.requests, 40)
+        self.assertEqual(stats.errors, 4)
+        self.assertAlmostEqual(stats.error_rate, 10.0)
+        self.assertAlmostEqual(stats.avg_ms, 50.0)
+
+    def test_prometheus_text(self):
+        _insert(self.env.cr, "host:1", "/rooms", 10, 1)
+        _insert(self.env.cr, "host:2", "/rooms", 30, 3)
+
+        text = self.env["onecore.api.stats"]._prometheus_text()
+
+        self.assertIn(
+            'onecore_requests_total{method="GET",endpoint="/rooms",outcome="503"} 4',
+            text,
+        )
+
+    def test_gc_removes_only_stale_workers(self):
+        _insert(self.env.cr, "host:1", "/rooms", 1, 0)
+        _insert(self.env.cr, "host:2", "/rooms", 1, 0)
+        self.env.cr.execute(
+            f"UPDATE {metrics.TABLE} SET updated_at = updated_at - interval '2 days' "
+            "WHERE worker = 'host:1'"
+        )
+
+        with patch.object(metrics, "maybe_publish") as maybe_publish:
+            self.env["onecore.api.stats"]._gc_stale_workers()
+
+        self.env.cr.execute(f"SELECT worker FROM {metrics.TABLE}")
+        self.assertEqual([row[0] for row in self.env.cr.fetchall()], ["host:2"])
+        # The cron also publishes its own worker's counters.
+        maybe_publish.assert_called_once_with(self.env.cr.dbname)
+
+    def test_cron_is_registered(self):
+        cron = self.env.ref("onecore_maintenance_extension.ir_cron_onecore_api_stats_gc")
+        self.assertEqual(cron.model_id.model, "onecore.api.stats")
+
+
+@tagged("onecore", "post_install", "-at_install")
+class TestOneCoreMetricsRoute(HttpCase):
+    """/onecore/metrics is only served with the configured token."""
+
+    def test_not_found_without_a_token(self):
+        self.env["ir.config_parameter"].sudo().set_param("onecore_metrics_token", "")
+
+        self.assertEqual(self.url_open("/onecore/metrics").status_code, 404)
+
+    def test_requires_the_token(self):
+        self.env["ir.config_parameter"].sudo().set_param("onecore_metrics_token", "s3cret")
+
+        refused = self.url_open("/onecore/metrics", headers={"Authorization": "Bearer x"})
+        served = self.url_open(
+            "/onecore/metrics", headers={"Authorization": "Bearer s3cret"}
+        )
+
+        self.assertEqual(refused.status_code, 401)
+        self.assertEqual(served.status_code, 200)
+        self.assertIn("# TYPE onecore_requests_total counter", served.text)